@@ -0,0 +1,81 @@
+"""
+Smoothing of legacy hair strands with degree 2 B-splines, in strands per
+second: evaluate_bsplines() with NumPy and with the pure Python fallback,
+against the former recursive basis evaluation kept in tests/test_hair.py,
+at render steps 2 and 4.
+"""
+
+import random
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+from test_hair import legacy_smooth
+
+from luxrender.export import hair
+from luxrender.export.meshdata import numpy
+
+RENDER_STEPS = (2, 4)
+STRAND_COUNT = 20000
+
+# The recursive evaluation is slow, it smooths fewer strands
+RECURSIVE_STRAND_COUNT = 500
+
+
+def make_strands(count, steps, seed=0):
+    """
+    Strands of steps points, like handler_Duplis_PATH gathers them, a few with points dropped at the origin
+    """
+    rng = random.Random(seed)
+    strands = []
+
+    for s in range(count):
+        points = [tuple(rng.uniform(-1.0, 1.0) for c in range(3)) for step in range(steps)]
+        if rng.random() < 0.1:
+            del points[rng.randrange(steps)]
+        strands.append(points)
+
+    return strands
+
+
+def evaluate(strands, steps, use_numpy):
+    """
+    evaluate_bsplines() with or without NumPy, basis matrices included
+    """
+    module_numpy = hair.numpy
+    hair.numpy = module_numpy if use_numpy else None
+    hair._basis_cache = {}
+
+    try:
+        hair.evaluate_bsplines(strands, 2, steps)
+    finally:
+        hair.numpy = module_numpy
+
+
+def benchmark(args):
+    results = {}
+
+    for render_step in RENDER_STEPS:
+        steps = 2 ** render_step
+        strands = make_strands(STRAND_COUNT, steps)
+        reference = strands[:RECURSIVE_STRAND_COUNT]
+        case = {}
+
+        case['recursive_strands_per_second'] = len(reference) / best_time(
+            lambda: [legacy_smooth(points, render_step) for points in reference], args.repeat)
+
+        case['python_strands_per_second'] = len(strands) / best_time(
+            lambda: evaluate(strands, steps, False), args.repeat)
+
+        if numpy is not None:
+            case['numpy_strands_per_second'] = len(strands) / best_time(
+                lambda: evaluate(strands, steps, True), args.repeat)
+
+        results['bspline_render_step_%d' % render_step] = case
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
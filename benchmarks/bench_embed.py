@@ -0,0 +1,92 @@
+"""
+Embedding file data: bEncoder throughput in MB/s of input with one worker
+and with a worker per CPU, the peak of memory allocated while encoding a
+file to a file, and 40 references of one texture with and without the
+bEncodeCache of an export.
+"""
+
+import contextlib, os, random, shutil, tempfile, tracemalloc
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+from luxrender import util
+
+SIZES_MB = (16, 512)
+
+# Materials referencing the same texture
+REFERENCES = 40
+
+
+def write_file(path, megabytes, seed=0):
+    """
+    File of text-like data with random runs, written one megabyte at a time
+    """
+    rng = random.Random(seed)
+    words = [rng.getrandbits(48).to_bytes(6, 'little') + b' ' for k in range(300)]
+
+    with open(path, 'wb') as data_file:
+        for k in range(megabytes):
+            chunk = bytearray()
+            while len(chunk) < 1024 * 1024:
+                chunk += rng.getrandbits(8 * 64).to_bytes(64, 'little') if rng.random() < 0.1 else rng.choice(words)
+            data_file.write(chunk[:1024 * 1024])
+
+
+def peak_memory_mb(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def encode_cases(source, encoded, repeat):
+    results = {}
+    workers = os.cpu_count() or 1
+
+    for megabytes in SIZES_MB:
+        write_file(source, megabytes)
+        case = {'workers': workers}
+
+        for name, count in (('serial', 1), ('parallel', workers)):
+            encoder = util.bEncoder(9, count)
+            # Large files are encoded once per measurement
+            case['%s_mb_s' % name] = megabytes / best_time(lambda: encoder.Encode_File2File(source, encoded),
+                                                           repeat if megabytes <= 64 else 1)
+
+        case['peak_memory_mb'] = peak_memory_mb(lambda: util.bEncoder(9, workers).Encode_File2File(source, encoded))
+        results['encode_%d_mb' % megabytes] = case
+
+    write_file(source, SIZES_MB[0])
+
+    def cached():
+        cache = util.bEncodeCache()
+        for k in range(REFERENCES):
+            cache.encode_lines(source)
+
+    results['references_%d' % REFERENCES] = {
+        'uncached_seconds': best_time(
+            lambda: [util.bencode_file2string_with_size(source) for k in range(REFERENCES)], 1),
+        'cached_seconds': best_time(cached, repeat),
+    }
+
+    return results
+
+
+def benchmark(args):
+    directory = tempfile.mkdtemp()
+
+    # Hide the log line of every encoded file
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            return encode_cases(os.path.join(directory, 'texture.bin'), os.path.join(directory, 'texture.b64'),
+                                args.repeat)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
@@ -0,0 +1,141 @@
+"""
+Whole scene exports outside of Blender: synthetic scenes of grid meshes, a
+sun lamp and a particle system go through the classic SceneExporter (FILE
+API) and the LuxCoreExporter, with recording pylux and pyluxcore modules.
+Records the time of each export phase, the peak of memory allocated from
+Python and the bytes written or properties set.
+"""
+
+import contextlib, json, os, shutil, tempfile, time, tracemalloc
+
+from common import install_stubs, run
+
+install_stubs()
+
+import bpy
+
+from blender_stubs import Data, Stub
+from scenes import make_render_scene
+
+from luxrender.export.luxcore import LuxCoreExporter
+from luxrender.export.scene import SceneExporter
+from luxrender.outputs import LuxManager
+
+# (objects, particles) of each benchmark scene
+SCENE_SIZES = ((20, 200), (100, 1000))
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(path, name))
+               for path, dirs, files in os.walk(directory) for name in files)
+
+
+def use_scene(scene):
+    bpy.context.scene = scene
+    LuxManager.CurrentScene = scene
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Hide the export log, which would dominate the timings of small scenes
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure_memory(function):
+    """
+    Call function, return its result and the peak of memory allocated from Python in megabytes
+    """
+    tracemalloc.start()
+    try:
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return result, peak / 1e6
+
+
+def export_classic(scene, directory):
+    """
+    One classic export to the FILE API, returns {measurement: value}
+    """
+    use_scene(scene)
+    LuxManager.SetActive(None)
+
+    properties = Data('properties', filename='scene', directory=directory, api_type='FILE',
+                      write_files=True, write_all_files=True)
+    exporter = SceneExporter().set_properties(properties).set_scene(scene)
+
+    start = time.perf_counter()
+    status, peak = measure_memory(exporter.export)
+    total = time.perf_counter() - start
+
+    if status != {'FINISHED'}:
+        raise RuntimeError('Classic export failed: %s' % status)
+
+    measurements = dict(('%s_seconds' % phase, seconds) for phase, seconds in exporter.phase_times.items())
+    measurements.update(total_seconds=total, peak_memory_mb=peak, written_bytes=directory_size(directory))
+    return measurements
+
+
+def export_luxcore(scene, directory):
+    """
+    One LuxCore conversion into recording pyluxcore objects, returns {measurement: value}
+    """
+    use_scene(scene)
+    scene.luxrender_testing.profile_export = True
+    scene.render.filepath = directory
+
+    exporter = LuxCoreExporter(scene, Stub('engine'))
+
+    start = time.perf_counter()
+    config, peak = measure_memory(lambda: exporter.convert(640, 480))
+    total = time.perf_counter() - start
+
+    with open(os.path.join(directory, '%s_profile.json' % scene.name)) as profile_file:
+        scopes = json.load(profile_file)['scopes']
+
+    measurements = dict(('%s_seconds' % path, entry['total']) for path, entry in scopes.items() if '/' not in path)
+    measurements.update(total_seconds=total, peak_memory_mb=peak,
+                        properties=len(config.GetScene().props) + len(config.GetProperties()))
+    return measurements
+
+
+def best_export(export, object_count, particle_count, repeat):
+    """
+    Run export on fresh scenes, keep the measurements of the fastest run
+    """
+    best = None
+
+    for i in range(repeat):
+        scene = make_render_scene(object_count, particle_count=particle_count)
+        directory = tempfile.mkdtemp(prefix='luxrender_benchmark_')
+
+        try:
+            with quiet():
+                measurements = export(scene, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        if best is None or measurements['total_seconds'] < best['total_seconds']:
+            best = measurements
+
+    return best
+
+
+def benchmark(args):
+    results = {}
+
+    for object_count, particle_count in SCENE_SIZES:
+        for name, export in (('classic', export_classic), ('luxcore', export_luxcore)):
+            case = '%s_%d_objects_%d_particles' % (name, object_count, particle_count)
+            results[case] = best_export(export, object_count, particle_count, args.repeat)
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
@@ -0,0 +1,93 @@
+"""
+Writing scene files through the FILE API context: wall time and write
+system calls of BufferedFile, against the former write() and flush() of
+every line.
+"""
+
+import os, shutil, tempfile, time
+
+from common import install_stubs, run
+
+install_stubs()
+
+from luxrender.outputs import file_api
+
+LINE = '\t"point P" [0.123456 1.234567 2.345678 3.456789 4.567890 5.678901]'
+
+
+def write_syscalls():
+    """
+    Write system calls of this process so far, None where /proc/self/io is not available
+    """
+    try:
+        with open('/proc/self/io') as io_file:
+            for line in io_file:
+                if line.startswith('syscw:'):
+                    return int(line.split()[1])
+    except EnvironmentError:
+        pass
+
+    return None
+
+
+def write_lines_unbuffered(path, line_count):
+    with open(path, 'w') as f:
+        for k in range(line_count):
+            f.write('%s\n' % LINE)
+            f.flush()
+
+
+def write_lines_buffered(path, line_count):
+    context = file_api.Custom_Context('benchmark')
+    context.files = [file_api.BufferedFile(path)]
+
+    for k in range(line_count):
+        context.wf(file_api.Files.MAIN, LINE)
+
+    context.close_files()
+
+
+def measure(write_lines, path, line_count, repeat):
+    best = None
+
+    for i in range(repeat):
+        syscalls = write_syscalls()
+        start = time.perf_counter()
+        write_lines(path, line_count)
+        elapsed = time.perf_counter() - start
+
+        if syscalls is not None:
+            syscalls = write_syscalls() - syscalls
+
+        if best is None or elapsed < best[0]:
+            best = (elapsed, syscalls)
+
+    return best
+
+
+def benchmark(args):
+    results = {}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.lxo')
+
+    try:
+        for line_count in (10000, 500000):
+            case = {'megabytes': line_count * (len(LINE) + 1) / 1e6}
+
+            for name, write_lines in (('per_line_flush', write_lines_unbuffered),
+                                      ('buffered', write_lines_buffered)):
+                elapsed, syscalls = measure(write_lines, path, line_count, args.repeat)
+                case['%s_seconds' % name] = elapsed
+
+                if syscalls is not None:
+                    case['%s_write_syscalls' % name] = syscalls
+
+            results['scene_file_%d_lines' % line_count] = case
+    finally:
+        shutil.rmtree(directory)
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
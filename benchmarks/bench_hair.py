@@ -0,0 +1,75 @@
+"""
+Binary hair export of one million strands: time of build_hair() and
+write_hair_file() with NumPy and with the pure Python fallback, for strands
+with thickness, vertex colours and UVs like handler_Duplis_PATH gathers them.
+"""
+
+import os, random, shutil, tempfile
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+from blender_stubs import Matrix
+
+from luxrender.export import hair
+from luxrender.export.meshdata import numpy
+
+STRAND_COUNTS = (1000000,)
+
+# Points per strand, 2 ** render_step with the default render step of 2
+STEPS = 4
+
+
+def make_strands(count, seed=0):
+    """
+    Flat lists of the world space coordinates of all strand steps, and of the colour and UV of each strand
+    """
+    if numpy is not None:
+        rng = numpy.random.RandomState(seed)
+        return (rng.uniform(-1.0, 1.0, count * STEPS * 3).tolist(), rng.uniform(0.0, 1.0, count * 3).tolist(),
+                rng.uniform(0.0, 1.0, count * 2).tolist())
+
+    rng = random.Random(seed)
+    return ([rng.uniform(-1.0, 1.0) for i in range(count * STEPS * 3)], [rng.random() for i in range(count * 3)],
+            [rng.random() for i in range(count * 2)])
+
+
+def benchmark(args):
+    results = {}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.hair')
+
+    transform = Matrix.Translation((1.0, 2.0, 3.0)).inverted()
+    widths = hair.step_thickness(STEPS, 1.0, 0.1, 0.2)
+
+    variants = [('python', hair.build_hair_python)]
+    if numpy is not None:
+        variants.append(('numpy', hair.build_hair_numpy))
+
+    try:
+        for count in STRAND_COUNTS:
+            coords, colors, uvs = make_strands(count)
+            case = {}
+
+            for name, build_hair in variants:
+                def build():
+                    return build_hair(coords, STEPS, transform, widths, colors, uvs)
+
+                data = build()
+                case['%s_build_seconds' % name] = best_time(build, args.repeat)
+                case['%s_write_seconds' % name] = best_time(
+                    lambda: hair.write_hair_file(path, data, STEPS, 0.001), args.repeat)
+
+                del data
+
+            case['file_mb'] = os.path.getsize(path) / 1e6
+            results['hair_%d_strands' % count] = case
+    finally:
+        shutil.rmtree(directory)
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
@@ -0,0 +1,88 @@
+"""
+Writing static object instances with the FILE API context: time and file
+size of InstanceBatches, against the former AttributeBegin block with
+Transform, NamedMaterial, Exterior and ObjectInstance of every instance.
+"""
+
+import os, random, shutil, tempfile
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+from luxrender.export.instances import InstanceBatches
+from luxrender.outputs import file_api
+
+PROTOTYPES = ['ParticleMesh_%d_m000' % k for k in range(4)]
+MATERIALS = ['Red', 'Green']
+
+
+def random_instances(count, seed=0):
+    """
+    (prototype, material, transform) of count instances
+    """
+    rng = random.Random(seed)
+    instances = []
+
+    for i in range(count):
+        transform = [rng.uniform(-1.0, 1.0) for k in range(12)] + [rng.uniform(-50.0, 50.0) for k in range(3)] + [1.0]
+        instances.append((rng.choice(PROTOTYPES), rng.choice(MATERIALS), transform))
+
+    return instances
+
+
+def open_context(path):
+    context = file_api.Custom_Context('benchmark')
+    context.files = [file_api.BufferedFile(path)]
+    context.set_output_file(file_api.Files.MAIN)
+    return context
+
+
+def write_per_instance(path, instances):
+    context = open_context(path)
+
+    for prototype, material, transform in instances:
+        context.attributeBegin(comment='Emitter')
+        context.transform(transform)
+        context.namedMaterial(material)
+        context.exterior('world')
+        context.objectInstance(prototype)
+        context.attributeEnd()
+
+    context.close_files()
+
+
+def write_batched(path, instances):
+    context = open_context(path)
+    batches = InstanceBatches()
+
+    for prototype, material, transform in instances:
+        batches.add(prototype, material, None, 'world', transform)
+
+    batches.write(context)
+    context.close_files()
+
+
+def benchmark(args):
+    results = {}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.lxo')
+
+    try:
+        for count in (10000, 200000):
+            instances = random_instances(count)
+            case = {}
+
+            for name, write in (('per_instance', write_per_instance), ('batched', write_batched)):
+                case['%s_seconds' % name] = best_time(lambda: write(path, instances), args.repeat)
+                case['%s_bytes' % name] = os.path.getsize(path)
+
+            results['instances_%d' % count] = case
+    finally:
+        shutil.rmtree(directory)
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
@@ -0,0 +1,93 @@
+"""
+Converting duplis with the LuxCore exporter and the recording pyluxcore:
+time of a scene export whose particles or dupliverts are converted as
+instances of one prototype per object, against one ObjectExporter per dupli,
+and the number of ObjectExporters each conversion creates.
+"""
+
+import contextlib, os, random
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+import bpy
+
+from blender_stubs import Data, Matrix, Stub
+from scenes import make_mesh, make_mesh_object, make_render_scene
+
+from luxrender.export.luxcore import LuxCoreExporter, duplis
+from luxrender.outputs import LuxManager
+
+PARTICLE_COUNTS = (1000, 10000)
+DUPLI_VERT_COUNTS = (20000,)
+
+
+def add_dupli_verts(scene, count, seed=0):
+    """
+    Host object duplicating a child object on count vertices
+    """
+    rng = random.Random(seed)
+    child = make_mesh_object(make_mesh('Child', rows=2, columns=2, materials=1), 'Child',
+                             layers=[False] * 19 + [True], users_group=[])
+    host = make_mesh_object(make_mesh('Host', rows=1, columns=1, materials=1), 'Host')
+    dupli_list = [Data('dupli', object=child, matrix=Matrix.Translation([rng.uniform(-50.0, 50.0) for k in range(3)]))
+                  for i in range(count)]
+
+    def dupli_list_create(scene, settings='RENDER'):
+        host.dupli_list = dupli_list
+
+    host.__dict__.update(is_duplicator=True, dupli_type='VERTS', dupli_list=[], dupli_list_create=dupli_list_create,
+                         dupli_list_clear=lambda: None)
+    scene.objects.extend([child, host])
+    return scene
+
+
+class CountingObjectExporter(duplis.ObjectExporter):
+    count = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingObjectExporter.count += 1
+        super().__init__(*args, **kwargs)
+
+
+def export_case(scene, repeat):
+    bpy.context.scene = scene
+    LuxManager.CurrentScene = scene
+    case = {}
+
+    for name, is_instanceable in (('per_dupli', lambda obj: False), ('batched', duplis.is_instanceable)):
+        duplis.is_instanceable = is_instanceable
+        CountingObjectExporter.count = 0
+
+        def export():
+            LuxCoreExporter(scene, Stub('engine')).convert(64, 48)
+
+        case['%s_seconds' % name] = best_time(export, repeat)
+        case['%s_exporters' % name] = CountingObjectExporter.count // repeat
+
+    return case
+
+
+def benchmark(args):
+    LuxManager.ActiveManager = None
+    duplis.ObjectExporter = CountingObjectExporter
+    instanceable = duplis.is_instanceable
+    results = {}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            for count in PARTICLE_COUNTS:
+                results['particles_%d' % count] = export_case(make_render_scene(1, particle_count=count), args.repeat)
+
+            for count in DUPLI_VERT_COUNTS:
+                results['dupliverts_%d' % count] = export_case(add_dupli_verts(make_render_scene(1), count),
+                                                               args.repeat)
+        finally:
+            duplis.is_instanceable = instanceable
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
@@ -0,0 +1,48 @@
+"""
+Formatting speed and output size of ParamSet float arrays for each number
+precision policy, against the legacy '%0.15f' formatting.
+"""
+
+import array, random
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+import bpy
+
+from luxrender.export import ParamSetItem
+from luxrender.outputs import LuxManager
+
+from blender_stubs import Data
+
+
+def benchmark(args):
+    rng = random.Random(0)
+    values = list(array.array('f', [rng.uniform(-100.0, 100.0) for k in range(300000)]))
+
+    scene = Data('Scene', name='Scene', luxrender_engine=Data('luxrender_engine', float_precision='AUTO'))
+    bpy.context.scene = scene
+    LuxManager.CurrentScene = scene
+
+    results = {}
+
+    for policy in ('FIXED', 'DOUBLE', 'AUTO'):
+        scene.luxrender_engine.float_precision = policy
+        item = ParamSetItem('point', 'P', values)
+
+        seconds = best_time(item.to_string, args.repeat)
+        results['point_array_%s' % policy.lower()] = {
+            'seconds': seconds,
+            'values_per_second': len(values) / seconds,
+            'bytes': len(item.to_string()),
+        }
+
+    legacy = best_time(lambda: ' '.join(['%0.15f' % v for v in values]), args.repeat)
+    results['legacy_format'] = {'seconds': legacy, 'values_per_second': len(values) / legacy}
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
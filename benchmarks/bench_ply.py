@@ -0,0 +1,62 @@
+"""
+Throughput of the binary PLY packers and writer, in MB/s of file data.
+"""
+
+import os, random, shutil, tempfile
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+from luxrender.export import ply
+from luxrender.export.meshdata import numpy
+
+
+def make_mesh(vertex_count, seed=0):
+    rng = random.Random(seed)
+    vertices = [((rng.random(), rng.random(), rng.random()), (0.0, 0.0, 1.0), (rng.random(), rng.random()))
+                for k in range(vertex_count)]
+    faces = [[rng.randrange(vertex_count) for i in range(4)] for k in range(vertex_count)]
+    return vertices, faces
+
+
+def benchmark(args):
+    results = {}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.ply')
+
+    try:
+        for vertex_count in (10000, 200000):
+            vertices, faces = make_mesh(vertex_count)
+            vertex_data = ply.pack_vertices(vertices, uv=True)
+            face_data = ply.pack_faces(faces)
+            megabytes = (len(vertex_data) + len(face_data)) / 1e6
+
+            case = {'megabytes': megabytes}
+
+            case['pack_lists_mb_s'] = megabytes / best_time(
+                lambda: (ply.pack_vertices(vertices, uv=True), ply.pack_faces(faces)), args.repeat)
+
+            if numpy is not None:
+                columns = list(zip(*vertices))
+                co, no, uv = [numpy.array(c, dtype=numpy.float32) for c in columns]
+                face_sides = numpy.full(vertex_count, 4, dtype=numpy.uint8)
+                face_indices = numpy.array(faces, dtype=numpy.uint32)
+
+                case['pack_arrays_mb_s'] = megabytes / best_time(
+                    lambda: (ply.pack_vertex_arrays(co, no, uv), ply.pack_face_arrays(face_sides, face_indices)),
+                    args.repeat)
+
+            case['write_mb_s'] = megabytes / best_time(
+                lambda: ply.write_ply(path, vertex_count, vertex_count, vertex_data, face_data, uv=True),
+                args.repeat)
+
+            results['ply_%d_vertices' % vertex_count] = case
+    finally:
+        shutil.rmtree(directory)
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
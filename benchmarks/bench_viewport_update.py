@@ -0,0 +1,115 @@
+"""
+Latency of the viewport update check on scenes of 10k objects: the time
+find_update_changes() takes when nothing was edited, and when a texture, a
+material or a mesh shared by several objects was edited, including the
+conversion of the volumes it decides on, and the number of materials,
+objects and volumes it finds to convert. Elements are converted by the
+stand-in exporters of the test suite, so the times are those of the update
+check and the dependency index.
+"""
+
+import contextlib, os, random
+
+from common import best_time, install_stubs, run
+
+install_stubs()
+
+import bpy
+
+from blender_stubs import Collection, Data, Stub
+from scenes import make_dependency_scene, use_dependency_exporters
+
+from luxrender import core
+from luxrender.export.luxcore import LuxCoreExporter, fingerprints
+from luxrender.outputs import LuxManager
+
+# (objects, materials, textures, volumes) of each benchmark scene
+SCENE_SIZES = ((10000, 500, 1000, 20),)
+
+
+def set_data(scene):
+    for name, items in (('objects', scene.objects), ('materials', scene.materials), ('textures', scene.textures)):
+        setattr(bpy.data, name, Collection(items, is_updated=any(item.is_updated for item in items)))
+
+
+def start_viewport(scene):
+    """
+    Engine with a viewport session of scene, as after the first update
+    """
+    bpy.context.scene = scene
+    LuxManager.CurrentScene = scene
+
+    engine = core.RENDERENGINE_luxrender()
+    engine.camera_fingerprint_changed = lambda context: False
+    engine.viewFilmWidth, engine.viewFilmHeight = 640, 480
+
+    context = Data('context', scene=scene, visible_objects=list(scene.objects),
+                   region=Data('region', width=640, height=480))
+
+    exporter = LuxCoreExporter(scene, engine, True, context)
+    luxcore_scene = Data('luxcore_scene')
+    for obj in scene.objects:
+        exporter.convert_object(obj, luxcore_scene)
+    exporter.pop_updated_scene_properties()
+
+    engine.luxcore_exporter = exporter
+    engine.lastRenderFingerprint = 'config'
+
+    set_data(scene)
+    engine.find_update_changes(context)
+    return engine, context
+
+
+def update_case(engine, context, scene, datablocks, repeat):
+    for datablock in datablocks:
+        datablock.is_updated = True
+
+    set_data(scene)
+    seconds = best_time(lambda: engine.find_update_changes(context), repeat)
+    changes = engine.find_update_changes(context)
+
+    for datablock in datablocks:
+        datablock.is_updated = False
+
+    return {'seconds': seconds, 'materials': len(changes.changed_materials),
+            'objects': len(changes.changed_objects_mesh), 'volumes': len(changes.changed_volumes)}
+
+
+def benchmark(args):
+    use_dependency_exporters(setattr)
+    fingerprints.config_fingerprint = lambda *args: 'config'
+    fingerprints.volume_fingerprint = lambda volume: volume.settings
+    core.RENDERENGINE_luxrender.viewport_render_active = True
+    core.RENDERENGINE_luxrender.luxcore_session = Stub('session')
+
+    results = {}
+
+    for objects, materials, textures, volumes in SCENE_SIZES:
+        scene = make_dependency_scene(objects, materials, textures, volumes, lamp_count=10)
+        rng = random.Random(0)
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            engine, context = start_viewport(scene)
+
+            mesh = max(scene.meshes, key=lambda m: sum(1 for obj in scene.objects if obj.data is m))
+            editor = [obj for obj in scene.objects if obj.data is mesh][0]
+
+            used_materials = sorted({mat for obj in scene.objects for mat in obj.materials}, key=lambda m: m.name)
+            used_textures = sorted({tex for mat in used_materials for tex in mat.textures}, key=lambda t: t.name)
+
+            cases = {
+                'idle': [],
+                'texture_edit': [rng.choice(used_textures)],
+                'material_edit': [rng.choice(used_materials)],
+                'mesh_edit': [mesh, editor],
+            }
+
+            for name, datablocks in cases.items():
+                results['%s_%d_objects' % (name, objects)] = update_case(engine, context, scene, datablocks,
+                                                                         args.repeat)
+
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
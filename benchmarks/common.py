@@ -0,0 +1,84 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Shared helpers of the headless benchmarks. Each benchmark script builds a
+dict of {case: {measurement: value}}, prints it and optionally writes it as
+JSON (--json PATH), which compare.py checks against a baseline.
+"""
+
+import argparse, json, os, sys, time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_DIR = os.path.join(ROOT_DIR, 'tests')
+
+
+def install_stubs():
+    """
+    Import the add-on modules outside of Blender, with the stand-ins of the test suite
+    """
+    if TESTS_DIR not in sys.path:
+        sys.path.insert(0, TESTS_DIR)
+
+    import blender_stubs
+    return blender_stubs.install()
+
+
+def best_time(function, repeat=5):
+    """
+    Shortest wall time of repeat calls of function, in seconds
+    """
+    times = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def run(description, benchmark):
+    """
+    Command line entry point: benchmark(args) returns the results dict
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement, the best one is kept')
+    args = parser.parse_args()
+
+    results = benchmark(args)
+
+    for case, measurements in sorted(results.items()):
+        print('%s:' % case)
+        for name, value in sorted(measurements.items()):
+            print('    %-24s %s' % (name, '%.4f' % value if isinstance(value, float) else value))
+
+    if args.json:
+        with open(args.json, 'w') as result_file:
+            json.dump(results, result_file, indent=2, sort_keys=True)
+
+    return results
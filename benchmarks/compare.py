@@ -0,0 +1,90 @@
+"""
+Compare benchmark results with a baseline:
+
+    python bench_export.py --json result.json
+    python compare.py baseline.json result.json
+
+Exits with status 1 when a measurement is more than --tolerance (a fraction)
+worse than in the baseline. Throughputs (*_mb_s, *_per_second) are worse
+when lower; times, memory, sizes and system calls are worse when higher.
+Other measurements, like the size of the benchmark scene, are not compared.
+"""
+
+import argparse, json, sys
+
+HIGHER_IS_BETTER = ('_mb_s', '_per_second')
+LOWER_IS_BETTER = ('seconds', '_mb', '_bytes', '_syscalls')
+
+# Times which differ by less than this many seconds are never regressions
+TIME_NOISE = 0.01
+
+
+def direction(measurement):
+    """
+    1 when higher values are better, -1 when lower values are better, 0 when not compared
+    """
+    if measurement.endswith(HIGHER_IS_BETTER):
+        return 1
+    if measurement.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(baseline, result, tolerance, time_noise=TIME_NOISE):
+    """
+    Return a message for each measurement of result which is more than
+    tolerance worse than in baseline. Cases or measurements missing from
+    either side are skipped.
+    """
+    regressions = []
+
+    for case, measurements in sorted(result.items()):
+        base_measurements = baseline.get(case, {})
+
+        for measurement, value in sorted(measurements.items()):
+            base = base_measurements.get(measurement)
+            better = direction(measurement)
+
+            if base is None or better == 0:
+                continue
+
+            if better > 0:
+                worse = value < base * (1.0 - tolerance)
+            else:
+                worse = value > base * (1.0 + tolerance)
+                if measurement.endswith('seconds'):
+                    worse = worse and value - base > time_noise
+
+            if worse:
+                regressions.append('%s %s: %g, baseline %g' % (case, measurement, value, base))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline', help='JSON results to compare with')
+    parser.add_argument('result', help='JSON results of the current tree')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative change, default 0.25')
+    parser.add_argument('--time-noise', type=float, default=TIME_NOISE,
+                        help='time differences below this many seconds are ignored, default %g' % TIME_NOISE)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.result) as result_file:
+        result = json.load(result_file)
+
+    regressions = compare(baseline, result, args.tolerance, args.time_noise)
+
+    for regression in regressions:
+        print('REGRESSION %s' % regression)
+
+    if not regressions:
+        print('No regressions in %d cases' % len(result))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
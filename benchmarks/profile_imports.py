@@ -0,0 +1,113 @@
+"""
+Import time of the add-on with the Blender stand-ins: the time to load the
+core package, as Blender does when the add-on is enabled, then to load the
+interface panels deferred to the first selection of the render engine and
+the bindings deferred to the first render or export. Lists the add-on
+modules with the highest own import time.
+
+Modules are imported once per process, so --repeat does not apply.
+"""
+
+import importlib.abc, importlib.machinery, sys, time
+
+from common import install_stubs, run
+
+# Modules listed in the results
+TOP_MODULES = 20
+
+
+class TimedLoader(importlib.abc.Loader):
+    def __init__(self, profile, name, loader):
+        self.profile = profile
+        self.name = name
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        profile = self.profile
+        profile.stack.append(0.0)
+        start = time.perf_counter()
+
+        try:
+            self.loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = profile.stack.pop()
+            profile.modules[self.name] = (cumulative, cumulative - nested)
+
+            if profile.stack:
+                profile.stack[-1] += cumulative
+
+
+class ImportProfile(importlib.abc.MetaPathFinder):
+    """
+    Records the cumulative and own import time of every add-on module, in seconds
+    """
+
+    def __init__(self):
+        self.modules = {}  # {name: (cumulative, own)}
+        self.stack = []
+
+    def find_spec(self, name, path, target=None):
+        if not name.startswith('luxrender.'):
+            return None
+
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if spec is not None and spec.loader is not None:
+            spec.loader = TimedLoader(self, name, spec.loader)
+
+        return spec
+
+    def phase(self, function):
+        """
+        Call function, returns {measurement: value} of the modules it imported
+        """
+        before = set(self.modules)
+        start = time.perf_counter()
+        function()
+
+        return {'seconds': time.perf_counter() - start, 'modules': len(set(self.modules) - before)}
+
+
+def benchmark(args):
+    luxrender = install_stubs()
+    profile = ImportProfile()
+    sys.meta_path.insert(0, profile)
+
+    results = {}
+
+    def load_addon():
+        # Like the add-on's __init__.py, which the stand-ins do not run
+        framework = importlib.import_module('luxrender.extensions_framework')
+        luxrender.LuxRenderAddon = framework.Addon(luxrender.bl_info)
+        importlib.import_module('luxrender.core')
+
+    results['addon_load'] = profile.phase(load_addon)
+    results['addon_load']['deferred_modules'] = sum(len(names) for package, names in
+                                                    luxrender.LuxRenderAddon.deferred_modules)
+
+    results['load_interface'] = profile.phase(luxrender.LuxRenderAddon.load_deferred)
+
+    def load_bindings():
+        from luxrender.outputs.luxcore_api import load_pyluxcore
+        from luxrender.outputs.pure_api import load_pylux
+
+        load_pylux()
+        load_pyluxcore()
+        importlib.import_module('luxrender.export.scene')
+        importlib.import_module('luxrender.export.luxcore')
+
+    results['first_export'] = profile.phase(load_bindings)
+
+    ranked = sorted(profile.modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (cumulative, own) in ranked[:TOP_MODULES]:
+        results['module %s' % name] = {'own_seconds': own, 'cumulative_seconds': cumulative}
+
+    sys.meta_path.remove(profile)
+    return results
+
+
+if __name__ == '__main__':
+    run(__doc__, benchmark)
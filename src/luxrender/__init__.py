@@ -51,6 +51,22 @@ def find_luxrender_path():
                     efutil.find_config_value('luxrender', 'defaults', 'install_path', '')
     )
 
+def find_bindings_module(name):
+    """Whether import_bindings_module() would find the Lux Python bindings
+    module, without importing it. Loading the bindings is deferred to the
+    first render or export."""
+    import os.path
+    import sys
+    import importlib.machinery
+
+    luxblend_path = os.path.dirname(os.path.abspath(__file__))
+    if sys.platform == 'darwin':
+        paths = [luxblend_path]
+    else:
+        paths = [find_luxrender_path()] + sys.path + [luxblend_path]
+
+    return importlib.machinery.PathFinder.find_spec(name, paths) is not None
+
 def import_bindings_module(name):
     """Import Lux Python bindings module (e.g. pylux)."""
     import os.path
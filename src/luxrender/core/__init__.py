@@ -47,13 +47,13 @@ from ..extensions_framework import util as efutil
 # Exporter libs
 from .. import LuxRenderAddon
 from ..export import get_output_filename, get_worldscale
-from ..export.scene import SceneExporter
 from ..outputs import LuxManager, LuxFilmDisplay
 from ..outputs import LuxLog
+from ..outputs import aov
+from ..outputs.viewport import ViewportDisplay, InteractiveResolution
 from ..outputs.pure_api import LUXRENDER_VERSION
 from ..outputs.luxcore_api import ToValidLuxCoreName
-from ..outputs.luxcore_api import PYLUXCORE_AVAILABLE, UseLuxCore, pyluxcore
-from ..export.luxcore import LuxCoreExporter
+from ..outputs.luxcore_api import UseLuxCore, load_pyluxcore
 
 # Exporter Property Groups need to be imported to ensure initialisation
 from ..properties import (
@@ -64,31 +64,38 @@ from ..properties import (
     luxcore_tile_highlighting, luxcore_imagepipeline, luxcore_translator
 )
 
-# Exporter Interface Panels need to be imported to ensure initialisation
-from ..ui import (
-    render_panels, camera, image, lamps, mesh, node_editor, object as ui_object, particles, world,
-    imageeditor_panel
-)
-
-# Legacy material editor panels, node editor UI is initialized above
-from ..ui.materials import (
-    main as mat_main, compositing, carpaint, cloth, glass, glass2, roughglass, glossytranslucent,
-    glossycoating, glossy, layered, matte, mattetranslucent, metal, metal2, mirror, mix as mat_mix, null,
-    scatter, shinymetal, velvet
-)
-
-#Legacy texture editor panels
-from ..ui.textures import (
-    main as tex_main, abbe, add, band, blender, bilerp, blackbody, brick, cauchy, constant, colordepth,
-    checkerboard, cloud, densitygrid, dots, equalenergy, exponential, fbm, fresnelcolor, fresnelname, gaussian,
-    harlequin, hitpointcolor, hitpointalpha, hitpointgrey, imagemap, imagesampling, normalmap,
-    lampspectrum, luxpop, marble, mix as tex_mix, multimix, sellmeier, scale, subtract, sopra, uv,
-    uvmask, windy, wrinkled, mapping, tabulateddata, transform, pointiness
-)
+# Exporter Interface Panels are imported and registered once LuxRender is first
+# selected as render engine, see load_interface(). The node tree type is
+# registered at load, since .blend files refer to it.
+from .. import ui
+from ..ui import node_editor
+
+LuxRenderAddon.defer_modules(ui.__name__, [
+    'render_panels', 'camera', 'image', 'lamps', 'mesh', 'object', 'particles', 'world', 'imageeditor_panel',
+
+    # Legacy material editor panels, node editor UI is initialized above
+    'materials.main', 'materials.compositing', 'materials.carpaint', 'materials.cloth', 'materials.glass',
+    'materials.glass2', 'materials.roughglass', 'materials.glossytranslucent', 'materials.glossycoating',
+    'materials.glossy', 'materials.layered', 'materials.matte', 'materials.mattetranslucent', 'materials.metal',
+    'materials.metal2', 'materials.mirror', 'materials.mix', 'materials.null', 'materials.scatter',
+    'materials.shinymetal', 'materials.velvet',
+
+    # Legacy texture editor panels
+    'textures.main', 'textures.abbe', 'textures.add', 'textures.band', 'textures.blender', 'textures.bilerp',
+    'textures.blackbody', 'textures.brick', 'textures.cauchy', 'textures.constant', 'textures.colordepth',
+    'textures.checkerboard', 'textures.cloud', 'textures.densitygrid', 'textures.dots', 'textures.equalenergy',
+    'textures.exponential', 'textures.fbm', 'textures.fresnelcolor', 'textures.fresnelname', 'textures.gaussian',
+    'textures.harlequin', 'textures.hitpointcolor', 'textures.hitpointalpha', 'textures.hitpointgrey',
+    'textures.imagemap', 'textures.imagesampling', 'textures.normalmap', 'textures.lampspectrum', 'textures.luxpop',
+    'textures.marble', 'textures.mix', 'textures.multimix', 'textures.sellmeier', 'textures.scale',
+    'textures.subtract', 'textures.sopra', 'textures.uv', 'textures.uvmask', 'textures.windy', 'textures.wrinkled',
+    'textures.mapping', 'textures.tabulateddata', 'textures.transform', 'textures.pointiness',
+])
 
 # Exporter Operators need to be imported to ensure initialisation
 from .. import operators
 from ..operators import lrmdb
+from ..operators import benchmark
 
 
 def _register_elm(elm, required=False):
@@ -462,9 +469,9 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
 
         efutil.export_path = self.output_dir
 
-        from ..outputs.pure_api import PYLUX_AVAILABLE
+        from ..outputs.pure_api import load_pylux
 
-        if not PYLUX_AVAILABLE:
+        if load_pylux() is None:
             LuxLog('ERROR: Material previews require pylux')
             return
 
@@ -665,6 +672,8 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
 
         output_filename = get_output_filename(scene)
 
+        from ..export.scene import SceneExporter
+
         scene_exporter = SceneExporter()
         scene_exporter.properties.directory = self.output_dir
         scene_exporter.properties.filename = output_filename
@@ -678,6 +687,9 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
         if 'CANCELLED' in export_result:
             return False
 
+        if scene_exporter.profile_summary:
+            self.update_stats('Export profile', scene_exporter.profile_summary)
+
         # Look for an output image to load
         if scene.camera.data.luxrender_camera.luxrender_film.write_png:
             self.output_file = efutil.path_relative_to_export(
@@ -813,8 +825,7 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
         # Save changed config items and then launch Lux
 
         try:
-            for k, v in config_updates.items():
-                efutil.write_config_value('luxrender', 'defaults', k, v)
+            efutil.write_config_values('luxrender', 'defaults', config_updates)
         except Exception as err:
             LuxLog('WARNING: Saving LuxRender config failed, please set your user scripts dir: %s' % err)
 
@@ -1128,19 +1139,6 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                 halt_time != 0 and rendered_time >= halt_time) or (
                 stats.Get('stats.renderengine.convergence').GetFloat() == 1.0)
 
-    def normalizeChannel(self, channel_buffer):
-        isInf = math.isinf
-
-        # find max value
-        maxValue = 0.0
-        for elem in channel_buffer:
-            if elem > maxValue and not isInf(elem):
-                maxValue = elem
-
-        if maxValue > 0.0:
-            for i in range(0, len(channel_buffer)):
-                channel_buffer[i] = channel_buffer[i] / maxValue
-
     def convertChannelToImage(self, lcSession, scene, filmWidth, filmHeight, channelType, saveToDisk,
                               normalize = False, buffer_id = -1):
         """
@@ -1178,7 +1176,6 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
         outputType = attributes[channelType][0]
         use_hdr = attributes[channelType][1]
         arrayType = 'I' if channelType == 'MATERIAL_ID' else 'f'
-        arrayInitValue = 0 if channelType == 'MATERIAL_ID' else 0.0
         arrayDepth = attributes[channelType][2]
 
         # show info about imported passes
@@ -1189,89 +1186,26 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
         LuxLog(message)
 
         # raw channel buffer
-        channel_buffer = array.array(arrayType, [arrayInitValue] * (filmWidth * filmHeight * arrayDepth))
-        # buffer for converted array (to RGBA)
-        channel_buffer_converted = []
+        channel_buffer = aov.channel_buffer(arrayType, filmWidth * filmHeight * arrayDepth)
 
         if channelType == 'MATERIAL_ID':
             # MATERIAL_ID needs special treatment
-            channel_buffer_converted = [None] * (filmWidth * filmHeight * 4)
             lcSession.GetFilm().GetOutputUInt(outputType, channel_buffer)
-
-            mask_red = 0xff0000
-            mask_green = 0xff00
-            mask_blue = 0xff
-            
-            k = 0
-            for i in range(0, len(channel_buffer)):
-                rgba_raw = channel_buffer[i]
-                
-                rgba_converted = [
-                    float((rgba_raw & mask_red) >> 16) / 255.0,
-                    float((rgba_raw & mask_green) >> 8) / 255.0,
-                    float(rgba_raw & mask_blue) / 255.0,
-                    1.0
-                ]
-                
-                channel_buffer_converted[k:k + 4] = rgba_converted
-                k += 4
+            channel_buffer_converted = aov.material_id_to_rgba(channel_buffer)
         else:
             if channelType in ['MATERIAL_ID_MASK', 'BY_MATERIAL_ID', 'RADIANCE_GROUP'] and buffer_id != -1:
                 lcSession.GetFilm().GetOutputFloat(outputType, channel_buffer, buffer_id)
             else:
                 lcSession.GetFilm().GetOutputFloat(outputType, channel_buffer)
 
-            # spread value to RGBA format
+            # spread value to RGBA format, optionally normalizing values to the 0..1 range
+            pyluxcore_convert = getattr(pyluxcore, 'ConvertFilmChannelOutput_%ixFloat_To_4xFloatList' % arrayDepth,
+                                        None)
 
-            if arrayDepth == 1:
-                if getattr(pyluxcore, 'ConvertFilmChannelOutput_1xFloat_To_4xFloatList', None) is not None:
-                    channel_buffer_converted = pyluxcore.ConvertFilmChannelOutput_1xFloat_To_4xFloatList(filmWidth,
-                                                                                                         filmHeight,
-                                                                                                         channel_buffer,
-                                                                                                         normalize)
-                else:
-                    # normalize channel_buffer values (map to 0..1 range)
-                    if normalize:
-                        self.normalizeChannel(channel_buffer)
-                    for elem in channel_buffer:
-                        channel_buffer_converted.extend([elem, elem, elem, 1.0])
-
-            # UV channel, just add 0.0 for B and 1.0 for A components
-            elif arrayDepth == 2:
-                if getattr(pyluxcore, 'ConvertFilmChannelOutput_2xFloat_To_4xFloatList', None) is not None:
-                    channel_buffer_converted = pyluxcore.ConvertFilmChannelOutput_2xFloat_To_4xFloatList(filmWidth,
-                                                                                                         filmHeight,
-                                                                                                         channel_buffer,
-                                                                                                         normalize)
-                else:
-                    # normalize channel_buffer values (map to 0..1 range)
-                    if normalize:
-                        self.normalizeChannel(channel_buffer)
-                    i = 0
-                    while i < len(channel_buffer):
-                        channel_buffer_converted.extend([channel_buffer[i], channel_buffer[i + 1], 0.0, 1.0])
-                        i += 2
-
-            # RGB channels: just add 1.0 as alpha component
-            elif arrayDepth == 3:
-                if getattr(pyluxcore, 'ConvertFilmChannelOutput_3xFloat_To_4xFloatList', None) is not None:
-                    channel_buffer_converted = pyluxcore.ConvertFilmChannelOutput_3xFloat_To_4xFloatList(filmWidth,
-                                                                                                         filmHeight,
-                                                                                                         channel_buffer,
-                                                                                                         normalize)
-                else:
-                    # normalize channel_buffer values (map to 0..1 range)
-                    if normalize:
-                        self.normalizeChannel(channel_buffer)
-                    i = 0
-                    while i < len(channel_buffer):
-                        channel_buffer_converted.extend(
-                            [channel_buffer[i], channel_buffer[i + 1], channel_buffer[i + 2], 1.0])
-                        i += 3
-
-            # RGBA channels: just copy the list
+            if pyluxcore_convert is not None and not aov.NUMPY_AVAILABLE:
+                channel_buffer_converted = pyluxcore_convert(filmWidth, filmHeight, channel_buffer, normalize)
             else:
-                channel_buffer_converted = channel_buffer
+                channel_buffer_converted = aov.channel_to_rgba(channel_buffer, arrayDepth, normalize)
 
         imageName = 'pass_' + str(channelType)
         if buffer_id != -1:
@@ -1296,26 +1230,17 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                                                 width = imageWidth, height = imageHeight, float_buffer = use_hdr)
             
             # copy the buffer content to the right position in the Blender image
-            offsetFromLeft = int(imageWidth * scene.render.border_min_x) * 4
+            offsetFromLeft = int(imageWidth * scene.render.border_min_x)
             offsetFromTop = int(imageHeight * scene.render.border_min_y)
-            
-            # we use an intermediate temp image because blenderImage.pixels doesn't support list slicing
-            tempImage = [0.0] * (imageWidth * imageHeight * 4)
-            
-            for y in range(offsetFromTop, offsetFromTop + filmHeight):
-                imageSliceStart = y * imageWidth * 4 + offsetFromLeft
-                imageSliceEnd = imageSliceStart + filmWidth * 4
-                bufferSliceStart = (y - offsetFromTop) * filmWidth * 4
-                bufferSliceEnd = bufferSliceStart + filmWidth * 4
-                
-                tempImage[imageSliceStart:imageSliceEnd] = channel_buffer_converted[bufferSliceStart:bufferSliceEnd]
-                
-            blenderImage.pixels = tempImage
+
+            aov.set_image_pixels(blenderImage, aov.place_in_image(channel_buffer_converted, filmWidth, filmHeight,
+                                                                  imageWidth, imageHeight,
+                                                                  offsetFromLeft, offsetFromTop))
         else:
             # no border rendering or border rendering with cropping: just copy the buffer to a Blender image
             blenderImage = bpy.data.images.new(imageName, alpha = False, 
                                                 width = filmWidth, height = filmHeight, float_buffer = use_hdr)
-            blenderImage.pixels = channel_buffer_converted
+            aov.set_image_pixels(blenderImage, channel_buffer_converted)
 
         # write image to file
         suffix = '.png'
@@ -1403,7 +1328,7 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
             return
 
         # LuxCore libs
-        if not PYLUXCORE_AVAILABLE:
+        if load_pyluxcore() is None:
             LuxLog('ERROR: LuxCore rendering requires pyluxcore')
             self.report({'ERROR'}, 'LuxCore rendering requires pyluxcore')
             return
@@ -1414,6 +1339,8 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
         
             filmWidth, filmHeight = self.get_film_size(scene)
 
+            from ..export.luxcore import LuxCoreExporter
+
             luxcore_exporter = LuxCoreExporter(scene, self)
             luxcore_config = luxcore_exporter.convert(filmWidth, filmHeight)
             luxcore_session = pyluxcore.RenderSession(luxcore_config)
@@ -1683,7 +1610,7 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
 
     def luxcore_render_preview(self, scene):
         # LuxCore libs
-        if not PYLUXCORE_AVAILABLE:
+        if load_pyluxcore() is None:
             LuxLog('ERROR: LuxCore preview rendering requires pyluxcore')
             return
         from ..outputs.luxcore_api import pyluxcore
@@ -1763,13 +1690,18 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
 
     viewFilmWidth = -1
     viewFilmHeight = -1
-    viewImageBufferFloat = None
+    viewDisplay = None
+    viewResolution = None
     # store renderengine configuration of last update
     lastRenderSettings = ''
-    lastVolumeSettings = ''
+    lastVolumeSettings = {}
     lastHaltTime = -1
     lastHaltSamples = -1
     lastCameraSettings = ''
+    # fingerprints of the Blender settings read by the last camera, config and volume conversions
+    lastCameraFingerprint = None
+    lastRenderFingerprint = None
+    lastVolumeFingerprints = {}
     lastVisibilitySettings = None
     update_counter = 0
 
@@ -1802,7 +1734,7 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
     
     def luxcore_view_draw(self, context):
         # LuxCore libs
-        if not PYLUXCORE_AVAILABLE:
+        if load_pyluxcore() is None:
             LuxLog('ERROR: LuxCore real-time rendering requires pyluxcore')
             return
 
@@ -1816,15 +1748,23 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
             self.luxcore_view_update(context, update_changes)
 
         # check if camera settings have changed
-        self.luxcore_exporter.convert_camera()
-        newCameraSettings = str(self.luxcore_exporter.camera_exporter.properties)
+        if self.camera_fingerprint_changed(context):
+            self.luxcore_exporter.convert_camera()
+            newCameraSettings = str(self.luxcore_exporter.camera_exporter.properties)
 
-        if self.lastCameraSettings == '':
-            self.lastCameraSettings = newCameraSettings
-        elif self.lastCameraSettings != newCameraSettings:
+            if self.lastCameraSettings == '':
+                self.lastCameraSettings = newCameraSettings
+            elif self.lastCameraSettings != newCameraSettings:
+                update_changes = UpdateChanges()
+                update_changes.set_cause(camera = True)
+                self.lastCameraSettings = newCameraSettings
+                self.luxcore_view_update(context, update_changes)
+
+        # Return to full resolution when the scene was not edited for a while
+        if self.viewResolution is not None and self.viewResolution.idle(
+                time.time(), context.scene.luxcore_realtimesettings.interactive_idle_time):
             update_changes = UpdateChanges()
-            update_changes.set_cause(camera = True)
-            self.lastCameraSettings = newCameraSettings
+            update_changes.set_cause(config = True)
             self.luxcore_view_update(context, update_changes)
 
         # Update statistics
@@ -1832,8 +1772,13 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
             RENDERENGINE_luxrender.luxcore_session.UpdateStats()
             stats = RENDERENGINE_luxrender.luxcore_session.GetStats()
 
-            stop_redraw = (context.scene.luxrender_engine.preview_stop or
-                    self.haltConditionMet(context.scene, stats, realtime_preview = True))
+            if self.view_interactive():
+                # Keep redrawing until the full resolution render starts
+                self.viewResolution.measure(time.time(), stats.Get('stats.renderengine.pass').GetInt())
+                stop_redraw = context.scene.luxrender_engine.preview_stop
+            else:
+                stop_redraw = (context.scene.luxrender_engine.preview_stop or
+                        self.haltConditionMet(context.scene, stats, realtime_preview = True))
 
             # update statistic display in Blender
             luxcore_config = RENDERENGINE_luxrender.luxcore_session.GetRenderConfig()
@@ -1841,20 +1786,24 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                                                     stats,
                                                     context.scene,
                                                     realtime_preview = True)
+
+            # Update the image buffer if there are new samples, always show the last samples before pausing
+            display_fps = 0 if stop_redraw else context.scene.luxcore_realtimesettings.display_fps
+            self.viewDisplay.update(RENDERENGINE_luxrender.luxcore_session,
+                                    stats.Get('stats.renderengine.pass').GetInt(),
+                                    display_fps)
+
+            if context.scene.luxrender_testing.profile_viewport:
+                blender_stats += ' | ' + self.viewDisplay.frame_stats()
+
             if stop_redraw:
                 self.update_stats('Paused', blender_stats)
             else:
                 self.update_stats('Rendering', blender_stats)
 
-            # Update the image buffer
-            RENDERENGINE_luxrender.luxcore_session.GetFilm().GetOutputFloat(pyluxcore.FilmOutputType.RGB_TONEMAPPED,
-                                                      self.viewImageBufferFloat)
-
         # Update the screen
-        bufferSize = self.viewFilmWidth * self.viewFilmHeight * 3
-        glBuffer = bgl.Buffer(bgl.GL_FLOAT, [bufferSize], self.viewImageBufferFloat)
-        bgl.glRasterPos2i(0, 0)
-        bgl.glDrawPixels(self.viewFilmWidth, self.viewFilmHeight, bgl.GL_RGB, bgl.GL_FLOAT, glBuffer)
+        if self.viewDisplay is not None:
+            self.viewDisplay.draw(context.region.width, context.region.height)
 
         if stop_redraw:
             # Pause rendering
@@ -1863,10 +1812,44 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
             # Trigger another update
             self.tag_redraw()
 
+    def view_film_size(self):
+        """
+        Film resolution of the viewport render, reduced while the scene is edited
+        """
+        if self.viewResolution is None:
+            return self.viewFilmWidth, self.viewFilmHeight
+
+        return self.viewResolution.film_size(self.viewFilmWidth, self.viewFilmHeight)
+
+    def view_interactive(self):
+        return self.viewResolution is not None and self.viewResolution.reduced
+
+    def camera_fingerprint_changed(self, context):
+        """
+        True if a setting read by the viewport camera conversion has changed
+        since the last call
+        """
+        from ..export.luxcore.fingerprints import camera_fingerprint
+
+        fingerprint = camera_fingerprint(context)
+
+        if fingerprint is not None and fingerprint == self.lastCameraFingerprint:
+            return False
+
+        self.lastCameraFingerprint = fingerprint
+        return True
+
     def find_update_changes(self, context):
         """
         Find out what triggered the update (default: unknown)
+
+        The camera, volumes and config are only converted (and their
+        properties compared) if the fingerprint of their Blender settings
+        changed since the last update. Materials, volumes and objects are
+        converted again if a datablock they were converted from was edited.
         """
+        from ..export.luxcore.fingerprints import config_fingerprint, volume_fingerprint
+
         update_changes = UpdateChanges()
 
         try:
@@ -1893,6 +1876,8 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                 update_changes.set_cause(startViewportRender = True)
 
                 # LuxCoreExporter instance for viewport rendering is only created here
+                from ..export.luxcore import LuxCoreExporter
+
                 self.luxcore_exporter = LuxCoreExporter(context.scene, self, True, context)
 
             # check if filmsize has changed
@@ -1901,6 +1886,9 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                     self.viewFilmHeight != context.region.height):
                 update_changes.set_cause(config = True)
 
+            # Edited meshes and textures, other users of them are found in the dependency index
+            updated_data = set()
+
             if bpy.data.objects.is_updated:
                 # check objects for updates
                 for ob in bpy.data.objects:
@@ -1923,6 +1911,7 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                             if ob.data is not None and ob.data.is_updated:
                                 update_changes.set_cause(mesh = True)
                                 update_changes.changed_objects_mesh.add(ob)
+                                updated_data.add(ob.data)
                             else:
                                 update_changes.set_cause(objectTransform = True)
                                 update_changes.changed_objects_transform.add(ob)
@@ -1934,38 +1923,66 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
 
             if bpy.data.materials.is_updated:
                 for mat in bpy.data.materials:
-                    if mat.is_updated:
-                        # only update this material
+                    # only update this material, unused materials are converted with the object they are assigned to
+                    if mat.is_updated and mat in self.luxcore_exporter.material_cache:
                         update_changes.changed_materials.add(mat)
                         update_changes.set_cause(materials = True)
 
             if bpy.data.textures.is_updated:
                 for tex in bpy.data.textures:
                     if tex.is_updated:
-                        for mat in tex.users_material:
-                            update_changes.changed_materials.add(mat)
-                            update_changes.set_cause(materials = True)
+                        updated_data.add(tex)
 
-            self.luxcore_exporter.convert_camera()
-            newCameraSettings = str(self.luxcore_exporter.pop_updated_scene_properties())
+            dependencies = self.luxcore_exporter.dependencies
+            affected_volumes = set()
 
-            if self.lastCameraSettings == '':
-                self.lastCameraSettings = newCameraSettings
-            elif self.lastCameraSettings != newCameraSettings:
-                update_changes.set_cause(camera = True)
-                self.lastCameraSettings = newCameraSettings
+            for element in dependencies.affected(updated_data):
+                kind = dependencies.kinds.get(element)
+
+                if kind == 'material':
+                    update_changes.changed_materials.add(element)
+                    update_changes.set_cause(materials = True)
+                elif kind == 'volume':
+                    affected_volumes.add(element)
+                elif kind == 'object':
+                    # e.g. another user of an edited mesh, or a lamp using an edited texture
+                    update_changes.set_cause(mesh = True)
+                    update_changes.changed_objects_mesh.add(element)
+
+            if self.camera_fingerprint_changed(context):
+                self.luxcore_exporter.convert_camera()
+                newCameraSettings = str(self.luxcore_exporter.pop_updated_scene_properties())
+
+                if self.lastCameraSettings == '':
+                    self.lastCameraSettings = newCameraSettings
+                elif self.lastCameraSettings != newCameraSettings:
+                    update_changes.set_cause(camera = True)
+                    self.lastCameraSettings = newCameraSettings
+
+            # check for changes in volume configuration, only volumes with changed settings or
+            # an updated texture are converted again
+            volume_fingerprints = {}
+            volume_settings = dict(self.lastVolumeSettings)
 
-            # check for changes in volume configuration
             for volume in context.scene.luxrender_volumes.volumes:
+                fingerprint = volume_fingerprint(volume)
+                volume_fingerprints[volume.name] = fingerprint
+
+                if self.lastVolumeFingerprints.get(volume.name) == fingerprint and volume not in affected_volumes:
+                    continue
+
                 self.luxcore_exporter.convert_volume(volume)
+                newVolumeSettings = str(self.luxcore_exporter.pop_updated_scene_properties())
 
-            newVolumeSettings = str(self.luxcore_exporter.pop_updated_scene_properties())
+                if volume.name not in volume_settings:
+                    volume_settings[volume.name] = newVolumeSettings
+                elif volume_settings[volume.name] != newVolumeSettings:
+                    update_changes.set_cause(volumes = True)
+                    update_changes.changed_volumes.add(volume.name)
+                    volume_settings[volume.name] = newVolumeSettings
 
-            if self.lastVolumeSettings == '':
-                self.lastVolumeSettings = newVolumeSettings
-            elif self.lastVolumeSettings != newVolumeSettings:
-                update_changes.set_cause(volumes = True)
-                self.lastVolumeSettings = newVolumeSettings
+            self.lastVolumeSettings = volume_settings
+            self.lastVolumeFingerprints = volume_fingerprints
 
             # check for changes in halt conditions
             newHaltTime = context.scene.luxcore_realtimesettings.halt_time
@@ -1978,16 +1995,21 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
             self.lastHaltTime = newHaltTime
             self.lastHaltSamples = newHaltSamples
 
-            self.luxcore_exporter.convert_config(self.viewFilmWidth, self.viewFilmHeight)
-            newRenderSettings = str(self.luxcore_exporter.config_exporter.properties)
-
-            if self.lastRenderSettings == '':
-                self.lastRenderSettings = newRenderSettings
-            elif self.lastRenderSettings != newRenderSettings:
-                # renderengine config has changed
-                update_changes.set_cause(config = True)
-                # save settings to compare with next update
-                self.lastRenderSettings = newRenderSettings
+            film_width, film_height = self.view_film_size()
+            fingerprint = config_fingerprint(self.luxcore_exporter, film_width, film_height, self.view_interactive())
+
+            if fingerprint != self.lastRenderFingerprint:
+                self.lastRenderFingerprint = fingerprint
+                self.luxcore_exporter.convert_config(film_width, film_height, self.view_interactive())
+                newRenderSettings = str(self.luxcore_exporter.config_exporter.properties)
+
+                if self.lastRenderSettings == '':
+                    self.lastRenderSettings = newRenderSettings
+                elif self.lastRenderSettings != newRenderSettings:
+                    # renderengine config has changed
+                    update_changes.set_cause(config = True)
+                    # save settings to compare with next update
+                    self.lastRenderSettings = newRenderSettings
         except Exception as exc:
             LuxLog('Update check failed: %s' % exc)
             self.report({'ERROR'}, str(exc))
@@ -1998,7 +2020,8 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
     
     def luxcore_view_update(self, context, update_changes = None):
         # LuxCore libs
-        if not PYLUXCORE_AVAILABLE:
+        pyluxcore = load_pyluxcore()
+        if pyluxcore is None:
             LuxLog('ERROR: LuxCore real-time rendering requires pyluxcore')
             return
 
@@ -2035,10 +2058,13 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                 RENDERENGINE_luxrender.stop_luxcore_session()
 
                 self.lastRenderSettings = ''
-                self.lastVolumeSettings = ''
+                self.lastVolumeSettings = {}
                 self.lastHaltTime = -1
                 self.lastHaltSamples = -1
                 self.lastCameraSettings = ''
+                self.lastCameraFingerprint = None
+                self.lastRenderFingerprint = None
+                self.lastVolumeFingerprints = {}
                 self.lastVisibilitySettings = None
                 self.update_counter = 0
 
@@ -2046,7 +2072,12 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
 
                 self.viewFilmWidth = context.region.width
                 self.viewFilmHeight = context.region.height
-                self.viewImageBufferFloat = array.array('f', [0.0] * (self.viewFilmWidth * self.viewFilmHeight * 3))
+                self.viewResolution = InteractiveResolution()
+
+                if self.viewDisplay is None:
+                    self.viewDisplay = ViewportDisplay()
+
+                self.viewDisplay.resize(self.viewFilmWidth, self.viewFilmHeight)
 
                 LuxLog('Starting viewport render')
 
@@ -2071,18 +2102,40 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                 import traceback
                 traceback.print_exc()
         else:
+            # Render at a reduced resolution while the view or the scene are edited
+            scene_edited = (update_changes.cause_camera or update_changes.cause_mesh or update_changes.cause_light or
+                            update_changes.cause_objectTransform or update_changes.cause_materials or
+                            update_changes.cause_volumes or update_changes.cause_objectsRemoved)
+
+            if (scene_edited and self.viewResolution is not None and
+                    context.scene.luxcore_realtimesettings.interactive_resolution):
+                if self.viewResolution.edit(time.time()):
+                    update_changes.set_cause(config = True)
+
             # config update
             if update_changes.cause_config:
                 LuxLog('Configuration update')
 
+                from ..export.luxcore.fingerprints import config_fingerprint
+
                 self.viewFilmWidth = context.region.width
                 self.viewFilmHeight = context.region.height
-                self.viewImageBufferFloat = array.array('f', [0.0] * (self.viewFilmWidth * self.viewFilmHeight * 3))
+                film_width, film_height = self.view_film_size()
+
+                if self.viewDisplay is None:
+                    self.viewDisplay = ViewportDisplay()
+
+                self.viewDisplay.resize(film_width, film_height)
 
                 luxcore_config = RENDERENGINE_luxrender.luxcore_session.GetRenderConfig()
                 RENDERENGINE_luxrender.stop_luxcore_session()
 
-                self.luxcore_exporter.convert_config(self.viewFilmWidth, self.viewFilmHeight)
+                self.luxcore_exporter.convert_config(film_width, film_height, self.view_interactive())
+
+                # The next update check compares with this config instead of restarting again
+                self.lastRenderFingerprint = config_fingerprint(self.luxcore_exporter, film_width, film_height,
+                                                                self.view_interactive())
+                self.lastRenderSettings = str(self.luxcore_exporter.config_exporter.properties)
 
                 # change config
                 luxcore_config.Parse(self.luxcore_exporter.config_properties)
@@ -2117,66 +2170,13 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
                     self.luxcore_exporter.convert_object(ob, luxcore_scene, update_mesh=False, update_material=False)
 
             if update_changes.cause_objectsRemoved:
-                # TODO: implement this with new interface
-                pass
-
-                '''
-                def remove_object(ob, exported_object):
-                    # loop through object components (split by materials)
-                    for exported_object_data in exported_object.luxcore_data:
-                        luxcore_name = exported_object_data.lcObjName
-                        light_type = exported_object_data.lightType
-
-                        if ob.type == 'LAMP' and light_type != 'AREA':
-                            print('removing light %s (luxcore name: %s)' % (ob.name, luxcore_name))
-                            luxcore_scene.DeleteLight(luxcore_name)
-                        else:
-                            print('removing object %s (luxcore name: %s)' % (ob.name, luxcore_name))
-                            luxcore_scene.DeleteObject(luxcore_name)
-
-                cache = converter.get_export_cache()
-
-                for ob in update_changes.removed_objects:
-                    if cache.has(ob):
-                        exported_object = cache.get_exported_object(ob)
-                        remove_object(ob, exported_object)
-
-                # Remove particles/duplis
                 for ob in update_changes.removed_objects:
-                    # Dupliverts/frames/groups etc.
-                    if ob.is_duplicator and len(ob.particle_systems) == 0:
-                        ob.dupli_list_create(context.scene, settings = 'VIEWPORT')
-
-                        for dupli_ob in ob.dupli_list:
-                            dupli_key = (dupli_ob.object, ob)
-
-                            if cache.has(dupli_key):
-                                exported_object = cache.get_exported_object(dupli_key)
-                                remove_object(ob, exported_object)
-
-                        ob.dupli_list_clear()
-
-                    # Particle systems
-                    elif len(ob.particle_systems) > 0:
-                        for psys in ob.particle_systems:
-                            ob.dupli_list_create(context.scene, settings = 'VIEWPORT')
-
-                            if len(ob.dupli_list) > 0:
-                                dupli_ob = ob.dupli_list[0]
-                                dupli_key = (dupli_ob.object, psys)
-
-                                if cache.has(dupli_key):
-                                    exported_object_list = cache.get_exported_object(dupli_key)
-
-                                    for exported_object in exported_object_list:
-                                        remove_object(ob, exported_object)
-
-                            ob.dupli_list_clear()
-                '''
+                    self.luxcore_exporter.remove_object(ob, luxcore_scene)
 
             if update_changes.cause_volumes:
                 for volume in context.scene.luxrender_volumes.volumes:
-                    self.luxcore_exporter.convert_volume(volume)
+                    if not update_changes.changed_volumes or volume.name in update_changes.changed_volumes:
+                        self.luxcore_exporter.convert_volume(volume)
 
             updated_properties = self.luxcore_exporter.pop_updated_scene_properties()
 
@@ -2189,6 +2189,10 @@ class RENDERENGINE_luxrender(bpy.types.RenderEngine):
 
             RENDERENGINE_luxrender.end_scene_edit()
 
+            # The film restarts after a scene edit
+            if self.viewDisplay is not None:
+                self.viewDisplay.invalidate()
+
         # report time it took to update
         view_update_time = int(round(time.time() * 1000)) - view_update_startTime
         LuxLog('Dynamic updates: update took %dms' % view_update_time)
@@ -2198,6 +2202,7 @@ class UpdateChanges(object):
         self.changed_objects_transform = set()
         self.changed_objects_mesh = set()
         self.changed_materials = set()
+        self.changed_volumes = set()  # volume names
         self.removed_objects = set()
         
         self.cause_unknown = True
@@ -2304,4 +2309,15 @@ def stop_viewport_render(context):
     RENDERENGINE_luxrender.stop_luxcore_session()
 
 
-bpy.app.handlers.scene_update_post.append(stop_viewport_render)
\ No newline at end of file
+bpy.app.handlers.scene_update_post.append(stop_viewport_render)
+
+
+@persistent
+def load_interface(scene):
+    # All LuxRender panels are only shown with LuxRender as render engine. The handler is not removed from the list
+    # Blender is going through, once the panels are loaded it only tests the empty list of deferred modules.
+    if LuxRenderAddon.deferred_modules and scene.render.engine == 'LUXRENDER_RENDER':
+        LuxRenderAddon.load_deferred()
+
+
+bpy.app.handlers.scene_update_post.append(load_interface)
\ No newline at end of file
@@ -31,7 +31,8 @@ import bpy, mathutils
 from ..extensions_framework import util as efutil
 
 from ..outputs import LuxManager, LuxLog
-from ..util import bencode_file2string_with_size
+from ..util import embedded_files
+from ..export import numeric
 
 
 class ExportProgressThread(efutil.TimerThread):
@@ -115,35 +116,34 @@ class ParamSetItem(list):
 
         return sz
 
-    def list_wrap(self, lst, cnt, type='f'):
-        fcnt = float(cnt)
-        flen = float(len(lst))
-
-        if False:  # flen > fcnt:
-            # List wrapping disabled because it is hideously expensive
-            s = ''
-            if type == 'f':
-                for row in range(math.ceil(flen / fcnt)):
-                    s += ' '.join(['%0.15f' % i for i in lst[(row * cnt):(row + 1) * cnt]]) + '\n'
-            elif type == 'i':
-                for row in range(math.ceil(flen / fcnt)):
-                    s += ' '.join(['%i' % i for i in lst[(row * cnt):(row + 1) * cnt]]) + '\n'
-        else:
-            if type == 'f':
-                s = ' '.join(['%0.15f' % i for i in lst])
-            elif type == 'i':
-                s = ' '.join(['%i' % i for i in lst])
-        return s
+    def list_wrap(self, lst, cnt, type='f', precision=numeric.DOUBLE):
+        if type == 'f':
+            strings = numeric.float_strings(lst, precision)
+        elif type == 'i':
+            strings = numeric.integer_strings(lst)
+
+        return numeric.wrap_strings(strings, cnt)
 
     def to_string(self):
         fs_num = '"%s %s" [%s]'
         fs_str = '"%s %s" ["%s"]'
 
+        if self.type in ('float', 'vector', 'point', 'normal', 'color'):
+            policy = get_float_precision()
+
+            if policy == 'FIXED':
+                precision = numeric.FIXED
+            elif policy == 'AUTO' and (self.type != 'float' or type(self.value) in (list, tuple)):
+                # Geometry, colours and float arrays come from float32 data
+                precision = numeric.SINGLE
+            else:
+                precision = numeric.DOUBLE
+
         if self.type == "float" and type(self.value) in (list, tuple):
-            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f')
+            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f', precision)
             return fs_num % ('float', self.name, lst)
         if self.type == "float":
-            return fs_num % ('float', self.name, '%0.15f' % self.value)
+            return fs_num % ('float', self.name, numeric.format_float(self.value, precision))
         if self.type == "integer" and type(self.value) in (list, tuple):
             lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'i')
             return fs_num % ('integer', self.name, lst)
@@ -155,16 +155,18 @@ class ParamSetItem(list):
             else:
                 return fs_str % ('string', self.name, self.value.replace('\\', '\\\\'))
         if self.type == "vector":
-            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f')
+            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f', precision)
             return fs_num % ('vector', self.name, lst)
         if self.type == "point":
-            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f')
+            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f', precision)
             return fs_num % ('point', self.name, lst)
         if self.type == "normal":
-            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f')
+            lst = self.list_wrap(self.value, self.WRAP_WIDTH, 'f', precision)
             return fs_num % ('normal', self.name, lst)
         if self.type == "color":
-            return fs_num % ('color', self.name, ' '.join(['%0.8f' % i for i in self.value]))
+            if precision == numeric.FIXED:
+                return fs_num % ('color', self.name, ' '.join(['%0.8f' % i for i in self.value]))
+            return fs_num % ('color', self.name, ' '.join(numeric.float_strings(self.value, precision)))
         if self.type == "texture":
             return fs_str % ('texture', self.name, self.value)
         if self.type == "bool":
@@ -258,6 +260,16 @@ def is_obj_visible(scene, obj, is_dupli=False):
     return (ov or is_dupli) and not obj.hide_render
 
 
+def get_float_precision():
+    """
+    Float precision policy of the scene being exported, see export.numeric
+    """
+    if LuxManager.CurrentScene is None:
+        return 'AUTO'
+
+    return LuxManager.CurrentScene.luxrender_engine.float_precision
+
+
 def get_worldscale(as_scalematrix=True):
     """
     For usability, previev_scale is not an own property but calculated from the object dimensions
@@ -387,9 +399,10 @@ def process_filepath_data(scene, obj, file_path, paramset, parameter_name):
 
     if scene.luxrender_engine.allow_file_embed():
         paramset.add_string(parameter_name, file_basename)
-        encoded_data, encoded_size = bencode_file2string_with_size(file_relative)
+        encoded_lines, encoded_size = embedded_files.encode_lines(file_relative,
+                                                                 scene.luxrender_engine.embed_compression)
         paramset.increase_size('%s_data' % parameter_name, encoded_size)
-        paramset.add_string('%s_data' % parameter_name, encoded_data.splitlines())
+        paramset.add_string('%s_data' % parameter_name, encoded_lines)
     else:
         paramset.add_string(parameter_name, file_relative)
 
@@ -24,21 +24,29 @@
 #
 # ***** END GPL LICENCE BLOCK *****
 #
-import os, struct, math
+import functools, os, struct, math
 
 import bpy, mathutils, math
-from bpy.app.handlers import persistent
 
 from ..extensions_framework import util as efutil
 
 from ..outputs import LuxLog
 from ..outputs.file_api import Files
+from ..outputs.profiler import profiler
 from ..export import ParamSet, ExportProgressThread, ExportCache, object_anim_matrices
 from ..export import matrix_to_list
 from ..export import fix_matrix_order
 from ..export.materials import get_material_volume_defs
+from ..export.instances import InstanceBatches
+from ..export.hair import adaptive_strand_points, build_hair, evaluate_bsplines, image_pixel_array, sample_image, \
+    step_thickness, write_hair_file
+from ..export.meshdata import NUMPY_AVAILABLE, TessfaceArrays
+from ..export.motion import MotionSampleCache
+from ..export import ply
+from ..export.pipeline import ExportWorkerPool, export_thread_count
+from ..export.plycache import PLYCache, ply_cache_directory
+from ..export.snapshot import SceneSnapshot
 from ..export import LuxManager
-from ..export import is_obj_visible
 from ..properties import find_node
 from ..properties.node_material import luxrender_texture_maker
 
@@ -60,29 +68,36 @@ class DupliExportProgressThread(ExportProgressThread):
 
 
 class GeometryExporter(object):
-    # for partial mesh export
-    KnownExportedObjects = set()
-    KnownModifiedObjects = set()
-    NewExportedObjects = set()
-
-    def __init__(self, lux_context, visibility_scene):
+    def __init__(self, lux_context, visibility_scene, snapshot=None):
         self.lux_context = lux_context
         self.visibility_scene = visibility_scene
+        self.snapshot = snapshot if snapshot is not None else SceneSnapshot(visibility_scene)
 
         self.ExportedMeshes = ExportCache('ExportedMeshes')
         self.ExportedObjects = ExportCache('ExportedObjects')
         self.ExportedPLYs = ExportCache('ExportedPLYs')
         self.AnimationDataCache = ExportCache('AnimationData')
         self.ExportedObjectsDuplis = ExportCache('ExportedObjectsDuplis')
-
-        # start fresh
-        GeometryExporter.NewExportedObjects = set()
+        self.ImagePixelCache = ExportCache('ImagePixels')
+        self.InstanceMaterials = ExportCache('InstanceMaterials')
 
         self.objects_used_as_duplis = set()
 
         self.have_emitting_object = False
         self.exporting_duplis = False
 
+        # Set by iterateScene(), files are written synchronously otherwise
+        self.export_pool = None
+
+        # Set by open_ply_cache() when cached PLY files are enabled, for all geometry scenes of the export
+        self.ply_cache = None
+
+        # Set by iterateScene() when object motion blur is enabled
+        self.motion_samples = None
+
+        # Set by iterateScene() for the file API, collects static instances
+        self.instance_batches = None
+
         self.callbacks = {
             'duplis': {
                 'FACES': self.handler_Duplis_GENERIC,
@@ -188,16 +203,22 @@ class GeometryExporter(object):
 
             # Collate faces by mat index
             ffaces_mats = {}
-            mesh_faces = mesh.tessfaces
+            mesh_arrays = None
 
-            for f in mesh_faces:
-                mi = f.material_index
+            if NUMPY_AVAILABLE:
+                mesh_arrays = TessfaceArrays(mesh)
+                material_indices = mesh_arrays.material_indices()
+            else:
+                mesh_faces = mesh.tessfaces
+
+                for f in mesh_faces:
+                    mi = f.material_index
 
-                if mi not in ffaces_mats.keys():
-                    ffaces_mats[mi] = []
-                ffaces_mats[mi].append(f)
+                    if mi not in ffaces_mats.keys():
+                        ffaces_mats[mi] = []
+                    ffaces_mats[mi].append(f)
 
-            material_indices = ffaces_mats.keys()
+                material_indices = ffaces_mats.keys()
             number_of_mats = len(mesh.materials)
 
             if number_of_mats > 0:
@@ -214,6 +235,7 @@ class GeometryExporter(object):
                     mesh_cache_key = (self.geometry_scene, obj.data, i)
                     if self.allow_instancing(obj) and self.ExportedMeshes.have(mesh_cache_key):
                         mesh_definitions.append(self.ExportedMeshes.get(mesh_cache_key))
+                        profiler.count('mesh_instances')
                         continue
 
                     # Put PLY files in frame-numbered subfolders to avoid
@@ -241,33 +263,34 @@ class GeometryExporter(object):
 
                     self.ExportedPLYs.add(ply_path, None)
 
-                    # skip writing the PLY file if the box is checked
-                    skip_exporting = obj in self.KnownExportedObjects and not obj in self.KnownModifiedObjects
-
-                    if not os.path.exists(ply_path) or not (self.visibility_scene.luxrender_engine.partial_ply and
-                                                                skip_exporting):
-
-                        GeometryExporter.NewExportedObjects.add(obj)
+                    uv_textures = mesh.tessface_uv_textures
+                    vertex_color = mesh.tessface_vertex_colors.active
 
-                        uv_textures = mesh.tessface_uv_textures
-                        vertex_color = mesh.tessface_vertex_colors.active
+                    uv_layer = None
+                    vertex_color_layer = None
 
-                        uv_layer = None
-                        vertex_color_layer = None
+                    if len(uv_textures) > 0:
+                        if mesh.uv_textures.active and uv_textures.active.data:
+                            uv_layer = uv_textures.active.data
 
-                        if len(uv_textures) > 0:
-                            if mesh.uv_textures.active and uv_textures.active.data:
-                                uv_layer = uv_textures.active.data
+                    if vertex_color:
+                        vertex_color_layer = vertex_color.data
 
-                        if vertex_color:
-                            vertex_color_layer = vertex_color.data
+                    # Here we work out exactly which vert+normal combinations
+                    # we need to export. This is done first, and the export
+                    # combinations cached before writing to file because the
+                    # number of verts needed needs to be written in the header
+                    # and that number is not known before this is done.
+                    if mesh_arrays is not None:
+                        mesh_arrays.load_layers(uv_layer, vertex_color_layer)
+                        mesh_part = mesh_arrays.part(i, bool(uv_layer), bool(vertex_color_layer))
+                        vert_index = mesh_part.vertex_count
+                        face_count = mesh_part.face_count
 
-                        # Here we work out exactly which vert+normal combinations
-                        # we need to export. This is done first, and the export
-                        # combinations cached before writing to file because the
-                        # number of verts needed needs to be written in the header
-                        # and that number is not known before this is done.
+                        ply_pack = functools.partial(self.pack_ply_arrays, mesh_part)
 
+                        del mesh_part
+                    else:
                         # Export data
                         co_no_uv_vc_cache = []
                         face_vert_indices = {}  # mapping of face index to list of exported vert indices for that face
@@ -281,13 +304,13 @@ class GeometryExporter(object):
 
                         c1 = c2 = c3 = c4 = None
 
-                        for fidx, face in enumerate(ffaces_mats[i]):
+                        for face in ffaces_mats[i]:
                             fvi = []
                             if vertex_color_layer:
-                                c1 = vertex_color_layer[fidx].color1
-                                c2 = vertex_color_layer[fidx].color2
-                                c3 = vertex_color_layer[fidx].color3
-                                c4 = vertex_color_layer[fidx].color4
+                                c1 = vertex_color_layer[face.index].color1
+                                c2 = vertex_color_layer[face.index].color2
+                                c3 = vertex_color_layer[face.index].color3
+                                c4 = vertex_color_layer[face.index].color4
 
                             for j, vertex in enumerate(face.vertices):
                                 v = mesh.vertices[vertex]
@@ -360,71 +383,34 @@ class GeometryExporter(object):
                         del vert_vno_indices
                         del vert_use_vno
 
-                        with open(ply_path, 'wb') as ply:
-                            ply.write(b'ply\n')
-                            ply.write(b'format binary_little_endian 1.0\n')
-                            ply.write(b'comment Created by LuxBlend 2.6 exporter for LuxRender - www.luxrender.net\n')
-
-                            # vert_index == the number of actual verts needed
-                            ply.write(('element vertex %d\n' % vert_index).encode())
-                            ply.write(b'property float x\n')
-                            ply.write(b'property float y\n')
-                            ply.write(b'property float z\n')
-
-                            ply.write(b'property float nx\n')
-                            ply.write(b'property float ny\n')
-                            ply.write(b'property float nz\n')
-
-                            if uv_layer:
-                                ply.write(b'property float s\n')
-                                ply.write(b'property float t\n')
+                        face_count = len(ffaces_mats[i])
 
-                            if vertex_color_layer:
-                                ply.write(b'property uchar red\n')
-                                ply.write(b'property uchar green\n')
-                                ply.write(b'property uchar blue\n')
-
-                            ply.write(('element face %d\n' % len(ffaces_mats[i])).encode())
-                            ply.write(b'property list uchar uint vertex_indices\n')
+                        ply_data = (co_no_uv_vc_cache, [face_vert_indices[face.index] for face in ffaces_mats[i]])
+                        ply_pack = functools.partial(self.pack_ply_lists, ply_data, bool(uv_layer),
+                                                     bool(vertex_color_layer))
 
-                            ply.write(b'end_header\n')
+                        del ply_data
 
-                            # dump cached co/no/uv/vc
-                            if uv_layer:
-                                if vertex_color_layer:
-                                    for co, no, uv, vc in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
-                                        ply.write(struct.pack('<2f', *uv))
-                                        ply.write(struct.pack('<3B', *vc))
-                                else:
-                                    for co, no, uv in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
-                                        ply.write(struct.pack('<2f', *uv))
-                            else:
-                                if vertex_color_layer:
-                                    for co, no, vc in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
-                                        ply.write(struct.pack('<3B', *vc))
-                                else:
-                                    for co, no in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
+                        del co_no_uv_vc_cache
+                        del face_vert_indices
 
-                            # dump face vert indices
-                            for face in ffaces_mats[i]:
-                                lfvi = len(face_vert_indices[face.index])
-                                ply.write(struct.pack('<B', lfvi))
-                                ply.write(struct.pack('<%dI' % lfvi, *face_vert_indices[face.index]))
+                    ply_size = vert_index * struct.calcsize(ply.vertex_format(bool(uv_layer),
+                                                                              bool(vertex_color_layer)))
+                    ply_size += face_count * struct.calcsize('<B4I')
 
-                            del co_no_uv_vc_cache
-                            del face_vert_indices
+                    profiler.count('faces', face_count)
+                    profiler.count('ply_bytes', ply_size)
 
-                        LuxLog('Binary PLY file written: %s' % ply_path)
+                    # Packing, hashing and writing the file does not need any Blender data,
+                    # so this can be left to the export pool while the next mesh is extracted
+                    if self.ply_cache is not None:
+                        self.write_file(ply_size, self.pack_and_cache_ply_file, self.ply_cache, ply_path, vert_index,
+                                        face_count, ply_pack, bool(uv_layer), bool(vertex_color_layer))
                     else:
-                        LuxLog('Skipping already exported PLY: %s' % mesh_name)
+                        self.write_file(ply_size, self.pack_and_write_ply_file, ply_path, vert_index, face_count,
+                                        ply_pack, bool(uv_layer), bool(vertex_color_layer))
+
+                    del ply_pack
 
                     # Export the shape definition to LXO
                     shape_params = ParamSet().add_string('filename', efutil.path_relative_to_export(ply_path))
@@ -468,16 +454,22 @@ class GeometryExporter(object):
 
             # collate faces by mat index
             ffaces_mats = {}
-            mesh_faces = mesh.tessfaces
+            mesh_arrays = None
+
+            if NUMPY_AVAILABLE:
+                mesh_arrays = TessfaceArrays(mesh)
+                material_indices = mesh_arrays.material_indices()
+            else:
+                mesh_faces = mesh.tessfaces
 
-            for f in mesh_faces:
-                mi = f.material_index
+                for f in mesh_faces:
+                    mi = f.material_index
 
-                if mi not in ffaces_mats.keys():
-                    ffaces_mats[mi] = []
-                ffaces_mats[mi].append(f)
+                    if mi not in ffaces_mats.keys():
+                        ffaces_mats[mi] = []
+                    ffaces_mats[mi].append(f)
 
-            material_indices = ffaces_mats.keys()
+                material_indices = ffaces_mats.keys()
             number_of_mats = len(mesh.materials)
 
             if number_of_mats > 0:
@@ -495,6 +487,7 @@ class GeometryExporter(object):
 
                     if self.allow_instancing(obj) and self.ExportedMeshes.have(mesh_cache_key):
                         mesh_definitions.append(self.ExportedMeshes.get(mesh_cache_key))
+                        profiler.count('mesh_instances')
                         continue
 
                     # mesh_name must start with mesh data name to match with portals
@@ -514,65 +507,78 @@ class GeometryExporter(object):
                         if uv_textures.active and uv_textures.active.data:
                             uv_layer = uv_textures.active.data
 
-                    # Export data
-                    points = []
-                    normals = []
-                    uvs = []
-                    ntris = 0
-                    face_vert_indices = []  # list of face vert indices
+                    if mesh_arrays is not None:
+                        mesh_arrays.load_layers(uv_layer)
+                        mesh_part = mesh_arrays.part(i, bool(uv_layer))
 
-                    # Caches
-                    vert_vno_indices = {}  # mapping of vert index to exported vert index for verts with vert normals
-                    vert_use_vno = set()  # Set of vert indices that use vert normals
+                        points = mesh_part.co.ravel().tolist()
+                        normals = mesh_part.no.ravel().tolist()
+                        uvs = mesh_part.uv.ravel().tolist() if uv_layer else []
+                        face_vert_indices = mesh_part.triangle_indices().tolist()
+                        vert_index = mesh_part.vertex_count
+                        ntris = len(face_vert_indices)
 
-                    vert_index = 0  # exported vert index
-                    for face in ffaces_mats[i]:
-                        fvi = []
-                        for j, vertex in enumerate(face.vertices):
-                            v = mesh.vertices[vertex]
+                        del mesh_part
+                    else:
+                        # Export data
+                        points = []
+                        normals = []
+                        uvs = []
+                        ntris = 0
+                        face_vert_indices = []  # list of face vert indices
 
-                            if face.use_smooth:
+                        # Caches
+                        vert_vno_indices = {}  # mapping of vert index to exported vert index for verts with vert normals
+                        vert_use_vno = set()  # Set of vert indices that use vert normals
 
-                                if uv_layer:
-                                    vert_data = (v.co[:], v.normal[:], uv_layer[face.index].uv[j][:] )
-                                else:
-                                    vert_data = (v.co[:], v.normal[:], tuple() )
+                        vert_index = 0  # exported vert index
+                        for face in ffaces_mats[i]:
+                            fvi = []
+                            for j, vertex in enumerate(face.vertices):
+                                v = mesh.vertices[vertex]
 
-                                if vert_data not in vert_use_vno:
-                                    vert_use_vno.add(vert_data)
+                                if face.use_smooth:
 
-                                    points.extend(vert_data[0])
-                                    normals.extend(vert_data[1])
-                                    uvs.extend(vert_data[2])
+                                    if uv_layer:
+                                        vert_data = (v.co[:], v.normal[:], uv_layer[face.index].uv[j][:] )
+                                    else:
+                                        vert_data = (v.co[:], v.normal[:], tuple() )
 
-                                    vert_vno_indices[vert_data] = vert_index
-                                    fvi.append(vert_index)
+                                    if vert_data not in vert_use_vno:
+                                        vert_use_vno.add(vert_data)
 
-                                    vert_index += 1
-                                else:
-                                    fvi.append(vert_vno_indices[vert_data])
+                                        points.extend(vert_data[0])
+                                        normals.extend(vert_data[1])
+                                        uvs.extend(vert_data[2])
 
-                            else:
-                                # all face-vert-co-no are unique, we cannot
-                                # cache them
-                                points.extend(v.co[:])
-                                normals.extend(face.normal[:])
-                                if uv_layer:
-                                    uvs.extend(uv_layer[face.index].uv[j][:])
+                                        vert_vno_indices[vert_data] = vert_index
+                                        fvi.append(vert_index)
 
-                                fvi.append(vert_index)
+                                        vert_index += 1
+                                    else:
+                                        fvi.append(vert_vno_indices[vert_data])
+
+                                else:
+                                    # all face-vert-co-no are unique, we cannot
+                                    # cache them
+                                    points.extend(v.co[:])
+                                    normals.extend(face.normal[:])
+                                    if uv_layer:
+                                        uvs.extend(uv_layer[face.index].uv[j][:])
+
+                                    fvi.append(vert_index)
 
-                                vert_index += 1
+                                    vert_index += 1
 
-                        # For Lux, we need to triangulate quad faces
-                        face_vert_indices.extend(fvi[0:3])
-                        ntris += 3
-                        if len(fvi) == 4:
-                            face_vert_indices.extend([fvi[0], fvi[2], fvi[3]])
+                            # For Lux, we need to triangulate quad faces
+                            face_vert_indices.extend(fvi[0:3])
                             ntris += 3
+                            if len(fvi) == 4:
+                                face_vert_indices.extend([fvi[0], fvi[2], fvi[3]])
+                                ntris += 3
 
-                    del vert_vno_indices
-                    del vert_use_vno
+                        del vert_vno_indices
+                        del vert_use_vno
 
                     # build shape ParamSet
                     shape_params = ParamSet()
@@ -582,6 +588,8 @@ class GeometryExporter(object):
                         shape_params.add_integer('ntris', ntris)
                         shape_params.add_integer('nvertices', vert_index)
 
+                    profiler.count('faces', ntris // 3)
+
                     shape_params.add_integer('triindices', face_vert_indices)
                     shape_params.add_point('P', points)
                     shape_params.add_normal('N', normals)
@@ -611,6 +619,95 @@ class GeometryExporter(object):
 
         return mesh_definitions
 
+    def write_file(self, size, func, *args):
+        """
+        Run a file writing job on the export pool, if there is one
+        """
+        if self.export_pool is None:
+            func(*args)
+        else:
+            self.export_pool.submit(size, func, *args)
+
+    @staticmethod
+    def pack_ply_arrays(mesh_part):
+        return (ply.pack_vertex_arrays(mesh_part.co, mesh_part.no, mesh_part.uv, mesh_part.vc),
+                ply.pack_face_arrays(mesh_part.face_sides, mesh_part.face_indices))
+
+    @staticmethod
+    def pack_ply_lists(ply_data, uv, color):
+        co_no_uv_vc_cache, face_vert_indices = ply_data
+        return ply.pack_vertices(co_no_uv_vc_cache, uv, color), ply.pack_faces(face_vert_indices)
+
+    @staticmethod
+    def write_ply_file(ply_path, vertex_count, face_count, vertex_data, face_data, uv, color):
+        # Write to a temporary name first, so that an interrupted export
+        # never leaves a truncated file behind under the final name
+        tmp_path = '%s.tmp' % ply_path
+        ply.write_ply(tmp_path, vertex_count, face_count, vertex_data, face_data, uv, color)
+        os.replace(tmp_path, ply_path)
+
+        LuxLog('Binary PLY file written: %s' % ply_path)
+
+    @staticmethod
+    def pack_and_write_ply_file(ply_path, vertex_count, face_count, ply_pack, uv, color):
+        vertex_data, face_data = ply_pack()
+        GeometryExporter.write_ply_file(ply_path, vertex_count, face_count, vertex_data, face_data, uv, color)
+
+    @staticmethod
+    def pack_and_cache_ply_file(ply_cache, ply_path, vertex_count, face_count, ply_pack, uv, color):
+        """
+        Look the packed file up in the PLY cache by its contents, write it
+        only if no earlier frame or render has written it already, and link
+        ply_path to the cache entry
+        """
+        vertex_data, face_data = ply_pack()
+        header = ply.ply_header(vertex_count, face_count, uv, color)
+        ply_digest = ply_cache.digest(header, vertex_data, face_data)
+
+        if ply_cache.claim(ply_digest):
+            try:
+                GeometryExporter.write_ply_file(ply_cache.path(ply_digest), vertex_count, face_count, vertex_data,
+                                                face_data, uv, color)
+            except:
+                ply_cache.release(ply_digest)
+                raise
+
+            ply_cache.add(ply_digest, len(header) + len(vertex_data) + len(face_data))
+        else:
+            LuxLog('Using cached PLY file: %s' % ply_cache.path(ply_digest))
+            profiler.count('ply_cache_hits')
+
+        ply_cache.link(ply_digest, ply_path)
+
+    def open_ply_cache(self):
+        """
+        Open the PLY cache for all geometry scenes of an export, if cached PLY
+        files are enabled
+        """
+        engine_settings = self.visibility_scene.luxrender_engine
+
+        if engine_settings.partial_ply:
+            self.ply_cache = PLYCache(ply_cache_directory(efutil.export_path),
+                                      engine_settings.ply_cache_size * 1024 * 1024)
+
+    def close_ply_cache(self, collect=True):
+        """
+        Remove unused files from the PLY cache once all geometry scenes are
+        exported. After a failed export, only the index is saved.
+        """
+        if self.ply_cache is None:
+            return
+
+        try:
+            if collect:
+                removed = self.ply_cache.collect()
+                if removed > 0:
+                    LuxLog('Removed %i unused files from the PLY cache' % removed)
+            else:
+                self.ply_cache.save_index()
+        finally:
+            self.ply_cache = None
+
     is_preview = False
 
     def allow_instancing(self, obj):
@@ -634,10 +731,12 @@ class GeometryExporter(object):
         # Only allow instancing for duplis and particles in non-hybrid mode, or
         # for normal objects if the object has certain modifiers applied against
         # the same shared base mesh.
-        if hasattr(obj, 'modifiers') and len(obj.modifiers) > 0 and obj.data.users > 1:
+        modifiers = self.snapshot.modifiers(obj)
+
+        if len(modifiers) > 0 and obj.data.users > 1:
             instance = False
 
-            for mod in obj.modifiers:
+            for mod in modifiers:
                 # Allow non-deforming modifiers
                 instance |= mod.type in ('COLLISION', 'PARTICLE_INSTANCE', 'PARTICLE_SYSTEM', 'SMOKE')
 
@@ -735,7 +834,10 @@ class GeometryExporter(object):
 
                 # object_anim_matrices returns steps+1 matrices, ie start and end of frame
                 # we don't want the start matrix
-                next_matrices = object_anim_matrices(self.geometry_scene, obj, steps)[1:]
+                if self.motion_samples is not None:
+                    next_matrices = self.motion_samples.object_matrices(obj, steps)[1:]
+                else:
+                    next_matrices = object_anim_matrices(self.geometry_scene, obj, steps)[1:]
 
                 is_object_animated = len(next_matrices) > 0
 
@@ -752,9 +854,15 @@ class GeometryExporter(object):
         if len(mesh_definitions) < 1:
             return
 
-        self.lux_context.attributeBegin(comment=obj.name, file=Files.GEOM)
         is_object_animated, next_matrices = self.is_object_animated(obj, matrix)
 
+        if self.instance_batches is not None and not is_object_animated and \
+                self.allow_instancing(parent if parent is not None else obj):
+            self.batchShapeInstances(obj, mesh_definitions, matrix, parent)
+            return
+
+        self.lux_context.attributeBegin(comment=obj.name, file=Files.GEOM)
+
         # object translation/rotation/scale
         if is_object_animated:
             num_steps = len(next_matrices)
@@ -816,21 +924,7 @@ class GeometryExporter(object):
                     mat_export_result = ob_mat.luxrender_material.export(self.visibility_scene, self.lux_context,
                                                                          ob_mat, mode='direct')
 
-                # We need to check the material's output node for a light-emission connection
-                output_node = find_node(ob_mat, 'luxrender_material_output_node')
-                light_node = None
-
-                if ob_mat.luxrender_material.nodetree:
-                    object_is_emitter = False
-
-                if output_node is not None:
-                    light_socket = output_node.inputs[3]
-
-                    if light_socket.is_linked:
-                        light_node = light_socket.links[0].from_node
-                        object_is_emitter = light_socket.is_linked
-                else:  # no node tree, so check the classic mat editor
-                    object_is_emitter = ob_mat.luxrender_emission.use_emission
+                object_is_emitter, light_node = self.materialEmission(ob_mat)
 
                 # If exporting an instance, we need to set emission in the ObjectBegin/End block
                 if object_is_emitter and not self.allow_instancing(mat_object):
@@ -878,47 +972,84 @@ class GeometryExporter(object):
 
         self.lux_context.attributeEnd()
 
-    def BSpline(self, points, dimension, degree, u):
-        controlpoints = []
+    def materialEmission(self, ob_mat):
+        """
+        Returns (object_is_emitter, light_node) of a material: the light-emission connection of its output node,
+        or the emission settings of the classic material editor
+        """
+        output_node = find_node(ob_mat, 'luxrender_material_output_node')
 
-        def Basispolynom(controlpoints, i, u, degree):
-            if degree == 0:
-                _temp = 0
-                if (controlpoints[i] <= u) and (u < controlpoints[i + 1]):
-                    _temp = 1
-            else:
-                N0 = Basispolynom(controlpoints, i, u, degree - 1)
-                N1 = Basispolynom(controlpoints, i + 1, u, degree - 1)
+        if output_node is None:  # no node tree, so check the classic mat editor
+            return ob_mat.luxrender_emission.use_emission, None
 
-                if N0 == 0:
-                    sum1 = 0
-                else:
-                    sum1 = (u - controlpoints[i]) / (controlpoints[i + degree] - controlpoints[i]) * N0
-                if N1 == 0:
-                    sum2 = 0
-                else:
-                    sum2 = (controlpoints[i + 1 + degree] - u) / (
-                        controlpoints[i + 1 + degree] - controlpoints[i + 1]) * N1
+        light_socket = output_node.inputs[3]
 
-                _temp = sum1 + sum2
-            return _temp
+        if light_socket.is_linked:
+            return True, light_socket.links[0].from_node
 
-        for i in range(len(points) + degree + 1):
-            if i <= degree:
-                controlpoints.append(0)
-            elif i >= len(points):
-                controlpoints.append(len(points) - degree)
-            else:
-                controlpoints.append(i - degree)
+        return False, None
+
+    def batchShapeInstances(self, obj, mesh_definitions, matrix=None, parent=None):
+        """
+        Add static instances to the instance batches instead of exporting
+        them one by one
+        """
+        if matrix is not None:
+            transform = matrix_to_list(matrix[0], apply_worldscale=True)
+        else:
+            transform = matrix_to_list(obj.matrix_world, apply_worldscale=True)
+
+        if parent is not None:
+            mat_object = parent
+        else:
+            mat_object = obj
 
-        if dimension == 2:
-            temp = mathutils.Vector((0.0, 0.0))
-        elif dimension == 3:
-            temp = mathutils.Vector((0.0, 0.0, 0.0))
+        for me_name, me_mat_index, me_shape_type, me_shape_params in mesh_definitions:
+            if me_mat_index == '':
+                me_mat_index = 0
+
+            try:
+                ob_mat = mat_object.material_slots[me_mat_index].material
+            except IndexError:
+                ob_mat = None
+                LuxLog('WARNING: material slot %d on object "%s" is unassigned!' % (me_mat_index + 1, mat_object.name))
+
+            material_name, int_v, ext_v = None, None, None
+
+            if ob_mat is not None:
+                # Default volumes can differ between the geometry scenes
+                mat_cache_key = (self.geometry_scene, ob_mat.name)
 
-        for i in range(len(points)):
-            temp = temp + Basispolynom(controlpoints, i, u, degree) * points[i]
-        return temp
+                if not self.InstanceMaterials.have(mat_cache_key):
+                    self.InstanceMaterials.add(mat_cache_key, self.instanceMaterialState(ob_mat))
+
+                material_name, int_v, ext_v, object_is_emitter = self.InstanceMaterials.get(mat_cache_key)
+
+                # Emission is set in the ObjectBegin/End block, but the instances light the scene
+                self.have_emitting_object |= object_is_emitter
+
+            self.instance_batches.add(me_name, material_name, int_v, ext_v, transform)
+
+    def instanceMaterialState(self, ob_mat):
+        """
+        Export a material and return the NamedMaterial, Interior and Exterior
+        names (or None) of its instances, and whether they emit light, like
+        exportShapeInstances()
+        """
+        self.lux_context.set_output_file(Files.MATS)
+        mat_export_result = ob_mat.luxrender_material.export(self.visibility_scene, self.lux_context, ob_mat,
+                                                             mode='indirect')
+        self.lux_context.set_output_file(Files.GEOM)
+
+        material_name = None if 'CLAY' in mat_export_result else ob_mat.name
+
+        int_v, ext_v = get_material_volume_defs(ob_mat)
+        int_v = int_v or self.geometry_scene.luxrender_world.default_interior_volume or None
+        ext_v = ext_v or self.geometry_scene.luxrender_world.default_exterior_volume or None
+
+        object_is_emitter, light_node = self.materialEmission(ob_mat)
+
+        return material_name, int_v, ext_v, object_is_emitter
 
     def handler_Duplis_PATH(self, obj, *args, **kwargs):
         if not 'particle_system' in kwargs.keys():
@@ -934,7 +1065,7 @@ class GeometryExporter(object):
         if not bpy.context.scene.luxrender_engine.export_hair:
             return
 
-        for mod in obj.modifiers:
+        for mod in self.snapshot.modifiers(obj):
             if mod.type == 'PARTICLE_SYSTEM':
                 if mod.particle_system.name == psys.name:
                     break
@@ -968,6 +1099,12 @@ class GeometryExporter(object):
         det = DupliExportProgressThread()
         det.start(num_parents + num_children)
 
+        # blender api change in r60251 - removed modifier argument
+        if bpy.app.version < (2, 68, 5):
+            co_hair = functools.partial(psys.co_hair, obj, mod)
+        else:
+            co_hair = functools.partial(psys.co_hair, obj)
+
         if psys.settings.luxrender_hair.use_binary_output:
             # Put HAIR_FILES files in frame-numbered subfolders to avoid
             # clobbering when rendering animations
@@ -981,20 +1118,12 @@ class GeometryExporter(object):
             hair_filename = '%s.hair' % bpy.path.clean_name(partsys_name)
             hair_file_path = '/'.join([sc_fr, hair_filename])
 
-            segments = []
-            points = []
-            thickness = []
-            colors = []
-            uv_coords = []
-            total_segments_count = 0
             vertex_color_layer = None
             uv_tex = None
+            image = None
             colorflag = 0
             uvflag = 0
             thicknessflag = 0
-            image_width = 0
-            image_height = 0
-            image_pixels = []
 
             mesh = obj.to_mesh(self.geometry_scene, True, 'RENDER')
             uv_textures = mesh.tessface_uv_textures
@@ -1008,133 +1137,58 @@ class GeometryExporter(object):
             if uv_textures.active and uv_textures.active.data:
                 uv_tex = uv_textures.active.data
                 if psys.settings.luxrender_hair.export_color == 'uv_texture_map':
-                    if uv_tex[0].image:
-                        image_width = uv_tex[0].image.size[0]
-                        image_height = uv_tex[0].image.size[1]
-                        image_pixels = uv_tex[0].image.pixels[:]
+                    if uv_tex[0].image and uv_tex[0].image.size[0] > 0 and uv_tex[0].image.size[1] > 0:
+                        image = uv_tex[0].image
                         colorflag = 1
                 uvflag = 1
 
-            info = 'Created by LuxBlend 2.6 exporter for LuxRender - www.luxrender.net'
-
-            transform = obj.matrix_world.inverted()
-            total_strand_count = 0
-
             if root_width == tip_width:
                 thicknessflag = 0
                 hair_size *= root_width
             else:
                 thicknessflag = 1
 
+            # Gather the world space coordinates of all strand steps, and the
+            # UV and colour of each strand, then convert them all at once
+            coords = []
+            strand_uvs = [] if uvflag else None
+            strand_colors = [] if colorflag else None
+
             for pindex in range(start, num_parents + num_children):
                 det.exported_objects += 1
-                point_count = 0
-                i = 0
-
-                if num_children == 0:
-                    i = pindex
-
-                # A small optimization in order to speedup the export
-                # process: cache the uv_co and color value
-                uv_co = None
-                col = None
-                seg_length = 1.0
+                i = pindex if num_children == 0 else 0
 
                 for step in range(0, steps):
-                    # blender api change in r60251 - removed modifier argument
-                    co = psys.co_hair(obj, mod, pindex, step) if bpy.app.version < (2, 68, 5 ) else psys.co_hair(obj,
-                                                                                                                 pindex,
-                                                                                                                 step)
-                    if step > 0:
-                        seg_length = (co - obj.matrix_world * points[len(points) - 1]).length_squared
-
-                    if not (co.length_squared == 0 or seg_length == 0):
-                        points.append(transform * co)
+                    coords.extend(co_hair(pindex, step))
 
-                        if thicknessflag:
-                            if step > steps * width_offset:
-                                thick = (root_width * (steps - step - 1) + tip_width * (
-                                            step - steps * width_offset)) / (
-                                            steps * (1 - width_offset) - 1)
-                            else:
-                                thick = root_width
-
-                            thickness.append(thick * hair_size)
-
-                        point_count += + 1
-
-                        if uvflag:
-                            if not uv_co:
-                                uv_co = psys.uv_on_emitter(mod, psys.particles[i], pindex, uv_textures.active_index)
-
-                            uv_coords.append(uv_co)
+                if uvflag:
+                    strand_uvs.extend(psys.uv_on_emitter(mod, psys.particles[i], pindex, uv_textures.active_index))
 
-                        if psys.settings.luxrender_hair.export_color == 'uv_texture_map' and not len(image_pixels) == 0:
-                            if not col:
-                                x_co = round(uv_co[0] * (image_width - 1))
-                                y_co = round(uv_co[1] * (image_height - 1))
+                if vertex_color_layer is not None:
+                    strand_colors.extend(psys.mcol_on_emitter(mod, psys.particles[i], pindex,
+                                                              vertex_color.active_index))
 
-                                pixelnumber = (image_width * y_co) + x_co
+            bpy.data.meshes.remove(mesh)
 
-                                r = image_pixels[pixelnumber * 4]
-                                g = image_pixels[pixelnumber * 4 + 1]
-                                b = image_pixels[pixelnumber * 4 + 2]
-                                col = (r, g, b)
+            if image is not None:
+                if not self.ImagePixelCache.have(image.name):
+                    self.ImagePixelCache.add(image.name, image_pixel_array(image))
 
-                            colors.append(col)
-                        elif psys.settings.luxrender_hair.export_color == 'vertex_color':
-                            if not col:
-                                col = psys.mcol_on_emitter(mod, psys.particles[i], pindex, vertex_color.active_index)
+                strand_colors = sample_image(self.ImagePixelCache.get(image.name), image.size[0], image.size[1],
+                                             strand_uvs)
 
-                            colors.append(col)
+            widths = None
+            if thicknessflag:
+                widths = [w * hair_size for w in step_thickness(steps, root_width, tip_width, width_offset)]
 
-                if point_count == 1:
-                    points.pop()
+            hair = build_hair(coords, steps, obj.matrix_world.inverted(), widths, strand_colors, strand_uvs)
+            del coords
 
-                    if thicknessflag:
-                        thickness.pop()
-                    point_count -= 1
-                elif point_count > 1:
-                    segments.append(point_count - 1)
-                    total_strand_count += 1
-                    total_segments_count = total_segments_count + point_count - 1
+            profiler.count('hair_points', hair.point_count)
 
             hair_file_path = efutil.path_relative_to_export(hair_file_path)
-            with open(hair_file_path, 'wb') as hair_file:
-                # Binary hair file format from
-                # http://www.cemyuksel.com/research/hairmodels/
-
-                # File header
-                hair_file.write(b'HAIR')  # magic number
-                hair_file.write(struct.pack('<I', total_strand_count))  # total strand count
-                hair_file.write(struct.pack('<I', len(points)))  # total point count
-                # bit array for configuration
-                hair_file.write(struct.pack('<I',
-                                            1 + 2 + 4 * thicknessflag + 16 * colorflag + 32 * uvflag))
-                hair_file.write(struct.pack('<I', steps))  # default segments count
-                hair_file.write(struct.pack('<f', hair_size))  # default thickness
-                hair_file.write(struct.pack('<f', 0.0))  # default transparency
-                color = (0.65, 0.65, 0.65)
-                hair_file.write(struct.pack('<3f', *color))  # default color
-                hair_file.write(struct.pack('<88s', info.encode()))  # information
-
-                # hair data
-                hair_file.write(struct.pack('<%dH' % (len(segments)), *segments))
-
-                for point in points:
-                    hair_file.write(struct.pack('<3f', *point))
-
-                if thicknessflag:
-                    for thickn in thickness:
-                        hair_file.write(struct.pack('<1f', thickn))
-
-                if colorflag:
-                    for col in colors:
-                        hair_file.write(struct.pack('<3f', *col))
-
-                if uvflag:
-                    for uv in uv_coords:
-                        hair_file.write(struct.pack('<2f', *uv))
+            write_hair_file(hair_file_path, hair, steps, hair_size)
+            del hair
 
             LuxLog('Binary hair file written: %s' % (hair_file_path))
 
@@ -1218,36 +1272,39 @@ class GeometryExporter(object):
                 self.lux_context.shape(st, sp)
                 self.lux_context.objectEnd()
 
+            strands = []
+
             for pindex in range(num_parents + num_children):
-                det.exported_objects += 1
                 points = []
 
                 for step in range(0, steps):
-                    # blender api change in r60251 - removed modifier argument
-                    co = psys.co_hair(obj, mod, pindex, step) if bpy.app.version < (2, 68, 5 ) else psys.co_hair(obj,
-                                                                                                                 pindex,
-                                                                                                                 step)
+                    co = co_hair(pindex, step)
+
                     if not co.length_squared == 0:
-                        points.append(co)
-
-                if psys.settings.use_hair_bspline:
-                    temp = []
-                    degree = 2
-                    dimension = 3
-                    for i in range(math.trunc(math.pow(2, psys.settings.render_step))):
-                        if i > 0:
-                            u = i * (len(points) - degree) / math.trunc(
-                                math.pow(2, psys.settings.render_step) - 1) - 0.0000000000001
-                        else:
-                            u = i * (len(points) - degree) / math.trunc(math.pow(2, psys.settings.render_step) - 1)
-                        temp.append(self.BSpline(points, dimension, degree, u))
-                    points = temp
+                        points.append(co[:])
+
+                strands.append(points)
+
+            # All strands are smoothed at once, with degree 2 B-splines
+            if psys.settings.use_hair_bspline:
+                strands = evaluate_bsplines(strands, 2, steps)
+
+            # transpose SB so we can extract columns
+            # TODO - change when matrix.col is available
+            SB = obj.matrix_basis.transposed().to_3x3()
+            SB = fix_matrix_order(SB)  # matrix indexing hack
+
+            segment_angle = psys.settings.luxrender_hair.segment_angle
+
+            for points in strands:
+                det.exported_objects += 1
+
+                if not points:
+                    continue
+
+                points = [mathutils.Vector(p) for p in adaptive_strand_points(points, segment_angle)]
 
                 for j in range(len(points) - 1):
-                    # transpose SB so we can extract columns
-                    # TODO - change when matrix.col is available
-                    SB = obj.matrix_basis.transposed().to_3x3()
-                    SB = fix_matrix_order(SB)  # matrix indexing hack
                     v1 = points[j + 1] - points[j]
                     v2 = SB[2].cross(v1)
                     v3 = v1.cross(v2)
@@ -1320,7 +1377,7 @@ class GeometryExporter(object):
                 if dupli_ob.object.type not in ['MESH', 'SURFACE', 'FONT', 'CURVE']:
                     continue
                     # if not dupli_ob.object.is_visible(self.visibility_scene) or dupli_ob.object.hide_render:
-                if not is_obj_visible(self.visibility_scene, dupli_ob.object, is_dupli=True):
+                if not self.snapshot.is_visible(dupli_ob.object, is_dupli=True):
                     continue
 
                 self.objects_used_as_duplis.add(dupli_ob.object)
@@ -1375,130 +1432,145 @@ class GeometryExporter(object):
         if self.visibility_scene.luxrender_testing.object_analysis:
             print(' -> handler_MESH: %s' % obj)
 
-        if 'matrix' in kwargs.keys():
-            self.exportShapeInstances(
-                obj,
-                self.buildMesh(obj),
-                matrix=kwargs['matrix']
-            )
-        else:
-            self.exportShapeInstances(
-                obj,
-                self.buildMesh(obj)
-            )
+        with profiler.scope('build_mesh'):
+            mesh_definitions = self.buildMesh(obj)
+
+        with profiler.scope('shape_instances'):
+            if 'matrix' in kwargs.keys():
+                self.exportShapeInstances(
+                    obj,
+                    mesh_definitions,
+                    matrix=kwargs['matrix']
+                )
+            else:
+                self.exportShapeInstances(
+                    obj,
+                    mesh_definitions
+                )
 
     def iterateScene(self, geometry_scene):
         self.geometry_scene = geometry_scene
         self.have_emitting_object = False
 
-        progress_thread = MeshExportProgressThread()
-        tot_objects = len(geometry_scene.objects)
-        progress_thread.start(tot_objects)
-
-        export_originals = {}
+        records = self.snapshot.records(geometry_scene)
+        object_analysis = self.visibility_scene.luxrender_testing.object_analysis
+        export_particles = bpy.context.scene.luxrender_engine.export_particles
 
-        for obj in geometry_scene.objects:
-            progress_thread.exported_objects += 1
+        engine_settings = self.visibility_scene.luxrender_engine
+        self.export_pool = ExportWorkerPool(export_thread_count(engine_settings),
+                                            engine_settings.export_buffer_size * 1024 * 1024)
 
-            if self.visibility_scene.luxrender_testing.object_analysis:
-                print('Analysing object %s : %s' % (obj, obj.type))
+        progress_thread = MeshExportProgressThread()
+        progress_thread.start(len(records))
 
-            try:
-                # Export only objects which are enabled for render (in the outliner) and visible on a render layer
-                if not is_obj_visible(self.visibility_scene, obj):
-                    raise UnexportableObjectException(' -> not visible')
+        # Shut the pool down and reset the per-export state also when the
+        # export fails, so no writer threads or stale caches are left behind
+        try:
+            camera_settings = self.visibility_scene.camera.data.luxrender_camera
+            if camera_settings.usemblur and camera_settings.objectmblur and geometry_scene.camera is not None:
+                # Sample all objects at once instead of re-evaluating
+                # the scene for every substep of every object
+                steps = geometry_scene.camera.data.luxrender_camera.motion_blur_samples
+                self.motion_samples = MotionSampleCache(geometry_scene)
 
-                if obj.parent and obj.parent.is_duplicator:
-                    raise UnexportableObjectException(' -> parent is duplicator')
+                for record in records:
+                    self.motion_samples.add_object(record.obj, steps)
 
-                number_psystems = len(obj.particle_systems)
+                with profiler.scope('motion_samples'):
+                    self.motion_samples.sample()
 
-                if obj.is_duplicator and number_psystems < 1:
-                    if self.visibility_scene.luxrender_testing.object_analysis:
-                        print(' -> is duplicator without particle systems')
-                    if obj.dupli_type in self.valid_duplis_callbacks:
-                        self.callbacks['duplis'][obj.dupli_type](obj)
-                    elif self.visibility_scene.luxrender_testing.object_analysis:
-                        print(' -> Unsupported Dupli type: %s' % obj.dupli_type)
-
-                # Some dupli types should hide the original
-                if obj.is_duplicator and obj.dupli_type in ('VERTS', 'FACES', 'GROUP'):
-                    export_originals[obj] = False
-                else:
-                    export_originals[obj] = True
+            if self.lux_context.API_TYPE == 'FILE':
+                self.instance_batches = InstanceBatches()
 
-                if number_psystems > 0 and bpy.context.scene.luxrender_engine.export_particles:
-                    export_originals[obj] = False
-                    if self.visibility_scene.luxrender_testing.object_analysis:
-                        print(' -> has %i particle systems' % number_psystems)
-                    for psys in obj.particle_systems:
-                        export_originals[obj] = export_originals[obj] or psys.settings.use_render_emitter
-                        if psys.settings.render_type in self.valid_particles_callbacks:
-                            self.callbacks['particles'][psys.settings.render_type](obj, particle_system=psys)
-                        elif self.visibility_scene.luxrender_testing.object_analysis:
-                            print(' -> Unsupported Particle system type: %s' % psys.settings.render_type)
+            export_originals = {}
 
-            except UnexportableObjectException as err:
-                if self.visibility_scene.luxrender_testing.object_analysis:
-                    print(' -> Unexportable object: %s : %s : %s' % (obj, obj.type, err))
+            for record in records:
+                obj = record.obj
+                progress_thread.exported_objects += 1
 
-        export_originals_keys = export_originals.keys()
+                if object_analysis:
+                    print('Analysing object %s : %s' % (obj, record.type))
 
-        for obj in geometry_scene.objects:
-            try:
-                if obj not in export_originals_keys:
-                    continue
-
-                if not export_originals[obj]:
-                    raise UnexportableObjectException('export_original_object=False')
-
-                if not obj.type in self.valid_objects_callbacks:
-                    raise UnexportableObjectException('Unsupported object type')
-
-                self.callbacks['objects'][obj.type](obj)
+                try:
+                    # Export only objects which are enabled for render (in the outliner) and visible on a render layer
+                    if not record.visible:
+                        raise UnexportableObjectException(' -> not visible')
+
+                    if record.parent_is_duplicator:
+                        raise UnexportableObjectException(' -> parent is duplicator')
+
+                    number_psystems = len(record.particle_systems)
+
+                    if record.is_duplicator and number_psystems < 1:
+                        if object_analysis:
+                            print(' -> is duplicator without particle systems')
+                        if record.dupli_type in self.valid_duplis_callbacks:
+                            with profiler.scope('duplis'):
+                                self.callbacks['duplis'][record.dupli_type](obj)
+                        elif object_analysis:
+                            print(' -> Unsupported Dupli type: %s' % record.dupli_type)
+
+                    # Some dupli types should hide the original
+                    if record.is_duplicator and record.dupli_type in ('VERTS', 'FACES', 'GROUP'):
+                        export_originals[obj] = False
+                    else:
+                        export_originals[obj] = True
+
+                    if number_psystems > 0 and export_particles:
+                        export_originals[obj] = False
+                        if object_analysis:
+                            print(' -> has %i particle systems' % number_psystems)
+                        for psys in record.particle_systems:
+                            export_originals[obj] = export_originals[obj] or psys.settings.use_render_emitter
+                            if psys.settings.render_type in self.valid_particles_callbacks:
+                                with profiler.scope('particles'):
+                                    self.callbacks['particles'][psys.settings.render_type](obj, particle_system=psys)
+                            elif object_analysis:
+                                print(' -> Unsupported Particle system type: %s' % psys.settings.render_type)
+
+                except UnexportableObjectException as err:
+                    if object_analysis:
+                        print(' -> Unexportable object: %s : %s : %s' % (obj, record.type, err))
+
+            for record in records:
+                obj = record.obj
 
-            except UnexportableObjectException as err:
-                if self.visibility_scene.luxrender_testing.object_analysis:
-                    print(' -> Unexportable object: %s : %s : %s' % (obj, obj.type, err))
+                try:
+                    if obj not in export_originals:
+                        continue
 
-        progress_thread.stop()
-        progress_thread.join()
+                    if not export_originals[obj]:
+                        raise UnexportableObjectException('export_original_object=False')
 
-        self.objects_used_as_duplis.clear()
+                    if not record.type in self.valid_objects_callbacks:
+                        raise UnexportableObjectException('Unsupported object type')
 
-        # update known exported objects for partial export
-        GeometryExporter.KnownModifiedObjects -= GeometryExporter.NewExportedObjects
-        GeometryExporter.KnownExportedObjects |= GeometryExporter.NewExportedObjects
-        GeometryExporter.NewExportedObjects = set()
+                    with profiler.scope('object'):
+                        self.callbacks['objects'][record.type](obj)
+                    profiler.count('objects')
 
-        return self.have_emitting_object
+                except UnexportableObjectException as err:
+                    if object_analysis:
+                        print(' -> Unexportable object: %s : %s : %s' % (obj, record.type, err))
 
+            if self.instance_batches is not None and len(self.instance_batches) > 0:
+                LuxLog('Writing %i batched object instances' % len(self.instance_batches))
 
-# Update handlers
+                with profiler.scope('instances'):
+                    self.instance_batches.write(self.lux_context)
 
-@persistent
-def lux_scene_update(context):
-    if bpy.data.objects.is_updated:
-        for ob in bpy.data.objects:
-            if ob is None:
-                continue
-                # if ob.is_updated_data:
-            # print('updated_data', ob.name)
-            #if ob.data.is_updated:
-            #	print('updated', ob.name)
+            with profiler.scope('file_writes'):
+                self.export_pool.finish()
+        finally:
+            self.export_pool.shutdown()
 
-            # only flag as updated if either modifiers or
-            # mesh data is updated
-            if ob.is_updated_data or (ob.data is not None and ob.data.is_updated):
-                GeometryExporter.KnownModifiedObjects.add(ob)
+            self.export_pool = None
+            self.motion_samples = None
+            self.instance_batches = None
 
-@persistent
-def lux_scene_load(context):
-    # clear known list on scene load
-    GeometryExporter.KnownExportedObjects = set()
+            progress_thread.stop()
+            progress_thread.join()
 
+        self.objects_used_as_duplis.clear()
 
-if hasattr(bpy.app, 'handlers') and hasattr(bpy.app.handlers, 'scene_update_post'):
-    bpy.app.handlers.scene_update_post.append(lux_scene_update)
-    bpy.app.handlers.load_post.append(lux_scene_load)
-    LuxLog('Installed scene post-update handler')
+        return self.have_emitting_object
@@ -0,0 +1,514 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Hair strand data and the binary .hair file format from
+http://www.cemyuksel.com/research/hairmodels/
+
+The strand points are gathered from Blender as one flat list of coordinates,
+steps points per strand, and converted to the file data at once: points are
+filtered and transformed, thicknesses interpolated along the strands and the
+per strand UVs and colours repeated for each point. With NumPy all of this is
+done with array operations, otherwise with lists.
+
+The B-spline functions smooth the strands of the legacy hair export, which
+are made of cylinder and sphere primitives.
+"""
+
+import array, math, struct
+
+from ..export.meshdata import numpy
+
+HAIR_MAGIC = b'HAIR'
+HAIR_INFO = 'Created by LuxBlend 2.6 exporter for LuxRender - www.luxrender.net'
+
+# Header flags, HAS_UV is a LuxRender extension
+HAS_SEGMENTS = 1
+HAS_POINTS = 2
+HAS_THICKNESS = 4
+HAS_TRANSPARENCY = 8
+HAS_COLOR = 16
+HAS_UV = 32
+
+DEFAULT_COLOR = (0.65, 0.65, 0.65)
+
+# magic, strand count, point count, flags, default segments, default thickness,
+# default transparency, default color, info
+_HEADER = struct.Struct('<4sIIIIff3f88s')
+
+
+class HairData(object):
+    """
+    Strands ready to be written: segments per strand, and points, thickness,
+    colors and uvs per point. thickness, colors and uvs are None when not
+    exported. Arrays with NumPy, flat lists otherwise.
+    """
+
+    def __init__(self, segments, points, thickness=None, colors=None, uvs=None):
+        self.segments = segments
+        self.points = points
+        self.thickness = thickness
+        self.colors = colors
+        self.uvs = uvs
+
+    @property
+    def strand_count(self):
+        return len(self.segments)
+
+    @property
+    def point_count(self):
+        if numpy is not None and isinstance(self.points, numpy.ndarray):
+            return len(self.points)
+
+        return len(self.points) // 3
+
+    @property
+    def flags(self):
+        return HAS_SEGMENTS | HAS_POINTS | \
+            (HAS_THICKNESS if self.thickness is not None else 0) | \
+            (HAS_COLOR if self.colors is not None else 0) | \
+            (HAS_UV if self.uvs is not None else 0)
+
+
+def step_thickness(steps, root_width, tip_width, width_offset):
+    """
+    Width at each step of a strand, constant up to width_offset and then
+    interpolated from root_width towards tip_width
+    """
+    widths = []
+
+    for step in range(steps):
+        if step > steps * width_offset:
+            widths.append((root_width * (steps - step - 1) + tip_width * (step - steps * width_offset)) /
+                          (steps * (1 - width_offset) - 1))
+        else:
+            widths.append(root_width)
+
+    return widths
+
+
+def image_pixel_array(image):
+    """
+    Pixels of a Blender image, as a (height, width, 4) float32 array with
+    NumPy or a flat list otherwise
+    """
+    width, height = image.size
+
+    if numpy is None:
+        return image.pixels[:]
+
+    pixels = numpy.empty(width * height * 4, dtype=numpy.float32)
+
+    if hasattr(image.pixels, 'foreach_get'):
+        image.pixels.foreach_get(pixels)
+    else:
+        pixels[:] = image.pixels[:]
+
+    return pixels.reshape(height, width, 4)
+
+
+def sample_image_python(pixels, width, height, uvs):
+    """
+    Bilinear RGB samples of a flat RGBA pixel list at each (u, v) of uvs,
+    with coordinates clamped to the image
+    """
+    colors = []
+
+    for u, v in zip(uvs[0::2], uvs[1::2]):
+        x = min(max(u, 0.0), 1.0) * (width - 1)
+        y = min(max(v, 0.0), 1.0) * (height - 1)
+        x0 = int(x)
+        y0 = int(y)
+        x1 = min(x0 + 1, width - 1)
+        y1 = min(y0 + 1, height - 1)
+        fx = x - x0
+        fy = y - y0
+
+        for c in range(3):
+            top = pixels[(y0 * width + x0) * 4 + c] * (1 - fx) + pixels[(y0 * width + x1) * 4 + c] * fx
+            bottom = pixels[(y1 * width + x0) * 4 + c] * (1 - fx) + pixels[(y1 * width + x1) * 4 + c] * fx
+            colors.append(top * (1 - fy) + bottom * fy)
+
+    return colors
+
+
+def sample_image_numpy(pixels, width, height, uvs):
+    """
+    NumPy version of sample_image_python(), for a (height, width, 4) array
+    """
+    uvs = numpy.clip(numpy.asarray(uvs, dtype=numpy.float32).reshape(-1, 2), 0.0, 1.0)
+
+    x = uvs[:, 0] * (width - 1)
+    y = uvs[:, 1] * (height - 1)
+    x0 = x.astype(numpy.int32)
+    y0 = y.astype(numpy.int32)
+    x1 = numpy.minimum(x0 + 1, width - 1)
+    y1 = numpy.minimum(y0 + 1, height - 1)
+    fx = (x - x0)[:, None]
+    fy = (y - y0)[:, None]
+
+    rgb = pixels[..., :3]
+    top = rgb[y0, x0] * (1 - fx) + rgb[y0, x1] * fx
+    bottom = rgb[y1, x0] * (1 - fx) + rgb[y1, x1] * fx
+
+    return (top * (1 - fy) + bottom * fy).astype(numpy.float32)
+
+
+def build_hair_python(coords, steps, transform, widths=None, strand_colors=None, strand_uvs=None):
+    """
+    Build HairData from the flat world space coordinates of steps points per
+    strand. Points at the origin and points equal to the previous point of
+    the strand are skipped, as are strands left with less than two points.
+    transform is a 4x4 matrix (sequence of rows) from world to object space,
+    widths the thickness at each step and strand_colors and strand_uvs flat
+    lists of values per strand.
+    """
+    segments = []
+    points = []
+    thickness = [] if widths is not None else None
+    colors = [] if strand_colors is not None else None
+    uvs = [] if strand_uvs is not None else None
+
+    rows = [list(transform[r]) for r in range(3)]
+    strand_count = len(coords) // (3 * steps)
+
+    for strand in range(strand_count):
+        kept = []
+        previous = None
+
+        for step in range(steps):
+            offset = (strand * steps + step) * 3
+            co = tuple(coords[offset:offset + 3])
+
+            if co != (0.0, 0.0, 0.0) and co != previous:
+                kept.append((step, co))
+
+            previous = co
+
+        if len(kept) < 2:
+            continue
+
+        segments.append(len(kept) - 1)
+
+        for step, co in kept:
+            points.extend([r[0] * co[0] + r[1] * co[1] + r[2] * co[2] + r[3] for r in rows])
+
+            if widths is not None:
+                thickness.append(widths[step])
+
+            if colors is not None:
+                colors.extend(strand_colors[strand * 3:strand * 3 + 3])
+
+            if uvs is not None:
+                uvs.extend(strand_uvs[strand * 2:strand * 2 + 2])
+
+    return HairData(segments, points, thickness, colors, uvs)
+
+
+def build_hair_numpy(coords, steps, transform, widths=None, strand_colors=None, strand_uvs=None):
+    """
+    NumPy version of build_hair_python()
+    """
+    co = numpy.asarray(coords, dtype=numpy.float64).reshape(-1, steps, 3)
+
+    keep = co.any(axis=2)
+    keep[:, 1:] &= (co[:, 1:] != co[:, :-1]).any(axis=2)
+
+    counts = keep.sum(axis=1)
+    keep &= (counts >= 2)[:, None]
+    strands = counts >= 2
+
+    matrix = numpy.array([list(transform[r]) for r in range(4)], dtype=numpy.float64)
+    points = co[keep].dot(matrix[:3, :3].T) + matrix[:3, 3]
+
+    # Index of the strand and of the step of each kept point
+    strand_index, step_index = numpy.nonzero(keep)
+
+    thickness = None
+    if widths is not None:
+        thickness = numpy.asarray(widths, dtype=numpy.float32)[step_index]
+
+    colors = None
+    if strand_colors is not None:
+        colors = numpy.asarray(strand_colors, dtype=numpy.float32).reshape(-1, 3)[strand_index]
+
+    uvs = None
+    if strand_uvs is not None:
+        uvs = numpy.asarray(strand_uvs, dtype=numpy.float32).reshape(-1, 2)[strand_index]
+
+    return HairData((counts[strands] - 1).astype(numpy.uint16), points.astype(numpy.float32),
+                    thickness, colors, uvs)
+
+
+def bspline_knots(point_count, degree):
+    """
+    Clamped uniform knot vector of a B-spline through point_count control
+    points: degree + 1 zeros, then 1, 2, ... up to point_count - degree
+    repeated degree + 1 times
+    """
+    knots = []
+
+    for i in range(point_count + degree + 1):
+        if i <= degree:
+            knots.append(0)
+        elif i >= point_count:
+            knots.append(point_count - degree)
+        else:
+            knots.append(i - degree)
+
+    return knots
+
+
+def bspline_parameters(point_count, degree, samples):
+    """
+    Curve parameters of samples points spread evenly over the whole curve.
+    The end parameter is moved inside the last knot span, where the basis
+    is defined.
+    """
+    if samples < 2:
+        return [0.0]
+
+    span = point_count - degree
+    return [0.0] + [i * span / (samples - 1) - 0.0000000000001 for i in range(1, samples)]
+
+
+def bspline_basis_python(point_count, degree, samples):
+    """
+    (samples x point_count) matrix of the B-spline basis functions at the
+    bspline_parameters(), as a list of rows. Uses the iterative Cox-de Boor
+    recursion, starting from the degree 0 functions and treating 0/0 as 0.
+    """
+    knots = bspline_knots(point_count, degree)
+    matrix = []
+
+    for u in bspline_parameters(point_count, degree, samples):
+        basis = [1.0 if knots[i] <= u < knots[i + 1] else 0.0 for i in range(len(knots) - 1)]
+
+        for d in range(1, degree + 1):
+            next_basis = []
+
+            for i in range(len(basis) - 1):
+                left = 0.0
+                if basis[i] != 0:
+                    left = (u - knots[i]) / (knots[i + d] - knots[i]) * basis[i]
+
+                right = 0.0
+                if basis[i + 1] != 0:
+                    right = (knots[i + 1 + d] - u) / (knots[i + 1 + d] - knots[i + 1]) * basis[i + 1]
+
+                next_basis.append(left + right)
+
+            basis = next_basis
+
+        matrix.append(basis)
+
+    return matrix
+
+
+def bspline_basis_numpy(point_count, degree, samples):
+    """
+    NumPy version of bspline_basis_python(), evaluating all parameters at once
+    """
+    knots = numpy.array(bspline_knots(point_count, degree), dtype=numpy.float64)
+    u = numpy.array(bspline_parameters(point_count, degree, samples), dtype=numpy.float64)[:, None]
+
+    basis = ((knots[:-1] <= u) & (u < knots[1:])).astype(numpy.float64)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        for d in range(1, degree + 1):
+            count = basis.shape[1] - 1
+
+            left_span = knots[d:d + count] - knots[:count]
+            right_span = knots[d + 1:d + 1 + count] - knots[1:1 + count]
+
+            left = numpy.where(basis[:, :-1] != 0, (u - knots[:count]) / left_span * basis[:, :-1], 0.0)
+            right = numpy.where(basis[:, 1:] != 0, (knots[d + 1:d + 1 + count] - u) / right_span * basis[:, 1:], 0.0)
+
+            basis = left + right
+
+    return basis
+
+
+# Basis matrices by (point count, degree, samples), strands of a hair system
+# mostly share the same point count
+_basis_cache = {}
+
+
+def bspline_basis(point_count, degree, samples):
+    key = (point_count, degree, samples)
+
+    if key not in _basis_cache:
+        if numpy is not None:
+            _basis_cache[key] = bspline_basis_numpy(point_count, degree, samples)
+        else:
+            _basis_cache[key] = bspline_basis_python(point_count, degree, samples)
+
+    return _basis_cache[key]
+
+
+def evaluate_bsplines(strands, degree, samples):
+    """
+    Replace the points of each strand, a list of (x, y, z), with samples
+    points of the B-spline they are the control points of. Strands with the
+    same number of points are evaluated together with one basis matrix.
+    Strands with no more than degree points have no B-spline and are
+    returned unchanged.
+    """
+    by_length = {}
+    for index, points in enumerate(strands):
+        by_length.setdefault(len(points), []).append(index)
+
+    curves = list(strands)
+
+    for point_count, indices in by_length.items():
+        if point_count <= degree:
+            continue
+
+        basis = bspline_basis(point_count, degree, samples)
+
+        if numpy is not None:
+            control = numpy.array([strands[i] for i in indices], dtype=numpy.float64).reshape(-1, point_count, 3)
+            evaluated = numpy.einsum('sn,knc->ksc', basis, control).tolist()
+        else:
+            evaluated = [[[sum(w * p[c] for w, p in zip(row, strands[i])) for c in range(3)] for row in basis]
+                         for i in indices]
+
+        for i, points in zip(indices, evaluated):
+            curves[i] = points
+
+    return curves
+
+
+def adaptive_strand_points(points, max_angle):
+    """
+    Drop points of a strand where it hardly bends: a point is only kept once
+    the strand has turned by max_angle (radians) since the last kept point.
+    The first and last points are always kept.
+    """
+    if max_angle <= 0 or len(points) < 3:
+        return points
+
+    kept = [points[0]]
+    turned = 0.0
+
+    for j in range(1, len(points) - 1):
+        a = [points[j][c] - points[j - 1][c] for c in range(3)]
+        b = [points[j + 1][c] - points[j][c] for c in range(3)]
+        length = math.sqrt(sum(x * x for x in a) * sum(x * x for x in b))
+
+        if length > 0:
+            cos_angle = sum(x * y for x, y in zip(a, b)) / length
+            turned += math.acos(min(max(cos_angle, -1.0), 1.0))
+
+        if turned >= max_angle:
+            kept.append(points[j])
+            turned = 0.0
+
+    kept.append(points[-1])
+    return kept
+
+
+if numpy is not None:
+    build_hair = build_hair_numpy
+    sample_image = sample_image_numpy
+else:
+    build_hair = build_hair_python
+    sample_image = sample_image_python
+
+
+def _block(values, type_code, dtype):
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return numpy.ascontiguousarray(values, dtype=dtype).tobytes()
+
+    return array.array(type_code, values).tobytes()
+
+
+def write_hair_file(path, hair, default_segments, default_thickness, default_color=DEFAULT_COLOR):
+    """
+    Write HairData to a .hair file, with one write() call per block
+    """
+    header = _HEADER.pack(HAIR_MAGIC, hair.strand_count, hair.point_count, hair.flags, default_segments,
+                          default_thickness, 0.0, default_color[0], default_color[1], default_color[2],
+                          HAIR_INFO.encode())
+
+    with open(path, 'wb') as hair_file:
+        hair_file.write(header)
+        hair_file.write(_block(hair.segments, 'H', '<u2'))
+        hair_file.write(_block(hair.points, 'f', '<f4'))
+
+        if hair.thickness is not None:
+            hair_file.write(_block(hair.thickness, 'f', '<f4'))
+
+        if hair.colors is not None:
+            hair_file.write(_block(hair.colors, 'f', '<f4'))
+
+        if hair.uvs is not None:
+            hair_file.write(_block(hair.uvs, 'f', '<f4'))
+
+
+def read_hair_file(path):
+    """
+    Read a .hair file written by write_hair_file(). Returns the header values
+    as a dict and the data as HairData with flat lists.
+    """
+    with open(path, 'rb') as hair_file:
+        data = hair_file.read()
+
+    magic, strand_count, point_count, flags, default_segments, default_thickness, default_transparency, \
+        r, g, b, info = _HEADER.unpack_from(data)
+
+    if magic != HAIR_MAGIC:
+        raise Exception('Not a hair file: %s' % path)
+
+    offset = _HEADER.size
+
+    def block(type_code, count):
+        nonlocal offset
+        values = array.array(type_code)
+        values.frombytes(data[offset:offset + values.itemsize * count])
+        offset += values.itemsize * count
+        return values.tolist()
+
+    segments = block('H', strand_count) if flags & HAS_SEGMENTS else []
+    points = block('f', point_count * 3) if flags & HAS_POINTS else []
+    thickness = block('f', point_count) if flags & HAS_THICKNESS else None
+
+    if flags & HAS_TRANSPARENCY:
+        block('f', point_count)
+
+    colors = block('f', point_count * 3) if flags & HAS_COLOR else None
+    uvs = block('f', point_count * 2) if flags & HAS_UV else None
+
+    header = {
+        'flags': flags,
+        'default_segments': default_segments,
+        'default_thickness': default_thickness,
+        'default_transparency': default_transparency,
+        'default_color': (r, g, b),
+        'info': info.rstrip(b'\0').decode(),
+    }
+
+    return header, HairData(segments, points, thickness, colors, uvs)
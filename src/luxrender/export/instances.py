@@ -0,0 +1,96 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Batched output of static object instances for the file API.
+
+Every instance used to get its own AttributeBegin block with a Transform,
+NamedMaterial, Interior, Exterior and ObjectInstance. Instances which only
+differ by their transform are collected instead, and written at the end of
+the geometry export as one AttributeBegin block per prototype, material and
+volumes, holding a Transform and ObjectInstance line per instance. Transform
+replaces the current transformation, so no TransformBegin/End is needed
+between the instances.
+"""
+
+import array, collections
+
+from ..export import get_float_precision
+from ..export import numeric
+
+# Instances formatted per write, bounding the size of the strings
+WRITE_CHUNK = 4096
+
+
+class InstanceBatches(object):
+    def __init__(self):
+        # {(prototype, material, interior, exterior): array of 16 floats per instance}
+        self.batches = collections.OrderedDict()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, prototype, material, interior, exterior, transform):
+        """
+        Add an instance of the object prototype, with the named material
+        and volumes or None, and transform as 16 floats like matrix_to_list()
+        """
+        key = (prototype, material, interior, exterior)
+
+        if key not in self.batches:
+            self.batches[key] = array.array('d')
+
+        self.batches[key].extend(transform)
+        self.count += 1
+
+    def write(self, lux_context):
+        """
+        Write and forget all instances
+        """
+        precision = numeric.FIXED if get_float_precision() == 'FIXED' else numeric.DOUBLE
+
+        for (prototype, material, interior, exterior), transforms in self.batches.items():
+            lux_context.attributeBegin(comment='%i instances of %s' % (len(transforms) // 16, prototype))
+
+            if material is not None:
+                lux_context.namedMaterial(material)
+
+            if interior is not None:
+                lux_context.interior(interior)
+
+            if exterior is not None:
+                lux_context.exterior(exterior)
+
+            for start in range(0, len(transforms), WRITE_CHUNK * 16):
+                strings = numeric.float_strings(transforms[start:start + WRITE_CHUNK * 16], precision)
+                lux_context.objectInstances(prototype, [' '.join(strings[i:i + 16])
+                                                        for i in range(0, len(strings), 16)])
+
+            lux_context.attributeEnd()
+
+        self.batches.clear()
+        self.count = 0
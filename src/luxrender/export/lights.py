@@ -33,7 +33,7 @@ from ..extensions_framework import util as efutil
 from ..outputs.file_api import Files
 from ..export import ParamSet, get_worldscale, matrix_to_list
 from ..export import fix_matrix_order
-from ..export import is_obj_visible
+from ..export.snapshot import SceneSnapshot
 
 
 def attr_light(scene, lux_context, light, name, group, light_type, params, transform=None, portals=[]):
@@ -299,9 +299,10 @@ def exportLight(scene, lux_context, ob, matrix, portals=[]):
     return False
 
 
-def lights(lux_context, geometry_scene, visibility_scene, mesh_definitions):
+def lights(lux_context, geometry_scene, visibility_scene, mesh_definitions, snapshot=None):
     """
     lux_context		pylux.Context
+    snapshot		SceneSnapshot of visibility_scene, or None
     Iterate over the given scene's light sources,
     and export the compatible ones to the context lux_context.
 
@@ -332,18 +333,23 @@ def lights(lux_context, geometry_scene, visibility_scene, mesh_definitions):
             for mesh_def_key in mesh_def_keys[obdata]:
                 portal_shapes.append(mesh_definitions.get(mesh_def_key)[0])
 
+    if snapshot is None:
+        snapshot = SceneSnapshot(visibility_scene)
+
     # Then iterate for lights
-    for ob in geometry_scene.objects:
-        if not is_obj_visible(visibility_scene, ob) or ob.hide_render:
+    for record in snapshot.records(geometry_scene):
+        ob = record.obj
+
+        if not record.visible:
             continue
 
         # skip dupli (child) objects when they are not lamps
-        if (ob.parent and ob.parent.is_duplicator) and ob.type != 'LAMP':
+        if record.parent_is_duplicator and record.type != 'LAMP':
             continue
 
         # we have to check for duplis before the "LAMP" check
         # to support a mesh/object which got lamp as dupli object
-        if ob.is_duplicator and ob.dupli_type in ('GROUP', 'VERTS', 'FACES'):
+        if record.is_duplicator and record.dupli_type in ('GROUP', 'VERTS', 'FACES'):
             # create dupli objects
             ob.dupli_list_create(geometry_scene)
 
@@ -358,7 +364,7 @@ def lights(lux_context, geometry_scene, visibility_scene, mesh_definitions):
             if ob.dupli_list:
                 ob.dupli_list_clear()
         else:
-            if ob.type == 'LAMP':
+            if record.type == 'LAMP':
                 have_light |= exportLight(visibility_scene, lux_context, ob, ob.matrix_world, portal_shapes)
 
     return have_light
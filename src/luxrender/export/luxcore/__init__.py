@@ -25,20 +25,28 @@
 # ***** END GPL LICENCE BLOCK *****
 #
 
-import bpy, time
+import bpy, os, time
 
+from ...extensions_framework import util as efutil
 from ...outputs import LuxManager, LuxLog
-from ...outputs.luxcore_api import pyluxcore
+from ...outputs.luxcore_api import load_pyluxcore
 from ...outputs.luxcore_api import ToValidLuxCoreName
+from ...outputs.profiler import profiler
+from ...export.motion import MotionSampleCache
+from ...export.volumes import clear_decoded_frames
+
+# The exporter modules import pyluxcore when they are loaded
+pyluxcore = load_pyluxcore()
 
 # TODO: remove refactoring state comments
+from .fingerprints import DependencyIndex
 from .camera import CameraExporter      # finished
 from .config import ConfigExporter      # finished
 from .duplis import DupliExporter       # needs testing
 from .lights import LightExporter       # ported to new interface, but crucial refactoring/cleanup still missing
 from .materials import MaterialExporter # some features missing
 from .meshes import MeshExporter        # finished
-from .objects import ObjectExporter     # some features missing
+from .objects import ObjectExporter, ExportedNames     # some features missing
 from .textures import TextureExporter   # finished
 from .volumes import VolumeExporter     # finished
 
@@ -74,11 +82,20 @@ class LuxCoreExporter(object):
         # Namecache to map an ascending number to each lightgroup name
         self.lightgroup_cache = {}
 
+        # LuxCore names defined for each Blender object, structure: {blender object: ExportedNames}
+        self.exported_names = {}
+
+        # Datablocks each converted element depends on, to find what to convert again after an edit
+        self.dependencies = DependencyIndex()
+
         # Temporary caches to avoid multiple exporting
         self.temp_material_cache = set()
         self.temp_texture_cache = set()
         self.temp_volume_cache = set()
 
+        # Motion samples of all objects and particles, only set during convert()
+        self.motion_samples = None
+
         # Special exporters that are not stored in caches (because there's only one camera and config)
         self.config_exporter = ConfigExporter(self, self.blender_scene, self.is_viewport_render)
         self.camera_exporter = CameraExporter(self.blender_scene, self.is_viewport_render, self.context)
@@ -106,8 +123,16 @@ class LuxCoreExporter(object):
 
         start_time = time.time()
 
-        self.convert_camera()
-        self.__convert_all_volumes()
+        if self.blender_scene.luxrender_testing.profile_export:
+            profiler.start(bpy.path.clean_name(self.blender_scene.name))
+        else:
+            profiler.stop()
+
+        with profiler.scope('camera'):
+            self.convert_camera()
+
+        with profiler.scope('volumes'):
+            self.__convert_all_volumes()
 
         # Materials, textures, lights and meshes are all converted by their respective Blender object
         object_amount = len(self.blender_scene.objects)
@@ -115,19 +140,31 @@ class LuxCoreExporter(object):
         if luxcore_scene is None:
             luxcore_scene = pyluxcore.Scene(self.blender_scene.luxcore_scenesettings.imageScale)
 
-        for blender_object in self.blender_scene.objects:
-            if self.renderengine.test_break():
-                print('EXPORT CANCELLED BY USER')
-                break
+        with profiler.scope('motion_samples'):
+            self.motion_samples = self.__sample_motion()
+
+        try:
+            for blender_object in self.blender_scene.objects:
+                if self.renderengine.test_break():
+                    print('EXPORT CANCELLED BY USER')
+                    break
 
-            object_counter += 1
-            self.renderengine.update_stats('Exporting...', 'Object: ' + blender_object.name)
-            self.renderengine.update_progress(object_counter / object_amount)
+                object_counter += 1
+                self.renderengine.update_stats('Exporting...', 'Object: ' + blender_object.name)
+                self.renderengine.update_progress(object_counter / object_amount)
 
-            self.convert_object(blender_object, luxcore_scene)
+                with profiler.scope('object'):
+                    self.convert_object(blender_object, luxcore_scene)
+                profiler.count('objects')
+        finally:
+            # Later updates of single objects sample their current motion
+            self.motion_samples = None
+            # Smoke frames are only shared by the volumes and textures of one export
+            clear_decoded_frames()
 
         # Convert config at last so all lightgroups and passes are defined
-        self.convert_config(film_width, film_height)
+        with profiler.scope('config'):
+            self.convert_config(film_width, film_height)
 
         # Debug output
         if self.blender_scene.luxcore_translatorsettings.print_config:
@@ -139,6 +176,15 @@ class LuxCoreExporter(object):
         print('Export took %.1fs' % export_time)
         engine = self.blender_scene.luxcore_enginesettings.renderengine_type
         message = 'Compiling OpenCL Kernels...' if 'OCL' in engine else 'Starting LuxRender...'
+
+        if profiler.enabled:
+            profile_path = efutil.filesystem_path(self.blender_scene.render.filepath)
+            if not os.path.isdir(profile_path):
+                os.makedirs(profile_path)
+
+            message = profiler.finish(profile_path)
+            print('Export profile: %s' % message)
+
         self.renderengine.update_stats('Export Finished (%.1fs)' % export_time, message)
 
         # Create luxcore scene and config
@@ -148,6 +194,31 @@ class LuxCoreExporter(object):
         return luxcore_config
 
 
+    def __sample_motion(self):
+        """
+        Sample the motion of all objects and particle systems with one scene
+        update per subframe
+        """
+        motion_samples = MotionSampleCache(self.blender_scene)
+        camera = self.blender_scene.camera
+
+        object_blur = camera is not None and camera.data.luxrender_camera.usemblur and \
+            camera.data.luxrender_camera.objectmblur
+        steps = camera.data.luxrender_camera.motion_blur_samples if object_blur else 0
+
+        for blender_object in self.blender_scene.objects:
+            if object_blur:
+                motion_samples.add_object(blender_object, steps)
+
+            if self.blender_scene.luxcore_translatorsettings.export_particles:
+                for psys in blender_object.particle_systems:
+                    if psys.settings.render_type in ['OBJECT', 'GROUP']:
+                        motion_samples.add_particle_system(blender_object, psys, steps + 1)
+
+        motion_samples.sample()
+        return motion_samples
+
+
     def convert_camera(self):
         camera_props_keys = self.camera_exporter.properties.GetAllNames()
         self.scene_properties.DeleteAll(camera_props_keys)
@@ -156,11 +227,11 @@ class LuxCoreExporter(object):
         self.__set_scene_properties(self.camera_exporter.properties)
 
 
-    def convert_config(self, film_width, film_height):
+    def convert_config(self, film_width, film_height, interactive=False):
         config_props_keys = self.config_exporter.properties.GetAllNames()
         self.config_properties.DeleteAll(config_props_keys)
 
-        self.config_exporter.convert(film_width, film_height)
+        self.config_exporter.convert(film_width, film_height, interactive)
         self.config_properties.Set(self.config_exporter.properties)
 
 
@@ -176,58 +247,139 @@ class LuxCoreExporter(object):
             self.scene_properties.DeleteAll(old_properties)
             self.updated_scene_properties.DeleteAll(old_properties)
 
-        new_properties = exporter.convert(update_mesh, update_material, luxcore_scene)
+        # Lights and duplis are converted anew by the object exporter, which adds their names to this entry
+        self.__remove_exporters([self.light_cache.pop(blender_object, None)] + self.__pop_duplis(blender_object))
+        old_names = self.exported_names.get(blender_object)
+        names = ExportedNames()
+        self.exported_names[blender_object] = names
+
+        with self.dependencies.converting(blender_object, 'object'):
+            new_properties = exporter.convert(update_mesh, update_material, luxcore_scene)
+
         self.__set_scene_properties(new_properties)
+        names.add(new_properties)
 
         cache[blender_object] = exporter
 
+        if old_names is not None:
+            # e.g. the object was hidden from render, or has less material slots or particles than before
+            self.__delete_from_scene(luxcore_scene, old_names.objects - names.objects, old_names.lights - names.lights)
+
+
+    def remove_object(self, blender_object, luxcore_scene):
+        """
+        Delete everything that was exported for a Blender object that was deleted or hidden, including its duplis
+        and particles. The object itself is not accessed, as it may already be deleted.
+        """
+        exporters = [self.object_cache.pop(blender_object, None), self.light_cache.pop(blender_object, None)]
+        self.__remove_exporters(exporters + self.__pop_duplis(blender_object))
+        self.dependencies.forget(blender_object)
+
+        names = self.exported_names.pop(blender_object, None)
+
+        if names is not None:
+            self.__delete_from_scene(luxcore_scene, names.objects, names.lights)
+
+
+    def __pop_duplis(self, blender_object):
+        """
+        Remove the dupli exporters of a Blender object from the cache, and return them
+        """
+        exporters = []
+
+        for key in [key for key in self.dupli_cache if key[0] == blender_object]:
+            exporters.append(self.dupli_cache.pop(key))
+            self.dependencies.forget(key)
+
+        return exporters
+
+
+    def __remove_exporters(self, exporters):
+        """
+        Delete the scene properties of exporters removed from their cache
+        """
+        for exporter in exporters:
+            if exporter is not None:
+                old_properties = exporter.properties.GetAllNames()
+                self.scene_properties.DeleteAll(old_properties)
+                self.updated_scene_properties.DeleteAll(old_properties)
+
+
+    def __delete_from_scene(self, luxcore_scene, object_names, light_names):
+        for name in object_names:
+            print('Removing object %s' % name)
+            try:
+                luxcore_scene.DeleteObject(name)
+            except RuntimeError as err:
+                # Not parsed into the scene yet
+                print('Could not remove object %s: %s' % (name, err))
+
+        for name in light_names:
+            print('Removing light %s' % name)
+            try:
+                luxcore_scene.DeleteLight(name)
+            except RuntimeError as err:
+                print('Could not remove light %s: %s' % (name, err))
+
 
     def convert_mesh(self, blender_object, luxcore_scene):
         exporter = MeshExporter(self.blender_scene, self.is_viewport_render, blender_object)
-        self.__convert_element(blender_object.data, self.mesh_cache, exporter, luxcore_scene)
+        self.__convert_element(blender_object.data, self.mesh_cache, exporter, luxcore_scene, 'mesh')
 
 
     def convert_material(self, material):
         if material in self.temp_material_cache:
+            self.dependencies.add(material)
             return
         else:
             self.temp_material_cache.add(material)
 
         exporter = MaterialExporter(self, self.blender_scene, material)
-        self.__convert_element(material, self.material_cache, exporter)
+        self.__convert_element(material, self.material_cache, exporter, kind='material')
 
 
     def convert_texture(self, texture):
         if texture in self.temp_texture_cache:
+            self.dependencies.add(texture)
             return
         else:
             self.temp_texture_cache.add(texture)
 
         exporter = TextureExporter(self, self.blender_scene, texture)
-        self.__convert_element(texture, self.texture_cache, exporter)
+        self.__convert_element(texture, self.texture_cache, exporter, kind='texture')
 
 
     def convert_light(self, blender_object, luxcore_scene):
         exporter = LightExporter(self, self.blender_scene, blender_object)
-        self.__convert_element(blender_object, self.light_cache, exporter, luxcore_scene)
+        self.__convert_element(blender_object, self.light_cache, exporter, luxcore_scene, 'light')
+        self.__add_exported_names(blender_object, self.light_cache[blender_object])
 
 
     def convert_volume(self, volume):
         if volume in self.temp_volume_cache:
+            self.dependencies.add(volume)
             return
         else:
             self.temp_volume_cache.add(volume)
 
         exporter = VolumeExporter(self, self.blender_scene, volume)
-        self.__convert_element(volume, self.volume_cache, exporter)
+        self.__convert_element(volume, self.volume_cache, exporter, kind='volume')
 
 
     def convert_duplis(self, luxcore_scene, duplicator, dupli_system=None):
         exporter = DupliExporter(self, self.blender_scene, duplicator, dupli_system, self.is_viewport_render)
-        self.__convert_element((duplicator, dupli_system), self.dupli_cache, exporter, luxcore_scene)
+        self.__convert_element((duplicator, dupli_system), self.dupli_cache, exporter, luxcore_scene, 'duplis')
+        self.__add_exported_names(duplicator, self.dupli_cache[(duplicator, dupli_system)])
+
+
+    def __add_exported_names(self, blender_object, exporter):
+        if blender_object not in self.exported_names:
+            self.exported_names[blender_object] = ExportedNames()
 
+        self.exported_names[blender_object].add(exporter.properties)
 
-    def __convert_element(self, element, cache, exporter, luxcore_scene=None):
+
+    def __convert_element(self, element, cache, exporter, luxcore_scene=None, kind=None):
         if element in cache:
             exporter = cache[element]
             old_properties = exporter.properties.GetAllNames()
@@ -236,7 +388,9 @@ class LuxCoreExporter(object):
             self.scene_properties.DeleteAll(old_properties)
             self.updated_scene_properties.DeleteAll(old_properties)
 
-        new_properties = exporter.convert(luxcore_scene) if luxcore_scene else exporter.convert()
+        with self.dependencies.converting(element, kind):
+            new_properties = exporter.convert(luxcore_scene) if luxcore_scene else exporter.convert()
+
         self.__set_scene_properties(new_properties)
 
         cache[element] = exporter
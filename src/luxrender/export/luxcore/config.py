@@ -43,7 +43,10 @@ class ConfigExporter(object):
         self.by_material_id_counter = 0
 
 
-    def convert(self, film_width, film_height):
+    def convert(self, film_width, film_height, interactive=False):
+        """
+        interactive: fast settings for the reduced viewport resolution used while the scene is edited
+        """
         realtime_settings = self.blender_scene.luxcore_realtimesettings
 
         if self.is_viewport_render and not realtime_settings.use_finalrender_settings:
@@ -54,6 +57,9 @@ class ConfigExporter(object):
             self.__convert_filter()
             self.__convert_sampler()
 
+        if self.is_viewport_render and interactive:
+            self.__convert_interactive_settings()
+
         self.__convert_film_size(film_width, film_height)
         self.__convert_accelerator()
         self.__convert_custom_props()
@@ -342,6 +348,20 @@ class ConfigExporter(object):
             self.properties.Set(pyluxcore.Property('film.filter.width', [1.5]))
     
     
+    def __convert_interactive_settings(self):
+        # Path tracing gives the quickest overview, the filter would only blur the upscaled film further
+        engine = self.properties.Get('renderengine.type').GetString()
+
+        if engine == 'FILESAVER':
+            return
+
+        engine = 'PATHOCL' if engine.endswith('OCL') else 'PATHCPU'
+
+        self.properties.Set(pyluxcore.Property('renderengine.type', [engine]))
+        self.properties.Set(pyluxcore.Property('sampler.type', ['RANDOM']))
+        self.properties.Set(pyluxcore.Property('film.filter.type', ['NONE']))
+
+
     def __convert_custom_props(self):
         engine_settings = self.blender_scene.luxcore_enginesettings
         # Custom Properties
@@ -25,10 +25,48 @@
 # ***** END GPL LICENCE BLOCK *****
 #
 
-import mathutils, time
+import collections, mathutils, time
 from ...outputs.luxcore_api import pyluxcore
+from ...outputs.luxcore_api import ToValidLuxCoreName
+from ...export import get_worldscale
+from ...export import matrix_to_list
+from ...export.meshdata import numpy
+from ...export.motion import read_particle_states
 
 from .objects import ObjectExporter
+from .utils import calc_shutter
+
+# Object types whose duplis are converted as instances of one prototype
+INSTANCE_TYPES = {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT'}
+
+
+def is_instanceable(obj):
+    """
+    True if all duplis of the object can use the shapes and materials of one converted prototype
+    """
+    if obj.type not in INSTANCE_TYPES or obj.is_duplicator or len(obj.particle_systems) > 0:
+        return False
+
+    # Proxies are named after the object only
+    return not (obj.luxrender_object.append_proxy and obj.luxrender_object.proxy_type == 'plymesh')
+
+
+def transformation_lists(matrices):
+    """
+    Same result as matrix_to_list(matrix, apply_worldscale=True) for each matrix, computed in one step with numpy
+    """
+    if numpy is None or len(matrices) < 2:
+        return [matrix_to_list(matrix, apply_worldscale=True) for matrix in matrices]
+
+    ws = get_worldscale(as_scalematrix=False)
+    transforms = numpy.array(matrices, dtype=numpy.float32)
+
+    # matrix * Matrix.Scale(ws, 4) in single precision, then the translation is scaled by the float ws
+    transforms[:, :, :3] *= numpy.float32(ws)
+    transforms[:, :3, 3] = transforms[:, :3, 3].astype(numpy.float64) * ws
+
+    # Column major, like matrix_to_list()
+    return transforms.transpose(0, 2, 1).reshape(-1, 16).astype(numpy.float64).tolist()
 
 
 class DupliExporter(object):
@@ -71,22 +109,36 @@ class DupliExporter(object):
             self.duplicator.dupli_list_create(self.blender_scene, settings=mode)
             self.dupli_amount = len(self.duplicator.dupli_list)
 
+            # {dupli object: [(dupli_name_suffix, matrix, anim_matrices)]}
+            instances = collections.OrderedDict()
+            group_visibility = {}
+
             for dupli_ob in self.duplicator.dupli_list:
                 dupli_object = dupli_ob.object
 
                 # Check for group layer visibility, if the object is in a group
-                group_visible = len(dupli_object.users_group) == 0
+                if dupli_object not in group_visibility:
+                    group_visible = len(dupli_object.users_group) == 0
 
-                for group in dupli_object.users_group:
-                    group_visible |= True in [a & b for a, b in zip(dupli_object.layers, group.layers)]
+                    for group in dupli_object.users_group:
+                        group_visible |= True in [a & b for a, b in zip(dupli_object.layers, group.layers)]
 
-                if not group_visible:
+                    group_visibility[dupli_object] = group_visible
+
+                if not group_visibility[dupli_object]:
                     continue
 
                 # Convert dupli object
                 dupli_name_suffix = '_%s_%d' % (self.duplicator.name, self.dupli_number)
                 self.dupli_number += 1
 
+                if is_instanceable(dupli_object):
+                    if dupli_object not in instances:
+                        instances[dupli_object] = []
+
+                    instances[dupli_object].append((dupli_name_suffix, dupli_ob.matrix.copy(), None))
+                    continue
+
                 object_exporter = ObjectExporter(self.luxcore_exporter, self.blender_scene, self.is_viewport_render,
                                                  dupli_object, dupli_name_suffix)
                 properties = object_exporter.convert(update_mesh=True, update_material=True, luxcore_scene=luxcore_scene,
@@ -95,6 +147,9 @@ class DupliExporter(object):
 
             self.duplicator.dupli_list_clear()
 
+            for dupli_object, dupli_instances in instances.items():
+                self.__convert_instances(luxcore_scene, dupli_object, dupli_instances)
+
             time_elapsed = time.time() - time_start
             print('[%s] Dupli export finished (%.3fs)' % (self.duplicator.name, time_elapsed))
         except Exception as err:
@@ -121,8 +176,13 @@ class DupliExporter(object):
             old_subframe = self.blender_scene.frame_subframe
             current_frame = self.blender_scene.frame_current
 
-            # Collect particles that should be visible
-            particles = [p for p in particle_system.particles if p.alive_state == 'ALIVE' or (
+            # Particle states of all steps, if the exporter sampled them already
+            particle_states = None
+            if self.luxcore_exporter.motion_samples is not None:
+                particle_states = self.luxcore_exporter.motion_samples.particle_states(obj, particle_system, steps)
+
+            # Collect indices of particles that should be visible
+            particles = [index for index, p in enumerate(particle_system.particles) if p.alive_state == 'ALIVE' or (
                 p.alive_state == 'UNBORN' and particle_system.settings.show_unborn) or (
                              p.alive_state in ['DEAD', 'DYING'] and particle_system.settings.use_dead)]
 
@@ -133,35 +193,40 @@ class DupliExporter(object):
             dupli_objects = [dupli.object for dupli in obj.dupli_list]
             particle_dupliobj_pairs = list(zip(particles, dupli_objects))
 
-            # dict of the form {particle: [dupli_object, []]} (the empty list will contain the matrices)
+            # dict of the form {particle index: [dupli_object, []]} (the empty list will contain the matrices)
             particle_dupliobj_dict = {pair[0]: [pair[1], []] for pair in particle_dupliobj_pairs}
 
             for i in range(steps):
-                self.blender_scene.frame_set(current_frame, subframe=i / steps)
+                if particle_states is None:
+                    self.blender_scene.frame_set(current_frame, subframe=i / steps)
+                    step_states = read_particle_states(particle_system)
+                else:
+                    step_states = particle_states[i]
 
                 # Calculate matrix for each particle
                 # I'm not using obj.dupli_list[i].matrix because it contains wrong positions
                 for particle in particle_dupliobj_dict:
                     dupli_object = particle_dupliobj_dict[particle][0]
+                    location, rotation, size, alive_state = step_states[particle]
 
-                    scale = dupli_object.scale * particle.size
+                    scale = dupli_object.scale * size
                     scale_matrix = mathutils.Matrix()
                     scale_matrix[0][0] = scale.x
                     scale_matrix[1][1] = scale.y
                     scale_matrix[2][2] = scale.z
 
-                    rotation_matrix = particle.rotation.to_matrix()
+                    rotation_matrix = rotation.to_matrix()
                     rotation_matrix.resize_4x4()
 
                     transform_matrix = mathutils.Matrix()
-                    transform_matrix[0][3] = particle.location.x
-                    transform_matrix[1][3] = particle.location.y
-                    transform_matrix[2][3] = particle.location.z
+                    transform_matrix[0][3] = location.x
+                    transform_matrix[1][3] = location.y
+                    transform_matrix[2][3] = location.z
 
                     transform = transform_matrix * rotation_matrix * scale_matrix
 
                     # Only use motion blur for living particles
-                    if particle.alive_state == 'ALIVE':
+                    if alive_state == 'ALIVE':
                         # Don't append matrix if it is identical to the previous one
                         if particle_dupliobj_dict[particle][1][-1:] != transform:
                             particle_dupliobj_dict[particle][1].append(transform)
@@ -170,9 +235,13 @@ class DupliExporter(object):
                         particle_dupliobj_dict[particle][1] = [transform]
 
             obj.dupli_list_clear()
-            self.blender_scene.frame_set(current_frame, subframe=old_subframe)
+
+            if particle_states is None:
+                self.blender_scene.frame_set(current_frame, subframe=old_subframe)
 
             # Export particles
+            instances = collections.OrderedDict()
+
             for particle in particle_dupliobj_dict:
                 dupli_object = particle_dupliobj_dict[particle][0]
                 anim_matrices = particle_dupliobj_dict[particle][1]
@@ -183,12 +252,23 @@ class DupliExporter(object):
 
                 dupli_name_suffix = '_%s_%d' % (self.dupli_system.name, self.dupli_number)
                 self.dupli_number += 1
+
+                if is_instanceable(dupli_object):
+                    if dupli_object not in instances:
+                        instances[dupli_object] = []
+
+                    instances[dupli_object].append((dupli_name_suffix, anim_matrices[0], anim_matrices))
+                    continue
+
                 object_exporter = ObjectExporter(self.luxcore_exporter, self.blender_scene, self.is_viewport_render,
                                                  dupli_object, dupli_name_suffix)
                 properties = object_exporter.convert(update_mesh=True, update_material=True, luxcore_scene=luxcore_scene,
                                                      matrix=anim_matrices[0], is_dupli=True, anim_matrices=anim_matrices)
                 self.properties.Set(properties)
 
+            for dupli_object, dupli_instances in instances.items():
+                self.__convert_instances(luxcore_scene, dupli_object, dupli_instances)
+
             time_elapsed = time.time() - time_start
             print('[%s: %s] Particle export finished (%.3fs)' % (self.duplicator.name, particle_system.name, time_elapsed))
         except Exception as err:
@@ -197,6 +277,54 @@ class DupliExporter(object):
             traceback.print_exc()
 
 
+    def __convert_instances(self, luxcore_scene, dupli_object, instances):
+        """
+        Converts all duplis of one object, instances is a list of (dupli_name_suffix, matrix, anim_matrices).
+        The object is converted once as a prototype, the duplis are LuxCore objects with the prototype's shapes and
+        materials and their own transformation, named like the ObjectExporter of each dupli would name them.
+        """
+        prototype = ObjectExporter(self.luxcore_exporter, self.blender_scene, self.is_viewport_render, dupli_object)
+        dupli_name_suffix, matrix, anim_matrices = instances[0]
+        properties = prototype.convert(update_mesh=True, update_material=True, luxcore_scene=luxcore_scene,
+                                       matrix=matrix, is_dupli=True, anim_matrices=anim_matrices)
+
+        # Keep the shapes of the prototype (e.g. pointiness), its objects are replaced by the duplis
+        for key in properties.GetAllNames():
+            if not key.startswith('scene.objects.'):
+                self.properties.Set(properties.Get(key))
+
+        if not prototype.exported_objects:
+            return
+
+        transforms = transformation_lists([matrix for dupli_name_suffix, matrix, anim_matrices in instances])
+
+        for (dupli_name_suffix, matrix, anim_matrices), transform in zip(instances, transforms):
+            # The suffix starts with a valid character, so this equals converting the whole name
+            suffix = ToValidLuxCoreName(dupli_name_suffix)
+
+            for exported_object in prototype.exported_objects:
+                prefix = 'scene.objects.' + exported_object.luxcore_object_name + suffix
+
+                self.properties.Set(pyluxcore.Property(prefix + '.material', exported_object.luxcore_material_name))
+                self.properties.Set(pyluxcore.Property(prefix + '.shape', exported_object.luxcore_shape_name))
+                self.properties.Set(pyluxcore.Property(prefix + '.transformation', transform))
+
+                if anim_matrices and len(anim_matrices) > 1:
+                    self.__convert_motion_blur(prefix, anim_matrices)
+
+
+    def __convert_motion_blur(self, prefix, anim_matrices):
+        lux_camera = self.blender_scene.camera.data.luxrender_camera
+        shutter_open, shutter_close = calc_shutter(self.blender_scene, lux_camera)
+        step = (shutter_close - shutter_open) / lux_camera.motion_blur_samples
+
+        for i in range(len(anim_matrices)):
+            step_time = i * step
+            matrix = matrix_to_list(anim_matrices[i], apply_worldscale=True, invert=True)
+            self.properties.Set(pyluxcore.Property('%s.motion.%d.time' % (prefix, i), step_time))
+            self.properties.Set(pyluxcore.Property('%s.motion.%d.transformation' % (prefix, i), matrix))
+
+
     def __convert_hair(self):
         """
         Converts PATH type particle systems (hair systems)
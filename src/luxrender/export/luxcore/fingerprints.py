@@ -0,0 +1,241 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Simon Wendsche
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Fingerprints of the Blender settings read by the camera, config and volume
+exporters, and the index of the datablocks each converted element depends on.
+
+The viewport update check converted the camera, all volumes and the config on
+every update (and the camera on every redraw) and compared the str() of the
+resulting Properties. A fingerprint is a tuple of the values these exporters
+read, so the conversion only has to run when the fingerprint changed.
+
+Blender flags the datablocks that were edited, DependencyIndex finds the
+materials, volumes and objects that have to be converted again because of them.
+"""
+
+import collections, contextlib
+
+import bpy
+
+# Elements which LuxCore looks up by name, their users need no update when they are converted again
+NAMED_KINDS = ('material', 'volume')
+
+# {RNA struct identifier: [(property identifier, kind)]}
+rna_layouts = {}
+
+
+def rna_layout(group):
+    identifier = group.bl_rna.identifier
+
+    if identifier not in rna_layouts:
+        layout = []
+
+        for prop in group.bl_rna.properties:
+            if prop.identifier == 'rna_type':
+                continue
+
+            if prop.type == 'POINTER':
+                kind = 'pointer'
+            elif prop.type == 'COLLECTION':
+                kind = 'collection'
+            elif getattr(prop, 'is_array', False):
+                kind = 'array'
+            else:
+                kind = 'value'
+
+            layout.append((prop.identifier, kind))
+
+        rna_layouts[identifier] = layout
+
+    return rna_layouts[identifier]
+
+
+def freeze(value):
+    """
+    Hashable copy of an RNA array value
+    """
+    if isinstance(value, str):
+        return value
+
+    try:
+        return tuple(freeze(v) for v in value)
+    except TypeError:
+        return value
+
+
+def rna_fingerprint(group):
+    """
+    Values of all properties of a property group, including its nested
+    property groups and collections. Referenced IDs are compared by identity,
+    changes to their data are reported by Blender's is_updated flags.
+    """
+    if group is None:
+        return None
+
+    values = []
+
+    for identifier, kind in rna_layout(group):
+        value = getattr(group, identifier, None)
+
+        if kind == 'pointer':
+            if value is not None and not isinstance(value, bpy.types.ID):
+                value = rna_fingerprint(value)
+        elif kind == 'collection':
+            value = tuple(rna_fingerprint(item) for item in value)
+        elif kind == 'array':
+            value = freeze(value)
+
+        values.append(value)
+
+    return tuple(values)
+
+
+def object_placement(obj):
+    if obj is None:
+        return None
+
+    return obj.name, freeze(obj.matrix_world), freeze(obj.location), freeze(obj.rotation_euler)
+
+
+def worldscale_settings(scene):
+    unit_settings = scene.unit_settings
+    return scene.name, unit_settings.system, unit_settings.scale_length, scene.luxrender_world.preview_object_size
+
+
+def camera_fingerprint(context):
+    """
+    Everything CameraExporter reads for the viewport camera
+    """
+    region_data = context.region_data
+
+    if region_data is None:
+        return None
+
+    scene = context.scene
+    camera = scene.camera
+    camera_settings = None
+
+    if camera is not None:
+        data = camera.data
+        lux_camera = data.luxrender_camera
+        clipping_plane = None
+
+        if lux_camera.enable_clipping_plane:
+            clipping_plane = object_placement(bpy.data.objects.get(lux_camera.clipping_plane_obj))
+
+        camera_settings = (object_placement(camera), data.angle, data.lens, data.shift_x, data.shift_y,
+                           data.dof_distance, object_placement(data.dof_object), rna_fingerprint(lux_camera),
+                           clipping_plane)
+
+    return (region_data.view_perspective, freeze(region_data.view_matrix), region_data.view_camera_zoom,
+            freeze(region_data.view_camera_offset), context.space_data.lens,
+            context.region.width, context.region.height,
+            scene.render.fps, scene.render.fps_base, worldscale_settings(scene), camera_settings)
+
+
+def config_fingerprint(luxcore_exporter, film_width, film_height, interactive=False):
+    """
+    Everything ConfigExporter reads
+    """
+    scene = luxcore_exporter.blender_scene
+    camera = scene.camera
+    camera_settings = rna_fingerprint(camera.data.luxrender_camera) if camera is not None else None
+
+    return (film_width, film_height, interactive, scene.render.filepath, len(luxcore_exporter.lightgroup_cache),
+            rna_fingerprint(scene.luxcore_enginesettings), rna_fingerprint(scene.luxcore_realtimesettings),
+            rna_fingerprint(scene.luxcore_translatorsettings), rna_fingerprint(scene.luxrender_channels),
+            rna_fingerprint(scene.luxrender_lightgroups), camera_settings)
+
+
+def volume_fingerprint(volume):
+    """
+    Everything VolumeExporter reads from the volume, edits of the textures it
+    references are found with DependencyIndex
+    """
+    return (rna_fingerprint(volume), worldscale_settings(volume.id_data))
+
+
+class DependencyIndex(object):
+    """
+    Datablocks and the elements converted from them. Every conversion of a
+    LuxCoreExporter runs in converting(), and the elements converted meanwhile
+    (meshes, materials, textures, volumes) become dependencies of it.
+
+    Dependencies are only added while a session runs, a dependency that is no
+    longer used causes at most one conversion too many.
+    """
+
+    def __init__(self):
+        self.kinds = {}  # {element: kind}
+        self.dependents = collections.defaultdict(set)  # {datablock: {element converted from it}}
+        self.stack = []
+
+    def add(self, element):
+        """
+        Record element as a dependency of the element being converted
+        """
+        if self.stack and self.stack[-1] != element:
+            self.dependents[element].add(self.stack[-1])
+
+    @contextlib.contextmanager
+    def converting(self, element, kind):
+        self.add(element)
+        self.kinds.setdefault(element, kind)
+        self.stack.append(element)
+
+        try:
+            yield
+        finally:
+            self.stack.pop()
+
+    def affected(self, datablocks):
+        """
+        Elements to convert again after datablocks changed. Materials and
+        volumes are looked up by name, so their users are not affected.
+        """
+        affected = set()
+        pending = [d for d in datablocks if self.kinds.get(d) not in NAMED_KINDS]
+
+        while pending:
+            for element in self.dependents.get(pending.pop(), ()):
+                if element not in affected:
+                    affected.add(element)
+
+                    if self.kinds.get(element) not in NAMED_KINDS:
+                        pending.append(element)
+
+        return affected
+
+    def forget(self, element):
+        """
+        Remove an element which was deleted from the scene
+        """
+        self.kinds.pop(element, None)
+        self.dependents.pop(element, None)
+
+        for dependents in self.dependents.values():
+            dependents.discard(element)
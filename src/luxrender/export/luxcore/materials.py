@@ -29,6 +29,7 @@ import bpy
 
 from ...outputs.luxcore_api import pyluxcore
 from ...outputs.luxcore_api import ToValidLuxCoreName
+from ...outputs.profiler import profiler
 from ...export.materials import get_texture_from_scene
 
 from .utils import convert_texture_channel, generate_volume_name
@@ -53,7 +54,9 @@ class MaterialExporter(object):
         # Remove old properties
         self.properties = pyluxcore.Properties()
 
-        self.__convert_material()
+        with profiler.scope('material'):
+            self.__convert_material()
+        profiler.count('materials')
 
         return self.properties
 
@@ -25,12 +25,11 @@
 # ***** END GPL LICENCE BLOCK *****
 #
 
-import time
-
 import bpy
 
 from ...outputs.luxcore_api import pyluxcore
 from ...outputs.luxcore_api import ToValidLuxCoreName
+from ...outputs.profiler import profiler
 
 
 class ExportedShape(object):
@@ -54,14 +53,13 @@ class MeshExporter(object):
         # Remove old properties
         self.properties = pyluxcore.Properties()
 
-        self.__convert_object_geometry(luxcore_scene)
+        with profiler.scope('mesh'):
+            self.__convert_object_geometry(luxcore_scene)
 
         return self.properties
 
 
     def __convert_object_geometry(self, luxcore_scene):
-        start_time = time.time()
-
         obj = self.blender_object
 
         if obj.data is None or obj.type not in ['MESH', 'CURVE', 'SURFACE', 'META', 'FONT']:
@@ -72,14 +70,13 @@ class MeshExporter(object):
         if prepared_mesh is None or len(prepared_mesh.tessfaces) == 0:
             return
 
+        profiler.count('faces', len(prepared_mesh.tessfaces))
+
         luxcore_shape_name = self.__generate_shape_name()
         self.__export_mesh_to_shape(luxcore_shape_name, prepared_mesh, luxcore_scene)
 
         bpy.data.meshes.remove(prepared_mesh)
 
-        end_time = time.time() - start_time
-        print('Export of mesh %s took %.3fs' % (self.blender_object.data.name, end_time))
-
 
     def __prepare_export_mesh(self):
         modifier_mode = 'PREVIEW' if self.is_viewport_render else 'RENDER'
@@ -43,6 +43,32 @@ class ExportedObject(object):
         self.luxcore_material_name = material_name
 
 
+class ExportedNames(object):
+    """
+    Names of the LuxCore objects, shapes and lights defined for one Blender object, including its duplis and
+    particles. Meshes are shared between objects by the mesh cache and are not recorded here.
+    """
+    def __init__(self):
+        self.objects = set()
+        self.shapes = set()
+        self.lights = set()
+
+
+    def add(self, properties):
+        for key in properties.GetAllNames():
+            parts = key.split('.', 3)
+
+            if len(parts) < 3 or parts[0] != 'scene':
+                continue
+
+            if parts[1] == 'objects':
+                self.objects.add(parts[2])
+            elif parts[1] == 'shapes':
+                self.shapes.add(parts[2])
+            elif parts[1] == 'lights':
+                self.lights.add(parts[2])
+
+
 class ObjectExporter(object):
     def __init__(self, luxcore_exporter, blender_scene, is_viewport_render=False, blender_object=None,
                  dupli_name_suffix=''):
@@ -236,6 +262,10 @@ class ObjectExporter(object):
 
         if lux_camera.usemblur and lux_camera.objectmblur:
             steps = lux_camera.motion_blur_samples
+
+            if self.luxcore_exporter.motion_samples is not None:
+                return self.luxcore_exporter.motion_samples.object_matrices(self.blender_object, steps)
+
             return object_anim_matrices(self.blender_scene, self.blender_object, steps=steps)
         else:
             return None
\ No newline at end of file
@@ -30,6 +30,7 @@ import bpy, math, mathutils, os, tempfile
 from ...extensions_framework import util as efutil
 from ...outputs.luxcore_api import pyluxcore
 from ...outputs.luxcore_api import ToValidLuxCoreName
+from ...outputs.profiler import profiler
 from ...export import matrix_to_list
 from ...export import get_expanded_file_name
 
@@ -50,7 +51,9 @@ class TextureExporter(object):
         # Remove old properties
         self.properties = pyluxcore.Properties()
 
-        self.__convert_texture(name)
+        with profiler.scope('texture'):
+            self.__convert_texture(name)
+        profiler.count('textures')
 
         return self.properties
 
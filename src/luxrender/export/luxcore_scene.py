@@ -31,7 +31,7 @@ import math
 import mathutils
 
 from ..outputs import LuxManager, LuxLog
-from ..outputs.luxcore_api import pyluxcore
+from ..outputs.luxcore_api import load_pyluxcore
 from ..outputs.luxcore_api import ToValidLuxCoreName
 from ..export import get_worldscale
 from ..export import matrix_to_list
@@ -42,6 +42,8 @@ from ..export import get_expanded_file_name
 from ..export import ParamSet
 from ..export.materials import get_texture_from_scene
 
+pyluxcore = load_pyluxcore()
+
 
 # TODO: delete this file once refactoring is finished
 
@@ -24,7 +24,7 @@
 #
 # ***** END GPL LICENCE BLOCK *****
 #
-import os
+import collections, os
 
 import bpy
 
@@ -32,6 +32,7 @@ from ..extensions_framework import util as efutil
 
 from ..export import ParamSet
 from ..outputs import LuxLog, LuxManager
+from ..outputs.profiler import profiler
 from ..properties import find_node
 
 
@@ -49,28 +50,119 @@ class TextureCounter(object):
         if self.ident in TextureCounter.stack:
             raise Exception("Recursion in texture assignment: %s" % ' -> '.join(TextureCounter.stack))
         TextureCounter.stack.append(self.ident)
+        self.scope = profiler.scope('texture')
+        self.scope.__enter__()
+        profiler.count('textures')
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.scope.__exit__(exc_type, exc_val, exc_tb)
         TextureCounter.stack.pop()
 
 
+class ExportRegistry(object):
+    """
+    Scene definitions (textures or named materials) in order of registration,
+    indexed by name. Definitions are written once, by write_new().
+
+    Definitions registered with share=True are also indexed by their type,
+    plugin and parameters; an identical definition under another name is
+    not written again, and the name of the first one is returned instead.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.clear()
+
+    def clear(self):
+        self.definitions = collections.OrderedDict()  # {name: arguments, or name of the shared definition}
+        self.shared = {}  # {canonical key: name}
+        self.pending = []
+        self.exported = set()
+        self.hits = 0
+        self.duplicates = 0
+
+    def __contains__(self, name):
+        return name in self.definitions
+
+    def __len__(self):
+        return len(self.definitions)
+
+    @staticmethod
+    def canonical_value(value):
+        if type(value) in (list, tuple):
+            return tuple([ExportRegistry.canonical_value(v) for v in value])
+
+        return value
+
+    @staticmethod
+    def canonical_key(arguments):
+        """
+        Hashable key of the definition, independent of the parameter order
+        """
+        params = arguments[-1]
+        items = sorted([(p.type, p.name, ExportRegistry.canonical_value(p.value)) for p in params])
+
+        return tuple(arguments[:-1]) + tuple(items)
+
+    def resolve(self, name):
+        """
+        Name under which the definition of name is written
+        """
+        definition = self.definitions[name]
+
+        return definition if type(definition) is str else name
+
+    def add(self, name, arguments, share=False):
+        """
+        Register the definition arguments (..., ParamSet) under name, and
+        return the name to reference. The first definition of a name wins.
+        """
+        if name in self.definitions:
+            self.hits += 1
+            profiler.count('%s_hits' % self.kind)
+            return self.resolve(name)
+
+        if share:
+            key = self.canonical_key(arguments)
+
+            if key in self.shared:
+                self.duplicates += 1
+                profiler.count('%s_duplicates' % self.kind)
+                self.definitions[name] = self.shared[key]
+                return self.shared[key]
+
+            self.shared[key] = name
+
+        self.definitions[name] = arguments
+        self.pending.append(name)
+
+        return name
+
+    def is_exported(self, name):
+        return name in self.exported
+
+    def write_new(self, write):
+        """
+        Call write(name, *arguments) for each definition not yet written
+        """
+        pending, self.pending = self.pending, []
+
+        for name in pending:
+            write(name, *self.definitions[name])
+            self.exported.add(name)
+
+
 class ExportedTextures(object):
     # static class variables
-    texture_names = []  # Name
-    texture_types = []  # Float|Color
-    texture_texts = []  # Texture plugin name
-    texture_psets = []  # ParamSets
-    exported_texture_names = []
+    registry = ExportRegistry('texture')
+    last_name = None
     scalers_count = 0
 
     @staticmethod
     def clear():
         TextureCounter.reset()
-        ExportedTextures.texture_names = []
-        ExportedTextures.texture_types = []
-        ExportedTextures.texture_texts = []
-        ExportedTextures.texture_psets = []
-        ExportedTextures.exported_texture_names = []
+        ExportedTextures.registry.clear()
+        ExportedTextures.last_name = None
         ExportedTextures.scalers_count = 0
 
     @staticmethod
@@ -79,29 +171,24 @@ class ExportedTextures(object):
         return ExportedTextures.scalers_count
 
     @staticmethod
-    def texture(lux_context, name, type, texture, params):
+    def texture(lux_context, name, type, texture, params, share=False):
+        """
+        Register the texture, and return the name to reference, which is not
+        name if share is set and an identical texture is already registered
+        """
         if lux_context.API_TYPE == 'PURE':
             lux_context.texture(name, type, texture, params)
-            ExportedTextures.exported_texture_names.append(name)
-            return
+        else:
+            name = ExportedTextures.registry.add(name, (type, texture, params), share)
+
+        ExportedTextures.last_name = name
 
-        if name not in ExportedTextures.exported_texture_names:
-            ExportedTextures.texture_names.append(name)
-            ExportedTextures.texture_types.append(type)
-            ExportedTextures.texture_texts.append(texture)
-            ExportedTextures.texture_psets.append(params)
+        return name
 
     @staticmethod
     def export_new(lux_context):
-        for n, ty, tx, p in zip(
-                ExportedTextures.texture_names,
-                ExportedTextures.texture_types,
-                ExportedTextures.texture_texts,
-                ExportedTextures.texture_psets
-        ):
-            if lux_context.API_TYPE != 'PURE' and n not in ExportedTextures.exported_texture_names:
-                lux_context.texture(n, ty, tx, p)
-                ExportedTextures.exported_texture_names.append(n)
+        if lux_context.API_TYPE != 'PURE':
+            ExportedTextures.registry.write_new(lux_context.texture)
 
 
 class MaterialCounter(object):
@@ -119,23 +206,23 @@ class MaterialCounter(object):
             raise Exception("Recursion in material assignment: %s" % ' -> '.join(MaterialCounter.stack))
 
         MaterialCounter.stack.append(self.ident)
+        self.scope = profiler.scope('material')
+        self.scope.__enter__()
+        profiler.count('materials')
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.scope.__exit__(exc_type, exc_val, exc_tb)
         MaterialCounter.stack.pop()
 
 
 class ExportedMaterials(object):
     # Static class variables
-    material_names = []
-    material_psets = []
-    exported_material_names = []
+    registry = ExportRegistry('material')
 
     @staticmethod
     def clear():
         MaterialCounter.reset()
-        ExportedMaterials.material_names = []
-        ExportedMaterials.material_psets = []
-        ExportedMaterials.exported_material_names = []
+        ExportedMaterials.registry.clear()
 
     @staticmethod
     def makeNamedMaterial(lux_context, name, paramset):
@@ -143,16 +230,12 @@ class ExportedMaterials(object):
             lux_context.makeNamedMaterial(name, paramset)
             return
 
-        if name not in ExportedMaterials.exported_material_names:
-            ExportedMaterials.material_names.append(name)
-            ExportedMaterials.material_psets.append(paramset)
+        ExportedMaterials.registry.add(name, (paramset,))
 
     @staticmethod
     def export_new_named(lux_context):
-        for n, p in zip(ExportedMaterials.material_names, ExportedMaterials.material_psets):
-            if lux_context.API_TYPE != 'PURE' and n not in ExportedMaterials.exported_material_names:
-                lux_context.makeNamedMaterial(n, p)
-                ExportedMaterials.exported_material_names.append(n)
+        if lux_context.API_TYPE != 'PURE':
+            ExportedMaterials.registry.write_new(lux_context.makeNamedMaterial)
 
 
 def get_instance_materials(ob):
@@ -0,0 +1,219 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond, Daniel Genrich, Michael Klemm
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Vectorised extraction of tessellated mesh data for the PLY and native mesh
+exporters. The whole mesh is pulled out of Blender with foreach_get() and the
+per-material parts are assembled with NumPy, producing exactly the same vertex
+order and indices as the face-by-face loops in GeometryExporter.
+"""
+
+try:
+    import numpy
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    numpy = None
+    NUMPY_AVAILABLE = False
+
+
+def layer_uvs(uv_layer, face_count):
+    """
+    Read the uv_raw values of a tessface UV layer into a (faces, 4, 2) array
+    """
+    uvs = numpy.empty(face_count * 8, dtype=numpy.float32)
+    uv_layer.foreach_get('uv_raw', uvs)
+    return uvs.reshape(face_count, 4, 2)
+
+
+def layer_colors(vertex_color_layer, face_count):
+    """
+    Read a tessface vertex colour layer into a (faces, 4, 3) array of bytes,
+    converted the same way as int(255 * c) in the legacy exporter
+    """
+    cols = numpy.empty((4, face_count * 3), dtype=numpy.float32)
+    for j in range(4):
+        vertex_color_layer.foreach_get('color%d' % (j + 1), cols[j])
+
+    cols = cols.reshape(4, face_count, 3).transpose(1, 0, 2)
+    return (255 * cols.astype(numpy.float64)).astype(numpy.uint8)
+
+
+class MeshPart(object):
+    """
+    Exported vertex data and face vertex indices for one material of a mesh
+    """
+
+    def __init__(self, co, no, uv, vc, face_sides, face_indices):
+        self.co = co
+        self.no = no
+        self.uv = uv
+        self.vc = vc
+        self.face_sides = face_sides
+        # (faces, 4) exported vertex indices, unused slots of triangles are 0
+        self.face_indices = face_indices
+
+    @property
+    def vertex_count(self):
+        return len(self.co)
+
+    @property
+    def face_count(self):
+        return len(self.face_sides)
+
+    def triangle_indices(self):
+        """
+        Triangulate quads into (0, 1, 2), (0, 2, 3) and return the flattened
+        vertex index array
+        """
+        fi = self.face_indices
+        tris = numpy.concatenate((fi[:, [0, 1, 2]], fi[:, [0, 2, 3]]), axis=1)
+        keep = numpy.ones(tris.shape, dtype=bool)
+        keep[self.face_sides == 3, 3:] = False
+
+        return tris[keep]
+
+
+class TessfaceArrays(object):
+    """
+    Vertex and tessface data of a mesh held in NumPy arrays
+    """
+
+    def __init__(self, mesh):
+        vertex_count = len(mesh.vertices)
+        face_count = len(mesh.tessfaces)
+        self.face_count = face_count
+
+        self.vert_co = numpy.empty(vertex_count * 3, dtype=numpy.float32)
+        mesh.vertices.foreach_get('co', self.vert_co)
+        self.vert_co = self.vert_co.reshape(vertex_count, 3)
+
+        self.vert_no = numpy.empty(vertex_count * 3, dtype=numpy.float32)
+        mesh.vertices.foreach_get('normal', self.vert_no)
+        self.vert_no = self.vert_no.reshape(vertex_count, 3)
+
+        self.face_verts = numpy.empty(face_count * 4, dtype=numpy.int32)
+        mesh.tessfaces.foreach_get('vertices_raw', self.face_verts)
+        self.face_verts = self.face_verts.reshape(face_count, 4)
+
+        self.face_no = numpy.empty(face_count * 3, dtype=numpy.float32)
+        mesh.tessfaces.foreach_get('normal', self.face_no)
+        self.face_no = self.face_no.reshape(face_count, 3)
+
+        self.face_smooth = numpy.empty(face_count, dtype=bool)
+        mesh.tessfaces.foreach_get('use_smooth', self.face_smooth)
+
+        material_index = numpy.empty(face_count, dtype=numpy.int32)
+        mesh.tessfaces.foreach_get('material_index', material_index)
+
+        # A tessface is a triangle when its fourth vertex index is 0
+        self.face_sides = numpy.where(self.face_verts[:, 3] != 0, 4, 3).astype(numpy.uint8)
+
+        # Collate faces by material index, keeping the original face order
+        order = numpy.argsort(material_index, kind='mergesort')
+        sorted_indices = material_index[order]
+        material_indices, starts = numpy.unique(sorted_indices, return_index=True)
+        ends = list(starts[1:]) + [face_count]
+
+        self.faces_by_material = {}
+        for mi, start, end in zip(material_indices.tolist(), starts, ends):
+            self.faces_by_material[mi] = order[start:end]
+
+        self.uvs = None
+        self.colors = None
+
+    def material_indices(self):
+        return self.faces_by_material.keys()
+
+    def load_layers(self, uv_layer=None, vertex_color_layer=None):
+        """
+        Read the given tessface UV and vertex colour layers, once per mesh
+        """
+        if uv_layer and self.uvs is None:
+            self.uvs = layer_uvs(uv_layer, self.face_count)
+        if vertex_color_layer and self.colors is None:
+            self.colors = layer_colors(vertex_color_layer, self.face_count)
+
+    def part(self, material_index, use_uvs=False, use_colors=False):
+        """
+        Build the exported vertices and face indices of a material, with the
+        layers previously read by load_layers().
+
+        Corners of flat shaded faces always become new vertices, corners of
+        smooth faces are merged when their co/normal/uv/colour are identical,
+        numbering vertices in order of first use.
+        """
+        faces = self.faces_by_material[material_index]
+        face_sides = self.face_sides[faces]
+        corner_mask = numpy.arange(4)[numpy.newaxis, :] < face_sides[:, numpy.newaxis]
+
+        corner_face = numpy.repeat(faces, face_sides)
+        corner_slot = numpy.nonzero(corner_mask)[1]
+        corner_vert = self.face_verts[faces][corner_mask]
+        corner_smooth = self.face_smooth[corner_face]
+
+        co = self.vert_co[corner_vert]
+        no = numpy.where(corner_smooth[:, numpy.newaxis], self.vert_no[corner_vert], self.face_no[corner_face])
+        uv = self.uvs[corner_face, corner_slot] if use_uvs else None
+        vc = self.colors[corner_face, corner_slot] if use_colors else None
+
+        corner_count = len(corner_face)
+        first_use = numpy.arange(corner_count)
+        smooth_corners = numpy.nonzero(corner_smooth)[0]
+
+        if len(smooth_corners) > 0:
+            # Adding 0.0 folds -0.0 into 0.0, matching float equality of the tuple keys
+            key_fields = [('co', '<f4', (3,)), ('no', '<f4', (3,))]
+            key_values = [co[smooth_corners] + 0.0, no[smooth_corners] + 0.0]
+            if uv is not None:
+                key_fields.append(('uv', '<f4', (2,)))
+                key_values.append(uv[smooth_corners] + 0.0)
+            if vc is not None:
+                key_fields.append(('vc', 'u1', (3,)))
+                key_values.append(vc[smooth_corners])
+
+            keys = numpy.empty(len(smooth_corners), dtype=key_fields)
+            for (name, _, _), value in zip(key_fields, key_values):
+                keys[name] = value
+            keys = keys.view(numpy.dtype((numpy.void, keys.dtype.itemsize)))
+
+            _, first_key, key_inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+            first_use[smooth_corners] = smooth_corners[first_key][key_inverse.ravel()]
+
+        is_new = first_use == numpy.arange(corner_count)
+        new_index = numpy.cumsum(is_new) - 1
+
+        face_indices = numpy.zeros((len(faces), 4), dtype=numpy.uint32)
+        face_indices[corner_mask] = new_index[first_use]
+
+        return MeshPart(
+            co[is_new],
+            no[is_new],
+            uv[is_new] if uv is not None else None,
+            vc[is_new] if vc is not None else None,
+            face_sides,
+            face_indices
+        )
@@ -0,0 +1,134 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Scene wide motion blur sampling.
+
+object_anim_matrices() calls scene.frame_set() for every substep of every
+object, and each call re-evaluates the whole scene. MotionSampleCache instead
+collects the objects and particle systems which need motion samples, then
+visits each required subframe once and records all of them in one pass.
+"""
+
+from ..export import object_anim_matrices
+
+
+def read_particle_states(particle_system):
+    """
+    (location, rotation, size, alive_state) of every particle
+    """
+    return [(p.location.copy(), p.rotation.copy(), p.size, p.alive_state) for p in particle_system.particles]
+
+
+class MotionSampleCache(object):
+    """
+    Objects are sampled at the same subframes as object_anim_matrices() with
+    the same steps, i / steps for i in 0..steps, so the results are identical.
+    Every added object is sampled: whether it moves can depend on anything
+    the scene evaluates, like the deformed mesh of a vertex parent, and one
+    more matrix_world read per subframe costs far less than a frame_set().
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+
+        self.object_steps = {}
+        self.particle_steps = {}
+
+        # {subframe: {obj: matrix}} and {subframe: {(obj, psys): states}}
+        self.object_samples = {}
+        self.particle_samples = {}
+
+        self.sampled = False
+
+    def add_object(self, obj, steps):
+        self.object_steps[obj] = steps
+
+    def add_particle_system(self, obj, particle_system, steps):
+        """
+        Record the particles at i / steps for i in 0..steps-1
+        """
+        self.particle_steps[(obj, particle_system)] = steps
+
+    def subframes(self):
+        subframes = set()
+
+        for steps in self.object_steps.values():
+            subframes.update([i / float(steps) for i in range(steps + 1)])
+
+        for steps in self.particle_steps.values():
+            subframes.update([i / steps for i in range(steps)])
+
+        return sorted(subframes)
+
+    def sample(self):
+        """
+        Visit each subframe once and record the matrices and particles
+        """
+        scene = self.scene
+        old_subframe = scene.frame_subframe
+        current_frame = scene.frame_current
+
+        subframes = self.subframes()
+
+        for subframe in subframes:
+            scene.frame_set(current_frame, subframe=subframe)
+
+            self.object_samples[subframe] = {obj: obj.matrix_world.copy() for obj in self.object_steps}
+            self.particle_samples[subframe] = {key: read_particle_states(key[1]) for key in self.particle_steps}
+
+        if subframes:
+            scene.frame_set(current_frame, subframe=old_subframe)
+
+        self.sampled = True
+
+    def object_matrices(self, obj, steps=1):
+        """
+        Same result as object_anim_matrices(scene, obj, steps): steps + 1
+        matrices if the object moves within the frame, otherwise an empty list
+        """
+        if not self.sampled or self.object_steps.get(obj) != steps:
+            return object_anim_matrices(self.scene, obj, steps)
+
+        matrices = [self.object_samples[i / float(steps)][obj] for i in range(steps + 1)]
+
+        for matrix in matrices[1:]:
+            if matrix != matrices[0]:
+                return matrices
+
+        return []
+
+    def particle_states(self, obj, particle_system, steps):
+        """
+        A list of read_particle_states() results for each step, or None if
+        the particle system was not sampled with these steps
+        """
+        key = (obj, particle_system)
+
+        if not self.sampled or self.particle_steps.get(key) != steps:
+            return None
+
+        return [self.particle_samples[i / steps][key] for i in range(steps)]
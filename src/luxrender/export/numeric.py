@@ -0,0 +1,119 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond, Daniel Genrich, Michael Klemm
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Text formatting of numeric parameter values for the scene files.
+
+Floats are written with the shortest representation which reads back to the
+same value, either as a double or as a single precision float. Most of the
+exported data comes from Blender as float32 anyway, so single precision
+output loses nothing while being about half the size of the old fixed
+'%0.15f' format, which is still available for comparison.
+"""
+
+import array
+
+from ..export.meshdata import numpy
+
+# NumPy 1.14 and later print floats with the shortest round trip repr
+NUMPY_SHORTEST_REPR = hasattr(numpy, 'format_float_positional')
+
+# Float precision modes
+DOUBLE = 'DOUBLE'  # shortest string which reads back as the same double
+SINGLE = 'SINGLE'  # shortest string which reads back as the same float32
+FIXED = 'FIXED'  # legacy fixed point output with 15 decimals
+
+
+def _single_strings(values):
+    """
+    Format values rounded to float32. Every value is first written with 7
+    significant digits, then values which do not read back as the same
+    float32 are written again with more digits, up to the 9 which are always
+    enough.
+    """
+    if NUMPY_SHORTEST_REPR:
+        # NumPy formats float32 values with their shortest repr in C
+        return numpy.asarray(values, dtype=numpy.float32).ravel().astype(str).tolist()
+
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        values = values.ravel().tolist()
+
+    values = array.array('f', values)
+    strings = ['%.7g' % v for v in values]
+    pending = range(len(strings))
+
+    for digits in (8, 9):
+        parsed = array.array('f', [float(strings[k]) for k in pending])
+        pending = [k for k, p in zip(pending, parsed) if p != values[k]]
+
+        if not pending:
+            break
+
+        fmt = '%%.%dg' % digits
+        for k in pending:
+            strings[k] = fmt % values[k]
+
+    return strings
+
+
+def float_strings(values, precision=DOUBLE):
+    """
+    Format a sequence or NumPy array of floats as a list of strings
+    """
+    if precision == SINGLE:
+        return _single_strings(values)
+
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        values = values.astype(numpy.float64).ravel().tolist()
+
+    if precision == FIXED:
+        return ['%0.15f' % v for v in values]
+
+    return [repr(float(v)) for v in values]
+
+
+def integer_strings(values):
+    """
+    Format a sequence or NumPy array of integers as a list of strings
+    """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return list(map(str, values.astype(numpy.int64).ravel().tolist()))
+
+    return list(map(str, map(int, values)))
+
+
+def format_float(value, precision=DOUBLE):
+    return float_strings((value,), precision)[0]
+
+
+def wrap_strings(strings, width):
+    """
+    Join strings with spaces, starting a new line every width items
+    """
+    if len(strings) <= width:
+        return ' '.join(strings)
+
+    return '\n'.join([' '.join(strings[i:i + width]) for i in range(0, len(strings), width)])
@@ -0,0 +1,135 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond, Daniel Genrich, Michael Klemm
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Worker pool for the parts of the geometry export that do not touch Blender
+data, such as packing and writing PLY files. Anything which reads bpy data
+or emits scene file statements stays on the main thread, so the exported
+scene files do not depend on the order in which the jobs complete.
+"""
+
+import multiprocessing
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def export_thread_count(engine_settings):
+    """
+    Number of export worker threads, following the render threads setting
+    """
+    if engine_settings.threads_auto:
+        try:
+            return multiprocessing.cpu_count()
+        except NotImplementedError:
+            return 1
+
+    return engine_settings.threads
+
+
+class ExportWorkerPool(object):
+    """
+    Run jobs on a bounded pool of threads. Each job declares roughly how many
+    bytes of data it holds; submit() blocks while the jobs in flight exceed
+    max_bytes, so the main thread cannot run arbitrarily far ahead of the
+    writers. With a single thread jobs are run immediately in the caller.
+    """
+
+    def __init__(self, threads=1, max_bytes=512 * 1024 * 1024):
+        self.threads = max(1, threads)
+        self.max_bytes = max_bytes
+
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.futures = []
+        self.error = None
+
+        if self.threads > 1:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads)
+        else:
+            self.executor = None
+
+    def submit(self, size, func, *args):
+        """
+        Queue func(*args), holding size bytes until it has finished
+        """
+        self.check()
+
+        if self.executor is None:
+            func(*args)
+            return
+
+        with self.condition:
+            # A job larger than the whole budget may still run on its own
+            while self.in_flight > 0 and self.in_flight + size > self.max_bytes:
+                self.condition.wait()
+            self.in_flight += size
+
+        self.futures.append(self.executor.submit(self._run, size, func, args))
+
+    def _run(self, size, func, args):
+        try:
+            func(*args)
+        except Exception as err:
+            if self.error is None:
+                self.error = err
+            raise
+        finally:
+            with self.condition:
+                self.in_flight -= size
+                self.condition.notify_all()
+
+    def check(self):
+        """
+        Re-raise the first exception raised by a job in the calling thread
+        """
+        if self.error is not None:
+            err, self.error = self.error, None
+            raise err
+
+    def finish(self):
+        """
+        Wait for all queued jobs and shut the pool down
+        """
+        if self.executor is not None:
+            for future in self.futures:
+                future.exception()
+
+        self.shutdown()
+        self.check()
+
+    def shutdown(self):
+        """
+        Drop the jobs which have not started yet and wait for the running
+        ones, without raising their errors. Used when the export is aborted.
+        """
+        if self.executor is not None:
+            for future in self.futures:
+                future.cancel()
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+        self.futures = []
@@ -0,0 +1,217 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond, Daniel Genrich, Michael Klemm
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Binary little endian PLY writer shared by the mesh exporter and the proxy
+export operator. Vertex and face elements are packed into one buffer each
+and written with a single write() call, either from the NumPy arrays built
+by export.meshdata or from the plain Python lists of the fallback path.
+"""
+
+import struct
+
+from ..export.meshdata import numpy
+
+PLY_COMMENT = 'Created by LuxBlend 2.6 exporter for LuxRender - www.luxrender.net'
+
+_TRIANGLE = struct.Struct('<B3I')
+_QUAD = struct.Struct('<B4I')
+
+
+def ply_header(vertex_count, face_count, uv=False, color=False):
+    """
+    Build the header declaring x y z nx ny nz [s t] [red green blue] vertex
+    properties and 'list uchar uint' faces
+    """
+    lines = [
+        'ply',
+        'format binary_little_endian 1.0',
+        'comment %s' % PLY_COMMENT,
+        'element vertex %d' % vertex_count,
+        'property float x',
+        'property float y',
+        'property float z',
+        'property float nx',
+        'property float ny',
+        'property float nz',
+    ]
+
+    if uv:
+        lines.extend(['property float s', 'property float t'])
+
+    if color:
+        lines.extend(['property uchar red', 'property uchar green', 'property uchar blue'])
+
+    lines.extend([
+        'element face %d' % face_count,
+        'property list uchar uint vertex_indices',
+        'end_header',
+    ])
+
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def vertex_format(uv=False, color=False):
+    """
+    struct format of one vertex record
+    """
+    return '<3f3f' + ('2f' if uv else '') + ('3B' if color else '')
+
+
+def vertex_dtype(uv=False, color=False):
+    """
+    Packed NumPy record type of one vertex, same layout as vertex_format()
+    """
+    fields = [('co', '<f4', (3,)), ('no', '<f4', (3,))]
+
+    if uv:
+        fields.append(('uv', '<f4', (2,)))
+
+    if color:
+        fields.append(('vc', 'u1', (3,)))
+
+    return numpy.dtype(fields)
+
+
+def pack_vertices(vertices, uv=False, color=False):
+    """
+    Pack a list of (co, no[, uv][, vc]) tuples
+    """
+    record = struct.Struct(vertex_format(uv, color))
+
+    if uv and color:
+        return b''.join([record.pack(*(co + no + st + vc)) for co, no, st, vc in vertices])
+    elif uv or color:
+        return b''.join([record.pack(*(co + no + extra)) for co, no, extra in vertices])
+    else:
+        return b''.join([record.pack(*(co + no)) for co, no in vertices])
+
+
+def pack_faces(faces):
+    """
+    Pack a list of triangle or quad vertex index lists
+    """
+    return b''.join([
+        _TRIANGLE.pack(3, *f) if len(f) == 3 else _QUAD.pack(4, *f)
+        for f in faces
+    ])
+
+
+def pack_vertex_arrays(co, no, uv=None, vc=None):
+    """
+    Interleave (n, 3) co/no, (n, 2) uv and (n, 3) uint8 colour arrays
+    """
+    records = numpy.empty(len(co), dtype=vertex_dtype(uv is not None, vc is not None))
+    records['co'] = co
+    records['no'] = no
+
+    if uv is not None:
+        records['uv'] = uv
+
+    if vc is not None:
+        records['vc'] = vc
+
+    return records.tobytes()
+
+
+def pack_face_arrays(face_sides, face_indices):
+    """
+    Pack faces given as an array of side counts (3 or 4) and an (n, 4) index
+    array whose fourth column is ignored for triangles
+    """
+    face_count = len(face_sides)
+    records = numpy.zeros(face_count, dtype=[('n', 'u1'), ('v', '<u4', (4,))])
+    records['n'] = face_sides
+    records['v'] = face_indices
+
+    # Drop the unused fourth index of triangles
+    raw = records.view(numpy.uint8).reshape(face_count, records.dtype.itemsize)
+    keep = numpy.ones(raw.shape, dtype=bool)
+    keep[numpy.asarray(face_sides) == 3, -4:] = False
+
+    return raw[keep].tobytes()
+
+
+def write_ply(ply_path, vertex_count, face_count, vertex_data, face_data, uv=False, color=False):
+    """
+    Write a PLY file from already packed vertex and face element buffers
+    """
+    with open(ply_path, 'wb') as ply:
+        ply.write(ply_header(vertex_count, face_count, uv, color))
+        ply.write(vertex_data)
+        ply.write(face_data)
+
+
+def read_ply(ply_path):
+    """
+    Read back a PLY file written by write_ply(). Returns a tuple of the
+    vertex property names, a list of vertex value tuples and a list of face
+    vertex index lists.
+    """
+    type_formats = {
+        'char': 'b', 'uchar': 'B', 'short': 'h', 'ushort': 'H',
+        'int': 'i', 'uint': 'I', 'float': 'f', 'double': 'd',
+    }
+
+    with open(ply_path, 'rb') as ply:
+        data = ply.read()
+
+    header_end = data.index(b'end_header\n') + len(b'end_header\n')
+    header = data[:header_end].decode().splitlines()
+
+    if header[0] != 'ply' or header[1] != 'format binary_little_endian 1.0':
+        raise Exception('Unsupported PLY file: %s' % ply_path)
+
+    elements = []
+    for line in header:
+        words = line.split()
+        if words[0] == 'element':
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == 'property':
+            elements[-1][2].append(words[1:])
+
+    offset = header_end
+    vertex_names = []
+    vertices = []
+    faces = []
+
+    for name, count, properties in elements:
+        if name == 'vertex':
+            vertex_names = [p[-1] for p in properties]
+            record = struct.Struct('<' + ''.join([type_formats[p[0]] for p in properties]))
+            vertices = [record.unpack_from(data, offset + k * record.size) for k in range(count)]
+            offset += count * record.size
+        elif name == 'face':
+            count_type, index_type = properties[0][1:3]
+            count_size = struct.calcsize('<' + type_formats[count_type])
+            index_size = struct.calcsize('<' + type_formats[index_type])
+            for k in range(count):
+                n = struct.unpack_from('<' + type_formats[count_type], data, offset)[0]
+                offset += count_size
+                faces.append(list(struct.unpack_from('<%d%s' % (n, type_formats[index_type]), data, offset)))
+                offset += n * index_size
+
+    return vertex_names, vertices, faces
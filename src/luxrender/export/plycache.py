@@ -0,0 +1,246 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond, Daniel Genrich, Michael Klemm
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Content addressed store for exported PLY files. Each file is named after the
+hash of its contents and written once into a cache directory shared by all
+frames, so unchanged geometry is not written again on later frames or
+renders. The PLY paths of the exported scene are hard links to the cache
+entries. An index file records the size and last use of every entry.
+
+The size limit applies to the disk space only the cache holds. An entry
+still linked from the files of an exported frame shares its data with
+them, so it does not count and is not removed: removing it would free
+nothing. Once those frames are deleted, the least recently used entries
+are removed until the rest fit in the limit. On file systems without hard
+links, the exported scene gets a copy of the entry. The cache then holds
+a second copy of every PLY, which counts against the limit in full, and
+only spares encoding the mesh again.
+
+One PLYCache is used for all geometry scenes of an export. Entries are
+looked up and added by the export worker threads.
+"""
+
+import hashlib, json, os, shutil, threading, time
+
+from ..extensions_framework import util as efutil
+
+from ..outputs import LuxLog
+
+
+def ply_cache_directory(export_path):
+    return '%s/%s/ply_cache' % (export_path, efutil.scene_filename())
+
+
+class PLYCache(object):
+    INDEX_FILENAME = 'index.json'
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.index_path = '/'.join([directory, self.INDEX_FILENAME])
+
+        # Entries used by the current export, these are never evicted
+        self.used = set()
+
+        # Entries being written by a job, and the condition other jobs
+        # needing the same entry wait on
+        self.pending = set()
+        self.condition = threading.Condition()
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.index = self.load_index()
+
+    def load_index(self):
+        """
+        Read the index, or rebuild it from the files on disk if it is
+        missing or unreadable
+        """
+        try:
+            with open(self.index_path, 'r') as index_file:
+                index = json.load(index_file)
+
+            if not isinstance(index, dict):
+                raise ValueError('index is not a dict')
+
+            return index
+        except (IOError, OSError, ValueError) as err:
+            if os.path.exists(self.index_path):
+                LuxLog('PLY cache index is invalid, rebuilding it: %s' % err)
+
+            index = {}
+            for filename in os.listdir(self.directory):
+                digest, ext = os.path.splitext(filename)
+                if ext == '.ply':
+                    st = os.stat(self.path(digest))
+                    index[digest] = {'size': st.st_size, 'last_used': st.st_mtime}
+
+            return index
+
+    def save_index(self):
+        tmp_path = '%s.tmp' % self.index_path
+        with self.condition:
+            index = json.dumps(self.index)
+
+        with open(tmp_path, 'w') as index_file:
+            index_file.write(index)
+
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def digest(*buffers):
+        h = hashlib.sha1()
+        for b in buffers:
+            h.update(b)
+
+        return h.hexdigest()
+
+    def path(self, digest):
+        return '/'.join([self.directory, '%s.ply' % digest])
+
+    def have(self, digest):
+        """
+        Check for an entry, marking it as used if it exists
+        """
+        with self.condition:
+            if digest in self.index and os.path.exists(self.path(digest)):
+                self.index[digest]['last_used'] = time.time()
+                self.used.add(digest)
+                return True
+
+        return False
+
+    def claim(self, digest):
+        """
+        Returns True if the caller has to write the entry, and then has to
+        call add() or release() for it. Returns False if the entry exists,
+        after waiting for a job which is still writing it.
+        """
+        with self.condition:
+            while digest in self.pending:
+                self.condition.wait()
+
+            if self.have(digest):
+                return False
+
+            self.pending.add(digest)
+            return True
+
+    def add(self, digest, size):
+        with self.condition:
+            self.index[digest] = {'size': size, 'last_used': time.time()}
+            self.used.add(digest)
+            self.pending.discard(digest)
+            self.condition.notify_all()
+
+    def release(self, digest):
+        """
+        Give up a claimed entry which could not be written
+        """
+        with self.condition:
+            self.pending.discard(digest)
+            self.condition.notify_all()
+
+    def link(self, digest, path):
+        """
+        Make path refer to the entry, as a hard link if the file system
+        supports it and as a copy otherwise
+        """
+        tmp_path = '%s.tmp' % path
+
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        try:
+            os.link(self.path(digest), tmp_path)
+        except (AttributeError, OSError):
+            shutil.copyfile(self.path(digest), tmp_path)
+
+        os.replace(tmp_path, path)
+
+    def held_sizes(self):
+        """
+        {digest: size} of the entries whose files no exported frame links
+        to, and 0 for the others. Entries whose file is missing are dropped
+        from the index.
+        """
+        sizes = {}
+
+        for digest in list(self.index.keys()):
+            try:
+                st = os.stat(self.path(digest))
+            except OSError:
+                del self.index[digest]
+                continue
+
+            sizes[digest] = self.index[digest]['size'] if st.st_nlink == 1 else 0
+
+        return sizes
+
+    def collect(self):
+        """
+        Remove files which are not in the index, and evict the least
+        recently used entries only the cache holds until they fit in
+        max_size
+        """
+        removed = 0
+
+        for filename in os.listdir(self.directory):
+            digest, ext = os.path.splitext(filename)
+            if ext == '.ply' and digest not in self.index:
+                os.remove('/'.join([self.directory, filename]))
+                removed += 1
+
+        held_sizes = self.held_sizes()
+        total_size = sum(held_sizes.values())
+        by_age = sorted(self.index.items(), key=lambda item: item[1]['last_used'])
+
+        for digest, entry in by_age:
+            if total_size <= self.max_size:
+                break
+
+            if digest in self.used or held_sizes[digest] == 0:
+                continue
+
+            os.remove(self.path(digest))
+            del self.index[digest]
+            total_size -= held_sizes[digest]
+            removed += 1
+
+        self.save_index()
+
+        return removed
+
+    def clear(self):
+        for digest in list(self.index.keys()):
+            if os.path.exists(self.path(digest)):
+                os.remove(self.path(digest))
+
+        self.index = {}
+        self.used = set()
+        self.collect()
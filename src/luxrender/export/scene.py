@@ -25,8 +25,10 @@
 # ***** END GPL LICENCE BLOCK *****
 #
 # System Libs
+import collections
 import os
 import tempfile
+import time
 import bpy
 
 # Extensions_Framework Libs
@@ -39,11 +41,13 @@ from ..export import materials    as export_materials
 from ..export import geometry        as export_geometry
 from ..export import volumes        as export_volumes
 from ..export import fix_matrix_order
-from ..export import is_obj_visible
+from ..export.snapshot import GEOMETRY_TYPES, SceneSnapshot
 from ..outputs import LuxManager, LuxLog
 from ..outputs.file_api import Files
+from ..outputs.profiler import profiler
 from ..outputs.pure_api import LUXRENDER_VERSION
 from ..properties import find_node
+from ..util import embedded_files
 
 
 class SceneExporterProperties(object):
@@ -60,6 +64,36 @@ class SceneExporterProperties(object):
 class SceneExporter(object):
     properties = SceneExporterProperties()
 
+    def __init__(self):
+        # Wall time spent in each phase of the last export, in seconds
+        self.phase_times = collections.OrderedDict()
+        self.current_phase = None
+        self.phase_start = 0.0
+        # Profiler scope of the current phase, which also ends the scopes left open in the phase
+        self.phase_scope = None
+        # Top scopes of the last export, if it was profiled
+        self.profile_summary = ''
+
+    def start_phase(self, name=None):
+        """
+        End the current phase and start timing the named one, or just end
+        the current phase if name is None
+        """
+        now = time.time()
+
+        if self.current_phase is not None:
+            elapsed = now - self.phase_start
+            self.phase_times[self.current_phase] = self.phase_times.get(self.current_phase, 0.0) + elapsed
+            self.phase_scope.__exit__(None, None, None)
+            self.phase_scope = None
+
+        if name is not None:
+            self.phase_scope = profiler.scope(name)
+            self.phase_scope.__enter__()
+
+        self.current_phase = name
+        self.phase_start = now
+
     def set_properties(self, properties):
         self.properties = properties
         return self
@@ -75,12 +109,17 @@ class SceneExporter(object):
     def report(self, type, message):
         LuxLog('%s: %s' % ('|'.join([('%s' % i).upper() for i in type]), message))
 
-    def object_is_lit(self, GE, obj):
+    def object_is_lit(self, record):
 
         have_lamp = False
         have_emitter = False
 
-        if obj.type == 'LAMP' and is_obj_visible(self.scene, obj):
+        if not record.visible:
+            return False
+
+        obj = record.obj
+
+        if record.type == 'LAMP':
             lamp_enabled = export_lights.checkLightEnabled(self.scene, obj.data)
             lamp_enabled &= obj.data.energy > 0.0
 
@@ -100,19 +139,17 @@ class SceneExporter(object):
 
             have_lamp |= lamp_enabled
 
-        if obj.type in ['MESH', 'SURFACE', 'CURVE', 'FONT', 'META'] and is_obj_visible(self.scene, obj):
-            for ms in obj.material_slots:
-                mat = ms.material
+        if record.type in GEOMETRY_TYPES:
+            for mat in record.emitting_materials:
+                emit_enabled = self.scene.luxrender_lightgroups.is_enabled(mat.luxrender_emission.lightgroup)
+                emit_enabled &= (mat.luxrender_emission.L_color.v * mat.luxrender_emission.gain) > 0.0
+                have_emitter |= emit_enabled
 
-                if mat and mat.luxrender_emission.use_emission:
-                    emit_enabled = self.scene.luxrender_lightgroups.is_enabled(mat.luxrender_emission.lightgroup)
-                    emit_enabled &= (mat.luxrender_emission.L_color.v * mat.luxrender_emission.gain) > 0.0
-                    have_emitter |= emit_enabled
-
-                    if have_emitter:
-                        break
+                if have_emitter:
+                    return True
 
-                if mat.luxrender_material.nodetree:
+            for mat in record.materials:
+                if mat and mat.luxrender_material.nodetree:
                     output_node = find_node(mat, 'luxrender_material_output_node')
 
                     if output_node is not None:
@@ -126,15 +163,15 @@ class SceneExporter(object):
 
         return False
 
-    def scene_is_lit(self, GE):
+    def scene_is_lit(self, snapshot):
 
-        for obj in self.scene.objects:
-            if self.object_is_lit(GE, obj):
+        for record in snapshot.records(self.scene):
+            if self.object_is_lit(record):
                 return True
 
         for grp in bpy.data.groups:
             for obj in list(grp.objects):
-                if self.object_is_lit(GE, obj):
+                if self.object_is_lit(snapshot.record(obj)):
                     return True
 
         return False
@@ -142,6 +179,17 @@ class SceneExporter(object):
     def export(self):
         scene = self.scene
 
+        self.phase_times.clear()
+        self.profile_summary = ''
+
+        if scene is not None and scene.luxrender_testing.profile_export:
+            profiler.start(os.path.splitext(self.properties.filename)[0] or scene.name)
+        else:
+            profiler.stop()
+
+        self.start_phase('setup')
+        created_lux_manager = False
+
         try:
             if scene is None:
                 raise Exception('Scene is not valid for export to %s' % self.properties.filename)
@@ -151,7 +199,6 @@ class SceneExporter(object):
 
             # Set up the rendering context
             self.report({'INFO'}, 'Creating LuxRender context')
-            created_lux_manager = False
             if LuxManager.GetActive() is None:
                 LM = LuxManager(
                     scene.name,
@@ -163,9 +210,11 @@ class SceneExporter(object):
             LuxManager.SetCurrentScene(scene)
             lux_context = LuxManager.GetActive().lux_context
 
-            GE = export_geometry.GeometryExporter(lux_context, scene)
+            # Objects and volumes of the scene and its background sets, read once for all stages
+            snapshot = SceneSnapshot(scene)
+            GE = export_geometry.GeometryExporter(lux_context, scene, snapshot)
 
-            if not self.scene_is_lit(GE):
+            if not self.scene_is_lit(snapshot):
                 raise Exception('Scene is not lit!')
 
             if self.properties.filename.endswith('.lxs'):
@@ -208,7 +257,9 @@ class SceneExporter(object):
 
             export_materials.ExportedMaterials.clear()
             export_materials.ExportedTextures.clear()
+            embedded_files.clear()
 
+            self.start_phase('settings')
             self.report({'INFO'}, 'Exporting render settings')
 
             if self.properties.api_type == 'FILE':
@@ -251,41 +302,48 @@ class SceneExporter(object):
             lux_context.worldBegin()
             lights_in_export = False
 
-            # Find linked 'background_set' scenes
-            geom_scenes = [scene]
-            s = scene
-
-            while s.background_set is not None:
-                s = s.background_set
-                geom_scenes.append(s)
+            # Linked 'background_set' scenes
+            geom_scenes = snapshot.geometry_scenes
 
             # Make sure lamp textures go back into main file, not geom file
             if self.properties.api_type in ['FILE']:
                 lux_context.set_output_file(Files.MAIN)
 
-            # Export all data in linked 'background_set' scenes
-            for geom_scene in geom_scenes:
-                if len(geom_scene.luxrender_volumes.volumes) > 0:
-                    self.report({'INFO'}, 'Exporting volume data')
-                    if self.properties.api_type == 'FILE':
-                        lux_context.set_output_file(Files.MATS)
+            # Export all data in linked 'background_set' scenes, sharing one PLY cache
+            # so that no scene evicts the files of another one
+            GE.open_ply_cache()
+            geometry_exported = False
+
+            try:
+                for geom_scene in geom_scenes:
+                    self.start_phase('volumes')
+                    if len(snapshot.volumes[geom_scene]) > 0:
+                        self.report({'INFO'}, 'Exporting volume data')
+                        if self.properties.api_type == 'FILE':
+                            lux_context.set_output_file(Files.MATS)
 
-                    for volume in geom_scene.luxrender_volumes.volumes:
-                        lux_context.makeNamedVolume(volume.name, *volume.api_output(lux_context))
+                        for volume in snapshot.volumes[geom_scene]:
+                            lux_context.makeNamedVolume(volume.name, *volume.api_output(lux_context))
 
-                self.report({'INFO'}, 'Exporting geometry')
-                if self.properties.api_type == 'FILE':
-                    lux_context.set_output_file(Files.GEOM)
+                    self.start_phase('geometry')
+                    self.report({'INFO'}, 'Exporting geometry')
+                    if self.properties.api_type == 'FILE':
+                        lux_context.set_output_file(Files.GEOM)
 
-                lights_in_export |= GE.iterateScene(geom_scene)
+                    lights_in_export |= GE.iterateScene(geom_scene)
+
+                geometry_exported = True
+            finally:
+                GE.close_ply_cache(collect=geometry_exported)
 
             for geom_scene in geom_scenes:
                 # Make sure lamp textures go back into main file, not geom file
                 if self.properties.api_type in ['FILE']:
                     lux_context.set_output_file(Files.MAIN)
 
+                self.start_phase('lights')
                 self.report({'INFO'}, 'Exporting lights')
-                lights_in_export |= export_lights.lights(lux_context, geom_scene, scene, GE.ExportedMeshes)
+                lights_in_export |= export_lights.lights(lux_context, geom_scene, scene, GE.ExportedMeshes, snapshot)
 
             if not lights_in_export:
                 raise Exception('No lights in exported data!')
@@ -296,21 +354,42 @@ class SceneExporter(object):
             elif scene.luxrender_world.default_exterior_volume:
                 lux_context.exterior(scene.luxrender_world.default_exterior_volume)
 
+            self.start_phase('world_end')
             if self.properties.write_all_files:
                 lux_context.worldEnd()
 
             if created_lux_manager:
                 LM.reset()
 
+            embedded_files.clear()
+            export_volumes.clear_decoded_frames()
+            self.start_phase()
+
+            if profiler.enabled:
+                self.profile_summary = profiler.finish(self.properties.directory)
+                self.report({'INFO'}, 'Export profile: %s' % self.profile_summary)
+
             self.report({'INFO'}, 'Export finished')
             return {'FINISHED'}
 
         except Exception as err:
+            embedded_files.clear()
+            export_volumes.clear_decoded_frames()
+            self.start_phase()
+            profiler.stop()
             self.report({'ERROR'}, 'Export aborted: %s' % err)
             import traceback
 
             traceback.print_exc()
 
+            # Close the scene files of the context created for this export,
+            # without hiding the original error if that fails as well
+            if created_lux_manager:
+                try:
+                    LM.reset()
+                except Exception:
+                    traceback.print_exc()
+
             if scene.luxrender_testing.re_raise:
                 raise err
 
@@ -0,0 +1,152 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Snapshot of the scene graph used by one export.
+
+The light check, the volume export, the geometry export and the light export
+all walk the scene and its background sets. Every RNA property read is a
+lookup through Blender's RNA layer, and is_obj_visible() alone reads the scene
+and render layer masks again for each object. SceneSnapshot walks the scenes
+once, and records what these stages need for each object: visibility, dupli
+and particle settings, modifiers and the materials that emit light.
+"""
+
+import collections
+
+# Object types with material slots
+GEOMETRY_TYPES = ('MESH', 'SURFACE', 'CURVE', 'FONT', 'META')
+
+
+class ObjectRecord(object):
+    """
+    Properties of one object, read once
+    """
+
+    __slots__ = ('obj', 'type', 'visible', 'hide_render', 'parent_is_duplicator', 'is_duplicator', 'dupli_type',
+                 'particle_systems', 'modifiers', 'materials', 'emitting_materials', 'geometry_scene')
+
+    def __init__(self, obj, visible_layers, geometry_scene):
+        self.obj = obj
+        self.type = obj.type
+        self.hide_render = obj.hide_render
+        self.visible = not self.hide_render and any(ol and vl for ol, vl in zip(obj.layers, visible_layers))
+        self.geometry_scene = geometry_scene
+
+        parent = obj.parent
+        self.parent_is_duplicator = parent is not None and parent.is_duplicator
+
+        self.is_duplicator = obj.is_duplicator
+        self.dupli_type = obj.dupli_type if self.is_duplicator else None
+        self.particle_systems = list(obj.particle_systems)
+        self.modifiers = list(obj.modifiers)
+
+        if self.type in GEOMETRY_TYPES:
+            self.materials = [slot.material for slot in obj.material_slots]
+        else:
+            self.materials = []
+
+        self.emitting_materials = [mat for mat in self.materials if mat and mat.luxrender_emission.use_emission]
+
+
+class SceneSnapshot(object):
+    """
+    Objects and volumes of the export scene and its background sets.
+    Visibility follows is_obj_visible() for the export scene.
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+
+        # Render layers on which objects are visible, read once
+        self.visible_layers = [sl and rl for sl, rl in zip(scene.layers, scene.render.layers.active.layers)]
+
+        self.geometry_scenes = []
+        self.objects = collections.OrderedDict()  # {geometry scene: [ObjectRecord]}
+        self.object_records = {}  # {object: ObjectRecord}
+        self.volumes = {}  # {geometry scene: [volume]}
+
+        s = scene
+
+        while s is not None:
+            self.geometry_scenes.append(s)
+            self.records(s)
+            s = s.background_set
+
+    def is_visible(self, obj, is_dupli=False):
+        """
+        Same result as is_obj_visible(scene, obj, is_dupli)
+        """
+        record = self.object_records.get(obj)
+
+        if record is not None:
+            return not record.hide_render if is_dupli else record.visible
+
+        if obj.hide_render:
+            return False
+
+        if is_dupli:
+            return True
+
+        for ol, vl in zip(obj.layers, self.visible_layers):
+            if ol and vl:
+                return True
+
+        return False
+
+    def records(self, geometry_scene):
+        """
+        ObjectRecords of the objects of geometry_scene, in scene order
+        """
+        if geometry_scene not in self.objects:
+            self.objects[geometry_scene] = [self.record(obj, geometry_scene) for obj in geometry_scene.objects]
+            self.volumes[geometry_scene] = list(geometry_scene.luxrender_volumes.volumes)
+
+        return self.objects[geometry_scene]
+
+    def record(self, obj, geometry_scene=None):
+        """
+        ObjectRecord of obj, also for objects of groups which are not in a scene.
+        Objects in several scenes are recorded once.
+        """
+        record = self.object_records.get(obj)
+
+        if record is None:
+            record = ObjectRecord(obj, self.visible_layers, geometry_scene)
+            self.object_records[obj] = record
+
+        return record
+
+    def modifiers(self, obj):
+        """
+        Modifiers of obj, as recorded if it is in a scene of the snapshot
+        """
+        record = self.object_records.get(obj)
+
+        if record is not None:
+            return record.modifiers
+
+        return list(getattr(obj, 'modifiers', ()))
@@ -26,8 +26,13 @@
 #
 # System Libs
 from __future__ import division
-from ctypes import cdll, c_uint, c_float, cast, POINTER, byref, sizeof
-import os, struct, sys
+from ctypes import cdll, c_char, c_uint, c_float, byref, sizeof
+import array, collections, os, struct, sys
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
 
 # Blender Libs
 import bpy
@@ -35,6 +40,7 @@ from ..extensions_framework import util as efutil
 
 # LuxRender libs
 from . import ParamSet, matrix_to_list, LuxManager
+from .meshdata import numpy
 from ..outputs import LuxLog
 from ..outputs.file_api import Files
 
@@ -142,12 +148,149 @@ class library_loader():
         return cls.has_lzma, cls.lzmadll
 
 
-def read_cache(smokecache, is_high_res, amplifier, flowtype):
-    scene = LuxManager.CurrentScene
+SZ_FLOAT = sizeof(c_float)
+SZ_UINT = sizeof(c_uint)
+
+# Bytes of decoded pointcache frames kept in memory by read_cache() during an export
+DECODED_FRAMES_BYTES = 256 * 1024 * 1024
+decoded_frames = collections.OrderedDict()
+
+
+def frame_bytes(decoded):
+    """
+    Memory used by the density and fire values of a read_cache_file() result
+    """
+    density, fire = decoded[3], decoded[4]
+
+    return len(density) * SZ_FLOAT + len(fire) * SZ_FLOAT
+
+
+def clear_decoded_frames():
+    """
+    Forget the decoded frames, called at the end of each export
+    """
+    decoded_frames.clear()
+
+
+def read_segment(data, offset, cell_count, value_size=SZ_FLOAT):
+    """
+    Data segment of a pointcache file starting at offset. Returns the
+    compressed flag, the data stream and the LZMA props as views of data,
+    and the offset of the next segment.
+    """
+    compressed = data[offset]
+    offset += 1
+
+    if not compressed:
+        stream_size = cell_count * value_size
+    else:
+        stream_size = struct.unpack_from('<I', data, offset)[0]
+        offset += SZ_UINT
+
+    stream = data[offset:offset + stream_size]
+    offset += stream_size
+    props = None
+
+    if compressed == 2:
+        props_size = struct.unpack_from('<I', data, offset)[0]
+        offset += SZ_UINT
+        props = data[offset:offset + props_size]
+        offset += props_size
+
+    return compressed, stream, props, offset
+
+
+def decompress_lzo(stream, length):
+    has_lzo, lzodll = library_loader.load_lzo()
+
+    if not has_lzo:
+        LuxLog('Volumes: Cannot read compressed LZO stream; no library loaded')
+        return None
+
+    LuxLog('Volumes: De-compressing LZO stream of length {0:0d} bytes...'.format(len(stream)))
+
+    uncompressed = bytearray(length)
+    outlen = c_uint(length)
+
+    lzodll.lzo1x_decompress((c_char * len(stream)).from_buffer(stream), len(stream),
+                            (c_char * length).from_buffer(uncompressed), byref(outlen), None)
+
+    return memoryview(uncompressed)[:outlen.value]
+
+
+def decompress_lzma(stream, props, length):
+    LuxLog('Volumes: De-compressing LZMA stream of length {0:0d} bytes...'.format(len(stream)))
+
+    if lzma is not None:
+        # Blender writes raw LZMA streams with separate props; prefixing the props and
+        # the uncompressed size gives the .lzma format, whose decoder needs no end marker
+        decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE)
+
+        try:
+            return decompressor.decompress(b''.join([props, struct.pack('<Q', length), stream]))
+        except lzma.LZMAError as err:
+            LuxLog('Volumes: Cannot read compressed LZMA stream: %s' % err)
+            return None
+
+    has_lzma, lzmadll = library_loader.load_lzma()
+
+    if not has_lzma:
+        LuxLog('Volumes: Cannot read compressed LZMA stream; no library loaded')
+        return None
+
+    uncompressed = bytearray(length)
+    outlen = c_uint(length)
+
+    lzmadll.LzmaUncompress((c_char * length).from_buffer(uncompressed), byref(outlen),
+                           (c_char * len(stream)).from_buffer(stream), byref(c_uint(len(stream))),
+                           (c_char * len(props)).from_buffer(props), len(props))
+
+    return memoryview(uncompressed)[:outlen.value]
+
+
+def decode_segment(segment, cell_count):
+    """
+    Float values of a data segment read by read_segment(), as a NumPy array
+    when NumPy is available, otherwise an array. The values never reference
+    the buffer of the whole cache file: uncompressed segments are copied,
+    decompressed ones own their buffer. Empty if the segment cannot be
+    decoded.
+    """
+    compressed, stream, props, offset = segment
+    length = cell_count * SZ_FLOAT
+
+    if not compressed:
+        values = stream
+    elif compressed == 1:
+        values = decompress_lzo(stream, length)
+    elif compressed == 2:
+        values = decompress_lzma(stream, props, length)
+    else:
+        values = None
+
+    if values is None or len(values) < length:
+        return []
+
+    if numpy is not None:
+        decoded = numpy.frombuffer(values, dtype=numpy.float32, count=cell_count)
+
+        if not compressed or len(values) != length:
+            decoded = decoded.copy()
+
+        return decoded
 
-    # NOTE - dynamic libraries are not loaded until needed, further down
-    # the script...
+    decoded = array.array('f')
+    decoded.frombytes(memoryview(values)[:length])
 
+    return decoded
+
+
+def read_cache_file(path, is_high_res, amplifier, flowtype):
+    """
+    Returns res_x, res_y, res_z, density, fire of a pointcache file. The file
+    is read once, and segments are sliced from it without copying; only the
+    density and fire segments are decompressed or copied out of it.
+    """
     # ##################################################################################################
     # Read cache
     # Pointcache file format v1.04:
@@ -185,454 +328,144 @@ def read_cache(smokecache, is_high_res, amplifier, flowtype):
     #	props			(u_char, (props_size) Bytes)	props data for lzma decompressor
     #
     ###################################################################################################
-    density = []
-    fire = []
-    cell_count = 0
-    res_x = 0
-    res_y = 0
-    res_z = 0
-    cachefilepath = []
-    cachefilename = []
+    with open(path, 'rb') as cachefile:
+        data = bytearray(os.path.getsize(path))
+        cachefile.readinto(data)
 
-    if not smokecache.is_baked:
-        LuxLog('Volumes: Smoke data has to be baked for export')
-    else:
-        cachefilepath = os.path.join(
-            os.path.splitext(os.path.dirname(bpy.data.filepath))[0],
-            "blendcache_" + os.path.splitext(os.path.basename(bpy.data.filepath))[0]
-        )
-        cachefilename = smokecache.name + "_{0:06d}_{1:02d}.bphys".format(scene.frame_current, smokecache.index)
-        fullpath = os.path.join(cachefilepath, cachefilename)
-
-        if not os.path.exists(fullpath):
-            LuxLog('Volumes: Cachefile doesn''t exist: %s' % fullpath)
-        else:
-            cachefile = open(fullpath, "rb")
-            buffer = cachefile.read(8)
-            temp = ""
-            stream_size = c_uint()
-            props_size = c_uint()
-            outlen = c_uint()
-            compressed = 0
-
-            for i in range(len(buffer)):
-                temp = temp + chr(buffer[i])
-
-            SZ_FLOAT = sizeof(c_float)
-            SZ_UINT = sizeof(c_uint)
-
-            if temp == "BPHYSICS":  #valid cache file
-                data_type = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                #print("Data type: {0:1d}".format(data_type))
-
-                if data_type == 3 or data_type == 4:
-                    cell_count = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                    #print("Cell count: {0:1d}".format(cell_count))
-                    struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-
-                    last_pos = cachefile.tell()
-                    buffer = cachefile.read(4)
-                    temp = ""
-                    for i in range(len(buffer)):
-                        temp += chr(buffer[i])
-
-                    new_cache = False
-
-                    if temp[0] >= '1' and temp[1] == '.':
-                        new_cache = True
-                    else:
-                        cachefile.seek(last_pos)
-
-                    # Try to read new header
-                    if new_cache:
-                        # number of fluid fields in the cache file
-                        fluid_fields = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        active_fields = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        res_x = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        res_y = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        res_z = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        dx = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        cell_count = res_x * res_y * res_z
-
-                    # Shadow values
-                    compressed = struct.unpack("1B", cachefile.read(1))[0]
-
-                    if not compressed:
-                        cachefile.read(SZ_FLOAT * cell_count)
-                    else:
-                        stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        cachefile.read(stream_size)
+    data = memoryview(data)
 
-                        if compressed == 2:
-                            props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(props_size)
+    if data[:8].tobytes() != b'BPHYSICS':
+        return 0, 0, 0, [], []
 
-                    # Density values
-                    density_compressed = struct.unpack("1B", cachefile.read(1))[0]
+    data_type, cell_count = struct.unpack_from('<II', data, 8)
 
-                    if not density_compressed:
-                        cachefile.read(SZ_FLOAT * cell_count)
-                    else:
-                        density_stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        density_stream = cachefile.read(density_stream_size)
+    if data_type not in (3, 4):
+        return 0, 0, 0, [], []
 
-                        if density_compressed == 2:
-                            props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            props = cachefile.read(props_size)
+    res_x = res_y = res_z = 0
+    offset = 20
 
-                    if not new_cache:
-                        # Densitiy, old values
-                        compressed = struct.unpack("1B", cachefile.read(1))[0]
+    # Newer caches have a version string like "1.04" and the domain resolution
+    new_cache = len(data) > offset + 1 and ord('1') <= data[offset] and data[offset + 1] == ord('.')
 
-                        if not compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(stream_size)
+    if new_cache:
+        fluid_fields, active_fields, res_x, res_y, res_z, dx = struct.unpack_from('<6I', data, offset + 4)
+        offset += 4 + 6 * SZ_UINT
+        cell_count = res_x * res_y * res_z
 
-                            if compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
+    def skip(offset, value_size=SZ_FLOAT):
+        return read_segment(data, offset, cell_count, value_size)[3]
 
-                    # Heat values
-                    compressed = struct.unpack("1B", cachefile.read(1))[0]
+    # Shadow values
+    offset = skip(offset)
 
-                    if not compressed:
-                        cachefile.read(SZ_FLOAT * cell_count)
-                    else:
-                        stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        cachefile.read(stream_size)
+    # Density values
+    density = read_segment(data, offset, cell_count)
+    offset = density[3]
 
-                        if compressed == 2:
-                            props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(props_size)
+    if not new_cache:
+        # Density, old values
+        offset = skip(offset)
 
-                    # Heat, old values
-                    compressed = struct.unpack("1B", cachefile.read(1))[0]
+    # Heat and heat, old values
+    offset = skip(offset)
+    offset = skip(offset)
 
-                    if not compressed:
-                        cachefile.read(SZ_FLOAT * cell_count)
-                    else:
-                        stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                        cachefile.read(stream_size)
+    fire = None
 
-                        if compressed == 2:
-                            props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(props_size)
+    if new_cache and flowtype >= 1:
+        # Fire values
+        fire = read_segment(data, offset, cell_count)
+        offset = fire[3]
 
-                    # Fire values
-                    if new_cache and flowtype >= 1:
-                        # Fire values
-                        fire_compressed = struct.unpack("1B", cachefile.read(1))[0]
+        # Fuel and react values
+        offset = skip(offset)
+        offset = skip(offset)
 
-                        if not fire_compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            fire_stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            fire_stream = cachefile.read(fire_stream_size)
+    if is_high_res:
+        # vx, vy, vz values
+        offset = skip(offset)
+        offset = skip(offset)
+        offset = skip(offset)
 
-                            if fire_compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
-                                # Fuel values
+        if not new_cache:
+            # vx, vy, vz, old values
+            offset = skip(offset)
+            offset = skip(offset)
+            offset = skip(offset)
 
-                        compressed = struct.unpack("1B", cachefile.read(1))[0]
+        # Obstacle values
+        offset = skip(offset, 1)
 
-                        if not compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(stream_size)
+        # dt and dx values
+        offset += 2 * SZ_FLOAT
 
-                            if compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
+        if new_cache:
+            # p0, p1, dp0, shift, obj_shift_f, obmat, base_res, res min, res max, active color
+            offset += (3 + 3 + 3 + 3 + 16 + 3) * SZ_FLOAT + (3 + 3 + 3 + 3) * SZ_UINT
 
-                        # React values
-                        compressed = struct.unpack("1B", cachefile.read(1))[0]
+        # High resolution
+        cell_count = cell_count * amplifier * amplifier * amplifier
 
-                        if not compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(stream_size)
-
-                            if compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
-
-                                #						if new_cache and flowtype >= 1:
-                                #                           #active colors
-                                #    						# r values
-                                #							compressed = struct.unpack("1B", cachefile.read(1))[0]
-                                #							if not compressed:
-                                #								cachefile.read(SZ_FLOAT*cell_count)
-                                #							else:
-                                #								stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                #								cachefile.read(stream_size)
-                                #								if compressed == 2:
-                                #									props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                #									cachefile.read(props_size)
-                                #    						# g values
-                                #							compressed = struct.unpack("1B", cachefile.read(1))[0]
-                                #							if not compressed:
-                                #								cachefile.read(SZ_FLOAT*cell_count)
-                                #							else:
-                                #								stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                #								cachefile.read(stream_size)
-                                #								if compressed == 2:
-                                #									props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                #									cachefile.read(props_size)
-                                #    						# b values
-                                #							compressed = struct.unpack("1B", cachefile.read(1))[0]
-                                #							if not compressed:
-                                #								cachefile.read(SZ_FLOAT*cell_count)
-                                #							else:
-                                #								stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                #								cachefile.read(stream_size)
-                                #								if compressed == 2:
-                                #									props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                #									cachefile.read(props_size)
-
-                    if is_high_res:
-                        # vx values
-                        compressed = struct.unpack("1B", cachefile.read(1))[0]
-
-                        if not compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(stream_size)
-
-                            if compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
+        # Density values
+        density = read_segment(data, offset, cell_count)
+        offset = density[3]
 
-                        # vy values
-                        compressed = struct.unpack("1B", cachefile.read(1))[0]
-
-                        if not compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(stream_size)
+        if new_cache and flowtype >= 1:
+            # Fire values
+            fire = read_segment(data, offset, cell_count)
+            offset = fire[3]
 
-                            if compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
+    density = decode_segment(density, cell_count)
+    fire = decode_segment(fire, cell_count) if fire is not None else []
 
-                        # vz values
-                        compressed = struct.unpack("1B", cachefile.read(1))[0]
+    return res_x, res_y, res_z, density, fire
 
-                        if not compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(stream_size)
-
-                            if compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
-
-                        if not new_cache:
-                            # vx, old values
-                            compressed = struct.unpack("1B", cachefile.read(1))[0]
-
-                            if not compressed:
-                                cachefile.read(SZ_FLOAT * cell_count)
-                            else:
-                                stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(stream_size)
-
-                                if compressed == 2:
-                                    props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                    cachefile.read(props_size)
-
-                            #vy,old values
-                            compressed = struct.unpack("1B", cachefile.read(1))[0]
-
-                            if not compressed:
-                                cachefile.read(SZ_FLOAT * cell_count)
-                            else:
-                                stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(stream_size)
-
-                                if compressed == 2:
-                                    props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                    cachefile.read(props_size)
-
-                            # vz,old values
-                            compressed = struct.unpack("1B", cachefile.read(1))[0]
-                            if not compressed:
-                                cachefile.read(SZ_FLOAT * cell_count)
-                            else:
-                                stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(stream_size)
-
-                                if compressed == 2:
-                                    props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                    cachefile.read(props_size)
-
-                        # Obstacle values
-                        compressed = struct.unpack("1B", cachefile.read(1))[0]
-                        if not compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            cachefile.read(stream_size)
-
-                            if compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                cachefile.read(props_size)
-
-                        # dt value
-                        cachefile.read(SZ_FLOAT)
-                        # dx value
-                        cachefile.read(SZ_FLOAT)
-
-                        if new_cache:
-                            #p0
-                            cachefile.read(3 * SZ_FLOAT)
-                            #p1
-                            cachefile.read(3 * SZ_FLOAT)
-                            #dp0
-                            cachefile.read(3 * SZ_FLOAT)
-                            #shift
-                            cachefile.read(3 * SZ_UINT)
-                            #obj_shift_f
-                            cachefile.read(3 * SZ_FLOAT)
-                            #obmat
-                            cachefile.read(16 * SZ_FLOAT)
-                            #base_res
-                            cachefile.read(3 * SZ_UINT)
-                            #res min
-                            cachefile.read(3 * SZ_UINT)
-                            #res max
-                            cachefile.read(3 * SZ_UINT)
-                            #active color
-                            cachefile.read(3 * SZ_FLOAT)
-
-                        # High resolution
-                        cell_count = cell_count * amplifier * amplifier * amplifier
-
-                        # Density values
-                        density_compressed = struct.unpack("1B", cachefile.read(1))[0]
-
-                        if not density_compressed:
-                            cachefile.read(SZ_FLOAT * cell_count)
-                        else:
-                            density_stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                            density_stream = cachefile.read(density_stream_size)
-
-                            if density_compressed == 2:
-                                props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                props = cachefile.read(props_size)
-
-                        # Fire values
-                        if new_cache and flowtype >= 1:
-                            fire_compressed = struct.unpack("1B", cachefile.read(1))[0]
-
-                            if not fire_compressed:
-                                cachefile.read(SZ_FLOAT * cell_count)
-                            else:
-                                fire_stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                fire_stream = cachefile.read(fire_stream_size)
-
-                                if fire_compressed == 2:
-                                    props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                    cachefile.read(props_size)
-                                    #    						# Fuel values
-                                    #							compressed = struct.unpack("1B", cachefile.read(1))[0]
-                                    #							if not compressed:
-                                    #								cachefile.read(SZ_FLOAT*cell_count)
-                                    #							else:
-                                    #								stream_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                    #								cachefile.read(stream_size)
-                                    #								if compressed == 2:
-                                    #									props_size = struct.unpack("1I", cachefile.read(SZ_UINT))[0]
-                                    #									cachefile.read(props_size)
-
-                    if density_compressed == 1:
-                        has_lzo, lzodll = library_loader.load_lzo()
-                        if has_lzo:
-                            LuxLog('Volumes: De-compressing LZO stream of length {0:0d} bytes...'.format(
-                                density_stream_size))
-                            #print("Cell count: %d"%cell_count)
-                            uncomp_stream = (c_float * cell_count * SZ_FLOAT)()
-                            p_dens = cast(uncomp_stream, POINTER(c_float))
-
-                            #call lzo decompressor
-                            lzodll.lzo1x_decompress(density_stream, density_stream_size, p_dens, byref(outlen), None)
-
-                            for i in range(cell_count):
-                                density.append(p_dens[i])
-                        else:
-                            LuxLog('Volumes: Cannot read compressed LZO stream; no library loaded')
 
-                    elif density_compressed == 2:
-                        has_lzma, lzmadll = library_loader.load_lzma()
-
-                        if has_lzma:
-                            LuxLog('Volumes: De-compressing LZMA stream of length {0:0d} bytes...'.format(
-                                density_stream_size))
-                            #print("Cell count: %d"%cell_count)
-                            uncomp_stream = (c_float * cell_count * SZ_FLOAT)()
-                            p_dens = cast(uncomp_stream, POINTER(c_float))
-                            outlen = c_uint(cell_count * SZ_FLOAT)
-
-                            #call lzma decompressor
-                            lzmadll.LzmaUncompress(p_dens, byref(outlen), density_stream,
-                                                   byref(c_uint(density_stream_size)), props, props_size)
-
-                            for i in range(cell_count):
-                                density.append(p_dens[i])
-                        else:
-                            LuxLog('Volumes: Cannot read compressed LZMA stream; no library loaded')
+def read_cache(smokecache, is_high_res, amplifier, flowtype):
+    """
+    res_x, res_y, res_z, density, fire of the current frame of a baked smoke
+    pointcache. Decoded frames are kept in memory until the end of the
+    export, up to DECODED_FRAMES_BYTES, keyed by the cache file path,
+    modification time and size, so the density and fire channels of a
+    domain are decoded once.
+    """
+    scene = LuxManager.CurrentScene
 
-                    if new_cache and flowtype >= 1:
-                        if fire_compressed == 1:
-                            has_lzo, lzodll = library_loader.load_lzo()
+    if not smokecache.is_baked:
+        LuxLog('Volumes: Smoke data has to be baked for export')
+        return 0, 0, 0, [], []
 
-                            if has_lzo:
-                                fire_stream_size = len(fire_stream)
-                                LuxLog('Volumes: De-compressing LZO stream of length {0:0d} bytes...'.format(
-                                    fire_stream_size))
-                                uncomp_stream = (c_float * cell_count * SZ_FLOAT)()
-                                p_fire = cast(uncomp_stream, POINTER(c_float))
+    cachefilepath = os.path.join(
+        os.path.splitext(os.path.dirname(bpy.data.filepath))[0],
+        "blendcache_" + os.path.splitext(os.path.basename(bpy.data.filepath))[0]
+    )
+    cachefilename = smokecache.name + "_{0:06d}_{1:02d}.bphys".format(scene.frame_current, smokecache.index)
+    fullpath = os.path.join(cachefilepath, cachefilename)
 
-                                #call lzo decompressor
-                                lzodll.lzo1x_decompress(fire_stream, fire_stream_size, p_fire, byref(outlen), None)
+    if not os.path.exists(fullpath):
+        LuxLog('Volumes: Cachefile doesn''t exist: %s' % fullpath)
+        return 0, 0, 0, [], []
 
-                                for i in range(cell_count):
-                                    fire.append(p_fire[i])
-                            else:
-                                LuxLog('Volumes: Cannot read compressed LZO stream; no library loaded')
+    st = os.stat(fullpath)
+    key = (fullpath, st.st_mtime, st.st_size, is_high_res, amplifier, flowtype)
 
-                        elif fire_compressed == 2:
-                            has_lzma, lzmadll = library_loader.load_lzma()
+    if key in decoded_frames:
+        decoded_frames.move_to_end(key)
+        return decoded_frames[key]
 
-                            if has_lzma:
-                                fire_stream_size = len(stream)
-                                LuxLog('Volumes: De-compressing LZMA stream of length {0:0d} bytes...'.format(
-                                    fire_stream_size))
-                                uncomp_stream = (c_float * cell_count * SZ_FLOAT)()
-                                p_fire = cast(uncomp_stream, POINTER(c_float))
-                                outlen = c_uint(cell_count * SZ_FLOAT)
+    decoded = read_cache_file(fullpath, is_high_res, amplifier, flowtype)
+    size = frame_bytes(decoded)
 
-                                #call lzma decompressor
-                                lzmadll.LzmaUncompress(p_fire, byref(outlen), fire_stream,
-                                                       byref(c_uint(fire_stream_size)), props, props_size)
+    if size <= DECODED_FRAMES_BYTES:
+        cached = sum([frame_bytes(frame) for frame in decoded_frames.values()])
 
-                                for i in range(cell_count):
-                                    fire.append(p_fire[i])
-                            else:
-                                LuxLog('Volumes: Cannot read compressed LZMA stream; no library loaded')
+        while decoded_frames and cached + size > DECODED_FRAMES_BYTES:
+            cached -= frame_bytes(decoded_frames.popitem(last=False)[1])
 
-            cachefile.close()
-            #endif cachefile exists
-            return res_x, res_y, res_z, density, fire
+        decoded_frames[key] = decoded
 
-    return 0, 0, 0, [], []
+    return decoded
 
 
 def export_smoke(smoke_obj_name, channel):
@@ -666,14 +499,13 @@ def export_smoke(smoke_obj_name, channel):
                 # Blender version 2.71 supports direct access to smoke data structure
                 set = mod.domain_settings
 
+                # Slicing copies the whole array at once, instead of one voxel at a time
                 channeldata = []
                 if channel == 'density':
-                    for v in set.density_grid:
-                        channeldata.append(v.real)
+                    channeldata = set.density_grid[:]
 
                 if channel == 'fire':
-                    for v in set.flame_grid:
-                        channeldata.append(v.real)
+                    channeldata = set.flame_grid[:]
 
                 resolution = set.resolution_max
                 big_res = []
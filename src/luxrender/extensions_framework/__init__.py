@@ -24,6 +24,7 @@
 #
 # ***** END GPL LICENCE BLOCK *****
 #
+import importlib
 import time
 
 import bpy
@@ -330,6 +331,8 @@ class Addon(object):
 
     def __init__(self, bl_info=None):
         self.addon_classes = []
+        self.deferred_modules = []
+        self.registered = False
         self.bl_info = bl_info
 
         # Keep a count in case we have to give this addon an anonymous name
@@ -354,16 +357,50 @@ class Addon(object):
         self.addon_classes.append(cls)
         return cls
 
-    def register(self):
-        """This is the register function that should be exposed in the addon's
-        __init__.
+    def defer_modules(self, package, names):
+        """Import the modules names of package, and register the classes
+        they declare, only when load_deferred() is first called. Meant for
+        modules such as UI panels which are not needed until the addon is
+        used; classes which Blender needs to load a .blend file (property
+        groups, node trees) must not be deferred.
 
         """
-        for cls in self.addon_classes:
+        self.deferred_modules.append((package, names))
+
+    def load_deferred(self):
+        """Import the deferred modules, registering their classes if the
+        addon is registered. Returns True if any module was imported.
+
+        """
+        if not self.deferred_modules:
+            return False
+
+        deferred, self.deferred_modules = self.deferred_modules, []
+        first = len(self.addon_classes)
+
+        for package, names in deferred:
+            for name in names:
+                importlib.import_module('.' + name, package)
+
+        if self.registered:
+            self.register_classes(self.addon_classes[first:])
+
+        return True
+
+    def register_classes(self, classes):
+        for cls in classes:
             bpy.utils.register_class(cls)
             if hasattr(cls, 'ef_attach_to'):
                 cls.initialise_properties()
 
+    def register(self):
+        """This is the register function that should be exposed in the addon's
+        __init__.
+
+        """
+        self.register_classes(self.addon_classes)
+        self.registered = True
+
     def unregister(self):
         """This is the unregister function that should be exposed in the addon's
         __init__.
@@ -374,6 +411,8 @@ class Addon(object):
                 cls.remove_properties()
             bpy.utils.unregister_class(cls)
 
+        self.registered = False
+
     def init_functions(self):
         """Returns references to the three functions that this addon needs
         for successful class registration management. In the addon's __init__
@@ -28,6 +28,7 @@
 import configparser
 import datetime
 import os
+import stat
 import tempfile
 import threading
 
@@ -89,12 +90,8 @@ def filesystem_path(p):
     return pout.replace('\\', '/')
 
 
-# TODO: - somehow specify TYPES to get/set from config
-def find_config_value(module, section, key, default):
-    """Attempt to find the configuration value specified by string key
-    in the specified section of module's configuration file. If it is
-    not found, return default.
-    """
+def config_files(module):
+    """Candidate configuration files of module, in the writable config paths"""
     global config_paths
     fc = []
 
@@ -102,66 +99,196 @@ def find_config_value(module, section, key, default):
         if os.path.exists(p) and os.path.isdir(p) and os.access(p, os.W_OK):
             fc.append('/'.join([p, '%s.cfg' % module]))
 
-    if len(fc) < 1:
-        print('Cannot find %s config file path' % module)
-        return default
+    return fc
+
+
+class ConfigStore(object):
+    """Parsed configuration file of a module, kept in memory and parsed again
+    only when one of its files changes on disk. Writes go to a temporary
+    file which is renamed over the configuration file.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.lock = threading.RLock()
+        self.parser = None
+        self.cfg_files = []
+        self.stamps = None
+
+    @property
+    def files(self):
+        """Candidate files, looked up again on every use since config
+        paths can be created or become writable while Blender runs"""
+        return config_files(self.module)
+
+    def file_stamps(self, files=None):
+        stamps = []
+
+        for f in self.files if files is None else files:
+            try:
+                st = os.stat(f)
+                stamps.append((f, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append((f, None))
+
+        return stamps
+
+    def load(self, files=None):
+        """Parse the configuration files again if they, or the list of
+        files, have changed"""
+        if files is None:
+            files = self.files
+
+        stamps = self.file_stamps(files)
+
+        if stamps == self.stamps:
+            return self.parser
 
-    cp = configparser.SafeConfigParser()
+        cp = configparser.ConfigParser()
 
-    cfg_files = cp.read(fc)
-    if len(cfg_files) > 0:
         try:
-            val = cp.get(section, key)
-
-            if val == 'true':
-                return True
-            elif val == 'false':
-                return False
-            else:
-                return val
+            self.cfg_files = cp.read(files)
+        except configparser.Error as err:
+            print('Cannot read %s config file: %s' % (self.module, err))
+            cp = None
+            self.cfg_files = []
+
+        self.parser = cp
+        self.stamps = stamps
+
+        return cp
+
+    def get(self, section, key, default):
+        with self.lock:
+            cp = self.load()
+
+            if cp is None or not self.cfg_files:
+                return default
+
+            try:
+                val = cp.get(section, key)
+            except configparser.Error:
+                return default
+
+        if val == 'true':
+            return True
+        elif val == 'false':
+            return False
+        else:
+            return val
+
+    def update(self, section, values):
+        """Set all values of section, and write the file once if any changed"""
+        with self.lock:
+            files = self.files
+
+            if len(files) < 1:
+                raise Exception('Cannot find a writable path to store %s config file' % self.module)
+
+            # Pick up changes made by other processes before writing
+            cp = self.load(files)
+
+            if cp is None:
+                raise Exception('Cannot update the unreadable %s config file' % self.module)
+
+            try:
+                if not cp.has_section(section):
+                    cp.add_section(section)
+
+                changed = False
+
+                for key, value in values.items():
+                    # XXX: tomb: is there a type() or isinstance() missing here?
+                    if value == True:
+                        value = 'true'
+                    elif value == False:
+                        value = 'false'
+
+                    if not cp.has_option(section, key) or cp.get(section, key, raw=True) != value:
+                        cp.set(section, key, value)
+                        changed = True
+
+                if changed:
+                    self.write(cp, files)
+            except:
+                # The parser holds values which were not written, parse the files again on next use
+                self.parser = None
+                self.stamps = None
+                raise
+
+        return True
+
+    def write(self, cp, files):
+        cfg_file = self.cfg_files[0] if self.cfg_files else files[0]
+
+        try:
+            mode = stat.S_IMODE(os.stat(cfg_file).st_mode)
+        except OSError:
+            # New files get the permissions open() would give them
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+
+        fd, temp_path = tempfile.mkstemp(prefix='.%s.' % self.module, suffix='.tmp',
+                                         dir=os.path.dirname(cfg_file))
+
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                cp.write(fh)
+
+            # mkstemp() creates files readable by their owner only
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, cfg_file)
         except:
-            return default
-    else:
-        return default
+            os.remove(temp_path)
+            raise
 
+        if not self.cfg_files:
+            self.cfg_files = [cfg_file]
 
-def write_config_value(module, section, key, value):
-    """Attempt to write the configuration value specified by string key
-    in the specified section of module's configuration file.
-    """
-    global config_paths
-    fc = []
+        self.stamps = self.file_stamps(files)
 
-    for p in config_paths:
-        if os.path.exists(p) and os.path.isdir(p) and os.access(p, os.W_OK):
-            fc.append('/'.join([p, '%s.cfg' % module]))
 
-    if len(fc) < 1:
-        raise Exception('Cannot find a writable path to store %s config file' %
-                        module)
+# {module: ConfigStore}
+config_stores = {}
+config_stores_lock = threading.Lock()
 
-    cp = configparser.ConfigParser()
-    cfg_files = cp.read(fc)
 
-    if not cp.has_section(section):
-        cp.add_section(section)
+def config_store(module):
+    with config_stores_lock:
+        if module not in config_stores:
+            config_stores[module] = ConfigStore(module)
 
-    # XXX: tomb: is there a type() or isinstance() missing here?
-    if value == True:
-        cp.set(section, key, 'true')
-    elif value == False:
-        cp.set(section, key, 'false')
-    else:
-        cp.set(section, key, value)
+        return config_stores[module]
 
-    if len(cfg_files) < 1:
-        cfg_files = fc
 
-    fh = open(cfg_files[0], 'w')
-    cp.write(fh)
-    fh.close()
+# TODO: - somehow specify TYPES to get/set from config
+def find_config_value(module, section, key, default):
+    """Attempt to find the configuration value specified by string key
+    in the specified section of module's configuration file. If it is
+    not found, return default.
+    """
+    store = config_store(module)
+
+    if len(store.files) < 1:
+        print('Cannot find %s config file path' % module)
+        return default
 
-    return True
+    return store.get(section, key, default)
+
+
+def write_config_value(module, section, key, value):
+    """Attempt to write the configuration value specified by string key
+    in the specified section of module's configuration file.
+    """
+    return write_config_values(module, section, {key: value})
+
+
+def write_config_values(module, section, values):
+    """Write all key: value pairs of values to the specified section of
+    module's configuration file, with a single write.
+    """
+    return config_store(module).update(section, values)
 
 
 def scene_filename():
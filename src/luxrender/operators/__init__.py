@@ -26,13 +26,15 @@
 #
 # Blender Libs
 import bpy, bl_operators
-import json, math, os, struct, mathutils
+import json, math, os, mathutils
 
 # LuxRender Libs
 from .. import LuxRenderAddon
 from ..outputs import LuxLog, LuxManager
-from ..export.scene import SceneExporter
 from ..export import materials as export_materials
+from ..export.meshdata import NUMPY_AVAILABLE, TessfaceArrays
+from ..export.ply import write_ply, pack_vertices, pack_faces, pack_vertex_arrays, pack_face_arrays
+from ..export.plycache import PLYCache, ply_cache_directory
 
 from ..extensions_framework import util as efutil
 
@@ -410,7 +412,12 @@ class LUXRENDER_OT_opencl_device_list_update(bpy.types.Operator):
             devs.remove(0)
 
         # Create the new list
-        from ..outputs.luxcore_api import pyluxcore
+        from ..outputs.luxcore_api import load_pyluxcore
+
+        pyluxcore = load_pyluxcore()
+        if pyluxcore is None:
+            self.report({'ERROR'}, 'Listing OpenCL devices requires pyluxcore')
+            return {'CANCELLED'}
 
         deviceList = pyluxcore.GetOpenCLDeviceList()
         for dev in deviceList:
@@ -422,6 +429,41 @@ class LUXRENDER_OT_opencl_device_list_update(bpy.types.Operator):
         return {'FINISHED'}
 
 
+@LuxRenderAddon.addon_register_class
+class LUXRENDER_OT_ply_cache_collect(bpy.types.Operator):
+    """Remove unused files from the PLY cache of this scene"""
+
+    bl_idname = "luxrender.ply_cache_collect"
+    bl_label = "Clean up PLY cache"
+
+    clear = bpy.props.BoolProperty(name='Remove all cached files', default=False)
+
+    def execute(self, context):
+        scene_path = efutil.filesystem_path(context.scene.render.filepath)
+
+        if os.path.isdir(scene_path):
+            export_path = scene_path
+        else:
+            export_path = os.path.dirname(scene_path)
+
+        cache_path = ply_cache_directory(export_path)
+
+        if not os.path.exists(cache_path):
+            self.report({'INFO'}, 'No PLY cache in %s' % export_path)
+            return {'CANCELLED'}
+
+        cache = PLYCache(cache_path, context.scene.luxrender_engine.ply_cache_size * 1024 * 1024)
+
+        if self.properties.clear:
+            removed = len(cache.index)
+            cache.clear()
+        else:
+            removed = cache.collect()
+
+        self.report({'INFO'}, 'Removed %i files from the PLY cache' % removed)
+        return {'FINISHED'}
+
+
 # Export process
 
 @LuxRenderAddon.addon_register_class
@@ -454,6 +496,8 @@ class EXPORT_OT_luxrender(bpy.types.Operator):
 
         LuxManager.SetActive(None)
 
+        from ..export.scene import SceneExporter
+
         return SceneExporter() \
             .set_report(self.report) \
             .set_properties(self.properties) \
@@ -1160,16 +1204,22 @@ class LUXRENDER_OT_export_luxrender_proxy(bpy.types.Operator):
 
             # Collate faces by mat index
             ffaces_mats = {}
-            mesh_faces = mesh.tessfaces
+            mesh_arrays = None
+
+            if NUMPY_AVAILABLE:
+                mesh_arrays = TessfaceArrays(mesh)
+                material_indices = mesh_arrays.material_indices()
+            else:
+                mesh_faces = mesh.tessfaces
 
-            for f in mesh_faces:
-                mi = f.material_index
+                for f in mesh_faces:
+                    mi = f.material_index
 
-                if mi not in ffaces_mats.keys():
-                    ffaces_mats[mi] = []
-                ffaces_mats[mi].append(f)
+                    if mi not in ffaces_mats.keys():
+                        ffaces_mats[mi] = []
+                    ffaces_mats[mi].append(f)
 
-            material_indices = ffaces_mats.keys()
+                material_indices = ffaces_mats.keys()
             number_of_mats = len(mesh.materials)
 
             if number_of_mats > 0:
@@ -1211,160 +1261,123 @@ class LUXRENDER_OT_export_luxrender_proxy(bpy.types.Operator):
                         # number of verts needed needs to be written in the header
                         # and that number is not known before this is done.
 
-                        # Export data
-                        co_no_uv_vc_cache = []
-                        face_vert_indices = {}  # mapping of face index to list of exported vert indices for that face
+                        if mesh_arrays is not None:
+                            mesh_arrays.load_layers(uv_layer, vertex_color_layer)
+                            mesh_part = mesh_arrays.part(i, bool(uv_layer), bool(vertex_color_layer))
+                            vert_index = mesh_part.vertex_count
+                            face_count = mesh_part.face_count
 
-                        # Caches
-                        # mapping of vert index to exported vert index for verts with vert normals
+                            vertex_data = pack_vertex_arrays(mesh_part.co, mesh_part.no, mesh_part.uv, mesh_part.vc)
+                            face_data = pack_face_arrays(mesh_part.face_sides, mesh_part.face_indices)
 
-                        vert_vno_indices = {}
-                        vert_use_vno = set()  # Set of vert indices that use vert normals
-                        vert_index = 0  # exported vert index
+                            del mesh_part
+                        else:
+                            # Export data
+                            co_no_uv_vc_cache = []
+                            face_vert_indices = {}  # mapping of face index to list of exported vert indices for that face
 
-                        c1 = c2 = c3 = c4 = None
+                            # Caches
+                            # mapping of vert index to exported vert index for verts with vert normals
 
-                        for fidx, face in enumerate(ffaces_mats[i]):
-                            fvi = []
-                            if vertex_color_layer:
-                                c1 = vertex_color_layer[fidx].color1
-                                c2 = vertex_color_layer[fidx].color2
-                                c3 = vertex_color_layer[fidx].color3
-                                c4 = vertex_color_layer[fidx].color4
+                            vert_vno_indices = {}
+                            vert_use_vno = set()  # Set of vert indices that use vert normals
+                            vert_index = 0  # exported vert index
 
-                            for j, vertex in enumerate(face.vertices):
-                                v = mesh.vertices[vertex]
+                            c1 = c2 = c3 = c4 = None
 
+                            for face in ffaces_mats[i]:
+                                fvi = []
                                 if vertex_color_layer:
-                                    if j == 0:
-                                        vert_col = c1
-                                    elif j == 1:
-                                        vert_col = c2
-                                    elif j == 2:
-                                        vert_col = c3
-                                    elif j == 3:
-                                        vert_col = c4
-
-                                if face.use_smooth:
-                                    if uv_layer:
-                                        if vertex_color_layer:
-                                            vert_data = (v.co[:], v.normal[:], uv_layer[face.index].uv[j][:],
-                                                         (int(255 * vert_col[0]),
-                                                          int(255 * vert_col[1]),
-                                                          int(255 * vert_col[2]))[:])
+                                    c1 = vertex_color_layer[face.index].color1
+                                    c2 = vertex_color_layer[face.index].color2
+                                    c3 = vertex_color_layer[face.index].color3
+                                    c4 = vertex_color_layer[face.index].color4
+
+                                for j, vertex in enumerate(face.vertices):
+                                    v = mesh.vertices[vertex]
+
+                                    if vertex_color_layer:
+                                        if j == 0:
+                                            vert_col = c1
+                                        elif j == 1:
+                                            vert_col = c2
+                                        elif j == 2:
+                                            vert_col = c3
+                                        elif j == 3:
+                                            vert_col = c4
+
+                                    if face.use_smooth:
+                                        if uv_layer:
+                                            if vertex_color_layer:
+                                                vert_data = (v.co[:], v.normal[:], uv_layer[face.index].uv[j][:],
+                                                             (int(255 * vert_col[0]),
+                                                              int(255 * vert_col[1]),
+                                                              int(255 * vert_col[2]))[:])
+                                            else:
+                                                vert_data = (v.co[:], v.normal[:], uv_layer[face.index].uv[j][:])
                                         else:
-                                            vert_data = (v.co[:], v.normal[:], uv_layer[face.index].uv[j][:])
-                                    else:
-                                        if vertex_color_layer:
-                                            vert_data = (v.co[:], v.normal[:],
-                                                         (int(255 * vert_col[0]),
-                                                          int(255 * vert_col[1]),
-                                                          int(255 * vert_col[2]))[:])
-                                        else:
-                                            vert_data = (v.co[:], v.normal[:])
+                                            if vertex_color_layer:
+                                                vert_data = (v.co[:], v.normal[:],
+                                                             (int(255 * vert_col[0]),
+                                                              int(255 * vert_col[1]),
+                                                              int(255 * vert_col[2]))[:])
+                                            else:
+                                                vert_data = (v.co[:], v.normal[:])
 
-                                    if vert_data not in vert_use_vno:
-                                        vert_use_vno.add(vert_data)
+                                        if vert_data not in vert_use_vno:
+                                            vert_use_vno.add(vert_data)
 
-                                        co_no_uv_vc_cache.append(vert_data)
+                                            co_no_uv_vc_cache.append(vert_data)
 
-                                        vert_vno_indices[vert_data] = vert_index
-                                        fvi.append(vert_index)
+                                            vert_vno_indices[vert_data] = vert_index
+                                            fvi.append(vert_index)
 
-                                        vert_index += 1
-                                    else:
-                                        fvi.append(vert_vno_indices[vert_data])
-                                else:
-                                    if uv_layer:
-                                        if vertex_color_layer:
-                                            vert_data = (v.co[:], face.normal[:], uv_layer[face.index].uv[j][:],
-                                                         (int(255 * vert_col[0]),
-                                                          int(255 * vert_col[1]),
-                                                          int(255 * vert_col[2]))[:])
+                                            vert_index += 1
                                         else:
-                                            vert_data = (v.co[:], face.normal[:], uv_layer[face.index].uv[j][:])
+                                            fvi.append(vert_vno_indices[vert_data])
                                     else:
-                                        if vertex_color_layer:
-                                            vert_data = (v.co[:], face.normal[:],
-                                                         (int(255 * vert_col[0]),
-                                                          int(255 * vert_col[1]),
-                                                          int(255 * vert_col[2]))[:])
+                                        if uv_layer:
+                                            if vertex_color_layer:
+                                                vert_data = (v.co[:], face.normal[:], uv_layer[face.index].uv[j][:],
+                                                             (int(255 * vert_col[0]),
+                                                              int(255 * vert_col[1]),
+                                                              int(255 * vert_col[2]))[:])
+                                            else:
+                                                vert_data = (v.co[:], face.normal[:], uv_layer[face.index].uv[j][:])
                                         else:
-                                            vert_data = (v.co[:], face.normal[:])
-
-                                    # All face-vert-co-no are unique, we cannot
-                                    # cache them
-                                    co_no_uv_vc_cache.append(vert_data)
-                                    fvi.append(vert_index)
-                                    vert_index += 1
-
-                            face_vert_indices[face.index] = fvi
-
-                        del vert_vno_indices
-                        del vert_use_vno
-
-                        with open(ply_path, 'wb') as ply:
-                            ply.write(b'ply\n')
-                            ply.write(b'format binary_little_endian 1.0\n')
-                            ply.write(b'comment Created by LuxBlend 2.6 exporter for LuxRender - www.luxrender.net\n')
-
-                            # vert_index == the number of actual verts needed
-                            ply.write(('element vertex %d\n' % vert_index).encode())
-                            ply.write(b'property float x\n')
-                            ply.write(b'property float y\n')
-                            ply.write(b'property float z\n')
-
-                            ply.write(b'property float nx\n')
-                            ply.write(b'property float ny\n')
-                            ply.write(b'property float nz\n')
-
-                            if uv_layer:
-                                ply.write(b'property float s\n')
-                                ply.write(b'property float t\n')
+                                            if vertex_color_layer:
+                                                vert_data = (v.co[:], face.normal[:],
+                                                             (int(255 * vert_col[0]),
+                                                              int(255 * vert_col[1]),
+                                                              int(255 * vert_col[2]))[:])
+                                            else:
+                                                vert_data = (v.co[:], face.normal[:])
+
+                                        # All face-vert-co-no are unique, we cannot
+                                        # cache them
+                                        co_no_uv_vc_cache.append(vert_data)
+                                        fvi.append(vert_index)
+                                        vert_index += 1
 
-                            if vertex_color_layer:
-                                ply.write(b'property uchar red\n')
-                                ply.write(b'property uchar green\n')
-                                ply.write(b'property uchar blue\n')
+                                face_vert_indices[face.index] = fvi
 
-                            ply.write(('element face %d\n' % len(ffaces_mats[i])).encode())
-                            ply.write(b'property list uchar uint vertex_indices\n')
+                            del vert_vno_indices
+                            del vert_use_vno
 
-                            ply.write(b'end_header\n')
-
-                            # dump cached co/no/uv/vc
-                            if uv_layer:
-                                if vertex_color_layer:
-                                    for co, no, uv, vc in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
-                                        ply.write(struct.pack('<2f', *uv))
-                                        ply.write(struct.pack('<3B', *vc))
-                                else:
-                                    for co, no, uv in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
-                                        ply.write(struct.pack('<2f', *uv))
-                            else:
-                                if vertex_color_layer:
-                                    for co, no, vc in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
-                                        ply.write(struct.pack('<3B', *vc))
-                                else:
-                                    for co, no in co_no_uv_vc_cache:
-                                        ply.write(struct.pack('<3f', *co))
-                                        ply.write(struct.pack('<3f', *no))
-
-                            # dump face vert indices
-                            for face in ffaces_mats[i]:
-                                lfvi = len(face_vert_indices[face.index])
-                                ply.write(struct.pack('<B', lfvi))
-                                ply.write(struct.pack('<%dI' % lfvi, *face_vert_indices[face.index]))
+                            face_count = len(ffaces_mats[i])
+                            vertex_data = pack_vertices(co_no_uv_vc_cache, bool(uv_layer), bool(vertex_color_layer))
+                            face_data = pack_faces([face_vert_indices[face.index] for face in ffaces_mats[i]])
 
                             del co_no_uv_vc_cache
                             del face_vert_indices
 
+                        # vert_index == the number of actual verts needed
+                        write_ply(ply_path, vert_index, face_count, vertex_data, face_data,
+                                  bool(uv_layer), bool(vertex_color_layer))
+
+                        del vertex_data
+                        del face_data
+
                         print('[Object: %s] Binary PLY file written: %s' % (obj.name, ply_path))
                         return mesh, ply_path
                     else:
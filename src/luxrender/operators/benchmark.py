@@ -0,0 +1,236 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Export benchmark, meant to be run from a background Blender session:
+
+    blender -b [scene.blend] --python-exit-code 1 --python-expr \\
+        "import bpy; assert bpy.ops.luxrender.benchmark_export(mesh_count=1000, \\
+        result_path='result.json', baseline_path='baseline.json') == {'FINISHED'}"
+
+The current scene is exported to a temporary directory with the file API,
+or a procedural scene of mesh_count grid meshes when mesh_count > 0. The
+wall time of each export phase, the peak of memory allocated from Python
+and the number of bytes written are saved as JSON, and compared to a
+previous result when a baseline is given.
+
+Outside of Blender, benchmarks/bench_export.py measures both exporters on
+synthetic scenes and benchmarks/compare.py checks the results against
+benchmarks/baseline_export.json.
+"""
+
+import json, os, shutil, tempfile, time, tracemalloc
+
+import bpy
+
+from .. import LuxRenderAddon
+from ..outputs import LuxLog, LuxManager
+
+# Phase times which differ by less than this many seconds are never regressions
+TIME_NOISE = 0.05
+
+
+def build_benchmark_scene(mesh_count, subdivisions):
+    """
+    Create a scene with a camera, a sun lamp and mesh_count separate grid
+    meshes of subdivisions x subdivisions quads
+    """
+    scene = bpy.data.scenes.new('LuxRender Benchmark')
+
+    size = subdivisions + 1
+    verts = [(x / subdivisions - 0.5, y / subdivisions - 0.5, 0.0) for y in range(size) for x in range(size)]
+    faces = [(y * size + x, y * size + x + 1, (y + 1) * size + x + 1, (y + 1) * size + x)
+             for y in range(subdivisions) for x in range(subdivisions)]
+
+    row_length = max(1, int(mesh_count ** 0.5))
+
+    for i in range(mesh_count):
+        mesh = bpy.data.meshes.new('benchmark_%05d' % i)
+        mesh.from_pydata(verts, [], faces)
+        mesh.update()
+
+        obj = bpy.data.objects.new(mesh.name, mesh)
+        obj.location = (1.5 * (i % row_length), 1.5 * (i // row_length), 0.0)
+        scene.objects.link(obj)
+
+    lamp = bpy.data.objects.new('benchmark_sun', bpy.data.lamps.new('benchmark_sun', 'SUN'))
+    scene.objects.link(lamp)
+
+    camera = bpy.data.objects.new('benchmark_camera', bpy.data.cameras.new('benchmark_camera'))
+    camera.location = (0.75 * row_length, -2.0 * row_length, 2.0 * row_length)
+    camera.rotation_euler = (0.8, 0.0, 0.0)
+    scene.objects.link(camera)
+    scene.camera = camera
+
+    return scene
+
+
+def remove_benchmark_scene(scene):
+    objects = list(scene.objects)
+
+    for obj in objects:
+        scene.objects.unlink(obj)
+
+    bpy.data.scenes.remove(scene)
+
+    for obj in objects:
+        data = obj.data
+        bpy.data.objects.remove(obj)
+
+        if isinstance(data, bpy.types.Mesh):
+            bpy.data.meshes.remove(data)
+        elif isinstance(data, bpy.types.Lamp):
+            bpy.data.lamps.remove(data)
+        elif isinstance(data, bpy.types.Camera):
+            bpy.data.cameras.remove(data)
+
+
+def directory_size(path):
+    size = 0
+
+    for dirpath, dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            size += os.path.getsize(os.path.join(dirpath, filename))
+
+    return size
+
+
+def compare_benchmark(result, baseline, tolerance):
+    """
+    Return a message for each measurement of result which is more than
+    tolerance (a fraction) worse than in baseline
+    """
+    regressions = []
+
+    def check(name, value, base, noise=0):
+        if base is not None and value > base * (1.0 + tolerance) and value - base > noise:
+            regressions.append('%s: %g, baseline %g' % (name, value, base))
+
+    for phase, seconds in result['phases'].items():
+        check('phase %s' % phase, seconds, baseline['phases'].get(phase), TIME_NOISE)
+
+    check('total time', result['total_time'], baseline.get('total_time'), TIME_NOISE)
+    check('peak memory', result['peak_memory'], baseline.get('peak_memory'))
+    check('bytes written', result['bytes_written'], baseline.get('bytes_written'))
+
+    return regressions
+
+
+@LuxRenderAddon.addon_register_class
+class LUXRENDER_OT_benchmark_export(bpy.types.Operator):
+    """Measure the export of the current or a procedural scene"""
+
+    bl_idname = 'luxrender.benchmark_export'
+    bl_label = 'Benchmark LuxRender Export'
+
+    mesh_count = bpy.props.IntProperty(name='Meshes', default=0, min=0,
+                                       description='Number of procedural meshes, 0 to export the current scene')
+    subdivisions = bpy.props.IntProperty(name='Subdivisions', default=32, min=1,
+                                         description='Grid subdivisions of each procedural mesh')
+    result_path = bpy.props.StringProperty(name='Result', default='', subtype='FILE_PATH',
+                                           description='JSON file to save the measurements to')
+    baseline_path = bpy.props.StringProperty(name='Baseline', default='', subtype='FILE_PATH',
+                                             description='JSON file of earlier measurements to compare with')
+    tolerance = bpy.props.FloatProperty(name='Tolerance', default=0.1, min=0.0,
+                                        description='Allowed relative increase over the baseline')
+
+    def execute(self, context):
+        if self.mesh_count > 0:
+            generate_start = time.time()
+            scene = build_benchmark_scene(self.mesh_count, self.subdivisions)
+            generate_time = time.time() - generate_start
+        else:
+            scene = context.scene
+            generate_time = 0.0
+
+        from ..export.scene import SceneExporter, SceneExporterProperties
+
+        output_dir = tempfile.mkdtemp(prefix='luxrender_benchmark_')
+
+        properties = SceneExporterProperties()
+        properties.directory = output_dir
+        properties.filename = 'benchmark'
+        properties.api_type = 'FILE'
+
+        exporter = SceneExporter().set_report(self.report).set_properties(properties).set_scene(scene)
+
+        try:
+            LuxManager.SetActive(None)
+
+            tracemalloc.start()
+            export_start = time.time()
+            status = exporter.export()
+            total_time = time.time() - export_start
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            bytes_written = directory_size(output_dir)
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+            if self.mesh_count > 0:
+                remove_benchmark_scene(scene)
+
+        if status != {'FINISHED'}:
+            return status
+
+        result = {
+            'blender': bpy.app.version_string,
+            'mesh_count': self.mesh_count,
+            'subdivisions': self.subdivisions,
+            'generate_time': generate_time,
+            'phases': exporter.phase_times,
+            'total_time': total_time,
+            'peak_memory': peak_memory,
+            'bytes_written': bytes_written,
+        }
+
+        for phase, seconds in result['phases'].items():
+            LuxLog('Benchmark phase %s: %.3fs' % (phase, seconds))
+        LuxLog('Benchmark total: %.3fs, peak memory %i bytes, %i bytes written' % (total_time, peak_memory,
+                                                                                  bytes_written))
+
+        if self.result_path:
+            with open(bpy.path.abspath(self.result_path), 'w') as result_file:
+                json.dump(result, result_file, indent=2)
+
+        if self.baseline_path:
+            with open(bpy.path.abspath(self.baseline_path), 'r') as baseline_file:
+                baseline = json.load(baseline_file)
+
+            regressions = compare_benchmark(result, baseline, self.tolerance)
+
+            if regressions:
+                for regression in regressions:
+                    self.report({'ERROR'}, 'Benchmark regression, %s' % regression)
+
+                return {'CANCELLED'}
+
+        self.report({'INFO'}, 'Benchmark finished in %.3fs' % total_time)
+        return {'FINISHED'}
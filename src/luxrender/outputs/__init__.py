@@ -225,6 +225,7 @@ class LuxManager(object):
         if api_type == 'FILE':
             Context = file_api.Custom_Context
         elif api_type == 'API':
+            pure_api.load_pylux()
             Context = pure_api.Custom_Context
         elif api_type == 'LBM2':
             Context = lbm2_api.Custom_Context
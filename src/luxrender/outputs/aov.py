@@ -0,0 +1,204 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond, Daniel Genrich
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Conversion of LuxCore film channels (AOVs) to RGBA pixels for Blender images.
+
+The functions take the array.array filled by GetOutputFloat/GetOutputUInt.
+With NumPy the buffer is wrapped without copying and converted with array
+operations; otherwise the _python variants are used, which return the same
+values as lists.
+"""
+
+import array, math
+
+try:
+    import numpy
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    numpy = None
+    NUMPY_AVAILABLE = False
+
+
+def channel_buffer(type_code, size):
+    """
+    Zero filled array.array of the given type code, for GetOutputFloat/GetOutputUInt
+    """
+    return array.array(type_code, [0]) * size
+
+
+def normalize_python(values):
+    """
+    Divide all values in place by the largest finite value, if it is positive
+    """
+    isInf = math.isinf
+
+    maxValue = 0.0
+    for elem in values:
+        if elem > maxValue and not isInf(elem):
+            maxValue = elem
+
+    if maxValue > 0.0:
+        for i in range(0, len(values)):
+            values[i] = values[i] / maxValue
+
+
+def channel_to_rgba_python(values, depth, normalize=False):
+    """
+    Expand a float channel of depth 1, 2 or 3 to a flat RGBA list. Single
+    values become grey, missing components are 0.0 and alpha is 1.0. RGBA
+    channels are returned unchanged.
+    """
+    if depth == 4:
+        return values
+
+    if normalize:
+        normalize_python(values)
+
+    converted = []
+
+    if depth == 1:
+        for elem in values:
+            converted.extend([elem, elem, elem, 1.0])
+    elif depth == 2:
+        for i in range(0, len(values), 2):
+            converted.extend([values[i], values[i + 1], 0.0, 1.0])
+    else:
+        for i in range(0, len(values), 3):
+            converted.extend([values[i], values[i + 1], values[i + 2], 1.0])
+
+    return converted
+
+
+def material_id_to_rgba_python(values):
+    """
+    Decode 0xRRGGBB material IDs to a flat RGBA list
+    """
+    converted = []
+
+    for rgba_raw in values:
+        converted.extend([
+            float((rgba_raw & 0xff0000) >> 16) / 255.0,
+            float((rgba_raw & 0xff00) >> 8) / 255.0,
+            float(rgba_raw & 0xff) / 255.0,
+            1.0
+        ])
+
+    return converted
+
+
+def place_in_image_python(rgba, width, height, image_width, image_height, offset_x, offset_y):
+    """
+    Copy width x height RGBA pixels into a blank image_width x image_height
+    image, offset_x pixels from the left and offset_y rows from the bottom
+    """
+    image = [0.0] * (image_width * image_height * 4)
+
+    for y in range(height):
+        image_start = ((y + offset_y) * image_width + offset_x) * 4
+        buffer_start = y * width * 4
+        image[image_start:image_start + width * 4] = rgba[buffer_start:buffer_start + width * 4]
+
+    return image
+
+
+def normalize_numpy(values):
+    finite = values[numpy.isfinite(values)]
+    max_value = finite.max() if len(finite) else 0.0
+
+    if max_value > 0.0:
+        values /= max_value
+
+
+def channel_to_rgba_numpy(values, depth, normalize=False):
+    """
+    NumPy version of channel_to_rgba_python(), returns a float32 array
+    """
+    values = numpy.frombuffer(values, dtype=numpy.float32)
+
+    if depth == 4:
+        return values
+
+    pixels = values.reshape(-1, depth)
+    if normalize:
+        pixels = pixels.copy()
+        normalize_numpy(pixels)
+
+    rgba = numpy.zeros((len(pixels), 4), dtype=numpy.float32)
+    rgba[:, 3] = 1.0
+
+    if depth == 1:
+        rgba[:, :3] = pixels
+    else:
+        rgba[:, :depth] = pixels
+
+    return rgba.ravel()
+
+
+def material_id_to_rgba_numpy(values):
+    """
+    NumPy version of material_id_to_rgba_python(), returns a float32 array
+    """
+    ids = numpy.frombuffer(values, dtype=numpy.uint32)
+
+    rgba = numpy.empty((len(ids), 4), dtype=numpy.float32)
+    rgba[:, 0] = (ids >> 16) & 0xff
+    rgba[:, 1] = (ids >> 8) & 0xff
+    rgba[:, 2] = ids & 0xff
+    rgba[:, :3] /= 255.0
+    rgba[:, 3] = 1.0
+
+    return rgba.ravel()
+
+
+def place_in_image_numpy(rgba, width, height, image_width, image_height, offset_x, offset_y):
+    image = numpy.zeros((image_height, image_width, 4), dtype=numpy.float32)
+    image[offset_y:offset_y + height, offset_x:offset_x + width] = numpy.asarray(rgba).reshape(height, width, 4)
+
+    return image.ravel()
+
+
+if NUMPY_AVAILABLE:
+    channel_to_rgba = channel_to_rgba_numpy
+    material_id_to_rgba = material_id_to_rgba_numpy
+    place_in_image = place_in_image_numpy
+else:
+    channel_to_rgba = channel_to_rgba_python
+    material_id_to_rgba = material_id_to_rgba_python
+    place_in_image = place_in_image_python
+
+
+def set_image_pixels(image, pixels):
+    """
+    Assign converted pixels to a Blender image
+    """
+    if NUMPY_AVAILABLE and hasattr(image.pixels, 'foreach_set'):
+        image.pixels.foreach_set(numpy.ascontiguousarray(pixels, dtype=numpy.float32))
+    elif NUMPY_AVAILABLE and isinstance(pixels, numpy.ndarray):
+        image.pixels = pixels.tolist()
+    else:
+        image.pixels = pixels
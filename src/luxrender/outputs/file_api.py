@@ -24,13 +24,14 @@
 #
 # ***** END GPL LICENCE BLOCK *****
 #
-import os
+import os, queue, threading
 
 import bpy
 
 from ..extensions_framework import util as efutil
 
 from ..outputs import LuxLog
+from ..outputs.profiler import profiler
 from ..outputs.pure_api import LUXRENDER_VERSION
 from ..properties import ExportedVolumes
 
@@ -56,6 +57,112 @@ class RenderingServerInfo(object):
         self.name = name
 
 
+class BufferedFile(object):
+    """
+    Text file written by a background thread. Written strings are collected
+    in memory and handed to the writer thread in chunks of about BUFFER_SIZE
+    characters, so that exporting large scenes does not issue a write() and
+    flush() for every line. Errors raised by the writer thread are re-raised
+    in the exporting thread by the next write(), flush() or close().
+    """
+
+    BUFFER_SIZE = 4 * 1024 * 1024
+
+    # Chunks waiting for the writer thread, write() blocks when this many are queued
+    MAX_PENDING = 4
+
+    _FLUSH = object()
+    _CLOSE = object()
+
+    def __init__(self, name):
+        self.name = name
+        self.file = open(name, 'w')
+
+        self.buffer = []
+        self.buffered = 0
+        self.failed = False
+        self.error = None
+
+        self.queue = queue.Queue(self.MAX_PENDING)
+        self.thread = threading.Thread(target=self._drain, name='LuxRender file writer: %s' % name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _drain(self):
+        while True:
+            chunk = self.queue.get()
+
+            try:
+                # After an error everything else is discarded, it is
+                # reported by check() in the exporting thread
+                if not self.failed:
+                    if chunk is self._FLUSH:
+                        self.file.flush()
+                    elif chunk is not self._CLOSE:
+                        self.file.write(chunk)
+            except Exception as err:
+                self.failed = True
+                self.error = err
+            finally:
+                self.queue.task_done()
+
+            if chunk is self._CLOSE:
+                return
+
+    def _hand_off(self):
+        if self.buffer:
+            # Scene files are ascii, so characters are bytes
+            profiler.count('scene_file_bytes', self.buffered)
+
+            # Time spent blocked here means the writer thread can't keep up
+            with profiler.scope('file_wait'):
+                self.queue.put(''.join(self.buffer))
+
+            self.buffer = []
+            self.buffered = 0
+
+    def check(self):
+        """
+        Re-raise an exception from the writer thread in the calling thread
+        """
+        if self.error is not None:
+            err, self.error = self.error, None
+            raise err
+
+    def write(self, st):
+        self.check()
+
+        self.buffer.append(st)
+        self.buffered += len(st)
+
+        if self.buffered >= self.BUFFER_SIZE:
+            self._hand_off()
+
+    def flush(self):
+        """
+        Wait until everything written so far has been passed to the OS
+        """
+        self.check()
+        self._hand_off()
+        self.queue.put(self._FLUSH)
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        if self.thread is None:
+            return
+
+        try:
+            self._hand_off()
+            self.queue.put(self._CLOSE)
+            self.thread.join()
+        finally:
+            self.thread = None
+            self.file.close()
+
+        self.check()
+
+
 class Custom_Context(object):
     """
     Imitate the real pylux Context object so that we can
@@ -97,7 +204,6 @@ class Custom_Context(object):
             ind = 0
 
         self.files[ind].write('%s%s\n' % ('\t' * tabs, st))
-        self.files[ind].flush()
 
     def set_filename(self, scene, name, LXV=True):
         """
@@ -110,29 +216,27 @@ class Custom_Context(object):
         """
 
         # If any files happen to be open, close them and start again
-        for f in self.files:
-            if f is not None:
-                f.close()
+        self.close_files()
 
         self.files = []
         self.file_names = []
 
         self.file_names.append('%s.lxs' % name)
-        self.files.append(open(self.file_names[Files.MAIN], 'w'))
+        self.files.append(BufferedFile(self.file_names[Files.MAIN]))
         self.wf(Files.MAIN, '# Main Scene File')
 
-        subdir = '%s%s/%s/%05d' % (efutil.export_path, efutil.scene_filename(), bpy.path.clean_name(scene.name),
-                                   scene.frame_current)
+        self.subdir = '%s%s/%s/%05d' % (efutil.export_path, efutil.scene_filename(),
+                                        bpy.path.clean_name(scene.name), scene.frame_current)
 
-        if not os.path.exists(subdir):
-            os.makedirs(subdir)
+        if not os.path.exists(self.subdir):
+            os.makedirs(self.subdir)
 
-        self.file_names.append('%s/LuxRender-Materials.lxm' % subdir)
-        self.files.append(open(self.file_names[Files.MATS], 'w'))
+        self.file_names.append('%s/LuxRender-Materials.lxm' % self.subdir)
+        self.files.append(BufferedFile(self.file_names[Files.MATS]))
         self.wf(Files.MATS, '# Materials File')
 
-        self.file_names.append('%s/LuxRender-Geometry.lxo' % subdir)
-        self.files.append(open(self.file_names[Files.GEOM], 'w'))
+        self.file_names.append('%s/LuxRender-Geometry.lxo' % self.subdir)
+        self.files.append(BufferedFile(self.file_names[Files.GEOM]))
         self.wf(Files.GEOM, '# Geometry File')
 
         self.files.append(None)
@@ -184,6 +288,20 @@ class Custom_Context(object):
     def objectInstance(self, name):
         self._api('ObjectInstance ', [name, []])
 
+    def objectInstances(self, name, transforms):
+        """
+        name				string
+        transforms			list of strings
+
+        Write a Transform with each string of 16 formatted matrix values,
+        each followed by an ObjectInstance of name, in a single write
+
+        Returns None
+        """
+
+        instance = ']\nObjectInstance "%s"\nTransform [' % name
+        self.wf(self.current_file, 'Transform [%s]\nObjectInstance "%s"' % (instance.join(transforms), name))
+
     def portalInstance(self, name):
         self._api('PortalInstance ', [name, []])
 
@@ -322,8 +440,8 @@ class Custom_Context(object):
 
     def volume(self, type, params):
         if not self.has_volumes_file:
-            self.file_names.append('%s/LuxRender-Volumes.lxv' % subdir)
-            self.files.insert(-1, open(self.file_names[Files.VOLM], 'w'))
+            self.file_names.append('%s/LuxRender-Volumes.lxv' % self.subdir)
+            self.files.insert(-1, BufferedFile(self.file_names[Files.VOLM]))
             self.wf(Files.VOLM, '# Volume File')
             self.has_volumes_file = True
 
@@ -348,24 +466,48 @@ class Custom_Context(object):
             # End of the world as we know it
             self.wf(Files.MAIN, 'WorldEnd')
 
-        # Close files
-        LuxLog('Wrote scene files')
+        try:
+            LuxLog('Wrote scene files')
+            self.close_files(log=True)
+        finally:
+            # Reset the volume redundancy check
+            ExportedVolumes.reset_vol_list()
+
+    def close_files(self, log=False):
+        """
+        log					bool
+
+        Close all open files. Every file is closed even if closing another
+        one fails, the first error is raised afterwards.
+
+        Returns None
+        """
+
+        error = None
+
         for f in self.files:
-            if f is not None:
+            if f is None:
+                continue
+
+            try:
                 f.close()
-                LuxLog(' %s' % f.name)
+            except Exception as err:
+                LuxLog('Error writing %s: %s' % (f.name, err))
+                if error is None:
+                    error = err
+            else:
+                if log:
+                    LuxLog(' %s' % f.name)
 
-        # Reset the volume redundancy check
-        ExportedVolumes.reset_vol_list()
+        if error is not None:
+            raise error
 
     def cleanup(self):
         self.exit()
 
     def exit(self):
         # If any files happen to be open, close them and start again
-        for f in self.files:
-            if f is not None:
-                f.close()
+        self.close_files()
 
     def wait(self):
         pass
@@ -389,15 +531,15 @@ class Custom_Context(object):
     def removeServer(self, s):
         self.servers.remove(s)
 
-    def parse(self, filename, async):
+    def parse(self, filename, asynchronous):
         """
         In a deviation from the API, this function returns a new context,
         which must be passed back to LuxManager so that it can control the
         rendering process.
         """
-        from ..outputs.pure_api import PYLUX_AVAILABLE
+        from ..outputs.pure_api import load_pylux
 
-        if PYLUX_AVAILABLE:
+        if load_pylux() is not None:
             from ..outputs.pure_api import Custom_Context as Pylux_Context
 
             c = Pylux_Context(self.context_name)
@@ -409,7 +551,7 @@ class Custom_Context(object):
                 for s in self.servers:
                     c.addServer(s)
 
-            c.parse(filename, async)
+            c.parse(filename, asynchronous)
 
             self.PYLUX = c.PYLUX
 
@@ -29,7 +29,7 @@ import bpy
 
 from collections import Iterable
 from ..outputs import LuxLog
-from .. import import_bindings_module
+from .. import find_bindings_module, import_bindings_module
 
 
 def ToValidLuxCoreName(name):
@@ -55,17 +55,34 @@ def ScenePrefix():
 
 
 if not 'PYLUXCORE_AVAILABLE' in locals():
-    try:
-        pyluxcore = import_bindings_module('pyluxcore')
-        pyluxcore.Init()
-        LUXCORE_VERSION = pyluxcore.Version()
+    # pyluxcore is only looked for here, it is imported by the first render or export, see load_pyluxcore()
+    PYLUXCORE_AVAILABLE = find_bindings_module('pyluxcore')
+    pyluxcore = None
+    LUXCORE_VERSION = ''
+
+
+def load_pyluxcore():
+    """
+    Import and initialise pyluxcore on first use, returns the module or None if it is not available. Modules which
+    import pyluxcore from here at load must only be imported after this was called.
+    """
+    global pyluxcore, PYLUXCORE_AVAILABLE, LUXCORE_VERSION
 
-        PYLUXCORE_AVAILABLE = True
-        LuxLog('Using pyluxcore version %s' % LUXCORE_VERSION)
+    if pyluxcore is not None or not PYLUXCORE_AVAILABLE:
+        return pyluxcore
 
+    try:
+        module = import_bindings_module('pyluxcore')
+        module.Init()
     except ImportError as err:
         LuxLog('WARNING: Binary pyluxcore module not available! Visit '
                'http://www.luxrender.net/ to obtain one for your system.')
         LuxLog('(ImportError was: %s)' % err)
-        pyluxcore = None
         PYLUXCORE_AVAILABLE = False
+        return None
+
+    LUXCORE_VERSION = module.Version()
+    pyluxcore = module
+    LuxLog('Using pyluxcore version %s' % LUXCORE_VERSION)
+
+    return pyluxcore
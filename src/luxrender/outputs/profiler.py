@@ -0,0 +1,224 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Export profiler, enabled with the "Debug: Profile Export" testing option.
+
+Code is timed in nested scopes:
+
+    with profiler.scope('mesh'):
+        ...
+        profiler.count('faces', len(faces))
+
+When the profiler is disabled, scope() returns a shared do-nothing context
+manager and count() returns immediately, so the calls can stay in the export
+code. finish() writes <name>_profile.json, with the calls, total and self
+time of each scope path and the counters, and <name>_trace.json, which can
+be opened in chrome://tracing.
+"""
+
+import collections, json, os, threading, time
+
+# Number of scopes listed in the summary
+SUMMARY_LENGTH = 5
+
+
+class _NullScope(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class _Scope(object):
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.depth = len(self.profiler.stack)
+        self.profiler.begin(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Also ends the scopes begun inside this one and left open
+        self.profiler.end(self.depth)
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class ExportProfiler(object):
+    """
+    Collects timed scopes and counters of one export. Scopes are only
+    recorded from the thread which called start(), counters may be
+    incremented from any thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.name = ''
+        self.thread = None
+        self.origin = 0.0
+        self.stack = []
+        self.events = []
+        self.counters = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def start(self, name):
+        """
+        Discard any previous results and start profiling the named export
+        """
+        self.enabled = True
+        self.name = name
+        self.thread = threading.get_ident()
+        self.stack = []
+        self.events = []
+        self.counters = collections.OrderedDict()
+        self.origin = time.perf_counter()
+
+    def stop(self):
+        """
+        End all open scopes and stop profiling
+        """
+        self.end(0)
+
+        self.enabled = False
+
+    def begin(self, name):
+        if not self.enabled or threading.get_ident() != self.thread:
+            return
+
+        # [name, start, time spent in child scopes]
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def end(self, depth=None):
+        """
+        End the innermost scope, or all scopes above depth
+        """
+        if not self.enabled or threading.get_ident() != self.thread:
+            return
+
+        if depth is None:
+            depth = len(self.stack) - 1
+
+        while len(self.stack) > max(depth, 0):
+            name, start, children = self.stack.pop()
+            duration = time.perf_counter() - start
+
+            path = '/'.join([s[0] for s in self.stack] + [name])
+            self.events.append((path, name, start - self.origin, duration, duration - children))
+
+            if self.stack:
+                self.stack[-1][2] += duration
+
+    def scope(self, name):
+        if not self.enabled:
+            return _NULL_SCOPE
+
+        return _Scope(self, name)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self):
+        """
+        Calls, total and self time of each scope path, in order of first use
+        """
+        scopes = collections.OrderedDict()
+
+        for path, name, start, duration, self_time in sorted(self.events, key=lambda e: e[2]):
+            entry = scopes.setdefault(path, {'calls': 0, 'total': 0.0, 'self': 0.0})
+            entry['calls'] += 1
+            entry['total'] += duration
+            entry['self'] += self_time
+
+        return {
+            'name': self.name,
+            'scopes': scopes,
+            'counters': self.counters,
+        }
+
+    def trace(self):
+        """
+        Complete events in the Chrome trace_event format
+        """
+        pid = os.getpid()
+
+        return {
+            'traceEvents': [{
+                'name': name,
+                'cat': path.split('/')[0],
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': duration * 1e6,
+                'pid': pid,
+                'tid': self.thread,
+            } for path, name, start, duration, self_time in self.events],
+            'displayTimeUnit': 'ms',
+        }
+
+    def summary(self, report=None, length=SUMMARY_LENGTH):
+        """
+        One line listing the scopes with the most self time
+        """
+        if report is None:
+            report = self.report()
+
+        ranked = sorted(report['scopes'].items(), key=lambda s: s[1]['self'], reverse=True)[:length]
+
+        return ', '.join(['%s %.2fs' % (path.split('/')[-1], entry['self']) for path, entry in ranked])
+
+    def finish(self, directory):
+        """
+        Stop profiling and write the report and trace files to directory.
+        Returns the summary.
+        """
+        if not self.enabled:
+            return ''
+
+        self.stop()
+
+        report = self.report()
+        basename = os.path.join(directory, self.name)
+
+        with open(basename + '_profile.json', 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+        with open(basename + '_trace.json', 'w') as trace_file:
+            json.dump(self.trace(), trace_file)
+
+        return self.summary(report)
+
+
+# Shared by all exporters; only one export runs at a time
+profiler = ExportProfiler()
@@ -25,130 +25,157 @@
 # ***** END GPL LICENCE BLOCK *****
 #
 from ..outputs import LuxLog
-from .. import import_bindings_module
+from .. import find_bindings_module, import_bindings_module
 
-if not 'PYLUX_AVAILABLE' in locals():
-    # If pylux is not available, revert to 0.8 feature set
-    LUXRENDER_VERSION = '0.8'
 
-    try:
-        pylux = import_bindings_module('pylux')
-        LUXRENDER_VERSION = pylux.version()
+def make_custom_context(pylux, version):
+    """
+    Custom_Context class of the pylux module
+    """
+
+    class Custom_Context(pylux.Context):
+        """
+        This is the 'pure' entry point to the pylux.Context API
+
+        Some methods in this class have been overridden with
+        extensions to provide additional functionality in other
+        API types (eg. file_api).
+
+        The other Custom_Context APIs are based on this one
+        """
+
+        PYLUX = pylux
+        API_TYPE = 'PURE'
 
-        class Custom_Context(pylux.Context):
+        def attributeBegin(self, comment='', file=None):
+            """
+            Added for compatibility with file_api
             """
-            This is the 'pure' entry point to the pylux.Context API
 
-            Some methods in this class have been overridden with
-            extensions to provide additional functionality in other
-            API types (eg. file_api).
+            pylux.Context.attributeBegin(self)
 
-            The other Custom_Context APIs are based on this one
+        def transformBegin(self, comment='', file=None):
+            """
+            Added for compatibility with file_api
             """
 
-            PYLUX = pylux
-            API_TYPE = 'PURE'
-
-            def attributeBegin(self, comment='', file=None):
-                """
-                Added for compatibility with file_api
-                """
-
-                pylux.Context.attributeBegin(self)
-
-            def transformBegin(self, comment='', file=None):
-                """
-                Added for compatibility with file_api
-                """
-
-                pylux.Context.transformBegin(self)
-
-            def logVerbosity(self, verbosity):
-                """
-                verbose, default, quiet, very-quiet
-                """
-                try:
-                    filterMap = {
-                        'verbose': pylux.ErrorSeverity.LUX_DEBUG,
-                        'default': pylux.ErrorSeverity.LUX_INFO,
-                        'quiet': pylux.ErrorSeverity.LUX_WARNING,
-                        'very-quiet': pylux.ErrorSeverity.LUX_ERROR,
-                    }
-
-                    pylux.errorFilter(filterMap[verbosity])
-                except ValueError:
-                    pass
-                # backwards compatibility
-                except NameError:
-                    pass
-                except AttributeError:
-                    pass
-
-        # Backwards-compatibility Context method substitution
-        if LUXRENDER_VERSION < '0.8':
-            from ..extensions_framework.util import format_elapsed_time
-
-            def printableStatistics(self, add_total):
-                stats_dict = {
-                    'secElapsed': 0.0,
-                    'samplesSec': 0.0,
-                    'samplesTotSec': 0.0,
-                    'samplesPx': 0.0,
-                    'efficiency': 0.0,
-                }
+            pylux.Context.transformBegin(self)
 
-                stats_format = {
-                    'secElapsed': format_elapsed_time,
-                    'samplesSec': lambda x: 'Samples/Sec: %0.2f' % x,
-                    'samplesTotSec': lambda x: 'Total Samples/Sec: %0.2f' % x,
-                    'samplesPx': lambda x: 'Samples/Px: %0.2f' % x,
-                    'efficiency': lambda x: 'Efficiency: %0.2f %%' % x,
+        def logVerbosity(self, verbosity):
+            """
+            verbose, default, quiet, very-quiet
+            """
+            try:
+                filterMap = {
+                    'verbose': pylux.ErrorSeverity.LUX_DEBUG,
+                    'default': pylux.ErrorSeverity.LUX_INFO,
+                    'quiet': pylux.ErrorSeverity.LUX_WARNING,
+                    'very-quiet': pylux.ErrorSeverity.LUX_ERROR,
                 }
 
-                for k in stats_dict.keys():
-                    stats_dict[k] = self.statistics(k)
+                pylux.errorFilter(filterMap[verbosity])
+            except ValueError:
+                pass
+            # backwards compatibility
+            except NameError:
+                pass
+            except AttributeError:
+                pass
+
+    # Backwards-compatibility Context method substitution
+    if version < '0.8':
+        from ..extensions_framework.util import format_elapsed_time
+
+        def printableStatistics(self, add_total):
+            stats_dict = {
+                'secElapsed': 0.0,
+                'samplesSec': 0.0,
+                'samplesTotSec': 0.0,
+                'samplesPx': 0.0,
+                'efficiency': 0.0,
+            }
 
-                    stats_string = ' | '.join(['%s' % stats_format[k](v) for k, v in stats_dict.items()])
-                    network_servers = self.getServerCount()
+            stats_format = {
+                'secElapsed': format_elapsed_time,
+                'samplesSec': lambda x: 'Samples/Sec: %0.2f' % x,
+                'samplesTotSec': lambda x: 'Total Samples/Sec: %0.2f' % x,
+                'samplesPx': lambda x: 'Samples/Px: %0.2f' % x,
+                'efficiency': lambda x: 'Efficiency: %0.2f %%' % x,
+            }
 
-                    if network_servers > 0:
-                        stats_string += ' | %i Network Servers Active' % network_servers
+            for k in stats_dict.keys():
+                stats_dict[k] = self.statistics(k)
 
-                return stats_string
+                stats_string = ' | '.join(['%s' % stats_format[k](v) for k, v in stats_dict.items()])
+                network_servers = self.getServerCount()
 
-            Custom_Context.printableStatistics = printableStatistics
+                if network_servers > 0:
+                    stats_string += ' | %i Network Servers Active' % network_servers
 
-            Custom_Context.setAttribute = Custom_Context.setOption
-            Custom_Context.getAttribute = Custom_Context.getOption
+            return stats_string
 
-            def getRenderingServersStatus(self):
-                server_list = []
+        Custom_Context.printableStatistics = printableStatistics
 
-                for i in range(self.getServerCount()):
-                    rsi = pylux.RenderingServerInfo()
-                    pylux.Context.getRenderingServersStatus(self, rsi, i + 1)
-                    server_list.append(rsi)
+        Custom_Context.setAttribute = Custom_Context.setOption
+        Custom_Context.getAttribute = Custom_Context.getOption
 
-                return server_list
+        def getRenderingServersStatus(self):
+            server_list = []
 
-            Custom_Context.getRenderingServersStatus = getRenderingServersStatus
+            for i in range(self.getServerCount()):
+                rsi = pylux.RenderingServerInfo()
+                pylux.Context.getRenderingServersStatus(self, rsi, i + 1)
+                server_list.append(rsi)
 
-            def saveEXR(self, filename, useHalfFloat, includeZBuffer, tonemapped):
-                pass  # can't do anything
+            return server_list
 
-            Custom_Context.saveEXR = saveEXR
+        Custom_Context.getRenderingServersStatus = getRenderingServersStatus
 
-            def portalInstance(self, name):
-                LuxLog('WARNING: Exporting PortalInstance as ObjectInstance; Portal will not be effective')
-                self.objectInstance(name)
+        def saveEXR(self, filename, useHalfFloat, includeZBuffer, tonemapped):
+            pass  # can't do anything
 
-            Custom_Context.portalInstace = portalInstance
+        Custom_Context.saveEXR = saveEXR
 
-        PYLUX_AVAILABLE = True
-        LuxLog('Using pylux version %s' % LUXRENDER_VERSION)
+        def portalInstance(self, name):
+            LuxLog('WARNING: Exporting PortalInstance as ObjectInstance; Portal will not be effective')
+            self.objectInstance(name)
 
+        Custom_Context.portalInstace = portalInstance
+
+    return Custom_Context
+
+
+if not 'PYLUX_AVAILABLE' in locals():
+    # pylux is only looked for here, it is imported by the first render or export, see load_pylux()
+    PYLUX_AVAILABLE = find_bindings_module('pylux')
+    pylux = None
+    Custom_Context = None
+
+    # If pylux is not available, revert to 0.8 feature set
+    LUXRENDER_VERSION = '0.8'
+
+
+def load_pylux():
+    """
+    Import pylux on first use and define Custom_Context, returns the module or None if it is not available
+    """
+    global pylux, Custom_Context, PYLUX_AVAILABLE, LUXRENDER_VERSION
+
+    if pylux is not None or not PYLUX_AVAILABLE:
+        return pylux
+
+    try:
+        module = import_bindings_module('pylux')
     except ImportError as err:
         LuxLog('WARNING: Binary pylux module not available! Visit '
                'http://www.luxrender.net/ to obtain one for your system.')
         LuxLog('(ImportError was: %s)' % err)
         PYLUX_AVAILABLE = False
+        return None
+
+    LUXRENDER_VERSION = module.version()
+    Custom_Context = make_custom_context(module, LUXRENDER_VERSION)
+    pylux = module
+    LuxLog('Using pylux version %s' % LUXRENDER_VERSION)
+
+    return pylux
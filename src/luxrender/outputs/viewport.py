@@ -0,0 +1,236 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Pixel buffer of the LuxCore viewport render.
+
+luxcore_view_draw() used to fetch the film and copy it into a new bgl.Buffer
+on every redraw. ViewportDisplay keeps one buffer per resolution, and only
+fetches the film when the render has new samples and the last fetch is
+longer ago than the display FPS target allows. Blender clears the region
+before every view_draw(), so the buffer itself is drawn every time.
+
+InteractiveResolution lets the viewport render at a fraction of the viewport
+resolution while the view or the scene are edited. The reduced film is
+scaled up when it is drawn.
+"""
+
+import array, collections, time
+
+import bgl
+
+from . import luxcore_api
+
+# Number of recent frames in the frame time statistics
+FRAME_TIME_SAMPLES = 60
+
+# Film resolution divisors used during edits, and the index of the initial one
+INTERACTIVE_DIVISORS = (2, 4, 8)
+INTERACTIVE_DIVISOR_DEFAULT = 1
+
+# Passes per second aimed for at the reduced resolution, and the minimum
+# rendering time needed to adapt the divisor
+INTERACTIVE_PASS_RATE = 10.0
+INTERACTIVE_MIN_MEASURE_TIME = 0.5
+
+
+class ViewportDisplay(object):
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.gl_buffer = None
+        # Film output for bgl.Buffer implementations without the buffer protocol, None if the film is written
+        # into gl_buffer directly
+        self.pixels = None
+
+        # Sample count of the film in the buffer
+        self.samples = -1
+        self.last_fetch = 0.0
+
+        # (time, duration) of recent draws and fetches
+        self.draw_times = collections.deque(maxlen=FRAME_TIME_SAMPLES)
+        self.fetch_times = collections.deque(maxlen=FRAME_TIME_SAMPLES)
+
+    def resize(self, width, height):
+        """
+        Allocate the buffer for a new resolution, the film is fetched again on the next update
+        """
+        self.invalidate()
+
+        if (width, height) == (self.width, self.height) and self.gl_buffer is not None:
+            return
+
+        self.width = width
+        self.height = height
+
+        size = width * height * 3
+        self.gl_buffer = bgl.Buffer(bgl.GL_FLOAT, [size])
+
+        try:
+            memoryview(self.gl_buffer)
+            self.pixels = None
+        except TypeError:
+            self.pixels = array.array('f', bytes(size * 4))
+
+    def invalidate(self):
+        """
+        Fetch the film on the next update, whatever its sample count
+        """
+        self.samples = -1
+
+    def update(self, session, samples, fps=0):
+        """
+        Fetch the tonemapped film if it has new samples and the last fetch is at least 1 / fps seconds ago
+        (fps = 0: no limit). Returns True if the buffer was updated.
+        """
+        start = time.time()
+
+        if samples == self.samples or (fps > 0 and start - self.last_fetch < 1.0 / fps):
+            return False
+
+        # Sessions only exist once pyluxcore is loaded
+        output_type = luxcore_api.pyluxcore.FilmOutputType.RGB_TONEMAPPED
+
+        if self.pixels is None:
+            session.GetFilm().GetOutputFloat(output_type, self.gl_buffer)
+        else:
+            session.GetFilm().GetOutputFloat(output_type, self.pixels)
+            self.gl_buffer[:] = self.pixels
+
+        self.samples = samples
+        self.last_fetch = start
+        self.fetch_times.append((start, time.time() - start))
+        return True
+
+    def draw(self, region_width=None, region_height=None):
+        """
+        Draw the buffer, scaled up to the region size if the film is smaller
+        """
+        start = time.time()
+        zoom = region_width is not None and (region_width, region_height) != (self.width, self.height)
+
+        if zoom:
+            bgl.glPixelZoom(region_width / self.width, region_height / self.height)
+
+        bgl.glRasterPos2i(0, 0)
+        bgl.glDrawPixels(self.width, self.height, bgl.GL_RGB, bgl.GL_FLOAT, self.gl_buffer)
+
+        if zoom:
+            bgl.glPixelZoom(1.0, 1.0)
+
+        self.draw_times.append((start, time.time() - start))
+
+    def frame_stats(self):
+        """
+        Summary of the recent draw and fetch rates and durations
+        """
+        def rate(times):
+            if len(times) < 2 or times[-1][0] == times[0][0]:
+                return 0.0
+
+            return (len(times) - 1) / (times[-1][0] - times[0][0])
+
+        def average_ms(times):
+            return sum(duration for start, duration in times) * 1000 / len(times) if times else 0.0
+
+        return 'Display: %.0f fps (%.1fms), Film: %.0f fps (%.1fms)' % (
+            rate(self.draw_times), average_ms(self.draw_times), rate(self.fetch_times), average_ms(self.fetch_times))
+
+
+class InteractiveResolution(object):
+    """
+    Film resolution of the viewport render. The first edit switches to 1 / divisor of the viewport resolution,
+    and the resolution returns to full size once there were no edits for the idle time. Before that, the divisor
+    for the next edits is adapted to the passes per second measured at the reduced resolution.
+    """
+
+    def __init__(self):
+        self.divisor_index = INTERACTIVE_DIVISOR_DEFAULT
+        self.reduced = False
+        self.last_edit = 0.0
+
+        # Passes and rendering time at the reduced resolution
+        self.measured_passes = 0
+        self.measured_time = 0.0
+        self.last_measure = None
+
+    @property
+    def divisor(self):
+        return INTERACTIVE_DIVISORS[self.divisor_index] if self.reduced else 1
+
+    def film_size(self, width, height):
+        return max(1, width // self.divisor), max(1, height // self.divisor)
+
+    def edit(self, now):
+        """
+        Record an edit of the view or the scene, returns True if the film resolution changes
+        """
+        self.last_edit = now
+
+        if self.reduced:
+            return False
+
+        self.reduced = True
+        self.measured_passes = 0
+        self.measured_time = 0.0
+        self.last_measure = None
+        return True
+
+    def measure(self, now, passes):
+        """
+        Record the pass count of the reduced film, which starts again from 0 after each edit
+        """
+        if not self.reduced:
+            return
+
+        if self.last_measure is not None:
+            last_time, last_passes = self.last_measure
+            self.measured_passes += passes - last_passes if passes >= last_passes else passes
+            self.measured_time += now - last_time
+
+        self.last_measure = (now, passes)
+
+    def idle(self, now, idle_time):
+        """
+        Returns True if the film returns to full resolution
+        """
+        if not self.reduced or now - self.last_edit < idle_time:
+            return False
+
+        self.adapt()
+        self.reduced = False
+        return True
+
+    def adapt(self):
+        if self.measured_time < INTERACTIVE_MIN_MEASURE_TIME:
+            return
+
+        rate = self.measured_passes / self.measured_time
+
+        if rate < INTERACTIVE_PASS_RATE / 2 and self.divisor_index < len(INTERACTIVE_DIVISORS) - 1:
+            self.divisor_index += 1
+        elif rate > INTERACTIVE_PASS_RATE * 2 and self.divisor_index > 0:
+            self.divisor_index -= 1
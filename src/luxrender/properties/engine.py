@@ -92,7 +92,9 @@ class luxrender_testing(declarative_property_group):
     controls = [
         'clay_render',
         'object_analysis',
-        're_raise'
+        're_raise',
+        'profile_export',
+        'profile_viewport'
     ]
 
     visibility = {}
@@ -119,6 +121,21 @@ class luxrender_testing(declarative_property_group):
             'description': 'Show export error messages in the UI as well as the console',
             'default': False
         },
+        {
+            'type': 'bool',
+            'attr': 'profile_export',
+            'name': 'Debug: Profile Export',
+            'description': 'Time each export step and write a profile report and a Chrome trace file to the export \
+directory',
+            'default': False
+        },
+        {
+            'type': 'bool',
+            'attr': 'profile_viewport',
+            'name': 'Debug: Viewport Frame Times',
+            'description': 'Show the draw and film update rates of the LuxCore realtime preview in the statistics',
+            'default': False
+        },
     ]
 
 
@@ -136,8 +153,12 @@ class luxrender_engine(declarative_property_group):
         #       'write_files',
         ['export_particles', 'export_hair'],
         'embed_filedata',
+        'embed_compression',
         'mesh_type',
+        'float_precision',
         'partial_ply',
+        'ply_cache_size',
+        'export_buffer_size',
         ['render', 'monitor_external'],
         'fixed_seed',
         # ['threads_auto', 'fixed_seed'],
@@ -149,12 +170,18 @@ class luxrender_engine(declarative_property_group):
     visibility = {
         'write_files': {'export_type': 'INT'},
         'embed_filedata': O([{'export_type': 'EXT'}, A([{'export_type': 'INT'}, {'write_files': True}])]),
+        'embed_compression': O([A([{'export_type': 'EXT'}, {'embed_filedata': True}]),
+                                A([{'export_type': 'INT'}, {'write_files': True}, {'embed_filedata': True}])]),
         'mesh_type': O([{'export_type': 'EXT'}, A([{'export_type': 'INT'}, {'write_files': True}])]),
+        'float_precision': O([{'export_type': 'EXT'}, A([{'export_type': 'INT'}, {'write_files': True}])]),
         'binary_name': {'export_type': 'EXT'},
         'render': O([{'write_files': True}, {'export_type': 'EXT'}]),
         # We need run renderer unless we are set for internal-pipe mode, which is the only time both of these are false
         'monitor_external': {'export_type': 'EXT', 'binary_name': 'luxrender', 'render': True},
         'partial_ply': O([{'export_type': 'EXT'}, A([{'export_type': 'INT'}, {'write_files': True}])]),
+        'ply_cache_size': O([A([{'export_type': 'EXT'}, {'partial_ply': True}]),
+                             A([{'export_type': 'INT'}, {'write_files': True}, {'partial_ply': True}])]),
+        'export_buffer_size': O([{'export_type': 'EXT'}, A([{'export_type': 'INT'}, {'write_files': True}])]),
         'threads_auto': O([A([{'write_files': False}, {'export_type': 'INT'}]),
                            A([O([{'write_files': True}, {'export_type': 'EXT'}]), {'render': True}])]),
         # The flag options must be present for any condition where run renderer is present and checked,
@@ -246,10 +273,34 @@ class luxrender_engine(declarative_property_group):
             'type': 'bool',
             'attr': 'partial_ply',
             'name': 'Use Cached PLY Files',
-            'description': 'Only export PLY files for new or modified objects',
+            'description': 'Keep exported PLY files in a cache shared by all frames and renders, and only write \
+            files for geometry which is not already in the cache',
             'default': True,
             'save_in_preset': True
         },
+        {
+            'type': 'int',
+            'attr': 'ply_cache_size',
+            'name': 'PLY Cache Size (MB)',
+            'description': 'Least recently used PLY files no exported frame uses any more are removed from the \
+            cache when they take more than this size',
+            'default': 4096,
+            'min': 64,
+            'soft_max': 65536,
+            'save_in_preset': True
+        },
+        {
+            'type': 'int',
+            'attr': 'export_buffer_size',
+            'name': 'Export Buffer (MB)',
+            'description': 'Maximum amount of mesh data held in memory while PLY files are written in the \
+            background',
+            'default': 512,
+            'min': 16,
+            'soft_min': 64,
+            'soft_max': 4096,
+            'save_in_preset': True
+        },
         {
             'type': 'enum',
             'attr': 'binary_name',
@@ -293,6 +344,16 @@ class luxrender_engine(declarative_property_group):
             'default': False,
             'save_in_preset': True
         },
+        {
+            'type': 'int',
+            'attr': 'embed_compression',
+            'name': 'Embed Compression',
+            'description': 'zlib compression level of embedded files, lower levels export faster',
+            'default': 9,
+            'min': 0,
+            'max': 9,
+            'save_in_preset': True
+        },
         {
             'type': 'bool',
             'attr': 'is_saving_lbm2',
@@ -313,6 +374,20 @@ class luxrender_engine(declarative_property_group):
             'default': 'binary_ply',
             'save_in_preset': True
         },
+        {
+            'type': 'enum',
+            'attr': 'float_precision',
+            'name': 'Number Precision',
+            'description': 'How floating point values are written to the scene files',
+            'items': [
+                ('AUTO', 'Automatic', 'Single precision for geometry, colors and float arrays, double precision for \
+                other values'),
+                ('DOUBLE', 'Double', 'Double precision for all values'),
+                ('FIXED', 'Fixed (legacy)', 'Fixed point with 15 decimals, as written by older versions')
+            ],
+            'default': 'AUTO',
+            'save_in_preset': True
+        },
         {
             'type': 'enum',
             'attr': 'log_verbosity',
@@ -41,6 +41,8 @@ class luxcore_realtimesettings(declarative_property_group):
     controls = [
         'label_halt',
         ['halt_samples', 'halt_time'],
+        'display_fps',
+        ['interactive_resolution', 'interactive_idle_time'],
         'use_finalrender_settings',
         'device_type', 
         'advanced',
@@ -52,6 +54,7 @@ class luxcore_realtimesettings(declarative_property_group):
     ]
 
     visibility = {
+                    'interactive_idle_time': {'interactive_resolution': True},
                     'device_type': {'use_finalrender_settings': False},
                     'advanced': {'use_finalrender_settings': False},
                     'cpu_renderengine_type': {'advanced': True, 'device_type': 'CPU', 'use_finalrender_settings': False},
@@ -91,6 +94,36 @@ class luxcore_realtimesettings(declarative_property_group):
             'soft_max': 3600,
             'save_in_preset': True
         },
+        {
+            'type': 'int',
+            'attr': 'display_fps',
+            'name': 'Display FPS',
+            'description': 'How often per second the preview image is updated with new samples (0 = as often as \
+possible)',
+            'default': 20,
+            'min': 0,
+            'max': 120,
+            'save_in_preset': True
+        },
+        {
+            'type': 'bool',
+            'attr': 'interactive_resolution',
+            'name': 'Reduce Resolution While Editing',
+            'description': 'Render at a lower resolution while the view or the scene are edited, the resolution \
+adapts to the rendering speed',
+            'default': False,
+            'save_in_preset': True
+        },
+        {
+            'type': 'float',
+            'attr': 'interactive_idle_time',
+            'name': 'Idle Time',
+            'description': 'Seconds without edits before the full resolution is rendered again',
+            'default': 1.0,
+            'min': 0.1,
+            'max': 10.0,
+            'save_in_preset': True
+        },
         {
             'type': 'bool',
             'attr': 'use_finalrender_settings',
@@ -532,7 +532,7 @@ class luxrender_material(declarative_property_group):
             return self.exportNodetree(scene, lux_context, material, mode)
 
         with MaterialCounter(material.name):
-            if not (mode == 'indirect' and material.name in ExportedMaterials.exported_material_names):
+            if not (mode == 'indirect' and ExportedMaterials.registry.is_exported(material.name)):
                 if self.type == 'mix':
                     # First export the other mix mats
                     m1_name = self.luxrender_mat_mix.namedmaterial1_material
@@ -1153,10 +1153,10 @@ class luxrender_transparency(declarative_property_group):
             # We take the name of the last texture exported, since
             # the texture export code may have re-written the name
 
-            if len(ExportedTextures.exported_texture_names) < 1:
+            if ExportedTextures.last_name is None:
                 raise Exception("Cannot get alpha texture for material %s" % material.name)
 
-            alpha_amount = ExportedTextures.exported_texture_names[-1]
+            alpha_amount = ExportedTextures.last_name
 
             if self.inverse:
                 params = ParamSet() \
@@ -59,7 +59,9 @@ class luxrender_texture_maker:
             with TextureCounter(texture_name):
                 print('Exporting texture, variant: "%s", type: "%s", name: "%s"' % (tex_variant, tex_type, tex_name))
 
-                ExportedTextures.texture(lux_context, texture_name, tex_variant, tex_type, tex_params)
+                # Node textures are referenced by the returned name, so identical ones can be shared
+                texture_name = ExportedTextures.texture(lux_context, texture_name, tex_variant, tex_type, tex_params,
+                                                        share=True)
                 ExportedTextures.export_new(lux_context)
 
                 return texture_name
@@ -1224,7 +1226,7 @@ class luxrender_material_output_node(luxrender_node):
 
         # start exporting that material...
         with MaterialCounter(material.name):
-            if not (mode == 'indirect' and material.name in ExportedMaterials.exported_material_names):
+            if not (mode == 'indirect' and ExportedMaterials.registry.is_exported(material.name)):
                 if check_node_export_material(surface_node):
                     surface_node.export_material(make_material=make_material, make_texture=make_texture)
 
@@ -36,7 +36,6 @@ from ..properties.texture import (
     import_paramset_to_blender_texture, shorten_name, refresh_preview
 )
 from ..export import ParamSet, get_worldscale, process_filepath_data
-from ..export.volumes import export_smoke
 from ..export.materials import (
     ExportedTextures, add_texture_parameter, get_texture_from_scene
 )
@@ -1064,6 +1063,9 @@ class luxrender_texture_type_node_vol_smoke_data(luxrender_texture_node):
         layout.prop(self, 'wrap')
 
     def export_texture(self, make_texture):
+        # The pointcache reader is only needed when a smoke texture is exported
+        from ..export.volumes import export_smoke
+
         # smoke_path = export_smoke(self.domain, self.source)
         grid = export_smoke(self.domain, self.source)
         nx = grid[0]
@@ -48,6 +48,7 @@ class luxrender_hair(declarative_property_group):
         'hair_size',
         ['root_width', 'tip_width', 'width_offset'],
         'use_binary_output',
+        'segment_angle',
         'tesseltype',
         'solid_sidecount',
         ['solid_capbottom', 'solid_captop'],
@@ -58,6 +59,7 @@ class luxrender_hair(declarative_property_group):
     ]
 
     visibility = {
+        'segment_angle': {'use_binary_output': False},
         'adaptive_maxdepth': {'tesseltype': O(['ribbonadaptive', 'solidadaptive'])},
         'adaptive_error': {'tesseltype': O(['ribbonadaptive', 'solidadaptive'])},
         'solid_sidecount': {'tesseltype': O(['solid', 'solidadaptive'])},
@@ -124,6 +126,20 @@ class luxrender_hair(declarative_property_group):
             'description': 'Use binary hair description file and strand primitive for export',
             'default': True,
         },
+        {
+            'type': 'float',
+            'attr': 'segment_angle',
+            'name': 'Segment Angle',
+            'description': 'Merge strand segments until the strand has turned by this angle, 0 to export all \
+segments',
+            'default': 0.0,
+            'min': 0.0,
+            'soft_min': 0.0,
+            'max': math.pi / 2,
+            'soft_max': math.pi / 2,
+            'subtype': 'ANGLE',
+            'unit': 'ROTATION',
+        },
         {
             'type': 'enum',
             'attr': 'tesseltype',
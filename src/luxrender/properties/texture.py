@@ -36,7 +36,6 @@ from .. import LuxRenderAddon
 from ..export import ParamSet, get_worldscale, process_filepath_data
 from ..export.materials import add_texture_parameter, convert_texture
 from ..outputs.luxcore_api import UseLuxCore
-from ..export.volumes import export_smoke
 from ..outputs import LuxManager
 from ..util import dict_merge, bdecode_string2file
 
@@ -2481,6 +2480,9 @@ class luxrender_tex_densitygrid(declarative_property_group):
                  ]
 
     def get_paramset(self, scene, texture):
+        # The pointcache reader is only needed when a smoke texture is exported
+        from ..export.volumes import export_smoke
+
         grid = export_smoke(self.domain_object, self.source)
         nx = grid[0]
         ny = grid[1]
@@ -38,7 +38,37 @@ def dict_merge(*args):
     return vis
 
 
-import base64, io, os, time, zlib
+import base64, collections, concurrent.futures, hashlib, io, os, time, zlib
+
+# Files are read, compressed and encoded in blocks of this size. Files with
+# several blocks are compressed in parallel.
+ENCODE_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Amount of text read per decoding step
+DECODE_CHUNK_SIZE = 4 * 1024 * 1024
+
+# base64.encodebytes() writes 57 input bytes per line
+BASE64_LINE_BYTES = 57
+
+# Compressed data is encoded once this many bytes are pending
+BASE64_ENCODE_BYTES = BASE64_LINE_BYTES * 16384
+
+# Last 32 KB of the previous block, used as dictionary for the next one
+DEFLATE_WINDOW = 32 * 1024
+
+
+def compress_block(block, dictionary, level):
+    """
+    Raw deflate data of block, ending on a byte boundary so that blocks can
+    be concatenated
+    """
+    if dictionary:
+        comp_obj = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL,
+                                    zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        comp_obj = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    return comp_obj.compress(block) + comp_obj.flush(zlib.Z_SYNC_FLUSH)
 
 
 class bEncoder(object):
@@ -46,8 +76,10 @@ class bEncoder(object):
     Encode binary files to text using base64(zlib.compress(file))
     """
 
-    def __init__(self):
+    def __init__(self, level=9, workers=None):
         self.last_encode_size = 0
+        self.level = level
+        self.workers = workers or os.cpu_count() or 1
 
     def Encode_File2File(self, fSrc_name, fDes_name):
         with open(fSrc_name, 'rb') as fSrc:
@@ -62,6 +94,44 @@ class bEncoder(object):
 
                 return fDes.getvalue()
 
+    def _deflate(self, fSrc, filelen):
+        """
+        Yield the zlib stream of fSrc in pieces. Files of more than one block
+        are compressed in parallel, block by block, each block using the end
+        of the previous one as dictionary.
+        """
+        if self.workers < 2 or filelen <= ENCODE_BLOCK_SIZE:
+            comp_obj = zlib.compressobj(self.level)
+
+            for block in iter(lambda: fSrc.read(ENCODE_BLOCK_SIZE), b''):
+                yield comp_obj.compress(block)
+
+            yield comp_obj.flush()
+            return
+
+        yield zlib.compress(b'', self.level)[:2]
+
+        checksum = zlib.adler32(b'')
+        dictionary = b''
+        pending = collections.deque()
+
+        with concurrent.futures.ThreadPoolExecutor(self.workers) as executor:
+            for block in iter(lambda: fSrc.read(ENCODE_BLOCK_SIZE), b''):
+                checksum = zlib.adler32(block, checksum)
+                pending.append(executor.submit(compress_block, block, dictionary, self.level))
+                dictionary = block[-DEFLATE_WINDOW:]
+
+                # Bound the number of blocks held in memory
+                while len(pending) > 2 * self.workers:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+        # Empty final block, and the checksum of the whole file
+        yield zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS).flush()
+        yield (checksum & 0xffffffff).to_bytes(4, 'big')
+
     def _Encode(self, fSrc, fDes):
         """
         Assumes that fSrc and fDes are already-opened file-like objects
@@ -74,30 +144,30 @@ class bEncoder(object):
         fSrc.seek(0)
         fDes.seek(0)
 
-        # Compress with a specific set of parameters
-        comp_obj = zlib.compressobj(
-            9,  # compression level
-        )
+        deflated_size = 0
+        encoded_size = 0
+        pending = bytearray()
 
-        deflated = comp_obj.compress(
-            fSrc.read()
-        )
-        deflated += comp_obj.flush()
+        for deflated in self._deflate(fSrc, filelen):
+            deflated_size += len(deflated)
+            pending += deflated
 
-        fDes.write(
-            base64.encodebytes(
-                deflated
-            ).decode()
-        )
+            if len(pending) >= BASE64_ENCODE_BYTES:
+                # Encode whole lines only, so that the output is the same as in one piece
+                length = len(pending) - len(pending) % BASE64_LINE_BYTES
+                encoded_size += fDes.write(base64.encodebytes(pending[:length]).decode())
+                del pending[:length]
+
+        encoded_size += fDes.write(base64.encodebytes(pending).decode())
 
-        self.last_encode_size = fDes.tell()
-        elapsed = time.time() - start_time
+        self.last_encode_size = encoded_size
+        elapsed = max(time.time() - start_time, 1e-6)
         print('bEncode %s : %d bytes -> %d bytes -> %d bytes: %0.2f%% : %0.2f sec : %0.2f kb/sec' % (
             input_filename,
             filelen,
-            len(deflated),
+            deflated_size,
             self.last_encode_size,
-            100 * self.last_encode_size / filelen,
+            100 * self.last_encode_size / max(filelen, 1),
             elapsed,
             filelen / elapsed / 1024)
         )
@@ -140,27 +210,79 @@ class bDecoder(object):
         fDes.seek(0)
 
         decomp_obj = zlib.decompressobj()
+        pending = b''
 
-        fDes.write(
-            decomp_obj.decompress(
-                base64.decodebytes(
-                    fSrc.read()
-                )
-            )
-        )
+        for chunk in iter(lambda: fSrc.read(DECODE_CHUNK_SIZE), b''):
+            # Lines hold whole groups of 4 base64 characters, decode up to the last line break
+            pending += chunk
+            length = pending.rfind(b'\n') + 1
+            fDes.write(decomp_obj.decompress(base64.decodebytes(pending[:length])))
+            pending = pending[length:]
+
+        fDes.write(decomp_obj.decompress(base64.decodebytes(pending)))
+        fDes.write(decomp_obj.flush())
 
         outlen = fDes.tell()
-        elapsed = time.time() - start_time
+        elapsed = max(time.time() - start_time, 1e-6)
         print('bDecode %s : %d bytes -> %d bytes : %0.2f%% : %0.2f sec : %0.2f kb/sec' % (
             input_filename,
             filelen,
             outlen,
-            100 * outlen / filelen,
+            100 * outlen / max(filelen, 1),
             elapsed,
             filelen / elapsed / 1024)
         )
 
 
+class bEncodeCache(object):
+    """
+    Encoded files of one export, indexed by content, so that a file referenced
+    by many materials or textures is read and encoded once
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.digests = {}  # {(path, mtime, size): content digest}
+        self.encoded = {}  # {(content digest, level): (lines, encoded size)}
+        self.hits = 0
+
+    def digest(self, filename):
+        st = os.stat(filename)
+        key = (os.path.realpath(filename), st.st_mtime, st.st_size)
+
+        if key not in self.digests:
+            sha = hashlib.sha1()
+
+            with open(filename, 'rb') as f:
+                for block in iter(lambda: f.read(ENCODE_BLOCK_SIZE), b''):
+                    sha.update(block)
+
+            self.digests[key] = sha.hexdigest()
+
+        return self.digests[key]
+
+    def encode_lines(self, filename, level=9):
+        """
+        Encoded lines of the file and their total size, as written by
+        bencode_file2string_with_size()
+        """
+        key = (self.digest(filename), level)
+
+        if key in self.encoded:
+            self.hits += 1
+        else:
+            be = bEncoder(level)
+            self.encoded[key] = (be.Encode_File2String(filename).splitlines(), be.last_encode_size)
+
+        return self.encoded[key]
+
+
+# Shared by the exporters; cleared at the start and end of each export
+embedded_files = bEncodeCache()
+
+
 def bencode_file2file(in_filename, out_filename):
     be = bEncoder()
     be.Encode_File2File(in_filename, out_filename)
@@ -171,8 +293,8 @@ def bencode_file2string(in_filename):
     return be.Encode_File2String(in_filename)
 
 
-def bencode_file2string_with_size(in_filename):
-    be = bEncoder()
+def bencode_file2string_with_size(in_filename, level=9):
+    be = bEncoder(level)
     en = be.Encode_File2String(in_filename)
     sz = be.last_encode_size
     return en, sz
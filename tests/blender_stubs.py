@@ -0,0 +1,839 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Stand-ins for the Blender modules (bpy, mathutils, bgl, ...) and the LuxRender
+bindings, so that the exporter modules can be imported and tested outside of
+Blender.
+
+install() puts the stand-ins into sys.modules and registers a 'luxrender'
+package that points at src/luxrender without running its __init__.py, which
+needs a running Blender to register the add-on.
+"""
+
+import collections, collections.abc, math, os, re, sys, threading, types
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+ADDON_DIR = os.path.join(SRC_DIR, 'luxrender')
+
+
+class Stub(object):
+    """
+    Permissive stand-in: any attribute, item or call returns another Stub. Called with a single class or function
+    it returns it unchanged, so it also works as a decorator.
+    """
+
+    def __init__(self, name='stub'):
+        object.__setattr__(self, '_name', name)
+
+    def __repr__(self):
+        return '<Stub %s>' % self._name
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        value = Stub('%s.%s' % (self._name, name))
+        object.__setattr__(self, name, value)
+        return value
+
+    def __call__(self, *args, **kwargs):
+        if len(args) == 1 and not kwargs and (isinstance(args[0], type) or isinstance(args[0], types.FunctionType)):
+            return args[0]
+
+        return Stub(self._name + '()')
+
+    def __getitem__(self, key):
+        return Stub('%s[%r]' % (self._name, key))
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+
+def stub_module(name, attributes=None, factory=None):
+    module = types.ModuleType(name)
+
+    if attributes:
+        module.__dict__.update(attributes)
+
+    cache = {}
+
+    def __getattr__(attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        if attr not in cache:
+            cache[attr] = factory(attr) if factory is not None else Stub('%s.%s' % (name, attr))
+
+        return cache[attr]
+
+    module.__getattr__ = __getattr__
+    return module
+
+
+# ------------------------------------------------------------------------------
+# mathutils
+# ------------------------------------------------------------------------------
+
+class Vector(object):
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._values = [float(v) for v in values]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._values[index])
+
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and self._values == other._values
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Vector(%r)' % (tuple(self._values),)
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self, other))
+
+    def __neg__(self):
+        return Vector(-a for a in self)
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return Vector(a * other for a in self)
+
+        return sum(a * b for a, b in zip(self, other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return Vector(a / other for a in self)
+
+    def _axis(index):
+        def getter(self):
+            return self._values[index]
+
+        def setter(self, value):
+            self._values[index] = float(value)
+
+        return property(getter, setter)
+
+    x = _axis(0)
+    y = _axis(1)
+    z = _axis(2)
+    w = _axis(3)
+
+    del _axis
+
+    @property
+    def length(self):
+        return math.sqrt(sum(a * a for a in self))
+
+    def normalized(self):
+        length = self.length
+        return Vector(a / length for a in self) if length else self.copy()
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self, other))
+
+    def cross(self, other):
+        a, b = self, other
+        return Vector((a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]))
+
+    def copy(self):
+        return Vector(self._values)
+
+    def to_tuple(self):
+        return tuple(self._values)
+
+    def to_3d(self):
+        return Vector(self._values[:3])
+
+    def to_4d(self):
+        return Vector(self._values[:3] + [1.0])
+
+
+class Matrix(object):
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+        self._rows = [Vector(row) for row in rows]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls.Identity(4)
+        for i in range(3):
+            matrix[i][3] = vector[i]
+        return matrix
+
+    @classmethod
+    def Scale(cls, factor, size, axis=None):
+        matrix = cls.Identity(size)
+        for i in range(min(size, 3)):
+            matrix[i][i] = factor if axis is None else 1.0 + (factor - 1.0) * axis[i] * axis[i]
+        return matrix
+
+    @classmethod
+    def Rotation(cls, angle, size, axis):
+        matrix = cls.Identity(size)
+        c, s = math.cos(angle), math.sin(angle)
+        i, j = {'X': (1, 2), 'Y': (2, 0), 'Z': (0, 1)}[axis]
+        matrix[i][i] = c
+        matrix[i][j] = -s
+        matrix[j][i] = s
+        matrix[j][j] = c
+        return matrix
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self._rows == other._rows
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Matrix(%r)' % ([row.to_tuple() for row in self._rows],)
+
+    def __mul__(self, other):
+        if isinstance(other, Matrix):
+            columns = list(zip(*other._rows))
+            return Matrix([[sum(a * b for a, b in zip(row, column)) for column in columns] for row in self._rows])
+
+        if isinstance(other, (int, float)):
+            return Matrix([[a * other for a in row] for row in self._rows])
+
+        values = list(other)
+        if len(values) == len(self._rows) - 1:
+            values.append(1.0)
+            return Vector(row * values for row in self._rows[:-1])
+
+        return Vector(row * values for row in self._rows)
+
+    __matmul__ = __mul__
+
+    def copy(self):
+        return Matrix(self._rows)
+
+    def transposed(self):
+        return Matrix(zip(*self._rows))
+
+    def transpose(self):
+        self._rows = self.transposed()._rows
+
+    def inverted(self):
+        size = len(self._rows)
+        work = [list(row) + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(self._rows)]
+
+        for column in range(size):
+            pivot = max(range(column, size), key=lambda r: abs(work[r][column]))
+            if abs(work[pivot][column]) < 1e-12:
+                raise ValueError('Matrix does not have an inverse')
+
+            work[column], work[pivot] = work[pivot], work[column]
+            scale = work[column][column]
+            work[column] = [v / scale for v in work[column]]
+
+            for r in range(size):
+                if r != column:
+                    factor = work[r][column]
+                    work[r] = [a - factor * b for a, b in zip(work[r], work[column])]
+
+        return Matrix(row[size:] for row in work)
+
+    def invert(self):
+        self._rows = self.inverted()._rows
+
+    def to_translation(self):
+        return Vector(row[3] for row in self._rows[:3])
+
+    def to_3x3(self):
+        return Matrix(row[:3] for row in self._rows[:3])
+
+    def to_scale(self):
+        return Vector(Vector(column).length for column in list(zip(*self.to_3x3()._rows)))
+
+    def resize_4x4(self):
+        size = len(self._rows)
+        self._rows = [Vector([self._rows[i][j] if i < size and j < size else float(i == j) for j in range(4)])
+                      for i in range(4)]
+
+
+class Euler(Vector):
+    def __init__(self, values=(0.0, 0.0, 0.0), order='XYZ'):
+        Vector.__init__(self, values)
+        self.order = order
+
+
+class Quaternion(Vector):
+    def __init__(self, values=(1.0, 0.0, 0.0, 0.0)):
+        Vector.__init__(self, values)
+
+    def copy(self):
+        return Quaternion(self._values)
+
+    def to_matrix(self):
+        w, x, y, z = self._values
+        return Matrix([
+            [1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+            [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+            [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)],
+        ])
+
+
+class Color(Vector):
+    r = Vector.x
+    g = Vector.y
+    b = Vector.z
+
+
+# ------------------------------------------------------------------------------
+# Blender data
+# ------------------------------------------------------------------------------
+
+class Data(Stub):
+    """
+    Blender data stand-in with the given attributes, other attributes are Stubs
+    """
+
+    def __init__(self, *label, **attributes):
+        Stub.__init__(self, label[0] if label else attributes.get('name', 'data'))
+        self.__dict__.update(attributes)
+
+    def __repr__(self):
+        return '<Data %s>' % self._name
+
+    def __bool__(self):
+        return True
+
+
+def flatten(value):
+    if isinstance(value, (str, bytes)) or not isinstance(value, collections.abc.Iterable):
+        return [value]
+
+    return [v for item in value for v in flatten(item)]
+
+
+class Collection(list):
+    """
+    bpy_prop_collection stand-in with foreach_get()/foreach_set(), counting the calls of each
+    """
+
+    def __init__(self, items=(), active=None, **attributes):
+        list.__init__(self, items)
+        self.active = active
+        self.foreach_calls = 0
+        self.__dict__.update(attributes)
+
+    def foreach_get(self, attr, seq):
+        self.foreach_calls += 1
+        values = [v for item in self for v in flatten(getattr(item, attr))]
+
+        if len(values) != len(seq):
+            raise RuntimeError('foreach_get(%r): expected %d values, got a sequence of %d' %
+                               (attr, len(values), len(seq)))
+
+        seq[:] = values
+
+    def foreach_set(self, attr, seq):
+        self.foreach_calls += 1
+        values = list(seq)
+        size = len(values) // len(self) if len(self) else 0
+
+        for i, item in enumerate(self):
+            item_values = values[i * size:(i + 1) * size]
+            setattr(item, attr, item_values[0] if size == 1 else item_values)
+
+    def get(self, key, default=None):
+        for item in self:
+            if getattr(item, 'name', None) == key:
+                return item
+
+        return default
+
+
+# ------------------------------------------------------------------------------
+# bpy
+# ------------------------------------------------------------------------------
+
+class StubType(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def append(cls, draw_function):
+        pass
+
+    @classmethod
+    def prepend(cls, draw_function):
+        pass
+
+    @classmethod
+    def remove(cls, draw_function):
+        pass
+
+
+def bpy_type(name):
+    return type(name, (StubType,), {'bl_rna': Stub('bpy.types.%s.bl_rna' % name)})
+
+
+def bpy_property(name):
+    def property_definition(**kwargs):
+        return name, kwargs
+
+    return property_definition
+
+
+def clean_name(name, replace='_'):
+    return re.sub('[^a-zA-Z0-9_]', replace, name)
+
+
+def display_name_from_filepath(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def make_bpy():
+    bpy = stub_module('bpy')
+    bpy.__path__ = []
+
+    bpy.types = stub_module('bpy.types', factory=bpy_type)
+    bpy.props = stub_module('bpy.props', factory=bpy_property)
+
+    handlers = stub_module('bpy.app.handlers', factory=lambda attr: [])
+    handlers.persistent = lambda function: function
+
+    bpy.app = stub_module('bpy.app', {
+        'version': (2, 76, 0),
+        'version_string': '2.76 (sub 0)',
+        'background': True,
+        'binary_path': '',
+        'tempdir': '',
+        'driver_namespace': {},
+        'handlers': handlers,
+    })
+
+    bpy.path = stub_module('bpy.path', {
+        'abspath': lambda path, start=None, library=None: path,
+        'relpath': lambda path, start=None: path,
+        'basename': os.path.basename,
+        'clean_name': clean_name,
+        'display_name_from_filepath': display_name_from_filepath,
+        'ensure_ext': lambda path, ext, case_sensitive=False: path if path.endswith(ext) else path + ext,
+    })
+
+    bpy.utils = stub_module('bpy.utils', {
+        'register_class': lambda cls: None,
+        'unregister_class': lambda cls: None,
+        'register_module': lambda module, verbose=False: None,
+        'unregister_module': lambda module, verbose=False: None,
+        'user_resource': lambda resource_type, path='', create=False: '',
+        'script_paths': lambda subdir=None, user_pref=True, check_all=False: [],
+    })
+
+    bpy.context = Stub('bpy.context')
+    bpy.data = Stub('bpy.data')
+    bpy.data.filepath = ''
+    bpy.ops = Stub('bpy.ops')
+
+    return bpy
+
+
+def make_mathutils():
+    mathutils = stub_module('mathutils', {
+        'Vector': Vector,
+        'Matrix': Matrix,
+        'Euler': Euler,
+        'Quaternion': Quaternion,
+        'Color': Color,
+    })
+    mathutils.__path__ = []
+    mathutils.noise = stub_module('mathutils.noise')
+    return mathutils
+
+
+def make_bgl():
+    """
+    bgl with a float Buffer and recording draw calls
+    """
+    import array
+
+    bgl = stub_module('bgl', {'GL_FLOAT': 'GL_FLOAT', 'GL_RGB': 'GL_RGB', 'GL_RGBA': 'GL_RGBA'})
+    bgl.calls = []
+    bgl.buffers = []
+
+    class Buffer(object):
+        def __init__(self, gl_type, dimensions, template=None):
+            size = 1
+            for dimension in dimensions:
+                size *= dimension
+
+            self.values = array.array('f', bytes(size * 4))
+            bgl.buffers.append(self)
+
+        def __len__(self):
+            return len(self.values)
+
+        def __getitem__(self, index):
+            return self.values[index]
+
+        def __setitem__(self, index, value):
+            self.values[index] = value
+
+    def recorder(name):
+        def call(*args):
+            bgl.calls.append((name,) + args)
+
+        return call
+
+    bgl.Buffer = Buffer
+
+    for name in ('glRasterPos2i', 'glDrawPixels', 'glPixelZoom', 'glEnable', 'glDisable', 'glBlendFunc',
+                 'glColor4f', 'glRecti'):
+        setattr(bgl, name, recorder(name))
+
+    return bgl
+
+
+# ------------------------------------------------------------------------------
+# Bindings
+# ------------------------------------------------------------------------------
+
+class RecordingProperties(object):
+    """
+    pyluxcore.Properties stand-in: an ordered dict of name -> list of values
+    """
+
+    def __init__(self, *args):
+        self.values = collections.OrderedDict()
+
+        for arg in args:
+            self.Set(arg)
+
+    def Set(self, prop):
+        if isinstance(prop, RecordingProperties):
+            self.values.update(prop.values)
+        else:
+            self.values[prop.name] = prop.values
+
+        return self
+
+    def Get(self, name, default=None):
+        if name in self.values:
+            return RecordingProperty(name, self.values[name])
+
+        return RecordingProperty(name, default if default is not None else [])
+
+    def IsDefined(self, name):
+        return name in self.values
+
+    def GetAllNames(self, prefix=''):
+        return [name for name in self.values if name.startswith(prefix)]
+
+    def GetAllUniqueSubNames(self, prefix):
+        depth = prefix.count('.') + 1
+        names = []
+        for name in self.GetAllNames(prefix + '.'):
+            sub_name = '.'.join(name.split('.')[:depth + 1])
+            if sub_name not in names:
+                names.append(sub_name)
+        return names
+
+    def Delete(self, name):
+        self.values.pop(name, None)
+
+    def DeleteAll(self, names):
+        for name in names:
+            self.Delete(name)
+
+    def GetSize(self):
+        return len(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        return isinstance(other, RecordingProperties) and self.values == other.values
+
+    def __str__(self):
+        return '\n'.join('%s = %s' % (name, ' '.join(str(v) for v in values)) for name, values in self.values.items())
+
+
+class RecordingProperty(object):
+    def __init__(self, name, values=None):
+        self.name = name
+
+        if values is None:
+            values = []
+        elif isinstance(values, (str, bytes)) or not isinstance(values, collections.abc.Iterable):
+            values = [values]
+        else:
+            values = list(values)
+
+        self.values = values
+
+    def Add(self, values):
+        self.values.extend(values)
+        return self
+
+    def Get(self):
+        return self.values
+
+    def GetValue(self, index=0):
+        return self.values[index]
+
+    def GetString(self):
+        return ' '.join(str(v) for v in self.values)
+
+    GetValuesString = GetString
+
+    def GetBool(self):
+        return bool(self.values[0])
+
+    def GetInt(self):
+        return int(self.values[0])
+
+    def GetFloat(self):
+        return float(self.values[0])
+
+
+class RecordingScene(object):
+    """
+    pyluxcore.Scene stand-in that records the calls which edit the scene
+    """
+
+    def __init__(self, *args):
+        self.calls = []
+        self.props = RecordingProperties()
+        self.meshes = {}
+
+    def Parse(self, props):
+        self.calls.append(('Parse', props))
+        self.props.Set(props)
+
+    def DefineMesh(self, name, *args):
+        self.calls.append(('DefineMesh', name))
+        self.meshes[name] = args
+
+    def DefineBlenderMesh(self, name, *args):
+        self.calls.append(('DefineBlenderMesh', name))
+        self.meshes[name] = args
+        return [(name, 0)]
+
+    def DefineImageMap(self, name, *args):
+        self.calls.append(('DefineImageMap', name))
+
+    def DefineStrands(self, name, *args):
+        self.calls.append(('DefineStrands', name))
+        self.meshes[name] = args
+
+    def IsMeshDefined(self, name):
+        return name in self.meshes
+
+    def IsTextureDefined(self, name):
+        return self.props.IsDefined('scene.textures.%s.type' % name)
+
+    def IsImageMapDefined(self, name):
+        return False
+
+    def IsMaterialDefined(self, name):
+        return self.props.IsDefined('scene.materials.%s.type' % name)
+
+    def DeleteObject(self, name):
+        self.calls.append(('DeleteObject', name))
+        if not self.props.IsDefined('scene.objects.%s.shape' % name):
+            raise RuntimeError('Unknown object: %s' % name)
+        for key in self.props.GetAllNames('scene.objects.%s.' % name):
+            del self.props.values[key]
+
+    def DeleteLight(self, name):
+        self.calls.append(('DeleteLight', name))
+        if not self.props.GetAllNames('scene.lights.%s.' % name):
+            raise RuntimeError('Unknown light: %s' % name)
+        for key in self.props.GetAllNames('scene.lights.%s.' % name):
+            del self.props.values[key]
+
+    def RemoveUnusedMeshes(self):
+        self.calls.append(('RemoveUnusedMeshes',))
+
+    def RemoveUnusedMaterials(self):
+        self.calls.append(('RemoveUnusedMaterials',))
+
+    def RemoveUnusedTextures(self):
+        self.calls.append(('RemoveUnusedTextures',))
+
+    def RemoveUnusedImageMaps(self):
+        self.calls.append(('RemoveUnusedImageMaps',))
+
+    def ToProperties(self):
+        return self.props
+
+    def GetProperties(self):
+        return self.props
+
+
+class RecordingRenderConfig(object):
+    def __init__(self, props, scene):
+        self.props = props
+        self.scene = scene
+
+    def GetScene(self):
+        return self.scene
+
+    def GetProperties(self):
+        return self.props
+
+
+def make_pyluxcore():
+    pyluxcore = stub_module('pyluxcore', {
+        'Properties': RecordingProperties,
+        'Property': RecordingProperty,
+        'Scene': RecordingScene,
+        'RenderConfig': RecordingRenderConfig,
+        'Init': lambda *args: None,
+        'Version': lambda: '1.6',
+    })
+    pyluxcore.FilmOutputType = Stub('pyluxcore.FilmOutputType')
+    return pyluxcore
+
+
+class RecordingContext(object):
+    """
+    pylux.Context stand-in recording the API calls
+    """
+
+    calls = None
+
+    def __init__(self, name='stub'):
+        self.name = name
+        self.calls = []
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            self.calls.append((name, args))
+
+        return call
+
+
+def make_pylux():
+    pylux = stub_module('pylux', {
+        'Context': RecordingContext,
+        'version': lambda: '1.6',
+    })
+    pylux.ErrorSeverity = Stub('pylux.ErrorSeverity')
+    return pylux
+
+
+# ------------------------------------------------------------------------------
+# Installation
+# ------------------------------------------------------------------------------
+
+def import_bindings_module(name):
+    """
+    Stand-in for luxrender.import_bindings_module, returning the recording bindings
+    """
+    if name not in sys.modules:
+        sys.modules[name] = {'pyluxcore': make_pyluxcore, 'pylux': make_pylux}[name]()
+
+    return sys.modules[name]
+
+
+def install():
+    """
+    Install the stand-ins and the luxrender package, once per process
+    """
+    if 'luxrender' in sys.modules:
+        return sys.modules['luxrender']
+
+    # The add-on targets the Python of Blender 2.7x, which still had the ABCs in collections and Thread.isAlive()
+    for name in ('Iterable', 'Mapping', 'MutableMapping', 'Sequence', 'Callable'):
+        if not hasattr(collections, name):
+            setattr(collections, name, getattr(collections.abc, name))
+
+    if not hasattr(threading.Thread, 'isAlive'):
+        threading.Thread.isAlive = threading.Thread.is_alive
+
+    bpy = make_bpy()
+    sys.modules['bpy'] = bpy
+    for name in ('types', 'props', 'app', 'path', 'utils'):
+        sys.modules['bpy.' + name] = getattr(bpy, name)
+    sys.modules['bpy.app.handlers'] = bpy.app.handlers
+
+    mathutils = make_mathutils()
+    sys.modules['mathutils'] = mathutils
+    sys.modules['mathutils.noise'] = mathutils.noise
+
+    sys.modules['bgl'] = make_bgl()
+    sys.modules['blf'] = stub_module('blf')
+    sys.modules['nodeitems_utils'] = stub_module('nodeitems_utils', factory=bpy_type)
+    for name in ('bl_ui', 'bl_operators'):
+        sys.modules[name] = stub_module(name, factory=lambda attr: stub_module(attr, factory=bpy_type))
+
+    luxrender = types.ModuleType('luxrender')
+    luxrender.__path__ = [ADDON_DIR]
+    luxrender.__file__ = os.path.join(ADDON_DIR, '__init__.py')
+    luxrender.bl_info = {'name': 'LuxRender', 'version': (1, 4), 'blender': (2, 67, 1)}
+    luxrender.find_bindings_module = lambda name: name in ('pyluxcore', 'pylux')
+    luxrender.import_bindings_module = import_bindings_module
+    luxrender.find_luxrender_path = lambda: ''
+    luxrender.LuxRenderAddon = Stub('LuxRenderAddon')
+    sys.modules['luxrender'] = luxrender
+
+    return luxrender
@@ -0,0 +1,25 @@
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import blender_stubs
+
+blender_stubs.install()
+
+import bpy
+import pytest
+
+
+@pytest.fixture
+def use_scene(monkeypatch):
+    """
+    Make a synthetic scene the context scene and the scene being exported
+    """
+    from luxrender.outputs import LuxManager
+
+    def use(scene):
+        monkeypatch.setattr(bpy.context, 'scene', scene, raising=False)
+        monkeypatch.setattr(LuxManager, 'CurrentScene', scene, raising=False)
+        return scene
+
+    return use
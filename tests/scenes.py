@@ -0,0 +1,432 @@
+# -*- coding: utf8 -*-
+#
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# --------------------------------------------------------------------------
+# Blender 2.5 LuxRender Add-On
+# --------------------------------------------------------------------------
+#
+# Authors:
+# Doug Hammond
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+"""
+Synthetic Blender data built from the stand-ins in blender_stubs: meshes with
+tessfaces, UV and vertex colour layers, mesh and lamp objects, particle
+systems, and scenes with the render settings of both exporters.
+"""
+
+import collections, math, random, struct
+
+from blender_stubs import Collection, Color, Data, Matrix, Quaternion, Stub, Vector
+
+
+def f32(value):
+    """
+    Round a float to single precision, as Blender stores it
+    """
+    return struct.unpack('<f', struct.pack('<f', value))[0]
+
+
+def unit_vector(rng):
+    values = [rng.uniform(-1.0, 1.0) for i in range(3)]
+    length = sum(v * v for v in values) ** 0.5 or 1.0
+    return Vector(f32(v / length) for v in values)
+
+
+def make_mesh(name='Mesh', rows=4, columns=5, materials=2, uv=True, colors=True, seed=0):
+    """
+    Grid of quads and triangles with random smooth flags and material indices. Most UVs and colours follow the
+    vertex, so that smooth corners are merged, some are random per face.
+    """
+    rng = random.Random(seed)
+    width = columns + 1
+
+    vertices = Collection()
+    vertex_uvs = []
+    vertex_colors = []
+
+    for row in range(rows + 1):
+        for column in range(width):
+            co = Vector((f32(column * 0.5), f32(row * 0.5), f32(rng.uniform(-0.25, 0.25))))
+            vertices.append(Data('vertex', index=len(vertices), co=co, normal=unit_vector(rng)))
+            vertex_uvs.append(Vector((f32(column / columns), f32(row / rows))))
+            vertex_colors.append(Color((f32(rng.random()), f32(rng.random()), f32(rng.random()))))
+
+    corners = []
+    for row in range(rows):
+        for column in range(columns):
+            a = row * width + column
+            b, c, d = a + 1, a + width + 1, a + width
+
+            if rng.random() < 0.6:
+                # Like Blender, never put vertex 0 last in a quad, where 0 marks a triangle
+                corners.append([b, c, d, a] if a != 0 else [a, b, c, d])
+            else:
+                corners.append([a, b, c])
+                corners.append([a, c, d])
+
+    tessfaces = Collection()
+    uv_data = Collection()
+    color_data = Collection()
+
+    for index, face_vertices in enumerate(corners):
+        shared = rng.random() < 0.8
+
+        tessfaces.append(Data(
+            'tessface',
+            index=index,
+            vertices=list(face_vertices),
+            vertices_raw=list(face_vertices) + [0] * (4 - len(face_vertices)),
+            material_index=rng.randrange(materials),
+            use_smooth=rng.random() < 0.7,
+            normal=unit_vector(rng),
+        ))
+
+        face_uvs = [vertex_uvs[v] if shared else Vector((f32(rng.random()), f32(rng.random())))
+                    for v in face_vertices]
+        face_uvs += [Vector((0.0, 0.0))] * (4 - len(face_uvs))
+        uv_data.append(Data('uv', uv=face_uvs, uv_raw=[c for uv in face_uvs for c in uv]))
+
+        face_colors = [vertex_colors[v] if shared else Color((f32(rng.random()), f32(rng.random()),
+                                                              f32(rng.random())))
+                       for v in face_vertices]
+        face_colors += [Color((0.0, 0.0, 0.0))] * (4 - len(face_colors))
+        color_data.append(Data('vertex_color', color1=face_colors[0], color2=face_colors[1],
+                               color3=face_colors[2], color4=face_colors[3]))
+
+    uv_texture = Data('uv_texture', data=uv_data)
+    vertex_color = Data('vertex_color_layer', data=color_data)
+
+    return Data(
+        name,
+        name=name,
+        users=1,
+        vertices=vertices,
+        tessfaces=tessfaces,
+        materials=[Stub('material')] * materials,
+        tessface_uv_textures=Collection([uv_texture] if uv else [], active=uv_texture if uv else None),
+        uv_textures=Data('uv_textures', active=Data('uv_texture') if uv else None),
+        tessface_vertex_colors=Collection([vertex_color] if colors else [], active=vertex_color if colors else None),
+    )
+
+
+def make_mesh_object(mesh, name='Object', matrix=None, layers=None, **attributes):
+    from luxrender.export import ParamSet
+
+    mesh.luxrender_mesh = Data('luxrender_mesh', portal=False, instancing_mode='never', mesh_type='global',
+                               get_paramset=ParamSet)
+
+    obj = Data(
+        name,
+        name=name,
+        type='MESH',
+        data=mesh,
+        parent=None,
+        modifiers=[],
+        material_slots=[],
+        particle_systems=[],
+        hide_render=False,
+        is_duplicator=False,
+        dupli_type='NONE',
+        layers=layers if layers is not None else [True] + [False] * 19,
+        luxrender_object=Data('luxrender_object', append_proxy=False),
+        animation_data=None,
+        matrix_world=matrix if matrix is not None else Matrix(),
+        scale=Vector((1.0, 1.0, 1.0)),
+        to_mesh=lambda scene, apply_modifiers, settings: mesh,
+    )
+    obj.__dict__.update(attributes)
+    return obj
+
+
+def make_scene(name='Scene', frame=1, objects=(), threads=1, mesh_type='binary_ply', partial_ply=False,
+               ply_cache_size=1024, background_set=None):
+    camera_settings = Data('luxrender_camera', usemblur=False, objectmblur=False, motion_blur_samples=2)
+
+    return Data(
+        name,
+        name=name,
+        frame_current=frame,
+        frame_subframe=0.0,
+        objects=Collection(objects),
+        layers=[True] + [False] * 19,
+        background_set=background_set,
+        camera=Data('Camera', name='Camera', data=Data('camera_data', luxrender_camera=camera_settings)),
+        render=Data('render', fps=24, fps_base=1.0,
+                    layers=Data('render_layers', active=Data('render_layer', layers=[True] * 20))),
+        luxrender_volumes=Data('luxrender_volumes', volumes=[]),
+        unit_settings=Data('unit_settings', system='NONE', scale_length=1.0),
+        luxrender_world=Data('luxrender_world', default_interior_volume='', default_exterior_volume='',
+                             preview_object_size=2.0),
+        luxrender_testing=Data('luxrender_testing', object_analysis=False),
+        luxrender_engine=Data('luxrender_engine', export_particles=True, threads_auto=False, threads=threads,
+                              export_buffer_size=64, partial_ply=partial_ply, ply_cache_size=ply_cache_size,
+                              mesh_type=mesh_type, export_type='EXT', write_files=True,
+                              float_precision='AUTO'),
+    )
+
+
+def make_grid_scene(object_count=6, prefix='', seed=0, **scene_settings):
+    """
+    Scene of separate mesh objects, each with its own synthetic mesh
+    """
+    objects = []
+
+    for k in range(object_count):
+        mesh = make_mesh('%sMesh%d' % (prefix, k), rows=3, columns=4, materials=1 + k % 3, seed=seed + k)
+        objects.append(make_mesh_object(mesh, '%sObject%d' % (prefix, k), Matrix.Translation((k * 3.0, 0.0, 0.0))))
+
+    return make_scene(objects=objects, **scene_settings)
+
+
+def make_lamp_object(name='Sun', matrix=None):
+    """
+    Sun lamp, enough for both exporters to find the scene lit
+    """
+    from luxrender.export import ParamSet
+
+    sun_settings = Data('luxrender_lamp_sun', sunsky_type='sun', legacy_sky=False, relsize=1.0, turbidity=2.2,
+                        get_paramset=lambda obj: ParamSet().add_integer('nsamples', 1).add_float('relsize', 1.0)
+                        .add_float('turbidity', 2.2))
+    luxcore_settings = Data('luxcore_lamp', visibility_indirect_diffuse_enable=True,
+                            visibility_indirect_glossy_enable=True, visibility_indirect_specular_enable=True)
+    lamp_settings = Data('luxrender_lamp', lightgroup='', importance=1.0, iesname='', Exterior_volume='',
+                         luxrender_lamp_sun=sun_settings, luxcore_lamp=luxcore_settings)
+    lamp = Data(name, name=name, type='SUN', energy=1.0, library=None, luxrender_lamp=lamp_settings)
+
+    return Data(
+        name,
+        name=name,
+        type='LAMP',
+        data=lamp,
+        parent=None,
+        modifiers=[],
+        material_slots=[],
+        particle_systems=[],
+        hide_render=False,
+        is_duplicator=False,
+        dupli_type='NONE',
+        layers=[True] + [False] * 19,
+        animation_data=None,
+        matrix_world=matrix if matrix is not None else Matrix.Rotation(0.5, 4, 'X'),
+    )
+
+
+def add_particle_system(emitter, dupli_object, count, name='ParticleSystem', seed=0):
+    """
+    Give emitter an OBJECT particle system of count living particles, each a dupli of dupli_object
+    """
+    rng = random.Random(seed)
+    particles = []
+
+    for k in range(count):
+        angle = rng.uniform(0.0, math.pi)
+        axis = unit_vector(rng)
+        rotation = Quaternion([math.cos(angle / 2)] + [math.sin(angle / 2) * a for a in axis])
+        particles.append(Data('particle', location=Vector(f32(rng.uniform(-5.0, 5.0)) for i in range(3)),
+                              rotation=rotation, size=f32(rng.uniform(0.1, 0.5)), alive_state='ALIVE'))
+
+    settings = Data('particle_settings', type='EMITTER', render_type='OBJECT', use_render_emitter=True,
+                    show_unborn=False, use_dead=False, dupli_object=dupli_object)
+    psys = Data(name, name=name, settings=settings, particles=particles)
+
+    def dupli_matrix(particle):
+        scale = Matrix.Scale(particle.size, 4)
+        rotation = particle.rotation.to_matrix()
+        rotation.resize_4x4()
+        return Matrix.Translation(particle.location) * rotation * scale
+
+    def dupli_list_create(scene, settings='RENDER'):
+        emitter.dupli_list = [Data('dupli', object=dupli_object, matrix=dupli_matrix(particle))
+                              for psys in emitter.particle_systems for particle in psys.particles]
+
+    def dupli_list_clear():
+        emitter.dupli_list = []
+
+    emitter.particle_systems.append(psys)
+    emitter.__dict__.update(is_duplicator=True, dupli_list=[], dupli_list_create=dupli_list_create,
+                            dupli_list_clear=dupli_list_clear)
+    return psys
+
+
+def add_render_settings(scene):
+    """
+    Settings read by SceneExporter and LuxCoreExporter, besides those of make_scene()
+    """
+    from luxrender.export import ParamSet
+
+    def settings(name, type_name):
+        return Data(name, api_output=lambda *args: (type_name, ParamSet().add_integer('benchmark', 1)))
+
+    scene.__dict__.update(
+        frame_set=lambda frame, subframe=0.0: None,
+        luxrender_testing=Data('luxrender_testing', object_analysis=False, profile_export=False, re_raise=True),
+        luxrender_lightgroups=Data('luxrender_lightgroups', ignore=False, lightgroups={},
+                                   is_enabled=lambda name: True),
+        luxrender_rendermode=settings('luxrender_rendermode', 'sampler'),
+        luxrender_sampler=settings('luxrender_sampler', 'metropolis'),
+        luxrender_accelerator=settings('luxrender_accelerator', 'qbvh'),
+        luxrender_integrator=settings('luxrender_integrator', 'bidirectional'),
+        luxrender_volumeintegrator=settings('luxrender_volumeintegrator', 'multi'),
+        luxrender_filter=settings('luxrender_filter', 'blackmanharris'),
+        luxcore_scenesettings=Data('luxcore_scenesettings', imageScale=100),
+        luxcore_translatorsettings=Data('luxcore_translatorsettings', export_particles=True, export_hair=True,
+                                        print_config=False, use_filesaver=False),
+        luxcore_enginesettings=Data('luxcore_enginesettings', renderengine_type='PATHCPU', native_threads_count=0,
+                                    luxcore_opencl_devices=[], sampler_type='SOBOL', advanced=False,
+                                    filter_type='BLACKMANHARRIS', filter_width=1.5, accelerator_type='AUTO',
+                                    instancing=True, path_maxdepth=8, biaspath_clamping_radiance_maxvalue=0.0,
+                                    biaspath_clamping_pdf_value=0.0),
+    )
+    scene.luxrender_integrator.surfaceintegrator = 'bidirectional'
+    scene.render.__dict__.update(use_border=False, filepath='')
+
+    film = Data('luxrender_film', resolution=lambda scene: (640, 480), output_alpha=False,
+                api_output=lambda: ('fleximage', ParamSet().add_integer('xresolution', 640)))
+    pipeline = Data('luxcore_imagepipeline_settings', output_switcher_pass='disabled',
+                    tonemapper_type='TONEMAP_AUTOLINEAR', crf_preset='None')
+
+    camera_data = scene.camera.data
+    camera_data.__dict__.update(type='PERSP', angle=0.857)
+    camera_data.luxrender_camera.__dict__.update(
+        type='perspective', cammblur=False, use_dof=False, use_clipping=False, enable_clipping_plane=False,
+        Exterior_volume='', exposure_mode='normalised', exposure_start_norm=0.0, exposure_end_norm=1.0,
+        luxrender_film=film, luxcore_imagepipeline_settings=pipeline,
+        lookAt=lambda camera, matrix=None: (0.0, -10.0, 5.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0),
+        screenwindow=lambda width, height, scene, camera_data, luxcore_export=False: [-1.0, 1.0, -0.75, 0.75],
+        api_output=lambda scene, is_cam_animated: ('perspective', ParamSet().add_float('fov', 49.1)),
+    )
+
+    return scene
+
+
+def make_render_scene(object_count=6, particle_count=0, seed=0, **scene_settings):
+    """
+    Grid scene with a sun lamp and the render settings of both exporters. With particle_count > 0 the first
+    object emits that many particles of a separate mesh object.
+    """
+    scene = make_grid_scene(object_count, seed=seed, **scene_settings)
+    scene.objects.append(make_lamp_object())
+
+    if particle_count > 0 and object_count > 0:
+        particle_object = make_mesh_object(make_mesh('ParticleMesh', rows=2, columns=2, materials=1, seed=seed),
+                                           'ParticleObject', layers=[False] * 19 + [True])
+        scene.objects.append(particle_object)
+        add_particle_system(scene.objects[0], particle_object, particle_count, seed=seed)
+
+    return add_render_settings(scene)
+
+
+def make_dependency_scene(object_count=20, material_count=10, texture_count=15, volume_count=4, lamp_count=3,
+                          seed=0):
+    """
+    Render scene of objects with shared meshes and materials, materials and volumes using textures, textures
+    using other textures and lamps using textures, for the DependencyExporter stand-ins. Every datablock has the
+    is_updated flags of Blender, all False.
+    """
+    rng = random.Random(seed)
+
+    def datablock(name, **attributes):
+        return Data(name, name=name, is_updated=False, **attributes)
+
+    def pick(items, most):
+        return rng.sample(items, rng.randint(0, min(most, len(items))))
+
+    textures = []
+    for k in range(texture_count):
+        textures.append(datablock('Texture%d' % k, textures=pick(textures, 2)))
+
+    materials = [datablock('Material%d' % k, textures=pick(textures, 3)) for k in range(material_count)]
+    meshes = [datablock('Mesh%d' % k) for k in range(max(1, object_count // 2))]
+
+    objects = [datablock('Object%d' % k, type='MESH', data=rng.choice(meshes), materials=pick(materials, 2),
+                         textures=[], is_updated_data=False) for k in range(object_count)]
+    objects += [datablock('Lamp%d' % k, type='LAMP', data=datablock('LampData%d' % k), materials=[],
+                          textures=pick(textures, 1), is_updated_data=False) for k in range(lamp_count)]
+
+    volumes = [datablock('Volume%d' % k, textures=pick(textures, 2), settings=(k, 1.0)) for k in range(volume_count)]
+
+    scene = make_render_scene(0)
+    scene.objects = Collection(objects)
+    scene.luxrender_volumes.volumes = volumes
+    scene.luxcore_realtimesettings = Data('luxcore_realtimesettings', halt_time=0, halt_samples=0,
+                                          interactive_resolution=False)
+    scene.__dict__.update(meshes=meshes, materials=materials, textures=textures)
+    return scene
+
+
+class DependencyExporter(object):
+    """
+    Stand-in of the LuxCore element exporters: converts the elements used by its element through the
+    LuxCoreExporter, like the real exporters, and counts the conversions of each element
+    """
+
+    conversions = collections.Counter()  # {element name: conversions}
+
+    def __init__(self, luxcore_exporter, blender_scene, *args):
+        self.luxcore_exporter = luxcore_exporter
+        self.element = args[-1]
+        self.properties = None
+
+    def convert(self, *args):
+        element = self.element
+        exporter = self.luxcore_exporter
+
+        if element.type == 'MESH':
+            exporter.convert_mesh(element, args[-1])
+
+        for material in getattr(element, 'materials', ()):
+            exporter.convert_material(material)
+
+        for texture in element.textures:
+            exporter.convert_texture(texture)
+
+        return self.converted(element)
+
+    def converted(self, element):
+        from luxrender.outputs.luxcore_api import pyluxcore
+
+        self.conversions[element.name] += 1
+
+        # The properties change with every conversion
+        self.properties = pyluxcore.Properties()
+        self.properties.Set(pyluxcore.Property('scene.elements.%s.conversion' % element.name,
+                                               self.conversions[element.name]))
+        return self.properties
+
+
+class MeshDependencyExporter(DependencyExporter):
+    def __init__(self, blender_scene, is_viewport_render, blender_object):
+        DependencyExporter.__init__(self, None, blender_scene, blender_object)
+
+    def convert(self, luxcore_scene):
+        return self.converted(self.element.data)
+
+
+def use_dependency_exporters(setattr):
+    """
+    Make LuxCoreExporter convert with DependencyExporter, setattr is monkeypatch.setattr in tests
+    """
+    from luxrender.export import luxcore
+
+    DependencyExporter.conversions.clear()
+
+    for name in ('ObjectExporter', 'MaterialExporter', 'TextureExporter', 'VolumeExporter'):
+        setattr(luxcore, name, DependencyExporter)
+
+    setattr(luxcore, 'MeshExporter', MeshDependencyExporter)
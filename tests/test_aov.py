@@ -0,0 +1,131 @@
+"""
+The NumPy converters of outputs.aov return the same RGBA pixels as the
+Python loops for every LuxCore film channel type.
+"""
+
+import array, random
+
+import pytest
+
+from blender_stubs import Data
+
+from luxrender.outputs import aov
+
+numpy = pytest.importorskip('numpy')
+
+# Depth of the float channels, as imported by RENDERENGINE_luxrender.import_aov_channel()
+CHANNEL_DEPTHS = {
+    'RGB': 3, 'RGBA': 4, 'RGB_TONEMAPPED': 3, 'RGBA_TONEMAPPED': 4, 'ALPHA': 1, 'DEPTH': 1, 'POSITION': 3,
+    'GEOMETRY_NORMAL': 3, 'SHADING_NORMAL': 3, 'DIRECT_DIFFUSE': 3, 'DIRECT_GLOSSY': 3, 'EMISSION': 3,
+    'INDIRECT_DIFFUSE': 3, 'INDIRECT_GLOSSY': 3, 'INDIRECT_SPECULAR': 3, 'DIRECT_SHADOW_MASK': 1,
+    'INDIRECT_SHADOW_MASK': 1, 'UV': 2, 'RAYCOUNT': 1, 'IRRADIANCE': 3, 'MATERIAL_ID_MASK': 1,
+    'BY_MATERIAL_ID': 3, 'RADIANCE_GROUP': 3,
+}
+
+WIDTH, HEIGHT = 7, 5
+
+
+def float_channel(depth, seed=0, special=True):
+    """
+    Filled GetOutputFloat() buffer, with some infinite and NaN values like an unbounded DEPTH channel
+    """
+    rng = random.Random(seed)
+    values = aov.channel_buffer('f', WIDTH * HEIGHT * depth)
+
+    for i in range(len(values)):
+        values[i] = rng.uniform(-2.0, 50.0)
+
+    if special:
+        values[3] = float('inf')
+        values[len(values) // 2] = float('nan')
+
+    return values
+
+
+def as_float32(values):
+    return array.array('f', values).tobytes()
+
+
+@pytest.mark.parametrize('channel', sorted(CHANNEL_DEPTHS))
+@pytest.mark.parametrize('normalize', [False, True])
+def test_float_channels_match(channel, normalize):
+    depth = CHANNEL_DEPTHS[channel]
+
+    python = aov.channel_to_rgba_python(float_channel(depth), depth, normalize)
+    vectorised = aov.channel_to_rgba_numpy(float_channel(depth), depth, normalize)
+
+    assert len(python) == WIDTH * HEIGHT * 4
+    assert isinstance(vectorised, numpy.ndarray) and vectorised.dtype == numpy.float32
+    assert as_float32(vectorised) == as_float32(python)
+
+
+def test_material_ids_match():
+    rng = random.Random(1)
+    ids = aov.channel_buffer('I', WIDTH * HEIGHT)
+    for i in range(len(ids)):
+        ids[i] = rng.randrange(1 << 24)
+    ids[0], ids[1] = 0, 0xffffff
+
+    python = aov.material_id_to_rgba_python(ids)
+    vectorised = aov.material_id_to_rgba_numpy(ids)
+
+    assert python[:8] == [0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0]
+    assert as_float32(vectorised) == as_float32(python)
+
+
+@pytest.mark.parametrize('values', [[0.0, -1.0, float('inf')], [float('nan'), 2.0, 4.0], []])
+def test_normalize_matches(values):
+    python = array.array('f', values)
+    vectorised = numpy.array(values, dtype=numpy.float32)
+
+    aov.normalize_python(python)
+    aov.normalize_numpy(vectorised)
+
+    assert as_float32(vectorised) == python.tobytes()
+
+
+@pytest.mark.parametrize('offset', [(0, 0), (3, 2), (5, 7)])
+def test_place_in_image_matches(offset):
+    rgba = aov.channel_to_rgba_python(float_channel(3, special=False), 3)
+
+    python = aov.place_in_image_python(rgba, WIDTH, HEIGHT, 12, 12, offset[0], offset[1])
+    vectorised = aov.place_in_image_numpy(numpy.array(rgba, dtype=numpy.float32), WIDTH, HEIGHT, 12, 12,
+                                          offset[0], offset[1])
+
+    assert len(python) == 12 * 12 * 4
+    assert as_float32(vectorised) == as_float32(python)
+
+    row = ((offset[1] + 1) * 12 + offset[0]) * 4
+    assert python[row:row + WIDTH * 4] == rgba[WIDTH * 4:WIDTH * 8]
+
+
+class PixelArray(list):
+    """
+    image.pixels of Blender versions where bpy_prop_array has foreach_set()
+    """
+
+    foreach_calls = 0
+
+    def foreach_set(self, seq):
+        self.foreach_calls += 1
+        self[:] = seq
+
+
+def test_set_image_pixels_uses_foreach_set():
+    pixels = aov.channel_to_rgba_numpy(float_channel(1, special=False), 1)
+    image = Data('image', pixels=PixelArray([0.0] * len(pixels)))
+
+    aov.set_image_pixels(image, pixels)
+
+    assert image.pixels.foreach_calls == 1
+    assert as_float32(image.pixels) == pixels.tobytes()
+
+
+def test_set_image_pixels_assigns_lists():
+    pixels = aov.channel_to_rgba_numpy(float_channel(2, special=False), 2)
+    image = Data('image', pixels=[])
+
+    aov.set_image_pixels(image, pixels)
+
+    assert type(image.pixels) is list
+    assert as_float32(image.pixels) == pixels.tobytes()
@@ -0,0 +1,148 @@
+"""
+Add-on configuration files: values written by several writers at once are
+all kept and the file is always complete, corrupt files fall back to the
+defaults without being overwritten, a failed write is not remembered, the
+file keeps its permissions and config paths are looked up on every use.
+"""
+
+import configparser, os, stat, threading
+
+import pytest
+
+from luxrender.extensions_framework import util as efutil
+
+
+@pytest.fixture
+def config_dir(tmpdir, monkeypatch):
+    monkeypatch.setattr(efutil, 'config_paths', [str(tmpdir)])
+    return tmpdir
+
+
+def read_file(path):
+    cp = configparser.ConfigParser()
+    cp.read(str(path))
+    return cp
+
+
+def test_values_round_trip(config_dir):
+    store = efutil.ConfigStore('test')
+
+    assert store.get('defaults', 'path', 'none') == 'none'
+    store.update('defaults', {'path': '/opt/lux', 'auto_start': True, 'servers': ''})
+
+    assert store.get('defaults', 'path', 'none') == '/opt/lux'
+    assert store.get('defaults', 'auto_start', False) is True
+    assert read_file(config_dir.join('test.cfg')).get('defaults', 'path') == '/opt/lux'
+
+    # Another writer's change is picked up
+    other = efutil.ConfigStore('test')
+    other.update('defaults', {'path': '/usr/lux'})
+    assert store.get('defaults', 'path', 'none') == '/usr/lux'
+
+
+def test_concurrent_writers_keep_every_value(config_dir):
+    path = str(config_dir.join('test.cfg'))
+    shared = efutil.ConfigStore('test')
+    shared.update('defaults', {'start': 'yes'})
+
+    errors = []
+    done = threading.Event()
+
+    def write(store, name):
+        try:
+            for k in range(50):
+                store.update('defaults', {'%s_%d' % (name, k): str(k)})
+        except Exception as err:
+            errors.append(err)
+
+    def read():
+        # Files are replaced whole, readers never see a partly written one
+        try:
+            while not done.is_set():
+                assert read_file(path).get('defaults', 'start') == 'yes'
+        except Exception as err:
+            errors.append(err)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+
+    writers = [threading.Thread(target=write, args=(shared, 'writer%d' % k)) for k in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    done.set()
+    reader.join()
+
+    assert errors == []
+    written = read_file(path)
+    assert all(written.get('defaults', 'writer%d_%d' % (w, k)) == str(k) for w in range(4) for k in range(50))
+    assert [name for name in os.listdir(str(config_dir)) if name.endswith('.tmp')] == []
+
+
+def test_corrupt_file_is_not_overwritten(config_dir):
+    path = config_dir.join('test.cfg')
+    path.write('[defaults\npath = /opt/lux\n')
+    store = efutil.ConfigStore('test')
+
+    assert store.get('defaults', 'path', 'none') == 'none'
+    with pytest.raises(Exception):
+        store.update('defaults', {'path': '/usr/lux'})
+    assert path.read() == '[defaults\npath = /opt/lux\n'
+
+    # Once repaired the file is read again
+    path.write('[defaults]\npath = /opt/lux\n')
+    assert store.get('defaults', 'path', 'none') == '/opt/lux'
+
+
+def test_failed_write_is_not_remembered(config_dir, monkeypatch):
+    store = efutil.ConfigStore('test')
+    store.update('defaults', {'path': '/opt/lux'})
+
+    def fail(*args):
+        raise OSError('disk full')
+
+    with monkeypatch.context() as patched:
+        patched.setattr(efutil.os, 'replace', fail)
+        with pytest.raises(OSError):
+            store.update('defaults', {'path': '/usr/lux', 'servers': 'render1'})
+
+    assert store.get('defaults', 'path', 'none') == '/opt/lux'
+    assert store.get('defaults', 'servers', 'none') == 'none'
+    assert [name for name in os.listdir(str(config_dir))] == ['test.cfg']
+
+
+def test_file_keeps_its_permissions(config_dir):
+    path = config_dir.join('test.cfg')
+    path.write('[defaults]\npath = /opt/lux\n')
+    os.chmod(str(path), 0o640)
+
+    efutil.ConfigStore('test').update('defaults', {'path': '/usr/lux'})
+    assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o640
+
+    # New files get the permissions of open()
+    umask = os.umask(0o022)
+    try:
+        efutil.ConfigStore('other').update('defaults', {'path': '/usr/lux'})
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(str(config_dir.join('other.cfg'))).st_mode) == 0o644
+
+
+def test_config_paths_are_looked_up_on_every_use(tmpdir, monkeypatch):
+    monkeypatch.setattr(efutil, 'config_paths', [])
+    store = efutil.ConfigStore('test')
+
+    assert store.files == []
+    with pytest.raises(Exception):
+        store.update('defaults', {'path': '/opt/lux'})
+
+    # The config path is created after the first use
+    config_dir = tmpdir.mkdir('config')
+    config_dir.join('test.cfg').write('[defaults]\npath = /opt/lux\n')
+    monkeypatch.setattr(efutil, 'config_paths', [str(config_dir)])
+
+    assert store.get('defaults', 'path', 'none') == '/opt/lux'
+    store.update('defaults', {'servers': 'render1'})
+    assert read_file(config_dir.join('test.cfg')).get('defaults', 'servers') == 'render1'
@@ -0,0 +1,148 @@
+"""
+Embedded file data: the block-parallel bEncoder writes one zlib stream which
+zlib.decompress() and bDecoder read back, single block files are encoded
+exactly as before, at most two blocks per worker are held at once, and
+bEncodeCache encodes each distinct file content once.
+"""
+
+import base64, io, os, random, zlib
+
+import pytest
+
+from luxrender import util
+
+BLOCK = 64 * 1024
+
+
+def file_data(size, seed=0):
+    """
+    Text-like data with random runs, so that blocks both compress and refer back to earlier blocks
+    """
+    rng = random.Random(seed)
+    words = [rng.getrandbits(8 * 6).to_bytes(6, 'little') for k in range(300)]
+    data = bytearray()
+
+    while len(data) < size:
+        if rng.random() < 0.1:
+            count = rng.randrange(1, 400)
+            data += rng.getrandbits(8 * count).to_bytes(count, 'little')
+        else:
+            data += rng.choice(words) + b' '
+
+    return bytes(data[:size])
+
+
+def encode(tmpdir, data, level=9, workers=4):
+    path = str(tmpdir.join('data.bin'))
+    with open(path, 'wb') as data_file:
+        data_file.write(data)
+
+    return util.bEncoder(level, workers).Encode_File2String(path)
+
+
+def decode(tmpdir, text):
+    path = str(tmpdir.join('decoded.bin'))
+    util.bDecoder().Decode_String2File(text, path)
+
+    with open(path, 'rb') as decoded_file:
+        return decoded_file.read()
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(util, 'ENCODE_BLOCK_SIZE', BLOCK)
+
+
+@pytest.mark.parametrize('size', [0, 1, 1000, BLOCK])
+def test_single_block_output_is_unchanged(tmpdir, small_blocks, size):
+    data = file_data(size)
+
+    for level in (1, 9):
+        assert encode(tmpdir, data, level) == base64.encodebytes(zlib.compress(data, level)).decode()
+
+
+@pytest.mark.parametrize('size', [BLOCK + 1, 2 * BLOCK, 13 * BLOCK + 777])
+@pytest.mark.parametrize('workers', [1, 2, 4])
+def test_multi_block_output_round_trips(tmpdir, small_blocks, size, workers):
+    data = file_data(size, seed=size)
+    text = encode(tmpdir, data, workers=workers)
+
+    assert zlib.decompress(base64.decodebytes(text.encode())) == data
+    assert decode(tmpdir, text) == data
+
+    # Whole lines of 57 bytes, as base64.encodebytes() writes them in one piece
+    lines = text.splitlines()
+    assert all(len(line) == 76 for line in lines[:-1]) and 0 < len(lines[-1]) <= 76
+
+
+def test_multi_block_output_decodes_in_small_chunks(tmpdir, small_blocks, monkeypatch):
+    data = file_data(5 * BLOCK + 3)
+    text = encode(tmpdir, data)
+
+    monkeypatch.setattr(util, 'DECODE_CHUNK_SIZE', 1000)
+    assert decode(tmpdir, text) == data
+
+
+def test_blocks_are_primed_with_the_previous_block(tmpdir, small_blocks):
+    # Each block repeats the previous one, which only a primed block can refer to
+    data = file_data(BLOCK) * 8
+    single = len(base64.encodebytes(zlib.compress(data, 9)))
+
+    assert len(encode(tmpdir, data)) < 1.05 * single
+
+
+class CountingFile(io.BytesIO):
+    name = 'counting.bin'
+
+    def __init__(self, data):
+        super(CountingFile, self).__init__(data)
+        self.blocks_read = 0
+
+    def read(self, size=-1):
+        self.blocks_read += 1
+        return super(CountingFile, self).read(size)
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_blocks_held_in_memory_are_bounded(small_blocks, workers):
+    source = CountingFile(file_data(20 * BLOCK))
+    encoder = util.bEncoder(workers=workers)
+    deflated = encoder._deflate(source, 20 * BLOCK)
+
+    # zlib header, then one piece per block
+    next(deflated)
+    for received in range(1, 21):
+        next(deflated)
+        assert source.blocks_read - received <= 2 * workers + 1
+
+
+def test_cache_encodes_each_content_once(tmpdir):
+    cache = util.bEncodeCache()
+    data = file_data(3000)
+
+    paths = []
+    for name in ('a.png', 'b.png'):
+        paths.append(str(tmpdir.join(name)))
+        with open(paths[-1], 'wb') as data_file:
+            data_file.write(data)
+
+    lines, size = cache.encode_lines(paths[0])
+    assert cache.encode_lines(paths[0]) == cache.encode_lines(paths[1]) == (lines, size)
+    assert cache.hits == 2
+    assert '\n'.join(lines) + '\n' == base64.encodebytes(zlib.compress(data, 9)).decode()
+    assert size == len('\n'.join(lines)) + 1
+
+    # Another level is another encoding
+    assert cache.encode_lines(paths[0], 1)[0] != lines
+    assert cache.hits == 2
+
+    # Changed content is encoded again
+    with open(paths[1], 'wb') as data_file:
+        data_file.write(data[::-1])
+    os.utime(paths[1], (1, 1))
+
+    assert cache.encode_lines(paths[1])[0] != lines
+    assert cache.hits == 2
+
+    cache.clear()
+    assert cache.encoded == {} and cache.hits == 0
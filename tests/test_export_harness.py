@@ -0,0 +1,113 @@
+"""
+The headless export benchmark: both exporters convert the synthetic scenes,
+particles included, and compare.py fails on regressions against a baseline.
+"""
+
+import json, os, re, sys
+
+import pytest
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import bench_export, compare
+
+from luxrender.outputs import LuxManager
+
+from scenes import make_render_scene
+
+OBJECTS, PARTICLES = 3, 7
+
+
+@pytest.fixture
+def render_scene(monkeypatch, use_scene):
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    return use_scene(make_render_scene(OBJECTS, particle_count=PARTICLES))
+
+
+def test_classic_export_writes_particle_instances(render_scene, tmpdir):
+    measurements = bench_export.export_classic(render_scene, str(tmpdir))
+
+    with open(str(tmpdir.join('untitled', 'Scene', '00001', 'LuxRender-Geometry.lxo'))) as geometry_file:
+        geometry = geometry_file.read()
+
+    assert geometry.count('ParticleMesh_0000_m000.ply') == PARTICLES
+    assert geometry.count('Mesh0_0000_m000.ply') == 1
+    assert set(measurements) >= {'setup_seconds', 'geometry_seconds', 'lights_seconds', 'total_seconds',
+                                 'peak_memory_mb', 'written_bytes'}
+    assert measurements['written_bytes'] > len(geometry)
+
+
+def test_luxcore_export_converts_particles(render_scene, tmpdir):
+    measurements = bench_export.export_luxcore(render_scene, str(tmpdir))
+
+    with open(str(tmpdir.join('Scene_profile.json'))) as profile_file:
+        profile = json.load(profile_file)
+
+    assert profile['counters']['objects'] == len(render_scene.objects)
+
+    assert set(measurements) >= {'camera_seconds', 'object_seconds', 'config_seconds', 'total_seconds',
+                                 'peak_memory_mb', 'properties'}
+
+
+def test_luxcore_properties_of_particles_and_lights(render_scene, tmpdir):
+    from blender_stubs import Stub
+    from luxrender.export.luxcore import LuxCoreExporter
+
+    config = LuxCoreExporter(render_scene, Stub('engine')).convert(64, 48)
+    names = config.GetScene().props.GetAllNames()
+
+    particles = set(re.findall(r'scene\.objects\.(\w+_ParticleSystem_\d+)\.shape', ' '.join(names)))
+    assert len(particles) == PARTICLES
+    assert 'scene.lights.Sun_sun.type' in names
+    assert {'scene.objects.Object%d0.shape' % k for k in range(OBJECTS)} <= set(names)
+
+
+def write_json(tmpdir, name, results):
+    path = str(tmpdir.join(name))
+    with open(path, 'w') as result_file:
+        json.dump(results, result_file)
+    return path
+
+
+BASELINE = {
+    'scene': {'total_seconds': 1.0, 'write_mb_s': 100.0, 'peak_memory_mb': 10.0, 'properties': 500},
+}
+
+
+@pytest.mark.parametrize('measurements, regressions', [
+    ({'total_seconds': 1.2, 'write_mb_s': 80.0, 'peak_memory_mb': 12.0, 'properties': 900}, 0),
+    ({'total_seconds': 1.5, 'write_mb_s': 100.0, 'peak_memory_mb': 10.0}, 1),
+    ({'total_seconds': 1.0, 'write_mb_s': 60.0, 'peak_memory_mb': 10.0}, 1),
+    ({'total_seconds': 0.5, 'write_mb_s': 200.0, 'peak_memory_mb': 20.0}, 1),
+    ({'total_seconds': 2.0, 'write_mb_s': 50.0, 'peak_memory_mb': 20.0}, 3),
+])
+def test_compare_reports_regressions(measurements, regressions):
+    assert len(compare.compare(BASELINE, {'scene': measurements}, 0.25)) == regressions
+
+
+def test_compare_ignores_time_noise():
+    baseline = {'scene': {'setup_seconds': 0.001}}
+
+    assert compare.compare(baseline, {'scene': {'setup_seconds': 0.005}}, 0.25) == []
+    assert len(compare.compare(baseline, {'scene': {'setup_seconds': 0.005}}, 0.25, time_noise=0.0)) == 1
+
+
+def test_compare_exit_status(tmpdir, capsys):
+    baseline = write_json(tmpdir, 'baseline.json', BASELINE)
+    better = write_json(tmpdir, 'better.json', {'scene': {'total_seconds': 0.9}, 'new_case': {'total_seconds': 9.0}})
+    worse = write_json(tmpdir, 'worse.json', {'scene': {'total_seconds': 1.3}})
+
+    assert compare.main([baseline, better]) == 0
+    assert compare.main([baseline, worse]) == 1
+    assert 'REGRESSION scene total_seconds' in capsys.readouterr().out
+    assert compare.main([baseline, worse, '--tolerance', '0.5']) == 0
+
+
+def test_baseline_covers_the_benchmark_cases():
+    with open(os.path.join(BENCHMARKS_DIR, 'baseline_export.json')) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    assert sorted(baseline) == sorted('%s_%d_objects_%d_particles' % (name, objects, particles)
+                                      for objects, particles in bench_export.SCENE_SIZES
+                                      for name in ('classic', 'luxcore'))
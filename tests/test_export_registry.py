@@ -0,0 +1,162 @@
+"""
+Texture and material registries: each definition is written once, in
+registration order, identical shared textures are written under the first
+name only, and registering and writing stays linear in the number of
+definitions.
+"""
+
+import time
+
+import pytest
+
+from luxrender.export import ParamSet
+from luxrender.export.materials import ExportedMaterials, ExportedTextures
+
+
+class RecordingContext(object):
+    """
+    Context of the file API (or PURE) which records texture and material definitions
+    """
+
+    def __init__(self, api_type='FILE'):
+        self.API_TYPE = api_type
+        self.written = []
+
+    def texture(self, name, type, texture, params):
+        self.written.append(('texture', name, type, texture, [(p.type, p.name, p.value) for p in params]))
+
+    def makeNamedMaterial(self, name, params):
+        self.written.append(('material', name, [(p.type, p.name, p.value) for p in params]))
+
+
+@pytest.fixture(autouse=True)
+def registries():
+    ExportedTextures.clear()
+    ExportedMaterials.clear()
+    yield
+    ExportedTextures.clear()
+    ExportedMaterials.clear()
+
+
+def checker(scale, color=(1.0, 0.5, 0.0), reverse=False):
+    params = [('float', 'scale', scale), ('color', 'tex1', list(color)), ('string', 'mapping', 'uv')]
+    paramset = ParamSet()
+
+    for kind, name, value in reversed(params) if reverse else params:
+        getattr(paramset, 'add_%s' % kind)(name, value)
+
+    return paramset
+
+
+def test_shared_textures_are_written_once():
+    context = RecordingContext()
+
+    assert ExportedTextures.texture(context, 'a', 'color', 'checkerboard', checker(2.0), share=True) == 'a'
+    # Same parameters in another order, and a repeated name
+    assert ExportedTextures.texture(context, 'b', 'color', 'checkerboard', checker(2.0, reverse=True),
+                                    share=True) == 'a'
+    assert ExportedTextures.texture(context, 'b', 'color', 'checkerboard', checker(3.0), share=True) == 'a'
+    # Another value, type or plugin is another texture
+    assert ExportedTextures.texture(context, 'c', 'color', 'checkerboard', checker(3.0), share=True) == 'c'
+    assert ExportedTextures.texture(context, 'd', 'float', 'checkerboard', checker(2.0), share=True) == 'd'
+    assert ExportedTextures.texture(context, 'e', 'color', 'checkerboard', checker(2.0, (1.0, 0.5, 0.1)),
+                                    share=True) == 'e'
+    assert ExportedTextures.last_name == 'e'
+
+    ExportedTextures.export_new(context)
+    ExportedTextures.export_new(context)
+
+    assert [w[1] for w in context.written] == ['a', 'c', 'd', 'e']
+    assert context.written[0][4] == [('float', 'scale', 2.0), ('color', 'tex1', [1.0, 0.5, 0.0]),
+                                     ('string', 'mapping', 'uv')]
+
+    registry = ExportedTextures.registry
+    assert (registry.hits, registry.duplicates) == (1, 1)
+    assert registry.is_exported('a') and not registry.is_exported('b')
+    assert registry.resolve('b') == 'a'
+
+
+def test_unshared_textures_keep_their_names():
+    context = RecordingContext()
+
+    for name in ('a', 'b'):
+        assert ExportedTextures.texture(context, name, 'color', 'checkerboard', checker(2.0)) == name
+
+    ExportedTextures.export_new(context)
+    assert [w[1] for w in context.written] == ['a', 'b']
+    assert ExportedTextures.registry.duplicates == 0
+
+
+def test_pure_api_defines_textures_immediately():
+    context = RecordingContext('PURE')
+
+    ExportedTextures.texture(context, 'a', 'color', 'checkerboard', checker(2.0), share=True)
+    ExportedTextures.texture(context, 'b', 'color', 'checkerboard', checker(2.0), share=True)
+    ExportedTextures.export_new(context)
+
+    assert [w[1] for w in context.written] == ['a', 'b']
+    assert len(ExportedTextures.registry) == 0
+
+
+def test_materials_are_written_once_in_order():
+    context = RecordingContext()
+
+    for name in ('glass', 'matte', 'glass', 'metal'):
+        ExportedMaterials.makeNamedMaterial(context, name, ParamSet().add_string('type', name))
+        ExportedMaterials.export_new_named(context)
+
+    assert context.written == [('material', name, [('string', 'type', name)]) for name in ('glass', 'matte', 'metal')]
+    assert ExportedMaterials.registry.hits == 1
+
+
+def register_scene(count):
+    """
+    Register count materials with two textures each, half of them shared with another material, writing the
+    new definitions after each material like the material export does. Returns the context.
+    """
+    context = RecordingContext()
+
+    for k in range(count):
+        ExportedTextures.texture(context, 'tex_%d' % k, 'color', 'checkerboard', checker(float(k // 2)), share=True)
+        ExportedTextures.texture(context, 'bump_%d' % k, 'float', 'blender_clouds', ParamSet().add_float('k', k))
+        ExportedTextures.export_new(context)
+
+        ExportedMaterials.makeNamedMaterial(context, 'mat_%d' % k, ParamSet().add_texture('Kd', 'tex_%d' % k))
+        ExportedMaterials.export_new_named(context)
+
+    return context
+
+
+def check_written_once(context, count):
+    textures = [w for w in context.written if w[0] == 'texture']
+    assert len(textures) == len(set(w[1] for w in textures)) == count + (count + 1) // 2
+    assert len(context.written) - len(textures) == count
+    assert ExportedTextures.registry.duplicates == count // 2
+    assert ExportedTextures.registry.pending == ExportedMaterials.registry.pending == []
+
+
+@pytest.mark.parametrize('count', [10, 1000])
+def test_each_definition_is_written_once(count):
+    check_written_once(register_scene(count), count)
+
+
+def timed_register_scene(count):
+    """
+    register_scene() and its wall time per material
+    """
+    ExportedTextures.clear()
+    ExportedMaterials.clear()
+
+    start = time.perf_counter()
+    context = register_scene(count)
+    return context, (time.perf_counter() - start) / count
+
+
+def test_registration_scales_linearly():
+    small = min(timed_register_scene(1000)[1] for i in range(3))
+    context, large = timed_register_scene(50000)
+
+    check_written_once(context, 50000)
+
+    # Rescanning all definitions on every export_new() made each of 50000 materials 50 times slower than of 1000
+    assert large < 5 * small
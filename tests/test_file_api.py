@@ -0,0 +1,117 @@
+"""
+Scene files of the FILE API context: every file is closed even when writing
+one of them fails, and the first error reaches the caller, also when the
+export is aborted.
+"""
+
+import os
+
+import pytest
+
+from blender_stubs import Data
+
+from luxrender.export.scene import SceneExporter
+from luxrender.outputs import LuxManager, file_api
+from luxrender.properties import ExportedVolumes
+
+from scenes import make_grid_scene
+
+
+class FailingFile(object):
+    """
+    Stand-in for the file written by a BufferedFile, write() fails
+    """
+
+    def __init__(self, file, error):
+        self.file = file
+        self.error = error
+
+    def write(self, st):
+        raise self.error
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def open_files(tmpdir, count):
+    return [file_api.BufferedFile(str(tmpdir.join('file%d.txt' % k))) for k in range(count)]
+
+
+def fail_writes(buffered_file, error):
+    buffered_file.file = FailingFile(buffered_file.file, error)
+
+
+def is_closed(buffered_file):
+    f = buffered_file.file
+    if isinstance(f, FailingFile):
+        f = f.file
+    return buffered_file.thread is None and f.closed
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_close_files_closes_all_and_raises_first_error(tmpdir):
+    context = file_api.Custom_Context('test')
+    context.files = open_files(tmpdir, 4) + [None]
+
+    fail_writes(context.files[1], IOError('disk full'))
+    fail_writes(context.files[3], IOError('quota exceeded'))
+
+    for f in context.files[:4]:
+        f.write('line\n')
+
+    with pytest.raises(IOError) as error:
+        context.close_files()
+
+    assert str(error.value) == 'disk full'
+    assert all(is_closed(f) for f in context.files[:4])
+    assert read(context.files[0].name) == read(context.files[2].name) == 'line\n'
+
+    # Closing again, like exit() after a failed worldEnd(), does not fail
+    context.exit()
+
+
+def test_world_end_raises_write_error(tmpdir, monkeypatch):
+    reset = []
+    monkeypatch.setattr(ExportedVolumes, 'reset_vol_list', lambda: reset.append(True))
+
+    context = file_api.Custom_Context('test')
+    context.files = open_files(tmpdir, 3) + [None]
+    fail_writes(context.files[file_api.Files.MAIN], IOError('disk full'))
+    context.wf(file_api.Files.GEOM, 'Shape "trianglemesh"')
+
+    with pytest.raises(IOError):
+        context.worldEnd()
+
+    assert all(is_closed(f) for f in context.files[:3])
+    assert read(context.files[file_api.Files.GEOM].name) == 'Shape "trianglemesh"\n'
+    assert reset == [True]
+
+
+def test_aborted_export_closes_scene_files(tmpdir, monkeypatch, use_scene):
+    scene = make_grid_scene(2)
+    scene.frame_set = lambda frame: None
+    scene.luxrender_testing = Data('luxrender_testing', profile_export=False, re_raise=True)
+    scene.luxrender_rendermode = Data('luxrender_rendermode', api_output=lambda: 1 / 0)
+    use_scene(scene)
+
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    monkeypatch.setattr(SceneExporter, 'scene_is_lit', lambda self, snapshot: True)
+
+    properties = Data('properties', filename='scene', directory=str(tmpdir), api_type='FILE',
+                      write_files=True, write_all_files=True)
+    exporter = SceneExporter().set_properties(properties).set_scene(scene)
+
+    with pytest.raises(ZeroDivisionError):
+        exporter.export()
+
+    files = LuxManager.GetActive().lux_context.files
+    assert len([f for f in files if f is not None]) == 3
+    assert all(is_closed(f) for f in files if f is not None)
+    assert read(os.path.join(str(tmpdir), 'scene.lxs')).startswith('# Main Scene File')
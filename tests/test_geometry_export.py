@@ -0,0 +1,121 @@
+"""
+GeometryExporter.iterateScene() with the export worker pool: the output does
+not depend on the number of threads, and a failing export leaves no pool,
+caches or progress thread behind.
+"""
+
+import os, threading
+
+import pytest
+
+from blender_stubs import RecordingContext
+from scenes import make_grid_scene
+
+from luxrender.export import geometry, pipeline, ply
+from luxrender.export.snapshot import SceneSnapshot
+from luxrender.extensions_framework import util as efutil
+
+
+class PureContext(RecordingContext):
+    API_TYPE = 'PURE'
+
+
+@pytest.fixture
+def export_dir(tmpdir, monkeypatch):
+    monkeypatch.setattr(efutil, 'export_path', os.path.join(str(tmpdir), 'scene.lxs'))
+    return str(tmpdir)
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """
+    Every ExportWorkerPool created by the export
+    """
+    created = []
+
+    class RecordedPool(pipeline.ExportWorkerPool):
+        def __init__(self, *args):
+            pipeline.ExportWorkerPool.__init__(self, *args)
+            created.append(self)
+
+    monkeypatch.setattr(geometry, 'ExportWorkerPool', RecordedPool)
+    return created
+
+
+def export_scene(use_scene, scene):
+    use_scene(scene)
+
+    lux_context = PureContext()
+    exporter = geometry.GeometryExporter(lux_context, scene, SceneSnapshot(scene))
+    exporter.iterateScene(scene)
+    return exporter, lux_context
+
+
+def written_files(directory):
+    files = {}
+
+    for path, dirs, filenames in os.walk(directory):
+        for filename in filenames:
+            with open(os.path.join(path, filename), 'rb') as f:
+                files[os.path.relpath(os.path.join(path, filename), directory)] = f.read()
+
+    return files
+
+
+def test_parallel_export_matches_serial(tmpdir, monkeypatch, use_scene):
+    outputs = []
+
+    for threads in (1, 4):
+        directory = str(tmpdir.mkdir('threads%d' % threads))
+        monkeypatch.setattr(efutil, 'export_path', os.path.join(directory, 'scene.lxs'))
+
+        exporter, lux_context = export_scene(use_scene, make_grid_scene(8, threads=threads))
+        outputs.append((lux_context.calls, written_files(directory)))
+
+    serial, parallel = outputs
+    assert len(serial[1]) > 8
+    assert parallel == serial
+
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_failed_writes_reset_exporter(export_dir, monkeypatch, use_scene, pools, threads):
+    def failing_write_ply(*args):
+        raise IOError('disk full')
+
+    monkeypatch.setattr(ply, 'write_ply', failing_write_ply)
+    scene = make_grid_scene(4, threads=threads)
+    use_scene(scene)
+    exporter = geometry.GeometryExporter(PureContext(), scene, SceneSnapshot(scene))
+
+    with pytest.raises(IOError):
+        exporter.iterateScene(scene)
+
+    assert_reset(exporter, pools)
+
+
+def test_failed_object_export_resets_exporter(export_dir, use_scene, pools):
+    scene = make_grid_scene(4, threads=4)
+
+    def failing_to_mesh(*args):
+        raise RuntimeError('evaluation failed')
+
+    scene.objects[2].to_mesh = failing_to_mesh
+    use_scene(scene)
+    exporter = geometry.GeometryExporter(PureContext(), scene, SceneSnapshot(scene))
+
+    with pytest.raises(RuntimeError):
+        exporter.iterateScene(scene)
+
+    assert_reset(exporter, pools)
+
+
+def assert_reset(exporter, pools):
+    assert (exporter.export_pool, exporter.ply_cache, exporter.motion_samples, exporter.instance_batches) == \
+        (None, None, None, None)
+
+    assert len(pools) == 1
+    assert pools[0].executor is None
+    assert pools[0].futures == []
+
+    assert not [thread for thread in threading.enumerate()
+                if isinstance(thread, geometry.MeshExportProgressThread)]
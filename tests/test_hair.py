@@ -0,0 +1,330 @@
+"""
+Hair export: .hair files built by build_hair() and write_hair_file() are
+byte-identical to the former per point writer, with and without NumPy, and
+the cached basis B-splines match the former recursive evaluation. Strand
+colours are bilinear texture samples, which equal the former nearest pixel
+lookup at pixel centres.
+"""
+
+import math, random, struct
+
+import pytest
+
+from blender_stubs import Matrix
+
+from luxrender.export import hair
+
+VARIANTS = ['python', 'numpy']
+
+
+@pytest.fixture(params=VARIANTS)
+def variant(request, monkeypatch):
+    """
+    The hair module with (numpy) or without NumPy (python), and an empty basis cache
+    """
+    monkeypatch.setattr(hair, '_basis_cache', {})
+
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(hair, 'numpy', None)
+
+    return request.param
+
+
+def build(variant, *args):
+    return (hair.build_hair_numpy if variant == 'numpy' else hair.build_hair_python)(*args)
+
+
+def sample(variant, pixels, width, height, uvs):
+    if variant == 'numpy':
+        import numpy
+        pixels = numpy.asarray(pixels, dtype=numpy.float32).reshape(height, width, 4)
+        return hair.sample_image_numpy(pixels, width, height, uvs).ravel().tolist()
+
+    return hair.sample_image_python(pixels, width, height, uvs)
+
+
+def random_strands(count, steps, seed=0, gaps=True):
+    """
+    World space points of each strand, on a grid of 1/64 so the former inverse transform round trip is exact.
+    With gaps some points are at the origin or repeat the previous point, which the export skips.
+    """
+    rng = random.Random(seed)
+    strands = []
+
+    for s in range(count):
+        points = []
+        for step in range(steps):
+            if gaps and step and rng.random() < 0.1 and points[-1] != (0.0, 0.0, 0.0):
+                points.append(points[-1])
+            elif gaps and rng.random() < 0.1:
+                points.append((0.0, 0.0, 0.0))
+            else:
+                points.append(tuple(rng.randint(-128, 128) / 64.0 for c in range(3)))
+        strands.append(points)
+
+    return strands
+
+
+def random_image(width, height, seed=0):
+    rng = random.Random(seed)
+    return [rng.random() for i in range(width * height * 4)]
+
+
+# Scales by powers of two and translations by whole numbers
+MATRIX_WORLD = Matrix([[2.0, 0.0, 0.0, 1.0], [0.0, 0.5, 0.0, -3.0], [0.0, 0.0, 4.0, 2.0], [0.0, 0.0, 0.0, 1.0]])
+TRANSFORM = Matrix([[0.5, 0.0, 0.0, -0.5], [0.0, 2.0, 0.0, 6.0], [0.0, 0.0, 0.25, -0.5], [0.0, 0.0, 0.0, 1.0]])
+
+
+def legacy_hair_file(path, strands, steps, hair_size, widths=None, uvs=None, image=None):
+    """
+    The binary hair export of handler_Duplis_PATH before build_hair(), one strand and point at a time.
+    widths are the (root_width, tip_width, width_offset) settings, uvs the (u, v) of each strand and image
+    a (width, height, pixels) texture sampled at them.
+    """
+    segments = []
+    points = []
+    thickness = []
+    colors = []
+    uv_coords = []
+
+    for strand, strand_points in enumerate(strands):
+        point_count = 0
+        col = None
+        seg_length = 1.0
+
+        for step, co in enumerate(strand_points):
+            if step > 0:
+                previous = MATRIX_WORLD * points[len(points) - 1]
+                seg_length = sum((co[c] - previous[c]) ** 2 for c in range(3))
+
+            if not (sum(c * c for c in co) == 0 or seg_length == 0):
+                points.append(tuple(TRANSFORM * co))
+
+                if widths is not None:
+                    root_width, tip_width, width_offset = widths
+                    if step > steps * width_offset:
+                        thick = (root_width * (steps - step - 1) + tip_width * (step - steps * width_offset)) / (
+                            steps * (1 - width_offset) - 1)
+                    else:
+                        thick = root_width
+
+                    thickness.append(thick * hair_size)
+
+                point_count += + 1
+                if uvs is not None:
+                    uv_coords.append(uvs[strand])
+
+                if image is not None:
+                    if not col:
+                        image_width, image_height, image_pixels = image
+                        x_co = round(uvs[strand][0] * (image_width - 1))
+                        y_co = round(uvs[strand][1] * (image_height - 1))
+                        pixelnumber = (image_width * y_co) + x_co
+                        col = tuple(image_pixels[pixelnumber * 4:pixelnumber * 4 + 3])
+                    colors.append(col)
+
+        if point_count == 1:
+            points.pop()
+            if widths is not None:
+                thickness.pop()
+            point_count -= 1
+        elif point_count > 1:
+            segments.append(point_count - 1)
+
+    with open(path, 'wb') as hair_file:
+        hair_file.write(b'HAIR')
+        hair_file.write(struct.pack('<I', len(segments)))
+        hair_file.write(struct.pack('<I', len(points)))
+        hair_file.write(struct.pack('<I', 1 + 2 + 4 * (widths is not None) + 16 * (image is not None) +
+                                    32 * (uvs is not None)))
+        hair_file.write(struct.pack('<I', steps))
+        hair_file.write(struct.pack('<f', hair_size))
+        hair_file.write(struct.pack('<f', 0.0))
+        hair_file.write(struct.pack('<3f', 0.65, 0.65, 0.65))
+        hair_file.write(struct.pack('<88s', hair.HAIR_INFO.encode()))
+        hair_file.write(struct.pack('<%dH' % (len(segments)), *segments))
+
+        for point in points:
+            hair_file.write(struct.pack('<3f', *point))
+        for thickn in thickness:
+            hair_file.write(struct.pack('<1f', thickn))
+        for col in colors:
+            hair_file.write(struct.pack('<3f', *col))
+        for uv in uv_coords:
+            hair_file.write(struct.pack('<2f', *uv))
+
+
+def new_hair_file(variant, path, strands, steps, hair_size, widths=None, uvs=None, image=None):
+    coords = [c for points in strands for co in points for c in co]
+    step_widths = None
+    if widths is not None:
+        step_widths = [w * hair_size for w in hair.step_thickness(steps, *widths)]
+
+    strand_uvs = [c for uv in uvs for c in uv] if uvs is not None else None
+    strand_colors = None
+    if image is not None:
+        strand_colors = sample(variant, image[2], image[0], image[1], strand_uvs)
+
+    hair.write_hair_file(path, build(variant, coords, steps, TRANSFORM, step_widths, strand_colors, strand_uvs),
+                         steps, hair_size)
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('steps', [4, 9])
+@pytest.mark.parametrize('with_widths', [False, True])
+def test_matches_legacy_writer(tmpdir, variant, steps, with_widths):
+    strands = random_strands(200, steps, seed=steps)
+    widths = (1.0, 0.25, 0.4) if with_widths else None
+
+    legacy_hair_file(str(tmpdir.join('legacy.hair')), strands, steps, 0.01, widths)
+    new_hair_file(variant, str(tmpdir.join('new.hair')), strands, steps, 0.01, widths)
+
+    assert read_bytes(str(tmpdir.join('new.hair'))) == read_bytes(str(tmpdir.join('legacy.hair')))
+
+
+def test_colors_and_uvs_match_legacy_writer_at_pixel_centres(tmpdir, variant):
+    width, height, steps = 5, 4, 6
+    rng = random.Random(2)
+    strands = random_strands(100, steps, seed=3, gaps=False)
+    uvs = [(rng.randrange(width) / (width - 1), rng.randrange(height) / (height - 1)) for s in strands]
+    image = (width, height, random_image(width, height))
+
+    legacy_hair_file(str(tmpdir.join('legacy.hair')), strands, steps, 0.02, (1.0, 0.0, 0.0), uvs, image)
+    new_hair_file(variant, str(tmpdir.join('new.hair')), strands, steps, 0.02, (1.0, 0.0, 0.0), uvs, image)
+
+    assert read_bytes(str(tmpdir.join('new.hair'))) == read_bytes(str(tmpdir.join('legacy.hair')))
+
+
+def test_single_point_strands_drop_their_uvs(tmpdir, variant):
+    strands = [[(1.0, 1.0, 1.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)], [(1.0, 2.0, 3.0), (2.0, 3.0, 4.0), (0.0, 0.0, 1.0)]]
+    path = str(tmpdir.join('new.hair'))
+
+    new_hair_file(variant, path, strands, 3, 0.01, uvs=[(0.1, 0.2), (0.3, 0.4)])
+    header, data = hair.read_hair_file(path)
+
+    assert header['flags'] == hair.HAS_SEGMENTS | hair.HAS_POINTS | hair.HAS_UV
+    assert list(data.segments) == [2]
+    assert data.uvs == pytest.approx([0.3, 0.4] * 3)
+
+
+def test_bilinear_color_sampling(variant):
+    # 2 x 2 texture: black, red / green, white
+    pixels = [0.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0,
+              0.0, 1.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0]
+    uvs = [0.25, 0.0, 0.5, 0.5, 1.0, 1.0, -1.0, 2.0]
+
+    # The former nearest pixel lookup gave black, white, white and an index error for the last uv
+    assert sample(variant, pixels, 2, 2, uvs) == pytest.approx([0.25, 0.0, 0.0, 0.5, 0.5, 0.25, 1.0, 1.0, 1.0,
+                                                                0.0, 1.0, 0.0])
+
+
+def test_sampling_variants_match():
+    pytest.importorskip('numpy')
+    rng = random.Random(4)
+    pixels = random_image(13, 7)
+    uvs = [rng.uniform(-0.1, 1.1) for i in range(400)]
+
+    assert sample('numpy', pixels, 13, 7, uvs) == pytest.approx(sample('python', pixels, 13, 7, uvs), abs=1e-6)
+
+
+def legacy_bspline(points, degree, u):
+    """
+    GeometryExporter.BSpline before evaluate_bsplines(), with recursive basis polynomials
+    """
+    controlpoints = []
+
+    def Basispolynom(controlpoints, i, u, degree):
+        if degree == 0:
+            _temp = 0
+            if (controlpoints[i] <= u) and (u < controlpoints[i + 1]):
+                _temp = 1
+        else:
+            N0 = Basispolynom(controlpoints, i, u, degree - 1)
+            N1 = Basispolynom(controlpoints, i + 1, u, degree - 1)
+
+            if N0 == 0:
+                sum1 = 0
+            else:
+                sum1 = (u - controlpoints[i]) / (controlpoints[i + degree] - controlpoints[i]) * N0
+            if N1 == 0:
+                sum2 = 0
+            else:
+                sum2 = (controlpoints[i + 1 + degree] - u) / (
+                    controlpoints[i + 1 + degree] - controlpoints[i + 1]) * N1
+
+            _temp = sum1 + sum2
+        return _temp
+
+    for i in range(len(points) + degree + 1):
+        if i <= degree:
+            controlpoints.append(0)
+        elif i >= len(points):
+            controlpoints.append(len(points) - degree)
+        else:
+            controlpoints.append(i - degree)
+
+    temp = [0.0, 0.0, 0.0]
+    for i in range(len(points)):
+        weight = Basispolynom(controlpoints, i, u, degree)
+        temp = [temp[c] + weight * points[i][c] for c in range(3)]
+    return temp
+
+
+def legacy_smooth(points, render_step, degree=2):
+    samples = math.trunc(math.pow(2, render_step))
+    curve = []
+
+    for i in range(samples):
+        if i > 0:
+            u = i * (len(points) - degree) / math.trunc(math.pow(2, render_step) - 1) - 0.0000000000001
+        else:
+            u = i * (len(points) - degree) / math.trunc(math.pow(2, render_step) - 1)
+        curve.append(legacy_bspline(points, degree, u))
+
+    return curve
+
+
+@pytest.mark.parametrize('render_step', [2, 4])
+def test_bsplines_match_recursive_evaluation(variant, render_step):
+    rng = random.Random(render_step)
+    strands = [[tuple(rng.uniform(-1.0, 1.0) for c in range(3)) for p in range(rng.randint(3, 12))]
+               for s in range(60)]
+
+    curves = hair.evaluate_bsplines(strands, 2, 2 ** render_step)
+
+    assert len(curves) == len(strands)
+    for curve, points in zip(curves, strands):
+        expected = legacy_smooth(points, render_step)
+        assert len(curve) == len(expected)
+        for point, expected_point in zip(curve, expected):
+            assert list(point) == pytest.approx(expected_point, rel=1e-12, abs=1e-12)
+
+
+def test_bspline_basis_variants_match():
+    pytest.importorskip('numpy')
+
+    for point_count in range(3, 14):
+        python = hair.bspline_basis_python(point_count, 2, 16)
+        vectorised = hair.bspline_basis_numpy(point_count, 2, 16)
+        for row, expected in zip(vectorised.tolist(), python):
+            assert row == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+
+def test_short_strands_are_not_smoothed(variant):
+    strands = [[], [(1.0, 2.0, 3.0)], [(0.0, 0.0, 1.0), (0.0, 1.0, 1.0)]]
+    assert hair.evaluate_bsplines(strands, 2, 8) == strands
+
+
+def test_adaptive_strand_points_keeps_bends():
+    straight = [(0.0, 0.0, float(z)) for z in range(6)]
+    bent = straight + [(1.0, 0.0, 5.0), (2.0, 0.0, 5.0)]
+
+    assert hair.adaptive_strand_points(straight, 0.1) == [straight[0], straight[-1]]
+    assert hair.adaptive_strand_points(bent, 0.1) == [bent[0], bent[5], bent[-1]]
+    assert hair.adaptive_strand_points(bent, 0.0) == bent
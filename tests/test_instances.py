@@ -0,0 +1,161 @@
+"""
+Batched object instances of the file API: the geometry file declares the
+same instances, with the same prototype, material, volumes and transform,
+as the former AttributeBegin block per instance.
+"""
+
+import re
+
+import pytest
+
+from blender_stubs import Data, Matrix
+from scenes import make_mesh, make_mesh_object, make_render_scene
+
+import luxrender.export.geometry
+from luxrender.export import ParamSet, instances
+from luxrender.export.scene import SceneExporter
+from luxrender.outputs import LuxManager
+
+PARTICLES = 40
+
+
+def make_material(name, interior='', exterior='', use_emission=False):
+    return Data(name, name=name,
+                luxrender_material=Data('luxrender_material', nodetree='', Interior_volume=interior,
+                                        Exterior_volume=exterior, export=lambda *args, **kwargs: set()),
+                luxrender_emission=Data('luxrender_emission', use_emission=use_emission, lightgroup='', gain=1.0,
+                                        L_color=Data('L_color', v=1.0),
+                                        api_output=lambda material: ('area', ParamSet().add_float('gain', 1.0))))
+
+
+def make_instanced_scene(emitters=()):
+    """
+    Render scene where a mesh is instanced by particles, and a two material mesh is shared by two objects. The
+    materials named in emitters emit light.
+    """
+    scene = make_render_scene(3, particle_count=PARTICLES)
+    scene.luxrender_world.default_exterior_volume = 'world'
+
+    particle_object = [obj for obj in scene.objects if obj.name == 'ParticleObject'][0]
+    particle_object.data.luxrender_mesh.instancing_mode = 'always'
+    particle_object.material_slots = [Data('slot', material=make_material('Red', interior='glass',
+                                                                          use_emission='Red' in emitters))]
+
+    shared = make_mesh('SharedMesh', rows=2, columns=3, materials=2, seed=5)
+    for k in range(2):
+        obj = make_mesh_object(shared, 'Linked%d' % k, Matrix.Translation((2.0 * k, 5.0, 0.0)))
+        obj.material_slots = [Data('slot', material=make_material('Green', use_emission='Green' in emitters)),
+                              Data('slot', material=make_material('Blue', exterior='fog'))]
+        scene.objects.append(obj)
+
+    shared.users = 2
+    shared.luxrender_mesh.instancing_mode = 'auto'
+    return scene
+
+
+STATEMENT = re.compile(r'^(AttributeBegin|AttributeEnd|ObjectBegin|ObjectEnd|NamedMaterial|Interior|Exterior|'
+                       r'Transform|ObjectInstance)\b\s*(.*)$')
+
+
+def parse_instances(path):
+    """
+    (prototype, material, interior, exterior, transform) of every ObjectInstance of a geometry file, following
+    the graphics state through AttributeBegin/End
+    """
+    state = {'NamedMaterial': None, 'Interior': None, 'Exterior': None, 'Transform': None}
+    stack = []
+    found = []
+
+    with open(path) as geometry_file:
+        for line in geometry_file:
+            match = STATEMENT.match(line.strip())
+            if match is None:
+                continue
+
+            statement, argument = match.groups()
+
+            if statement in ('AttributeBegin', 'ObjectBegin'):
+                stack.append(dict(state))
+            elif statement in ('AttributeEnd', 'ObjectEnd'):
+                state = stack.pop()
+            elif statement == 'Transform':
+                state['Transform'] = tuple(round(float(v), 12) for v in argument.strip('[] ').split())
+            elif statement == 'ObjectInstance':
+                found.append((argument.strip('"'), state['NamedMaterial'], state['Interior'], state['Exterior'],
+                              state['Transform']))
+            else:
+                state[statement] = argument.strip('"')
+
+    assert stack == []
+    return found
+
+
+def export_geometry(tmpdir, monkeypatch, use_scene, batched, scene=None):
+    scene = use_scene(scene or make_instanced_scene())
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+
+    if not batched:
+        # The former per instance output
+        monkeypatch.setattr(luxrender.export.geometry, 'InstanceBatches', lambda: None)
+
+    properties = Data('properties', filename='scene', directory=str(tmpdir), api_type='FILE',
+                      write_files=True, write_all_files=True)
+    assert SceneExporter().set_properties(properties).set_scene(scene).export() == {'FINISHED'}
+
+    return str(tmpdir.join('untitled', 'Scene', '00001', 'LuxRender-Geometry.lxo'))
+
+
+@pytest.mark.parametrize('chunk', [instances.WRITE_CHUNK, 7])
+def test_instances_match_per_instance_blocks(tmpdir, monkeypatch, use_scene, chunk):
+    monkeypatch.setattr(instances, 'WRITE_CHUNK', chunk)
+
+    per_instance = parse_instances(export_geometry(tmpdir.mkdir('per_instance'), monkeypatch, use_scene, False))
+    batched = parse_instances(export_geometry(tmpdir.mkdir('batched'), monkeypatch, use_scene, True))
+
+    assert sorted(batched) == sorted(per_instance)
+
+    # Every particle, and both material slots of the linked duplicates
+    assert len(batched) == PARTICLES + 4
+    assert {i[1:4] for i in batched} == {('Red', 'glass', 'world'), ('Blue', None, 'fog'),
+                                         ('Green', None, 'world')}
+
+
+@pytest.mark.parametrize('batched', [False, True])
+@pytest.mark.parametrize('emitter', ['Red', 'Green'])
+def test_scene_lit_only_by_instances(tmpdir, monkeypatch, use_scene, batched, emitter):
+    # Particles, or linked duplicates, of an emitting mesh and no lamp. The particle object is visible, for the
+    # light check before the export.
+    scene = make_instanced_scene(emitters=(emitter,))
+    scene.objects.remove([obj for obj in scene.objects if obj.type == 'LAMP'][0])
+    [obj for obj in scene.objects if obj.name == 'ParticleObject'][0].layers = [True] + [False] * 19
+
+    path = export_geometry(tmpdir, monkeypatch, use_scene, batched, scene)
+    assert emitter in {i[1] for i in parse_instances(path)}
+
+
+class RecordingContext(object):
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args))
+
+
+def test_batches_group_by_prototype_material_and_volumes():
+    batches = instances.InstanceBatches()
+    identity = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+    batches.add('a', 'red', None, None, identity)
+    batches.add('b', None, 'glass', 'fog', identity)
+    batches.add('a', 'red', None, None, identity[:12] + [1.5, 2.0, 3.0, 1.0])
+    assert len(batches) == 3
+
+    context = RecordingContext()
+    batches.write(context)
+
+    assert [name for name, args in context.calls] == ['attributeBegin', 'namedMaterial', 'objectInstances',
+                                                      'attributeEnd', 'attributeBegin', 'interior', 'exterior',
+                                                      'objectInstances', 'attributeEnd']
+    assert len(context.calls[2][1][1]) == 2
+    assert [float(v) for v in context.calls[2][1][1][1].split()[-4:]] == [1.5, 2.0, 3.0, 1.0]
+    assert len(batches) == 0
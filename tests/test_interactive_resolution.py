@@ -0,0 +1,149 @@
+"""
+Interactive resolution of the LuxCore viewport: the first edit reduces the
+film resolution, the film returns to full resolution once the scene was idle
+for the idle time, and the divisor of the next edits follows the passes per
+second measured at the reduced resolution.
+"""
+
+import pytest
+
+from luxrender.outputs.viewport import (INTERACTIVE_DIVISORS, INTERACTIVE_MIN_MEASURE_TIME, INTERACTIVE_PASS_RATE,
+                                        InteractiveResolution)
+
+IDLE_TIME = 0.5
+
+
+def test_starts_at_full_resolution():
+    resolution = InteractiveResolution()
+
+    assert not resolution.reduced and resolution.divisor == 1
+    assert resolution.film_size(640, 480) == (640, 480)
+    assert resolution.idle(100.0, IDLE_TIME) is False
+
+
+def test_first_edit_reduces_the_resolution():
+    resolution = InteractiveResolution()
+
+    assert resolution.edit(10.0) is True
+    assert resolution.reduced and resolution.divisor == INTERACTIVE_DIVISORS[1]
+    assert resolution.film_size(640, 480) == (640 // INTERACTIVE_DIVISORS[1], 480 // INTERACTIVE_DIVISORS[1])
+
+    # Further edits keep the resolution
+    assert resolution.edit(10.1) is False
+    assert resolution.edit(10.2) is False
+    assert resolution.divisor == INTERACTIVE_DIVISORS[1]
+
+
+def test_film_size_is_at_least_one_pixel():
+    resolution = InteractiveResolution()
+    resolution.divisor_index = len(INTERACTIVE_DIVISORS) - 1
+    resolution.edit(0.0)
+
+    assert resolution.film_size(5, 3) == (1, 1)
+
+
+def test_idle_time_counts_from_the_last_edit():
+    resolution = InteractiveResolution()
+    resolution.edit(10.0)
+    resolution.edit(10.4)
+
+    assert resolution.idle(10.8, IDLE_TIME) is False
+    assert resolution.reduced
+
+    assert resolution.idle(10.9, IDLE_TIME) is True
+    assert not resolution.reduced and resolution.divisor == 1
+
+    # Back at full resolution, nothing changes until the next edit
+    assert resolution.idle(20.0, IDLE_TIME) is False
+    assert resolution.edit(20.0) is True
+
+
+def measure(resolution, start, seconds, passes_per_second, interval=0.1):
+    """
+    Measure a render of passes_per_second from start for seconds, returns the end time
+    """
+    steps = int(round(seconds / interval))
+    for step in range(steps + 1):
+        resolution.measure(start + step * interval, int(round(step * interval * passes_per_second)))
+
+    return start + steps * interval
+
+
+def test_measure_only_at_the_reduced_resolution():
+    resolution = InteractiveResolution()
+    measure(resolution, 0.0, 2.0, 100)
+
+    assert (resolution.measured_passes, resolution.measured_time, resolution.last_measure) == (0, 0.0, None)
+
+    resolution.edit(10.0)
+    measure(resolution, 10.0, 1.0, 40)
+    assert resolution.measured_passes == 40
+    assert resolution.measured_time == pytest.approx(1.0)
+
+
+def test_measure_follows_pass_counter_resets():
+    resolution = InteractiveResolution()
+    resolution.edit(0.0)
+
+    # Each edit restarts the render, and its pass counter
+    resolution.measure(0.0, 0)
+    resolution.measure(0.5, 10)
+    resolution.measure(1.0, 4)
+    resolution.measure(1.5, 9)
+
+    assert resolution.measured_passes == 10 + 4 + 5
+    assert resolution.measured_time == pytest.approx(1.5)
+
+
+def test_edit_at_full_resolution_restarts_the_measure():
+    resolution = InteractiveResolution()
+    resolution.edit(0.0)
+    end = measure(resolution, 0.0, 0.3, 50)
+    resolution.idle(end + IDLE_TIME, IDLE_TIME)
+
+    resolution.edit(10.0)
+    assert (resolution.measured_passes, resolution.measured_time, resolution.last_measure) == (0, 0.0, None)
+
+
+@pytest.mark.parametrize('passes_per_second, index', [
+    (INTERACTIVE_PASS_RATE / 4, 2),
+    (INTERACTIVE_PASS_RATE / 2 + 1, 1),
+    (INTERACTIVE_PASS_RATE, 1),
+    (INTERACTIVE_PASS_RATE * 2 - 1, 1),
+    (INTERACTIVE_PASS_RATE * 4, 0),
+])
+def test_idle_adapts_the_divisor_to_the_pass_rate(passes_per_second, index):
+    resolution = InteractiveResolution()
+    resolution.edit(0.0)
+    end = measure(resolution, 0.0, 2.0, passes_per_second)
+
+    assert resolution.idle(end + IDLE_TIME, IDLE_TIME) is True
+    assert resolution.divisor_index == index
+
+    # The next edit uses the adapted divisor
+    resolution.edit(100.0)
+    assert resolution.divisor == INTERACTIVE_DIVISORS[index]
+
+
+def test_short_measures_do_not_adapt():
+    resolution = InteractiveResolution()
+    resolution.edit(0.0)
+    end = measure(resolution, 0.0, INTERACTIVE_MIN_MEASURE_TIME / 2, 1)
+
+    resolution.idle(end + IDLE_TIME, IDLE_TIME)
+    assert resolution.divisor_index == 1
+
+
+def test_adapt_step_by_step():
+    resolution = InteractiveResolution()
+    indices = []
+    now = 0.0
+
+    # A slow scene coarsens one step per edit, then a fast one refines one step per edit
+    for passes_per_second in (1, 1, 1, 100, 100, 100):
+        resolution.edit(now)
+        now = measure(resolution, now, 1.0, passes_per_second) + IDLE_TIME
+        resolution.idle(now, IDLE_TIME)
+        indices.append(resolution.divisor_index)
+
+    assert indices == [2, 2, 2, 1, 0, 0]
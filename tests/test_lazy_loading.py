@@ -0,0 +1,173 @@
+"""
+Deferred loading at add-on start: the interface panels are imported and
+registered when LuxRender is first selected as render engine, pylux and
+pyluxcore are only looked for at load and imported by the first render or
+export, and smoke textures no longer import the pointcache reader.
+"""
+
+import json, os, subprocess, sys, textwrap, types
+
+import pytest
+
+from luxrender.extensions_framework import Addon
+from luxrender.outputs import luxcore_api, pure_api
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ADDON_LOAD = textwrap.dedent('''
+    import importlib, json, sys
+    sys.path.insert(0, %r)
+
+    import blender_stubs
+    luxrender = blender_stubs.install()
+
+    import bpy
+    registered = []
+    bpy.utils.register_class = registered.append
+
+    # Like the add-on's __init__.py, which the stand-ins do not run
+    from luxrender.extensions_framework import Addon
+    luxrender.LuxRenderAddon = Addon(luxrender.bl_info)
+    import luxrender.core
+    luxrender.LuxRenderAddon.register()
+
+    def loaded():
+        return sorted(name for name in sys.modules if name.startswith(('luxrender.', 'pylux')))
+
+    at_load = loaded()
+    classes_at_load = len(registered)
+
+    handlers = [h for h in bpy.app.handlers.scene_update_post if h.__name__ == 'load_interface']
+    for engine in ('BLENDER_RENDER', 'LUXRENDER_RENDER', 'LUXRENDER_RENDER'):
+        handlers[0](blender_stubs.Data('scene', render=blender_stubs.Data('render', engine=engine)))
+        if engine == 'BLENDER_RENDER':
+            assert loaded() == at_load
+
+    json.dump({'at_load': at_load, 'after_select': loaded(), 'classes_at_load': classes_at_load,
+               'classes': [c.__module__ for c in registered], 'handlers': len(handlers)}, sys.stdout)
+''') % TESTS_DIR
+
+
+@pytest.fixture(scope='module')
+def addon_load():
+    output = subprocess.check_output([sys.executable, '-c', ADDON_LOAD], universal_newlines=True,
+                                     stderr=subprocess.DEVNULL)
+    return json.loads(output.splitlines()[-1])
+
+
+def test_panels_load_when_the_engine_is_selected(addon_load):
+    at_load, after_select = addon_load['at_load'], addon_load['after_select']
+
+    assert 'luxrender.ui.node_editor' in at_load
+    assert not [name for name in at_load if name.startswith(('luxrender.ui.materials.', 'luxrender.ui.textures.'))]
+    assert 'luxrender.ui.render_panels' not in at_load
+
+    loaded = set(after_select) - set(at_load)
+    assert {'luxrender.ui.render_panels', 'luxrender.ui.materials.glass', 'luxrender.ui.textures.pointiness'} <= loaded
+    assert addon_load['handlers'] == 1
+
+    # Panels are registered after the classes of the add-on load, each one once
+    panels = addon_load['classes'][addon_load['classes_at_load']:]
+    assert panels and all(module.startswith('luxrender.ui.') for module in panels)
+    assert not [m for m in addon_load['classes'][:addon_load['classes_at_load']] if m.startswith('luxrender.ui.')
+                and m != 'luxrender.ui.node_editor']
+
+
+def test_bindings_and_exporters_are_not_loaded_at_start(addon_load):
+    at_load = addon_load['at_load']
+
+    assert 'pylux' not in at_load and 'pyluxcore' not in at_load
+    for module in ('luxrender.export.scene', 'luxrender.export.luxcore', 'luxrender.export.volumes'):
+        assert module not in at_load
+
+
+def test_deferred_classes_register_with_a_registered_addon(monkeypatch):
+    addon = Addon({'name': 'Test', 'version': (1, 0)})
+    registered = []
+    monkeypatch.setattr('bpy.utils.register_class', registered.append)
+    monkeypatch.setattr('bpy.utils.unregister_class', lambda cls: registered.remove(cls))
+
+    package = types.ModuleType('deferred_test')
+    package.__path__ = []
+    monkeypatch.setitem(sys.modules, 'deferred_test', package)
+
+    class Panel(object):
+        pass
+
+    module = types.ModuleType('deferred_test.panel')
+    monkeypatch.setitem(sys.modules, 'deferred_test.panel', module)
+    addon.addon_register_class(object)
+    addon.defer_modules('deferred_test', ['panel'])
+
+    # Importing the module registers its class through the decorator
+    monkeypatch.setattr('importlib.import_module',
+                        lambda name, package=None: addon.addon_register_class(Panel) and module)
+
+    addon.register()
+    assert registered == [object]
+
+    assert addon.load_deferred() is True
+    assert registered == [object, Panel]
+    assert addon.load_deferred() is False
+
+    addon.unregister()
+    assert registered == []
+
+    # Registering again registers the deferred classes as well
+    addon.register()
+    assert registered == [object, Panel]
+
+
+@pytest.fixture
+def bindings(monkeypatch):
+    """
+    pure_api and luxcore_api as they are right after the add-on loads
+    """
+    imported = []
+    modules = {'pylux': types.SimpleNamespace(version=lambda: '1.6', Context=object),
+               'pyluxcore': types.SimpleNamespace(Init=lambda: imported.append('Init'), Version=lambda: '1.6')}
+
+    def import_bindings_module(name):
+        imported.append(name)
+        return modules[name]
+
+    for api, name in ((pure_api, 'pylux'), (luxcore_api, 'pyluxcore')):
+        monkeypatch.setattr(api, name, None)
+        monkeypatch.setattr(api, 'import_bindings_module', import_bindings_module)
+
+    monkeypatch.setattr(pure_api, 'PYLUX_AVAILABLE', True)
+    monkeypatch.setattr(pure_api, 'Custom_Context', None)
+    monkeypatch.setattr(pure_api, 'LUXRENDER_VERSION', '0.8')
+    monkeypatch.setattr(luxcore_api, 'PYLUXCORE_AVAILABLE', True)
+    monkeypatch.setattr(luxcore_api, 'LUXCORE_VERSION', '')
+    return imported
+
+
+def test_bindings_are_imported_once_on_first_use(bindings):
+    assert bindings == []
+
+    pyluxcore = luxcore_api.load_pyluxcore()
+    assert luxcore_api.load_pyluxcore() is pyluxcore is luxcore_api.pyluxcore
+    assert luxcore_api.LUXCORE_VERSION == '1.6'
+
+    pylux = pure_api.load_pylux()
+    assert pure_api.load_pylux() is pylux is pure_api.pylux
+    assert pure_api.LUXRENDER_VERSION == '1.6'
+    assert pure_api.Custom_Context.API_TYPE == 'PURE'
+
+    assert bindings == ['pyluxcore', 'Init', 'pylux']
+
+
+def test_missing_bindings_are_not_imported(bindings, monkeypatch):
+    monkeypatch.setattr(luxcore_api, 'PYLUXCORE_AVAILABLE', False)
+    assert luxcore_api.load_pyluxcore() is None
+
+    def fail(name):
+        raise ImportError('no %s' % name)
+
+    # Found at load, but the import fails
+    monkeypatch.setattr(pure_api, 'import_bindings_module', fail)
+    assert pure_api.load_pylux() is None
+    assert pure_api.PYLUX_AVAILABLE is False and pure_api.Custom_Context is None
+
+    assert bindings == []
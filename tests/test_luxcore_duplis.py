@@ -0,0 +1,182 @@
+"""
+Duplis of the LuxCore exporter converted as instances of a prototype: the
+LuxCore objects of dupliverts and particles have the same names, shapes,
+materials, transformations and motion blur as with one ObjectExporter per
+dupli, and the numpy transforms equal those of matrix_to_list().
+"""
+
+import random
+
+import numpy
+import pytest
+
+from blender_stubs import Data, Matrix, Quaternion, RecordingScene, Stub
+from luxrender.export import matrix_to_list
+from luxrender.export.luxcore import LuxCoreExporter, duplis
+from luxrender.outputs import LuxManager
+
+from scenes import f32, make_mesh, make_mesh_object, make_render_scene, unit_vector
+
+PARTICLES = 30
+DUPLIS = 12
+
+
+def add_dupli_verts(scene):
+    """
+    Host object duplicating two child objects on its vertices, one with particles of its own, which keeps one
+    ObjectExporter per dupli
+    """
+    child = make_mesh_object(make_mesh('Child', rows=2, columns=3, materials=2, seed=5), 'Child',
+                             layers=[False] * 19 + [True], users_group=[])
+    emitter_child = make_mesh_object(make_mesh('EmitterMesh', rows=1, columns=1, materials=1), 'EmitterChild',
+                                     layers=[False] * 19 + [True], users_group=[],
+                                     particle_systems=[Data('psys', settings=Data('settings', use_render_emitter=True,
+                                                                                  render_type='NONE'))])
+    host = make_mesh_object(make_mesh('Host', rows=1, columns=1, materials=1), 'Host')
+    rng = random.Random(3)
+
+    def dupli_matrix():
+        angle = rng.uniform(0.0, 3.0)
+        rotation = Quaternion([f32(numpy.cos(angle / 2))] + [f32(numpy.sin(angle / 2) * a) for a in unit_vector(rng)])
+        rotation = rotation.to_matrix()
+        rotation.resize_4x4()
+        translation = Matrix.Translation([f32(rng.uniform(-9.0, 9.0)) for k in range(3)])
+        return translation * rotation * Matrix.Scale(f32(rng.uniform(0.5, 2.0)), 4)
+
+    matrices = [dupli_matrix() for k in range(DUPLIS)]
+
+    def dupli_list_create(scene, settings='RENDER'):
+        host.dupli_list = [Data('dupli', object=emitter_child if k % 4 == 3 else child, matrix=matrix)
+                           for k, matrix in enumerate(matrices)]
+
+    host.__dict__.update(is_duplicator=True, dupli_type='VERTS', dupli_list=[], dupli_list_create=dupli_list_create,
+                         dupli_list_clear=lambda: None)
+    scene.objects.extend([child, emitter_child, host])
+
+
+def add_motion(scene):
+    """
+    Object motion blur, with particles moving along x during the frame
+    """
+    scene.camera.data.luxrender_camera.__dict__.update(usemblur=True, objectmblur=True, motion_blur_samples=2)
+    particles = [particle for obj in scene.objects for psys in obj.particle_systems for particle in psys.particles
+                 if 'location' in particle.__dict__]
+    rest = [particle.location.copy() for particle in particles]
+
+    def frame_set(frame, subframe=0.0):
+        scene.frame_current, scene.frame_subframe = frame, subframe
+        for particle, location in zip(particles, rest):
+            particle.location = location.copy()
+            particle.location.x += subframe
+
+    scene.frame_set = frame_set
+
+
+@pytest.fixture
+def export(monkeypatch, use_scene):
+    """
+    Converts a new scene with duplis, returns {property name: values} of the LuxCore scene
+    """
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    monkeypatch.setattr(duplis, 'ObjectExporter', CountingObjectExporter)
+    monkeypatch.setattr(RecordingScene, 'DefineBlenderMesh', define_shape_per_material)
+
+    def export(per_dupli, motion_blur=False):
+        scene = use_scene(make_render_scene(3, particle_count=PARTICLES))
+        add_dupli_verts(scene)
+        if motion_blur:
+            add_motion(scene)
+
+        with monkeypatch.context() as patch:
+            if per_dupli:
+                # The conversion before instancing
+                patch.setattr(duplis, 'is_instanceable', lambda obj: False)
+
+            CountingObjectExporter.count = 0
+            exporter = LuxCoreExporter(scene, Stub('engine'))
+            exporter.convert(64, 48)
+
+        return dict(exporter.scene_properties.values)
+
+    return export
+
+
+def define_shape_per_material(luxcore_scene, name, *args):
+    """
+    Like pyluxcore, one shape per material of the mesh, with two materials for Child
+    """
+    luxcore_scene.calls.append(('DefineBlenderMesh', name))
+    luxcore_scene.meshes[name] = args
+    return [('%s%03d' % (name, index), index) for index in range(2 if name.endswith('Child') else 1)]
+
+
+class CountingObjectExporter(duplis.ObjectExporter):
+    count = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingObjectExporter.count += 1
+        super().__init__(*args, **kwargs)
+
+
+def single_precision(values):
+    """
+    Values as mathutils computes them, in single precision
+    """
+    return numpy.array(values, dtype=numpy.float32).tolist()
+
+
+def assert_same_scene(batched, per_dupli):
+    assert sorted(batched) == sorted(per_dupli)
+
+    for name, values in per_dupli.items():
+        if name.endswith('transformation'):
+            assert single_precision(batched[name]) == single_precision(values), name
+        else:
+            assert batched[name] == values, name
+
+
+@pytest.mark.parametrize('motion_blur', [False, True])
+def test_instances_match_one_exporter_per_dupli(export, motion_blur):
+    per_dupli = export(per_dupli=True, motion_blur=motion_blur)
+    per_dupli_exporters = CountingObjectExporter.count
+    batched = export(per_dupli=False, motion_blur=motion_blur)
+
+    assert_same_scene(batched, per_dupli)
+
+    # One prototype for the particles and one for Child, the emitting child still has one exporter per dupli
+    assert per_dupli_exporters == PARTICLES + DUPLIS
+    assert CountingObjectExporter.count == 2 + DUPLIS // 4
+
+    names = {name.split('.')[2] for name in batched if name.startswith('scene.objects.')}
+    assert {'ParticleObject0_ParticleSystem_%d' % k for k in range(PARTICLES)} <= names
+    assert {'Child%d_Host_%d' % (shape, k) for k in range(DUPLIS) if k % 4 != 3 for shape in (0, 1)} <= names
+    assert {'EmitterChild0_Host_%d' % k for k in range(DUPLIS) if k % 4 == 3} <= names
+
+    motion = [name for name in batched if '.motion.' in name]
+    assert len(motion) == (PARTICLES * 3 * 2 if motion_blur else 0)
+
+
+def random_matrices(count, seed=0):
+    rng = random.Random(seed)
+    return [Matrix([[f32(rng.uniform(-2.0, 2.0)) for j in range(4)] for i in range(3)] + [[0.0, 0.0, 0.0, 1.0]])
+            for k in range(count)]
+
+
+# Scale lengths exact in single precision, like the ones mathutils computes with
+@pytest.mark.parametrize('scale_length', [1.0, 0.015625, 3.75])
+def test_transformation_lists_match_matrix_to_list(use_scene, monkeypatch, scale_length):
+    scene = use_scene(make_render_scene(1))
+    scene.unit_settings.__dict__.update(system='METRIC', scale_length=scale_length)
+    matrices = random_matrices(200)
+
+    expected = [matrix_to_list(matrix, apply_worldscale=True) for matrix in matrices]
+    transforms = duplis.transformation_lists(matrices)
+
+    assert len(transforms) == len(matrices)
+    assert single_precision(transforms) == single_precision(expected)
+    assert all(isinstance(value, float) for transform in transforms for value in transform)
+
+    # Without numpy, and for a single dupli, matrix_to_list() is used
+    assert duplis.transformation_lists(matrices[:1]) == expected[:1]
+    monkeypatch.setattr(duplis, 'numpy', None)
+    assert duplis.transformation_lists(matrices) == expected
@@ -0,0 +1,99 @@
+"""
+The vectorised tessface extraction of export.meshdata must produce the same
+PLY files and native mesh ParamSets as the face-by-face loops of
+GeometryExporter.
+"""
+
+import os
+
+import pytest
+
+from blender_stubs import Data, Stub
+from scenes import make_mesh, make_mesh_object, make_scene
+
+from luxrender.export import geometry, ply
+from luxrender.extensions_framework import util as efutil
+
+numpy = pytest.importorskip('numpy')
+
+
+def make_exporter(tmpdir, monkeypatch, vectorised, api_type='FILE'):
+    monkeypatch.setattr(geometry, 'NUMPY_AVAILABLE', vectorised)
+    monkeypatch.setattr(efutil, 'export_path', os.path.join(str(tmpdir), 'scene.lxs'))
+
+    scene = make_scene()
+    exporter = geometry.GeometryExporter(Data('lux_context', API_TYPE=api_type), scene, snapshot=Stub())
+    exporter.geometry_scene = scene
+    return exporter
+
+
+def export_ply_meshes(tmpdir, monkeypatch, vectorised, mesh):
+    exporter = make_exporter(tmpdir.mkdir('numpy' if vectorised else 'python'), monkeypatch, vectorised)
+    export_dir = os.path.dirname(efutil.export_path)
+    obj = make_mesh_object(mesh)
+
+    parts = []
+    for mesh_name, material_index, shape_type, params in exporter.buildBinaryPLYMesh(obj):
+        filename = [p.value for p in params if p.name == 'filename'][0]
+        with open(os.path.join(export_dir, filename), 'rb') as ply_file:
+            parts.append((mesh_name, material_index, os.path.basename(filename), ply_file.read()))
+
+    return parts
+
+
+def export_native_meshes(tmpdir, monkeypatch, vectorised, mesh):
+    exporter = make_exporter(tmpdir, monkeypatch, vectorised, api_type='PURE')
+    obj = make_mesh_object(mesh)
+
+    return [(mesh_name, material_index, shape_type, [(p.type, p.name, p.value) for p in params])
+            for mesh_name, material_index, shape_type, params in exporter.buildNativeMesh(obj)]
+
+
+@pytest.mark.parametrize('uv, colors', [(False, False), (True, False), (False, True), (True, True)])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_ply_files_match_legacy_path(tmpdir, monkeypatch, uv, colors, seed):
+    mesh = make_mesh(materials=3, uv=uv, colors=colors, seed=seed)
+
+    legacy = export_ply_meshes(tmpdir, monkeypatch, False, mesh)
+    vectorised = export_ply_meshes(tmpdir, monkeypatch, True, mesh)
+
+    assert len(legacy) == 3
+    assert vectorised == legacy
+
+
+@pytest.mark.parametrize('uv', [False, True])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_native_meshes_match_legacy_path(tmpdir, monkeypatch, uv, seed):
+    mesh = make_mesh(materials=3, uv=uv, colors=False, seed=seed)
+
+    legacy = export_native_meshes(tmpdir, monkeypatch, False, mesh)
+    vectorised = export_native_meshes(tmpdir, monkeypatch, True, mesh)
+
+    assert len(legacy) == 3
+    assert vectorised == legacy
+
+
+@pytest.mark.parametrize('vectorised', [False, True])
+def test_vertex_colors_follow_tessface_index(tmpdir, monkeypatch, vectorised):
+    """
+    Vertex colours of a material are read from the colour layer entry of each face's tessface index, not from
+    the face's position within its material
+    """
+    mesh = make_mesh(rows=2, columns=3, materials=2, uv=False, colors=True, seed=3)
+    color_data = mesh.tessface_vertex_colors.active.data
+
+    for material_index, (mesh_name, i, filename, data) in enumerate(
+            export_ply_meshes(tmpdir, monkeypatch, vectorised, mesh)):
+        path = os.path.join(str(tmpdir), filename)
+        with open(path, 'wb') as ply_file:
+            ply_file.write(data)
+
+        names, vertices, faces = ply.read_ply(path)
+        material_faces = [face for face in mesh.tessfaces if face.material_index == i]
+        assert len(faces) == len(material_faces)
+
+        for face, exported_face in zip(material_faces, faces):
+            layer = color_data[face.index]
+            for j, vertex in enumerate(exported_face):
+                expected = tuple(int(255 * c) for c in getattr(layer, 'color%d' % (j + 1)))
+                assert vertices[vertex][names.index('red'):] == expected
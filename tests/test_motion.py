@@ -0,0 +1,135 @@
+"""
+Motion blur sampling: MotionSampleCache returns the same matrices as
+object_anim_matrices() for every object, also for objects which only move
+through a deformed vertex parent, with one frame_set() per subframe.
+"""
+
+import math
+
+import pytest
+
+from blender_stubs import Matrix
+
+from luxrender.export import object_anim_matrices
+from luxrender.export.motion import MotionSampleCache
+
+from scenes import add_particle_system, make_grid_scene
+
+
+def animate(scene):
+    """
+    Give the scene a frame_set() which moves the objects with a motion(subframe) function and counts calls
+    """
+    scene.frame_set_calls = []
+    rest = {obj: obj.matrix_world for obj in scene.objects}
+
+    def frame_set(frame, subframe=0.0):
+        scene.frame_set_calls.append((frame, subframe))
+        scene.frame_current = frame
+        scene.frame_subframe = subframe
+
+        for obj in scene.objects:
+            motion = obj.__dict__.get('motion')
+            obj.matrix_world = rest[obj] if motion is None else motion(subframe) * rest[obj]
+
+    scene.frame_set = frame_set
+    return scene
+
+
+def make_motion_scene(object_count=8, seed=0):
+    """
+    Static objects, one with keyframed motion and one that has no animation data of its own or on its parent,
+    but follows a vertex of the parent mesh deformed by an armature
+    """
+    scene = make_grid_scene(object_count, seed=seed)
+
+    for obj in scene.objects:
+        obj.animation_data = None
+        obj.constraints = []
+        obj.rigid_body = None
+        obj.parent = None
+
+    keyframed, deformed, child = scene.objects[:3]
+    keyframed.motion = lambda subframe: Matrix.Translation((subframe, 0.0, 0.0))
+
+    deformed.modifiers = ['Armature']
+    child.parent = deformed
+    child.parent_type = 'VERTEX'
+    child.motion = lambda subframe: Matrix.Rotation(subframe * math.pi / 4, 4, 'Z')
+
+    scene.frame_subframe = 0.25
+    return animate(scene)
+
+
+def cached_matrices(scene, steps):
+    cache = MotionSampleCache(scene)
+    for obj in scene.objects:
+        cache.add_object(obj, steps)
+    cache.sample()
+
+    return [cache.object_matrices(obj, steps) for obj in scene.objects]
+
+
+@pytest.mark.parametrize('steps', [1, 2, 8])
+def test_matrices_match_object_anim_matrices(steps):
+    scene = make_motion_scene()
+    expected = [object_anim_matrices(scene, obj, steps) for obj in scene.objects]
+    per_object_calls = len(scene.frame_set_calls)
+
+    scene = make_motion_scene()
+    matrices = cached_matrices(scene, steps)
+
+    assert matrices == expected
+    assert [len(m) for m in matrices] == [steps + 1, 0, steps + 1] + [0] * (len(scene.objects) - 3)
+
+    # One call per subframe and one to restore the current subframe, instead of steps + 2 per object
+    assert per_object_calls == len(scene.objects) * (steps + 2)
+    assert len(scene.frame_set_calls) == steps + 2
+    assert scene.frame_set_calls[-1] == (1, 0.25)
+
+
+def test_unsampled_objects_and_steps_fall_back():
+    scene = make_motion_scene()
+    cache = MotionSampleCache(scene)
+    cache.add_object(scene.objects[0], 2)
+
+    # Before sample() and for other steps the cache samples on its own
+    assert cache.object_matrices(scene.objects[2], 2) == object_anim_matrices(scene, scene.objects[2], 2)
+
+    cache.sample()
+    calls = len(scene.frame_set_calls)
+
+    assert len(cache.object_matrices(scene.objects[0], 2)) == 3
+    assert len(scene.frame_set_calls) == calls
+
+    assert cache.object_matrices(scene.objects[0], 4) == object_anim_matrices(scene, scene.objects[0], 4)
+    assert len(cache.object_matrices(scene.objects[2], 1)) == 2
+
+
+def test_particle_states_per_step():
+    scene = make_motion_scene(3)
+    emitter = scene.objects[1]
+    psys = add_particle_system(emitter, scene.objects[0], 3)
+    particles = list(psys.particles)
+
+    frame_set = scene.frame_set
+
+    def move_particles(frame, subframe=0.0):
+        frame_set(frame, subframe)
+        for k, particle in enumerate(particles):
+            particle.size = k + subframe
+
+    scene.frame_set = move_particles
+
+    cache = MotionSampleCache(scene)
+    cache.add_object(emitter, 2)
+    cache.add_particle_system(emitter, psys, 3)
+    cache.sample()
+
+    assert cache.particle_states(emitter, psys, 2) is None
+
+    states = cache.particle_states(emitter, psys, 3)
+    assert [[state[2] for state in step] for step in states] == [[k + i / 3 for k in range(3)] for i in range(3)]
+
+    # Subframes 0, 1/3, 1/2, 2/3 and 1, and the restore
+    assert len(scene.frame_set_calls) == 6
@@ -0,0 +1,108 @@
+"""
+Numbers written by export.numeric read back as the values they were written
+from, with and without NumPy.
+"""
+
+import array, random, struct
+
+import pytest
+
+from scenes import make_scene
+
+from luxrender.export import ParamSetItem, numeric
+
+
+def sample_values(count=20000, seed=0):
+    rng = random.Random(seed)
+    values = [0.0, -0.0, 1.0, -1.0, 0.1, 1e-45, 1.4e-45, 3.4028234e38, -3.4028234e38, 1e-38, 123456789.0, 0.5]
+
+    for k in range(count):
+        values.append(rng.choice((
+            lambda: rng.uniform(-1.0, 1.0),
+            lambda: rng.uniform(-1e6, 1e6),
+            lambda: rng.gauss(0.0, 1.0) * 10 ** rng.randint(-40, 38),
+            lambda: float(rng.randint(-1000, 1000)),
+            lambda: struct.unpack('<f', struct.pack('<I', rng.getrandbits(31) & 0x7f7fffff))[0],
+        ))())
+
+    return values
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def numpy_mode(request, monkeypatch):
+    if request.param == 'numpy':
+        if numeric.numpy is None or not numeric.NUMPY_SHORTEST_REPR:
+            pytest.skip('NumPy with shortest float repr not available')
+    else:
+        monkeypatch.setattr(numeric, 'NUMPY_SHORTEST_REPR', False)
+        monkeypatch.setattr(numeric, 'numpy', None)
+
+    return request.param
+
+
+def test_single_precision_reads_back_as_same_float32(numpy_mode):
+    values = sample_values()
+    singles = array.array('f', values)
+
+    strings = numeric.float_strings(values, numeric.SINGLE)
+
+    assert array.array('f', [float(s) for s in strings]) == singles
+    assert all(len(s.lstrip('-')) <= 15 for s in strings)
+
+
+def test_single_precision_strings_are_short(numpy_mode):
+    strings = numeric.float_strings([0.5, 0.1, 1.0, -2.25, 100.0], numeric.SINGLE)
+    assert array.array('f', [float(s) for s in strings]) == array.array('f', [0.5, 0.1, 1.0, -2.25, 100.0])
+    assert max(len(s) for s in strings) <= 5
+
+
+def test_double_precision_reads_back_as_same_double(numpy_mode):
+    values = sample_values(seed=1)
+    assert [float(s) for s in numeric.float_strings(values, numeric.DOUBLE)] == values
+
+
+def test_fixed_precision_matches_legacy_format(numpy_mode):
+    values = sample_values(200, seed=2)
+    assert numeric.float_strings(values, numeric.FIXED) == ['%0.15f' % v for v in values]
+
+
+@pytest.mark.skipif(numeric.numpy is None, reason='NumPy not available')
+def test_numpy_arrays_match_lists():
+    numpy = numeric.numpy
+    values = sample_values(5000, seed=3)
+    singles = list(array.array('f', values))
+
+    for precision in (numeric.SINGLE, numeric.DOUBLE, numeric.FIXED):
+        assert numeric.float_strings(numpy.array(singles, dtype=numpy.float32).reshape(-1, 1), precision) == \
+            numeric.float_strings(singles, precision)
+
+    integers = numpy.arange(-50, 50, dtype=numpy.int32).reshape(10, 10)
+    assert numeric.integer_strings(integers) == [str(v) for v in range(-50, 50)]
+
+
+def test_wrap_strings():
+    strings = [str(v) for v in range(7)]
+    assert numeric.wrap_strings(strings, 10) == '0 1 2 3 4 5 6'
+    assert numeric.wrap_strings(strings, 3) == '0 1 2\n3 4 5\n6'
+
+
+@pytest.mark.parametrize('policy', ['AUTO', 'DOUBLE', 'FIXED'])
+def test_param_set_items_parse_back(use_scene, policy):
+    scene = use_scene(make_scene())
+    scene.luxrender_engine.float_precision = policy
+
+    values = list(array.array('f', sample_values(1000, seed=4)))
+    text = ParamSetItem('point', 'P', values).to_string()
+
+    assert text.startswith('"point P" [')
+    parsed = [float(s) for s in text[text.index('[') + 1:text.rindex(']')].split()]
+
+    if policy == 'FIXED':
+        assert parsed == [float('%0.15f' % v) for v in values]
+    elif policy == 'DOUBLE':
+        assert parsed == values
+    else:
+        assert array.array('f', parsed) == array.array('f', values)
+
+    scalar = ParamSetItem('float', 'gain', 0.1).to_string()
+    assert float(scalar[scalar.index('[') + 1:-1]) == (0.1 if policy != 'FIXED' else float('%0.15f' % 0.1))
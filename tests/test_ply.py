@@ -0,0 +1,88 @@
+"""
+Binary PLY files written by export.ply read back with the same vertices and
+faces, from both the list and the NumPy packers.
+"""
+
+import random
+
+import pytest
+
+from scenes import f32
+
+from luxrender.export import ply
+from luxrender.export.meshdata import numpy
+
+
+def make_ply_data(uv, color, vertex_count=50, face_count=40, seed=0):
+    rng = random.Random(seed)
+    vertices = []
+
+    for k in range(vertex_count):
+        vertex = [tuple(f32(rng.uniform(-10.0, 10.0)) for i in range(3)),
+                  tuple(f32(rng.uniform(-1.0, 1.0)) for i in range(3))]
+        if uv:
+            vertex.append(tuple(f32(rng.random()) for i in range(2)))
+        if color:
+            vertex.append(tuple(rng.randrange(256) for i in range(3)))
+        vertices.append(tuple(vertex))
+
+    faces = [[rng.randrange(vertex_count) for i in range(rng.choice((3, 4)))] for k in range(face_count)]
+    return vertices, faces
+
+
+def write_and_read(tmpdir, vertices, faces, vertex_data, face_data, uv, color):
+    path = str(tmpdir.join('mesh.ply'))
+    ply.write_ply(path, len(vertices), len(faces), vertex_data, face_data, uv, color)
+    return ply.read_ply(path)
+
+
+def expected_names(uv, color):
+    names = ['x', 'y', 'z', 'nx', 'ny', 'nz']
+    if uv:
+        names += ['s', 't']
+    if color:
+        names += ['red', 'green', 'blue']
+    return names
+
+
+@pytest.mark.parametrize('uv', [False, True])
+@pytest.mark.parametrize('color', [False, True])
+def test_list_round_trip(tmpdir, uv, color):
+    vertices, faces = make_ply_data(uv, color)
+
+    names, read_vertices, read_faces = write_and_read(
+        tmpdir, vertices, faces, ply.pack_vertices(vertices, uv, color), ply.pack_faces(faces), uv, color)
+
+    assert names == expected_names(uv, color)
+    assert read_vertices == [tuple(v for part in vertex for v in part) for vertex in vertices]
+    assert read_faces == faces
+
+
+@pytest.mark.skipif(numpy is None, reason='NumPy not available')
+@pytest.mark.parametrize('uv', [False, True])
+@pytest.mark.parametrize('color', [False, True])
+def test_array_packing_matches_lists(tmpdir, uv, color):
+    vertices, faces = make_ply_data(uv, color, seed=1)
+
+    columns = list(zip(*vertices))
+    co = numpy.array(columns[0], dtype=numpy.float32)
+    no = numpy.array(columns[1], dtype=numpy.float32)
+    uvs = numpy.array(columns[2], dtype=numpy.float32) if uv else None
+    vcs = numpy.array(columns[-1], dtype=numpy.uint8) if color else None
+
+    face_sides = numpy.array([len(f) for f in faces], dtype=numpy.uint8)
+    face_indices = numpy.array([f + [0] * (4 - len(f)) for f in faces], dtype=numpy.uint32)
+
+    vertex_data = ply.pack_vertex_arrays(co, no, uvs, vcs)
+    face_data = ply.pack_face_arrays(face_sides, face_indices)
+
+    assert vertex_data == ply.pack_vertices(vertices, uv, color)
+    assert face_data == ply.pack_faces(faces)
+
+    names, read_vertices, read_faces = write_and_read(tmpdir, vertices, faces, vertex_data, face_data, uv, color)
+    assert read_faces == faces
+
+
+def test_empty_mesh(tmpdir):
+    names, vertices, faces = write_and_read(tmpdir, [], [], b'', b'', False, False)
+    assert (vertices, faces) == ([], [])
@@ -0,0 +1,258 @@
+"""
+Cached PLY files: unchanged meshes are not written again, changed meshes are,
+and one cache serves all geometry scenes of an export. The size limit only
+counts the entries no exported frame links to, and copies made without hard
+links in full.
+"""
+
+import os, threading, time
+
+import pytest
+
+from blender_stubs import RecordingContext, Vector
+from scenes import make_grid_scene, make_mesh, make_mesh_object, make_scene
+
+from luxrender.export import geometry, ply
+from luxrender.export.plycache import PLYCache, ply_cache_directory
+from luxrender.export.snapshot import SceneSnapshot
+from luxrender.extensions_framework import util as efutil
+
+
+class PureContext(RecordingContext):
+    API_TYPE = 'PURE'
+
+
+@pytest.fixture
+def export_dir(tmpdir, monkeypatch):
+    path = str(tmpdir.mkdir('export'))
+    monkeypatch.setattr(efutil, 'export_path', path)
+    return path
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """
+    Paths of the PLY files written by the export
+    """
+    written = []
+    write_ply_file = geometry.GeometryExporter.write_ply_file
+
+    def recording_write_ply_file(ply_path, *args):
+        written.append(ply_path)
+        write_ply_file(ply_path, *args)
+
+    monkeypatch.setattr(geometry.GeometryExporter, 'write_ply_file', staticmethod(recording_write_ply_file))
+    return written
+
+
+def export(use_scene, scene):
+    """
+    Export the geometry of scene and its background sets like SceneExporter, returns {object:PLY name: PLY path}
+    """
+    use_scene(scene)
+    lux_context = PureContext()
+    exporter = geometry.GeometryExporter(lux_context, scene, SceneSnapshot(scene))
+
+    exporter.open_ply_cache()
+    try:
+        for geometry_scene in exporter.snapshot.geometry_scenes:
+            exporter.iterateScene(geometry_scene)
+    finally:
+        exporter.close_ply_cache()
+
+    export_path = os.path.dirname(efutil.export_path)
+    shapes = [args[1] for call, args in lux_context.calls if call == 'shape']
+    return {'%s:%s' % (params_value(params, 'name'), os.path.basename(path_name(params))):
+            os.path.join(export_path, path_name(params)) for params in shapes}
+
+
+def params_value(params, name):
+    return [p.value for p in params if p.name == name][0]
+
+
+def path_name(params):
+    return params_value(params, 'filename')
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def cache_entries(export_path):
+    cache = PLYCache(ply_cache_directory(export_path), 0)
+    return {os.stat(cache.path(digest)).st_ino: digest for digest in cache.index}
+
+
+def test_unchanged_frames_use_cached_files(export_dir, use_scene, writes):
+    scene = make_grid_scene(4, partial_ply=True)
+    first = export(use_scene, scene)
+
+    assert len(writes) == len(first) > 4
+    del writes[:]
+
+    scene.frame_current = 2
+    second = export(use_scene, scene)
+
+    assert writes == []
+    assert sorted(first) == sorted(second)
+    for name in first:
+        assert first[name] != second[name]
+        assert read(first[name]) == read(second[name])
+
+
+def test_changed_mesh_is_written_again(export_dir, use_scene, writes):
+    scene = make_grid_scene(4, partial_ply=True)
+    first = export(use_scene, scene)
+    del writes[:]
+
+    changed = scene.objects[2]
+    changed.data.vertices[7].co = Vector((10.0, 20.0, 30.0))
+
+    scene.frame_current = 2
+    second = export(use_scene, scene)
+
+    changed_names = [name for name in first if read(first[name]) != read(second[name])]
+    assert len(writes) == len(changed_names) > 0
+    assert all(name.startswith(changed.name + ':') for name in changed_names)
+
+    vertices = [vertex[:3] for name in changed_names for vertex in ply.read_ply(second[name])[1]]
+    assert (10.0, 20.0, 30.0) in vertices
+
+
+def test_background_sets_share_the_cache(export_dir, use_scene, writes):
+    """
+    With a cache size of 0 every entry not used by the export is evicted, which must not include the files of
+    the scene exported before the background set
+    """
+    background = make_grid_scene(3, name='Background', prefix='BG', seed=10)
+    scene = make_grid_scene(3, partial_ply=True, ply_cache_size=0, background_set=background)
+
+    paths = export(use_scene, scene)
+    entries = cache_entries(export_dir)
+
+    assert any(name.startswith('BG') for name in paths)
+    assert len(entries) == len(paths)
+    assert set(os.stat(path).st_ino for path in paths.values()) == set(entries)
+
+    del writes[:]
+    scene.frame_current = 2
+    export(use_scene, scene)
+    assert writes == []
+
+
+def test_identical_meshes_are_written_once(export_dir, use_scene, writes):
+    objects = [make_mesh_object(make_mesh('Mesh%d' % k, seed=5), 'Object%d' % k) for k in range(6)]
+    scene = make_scene(objects=objects, threads=4, partial_ply=True)
+
+    paths = export(use_scene, scene)
+
+    assert len(writes) == 2
+    assert len(paths) == 12
+    assert len(set(os.stat(path).st_ino for path in paths.values())) == 2
+
+
+def test_claim_waits_for_the_writing_job(tmpdir):
+    cache = PLYCache(str(tmpdir), 1024)
+    results = []
+
+    assert cache.claim('abc')
+
+    waiting = threading.Thread(target=lambda: results.append(cache.claim('abc')))
+    waiting.start()
+    time.sleep(0.05)
+    assert results == []
+
+    # The entry could not be written, so the waiting job has to write it
+    cache.release('abc')
+    waiting.join()
+    assert results == [True]
+
+    with open(cache.path('abc'), 'wb') as f:
+        f.write(b'ply')
+    cache.add('abc', 3)
+    assert not cache.claim('abc')
+
+
+def test_index_is_rebuilt_from_files(tmpdir):
+    cache = PLYCache(str(tmpdir), 1024)
+    with open(cache.path('abc'), 'wb') as f:
+        f.write(b'plydata')
+    cache.add('abc', 7)
+    cache.save_index()
+
+    with open(cache.index_path, 'w') as f:
+        f.write('{not json')
+
+    rebuilt = PLYCache(str(tmpdir), 1024)
+    assert list(rebuilt.index) == ['abc']
+    assert rebuilt.index['abc']['size'] == 7
+
+
+def cached_entries(directory, frame_dir, entries):
+    """
+    Cache entries {digest: data} used in that order, linked into frame_dir like the PLY files of an exported frame.
+    Returns a new PLYCache of the directory, whose entries are not used by its export.
+    """
+    cache = PLYCache(directory, 0)
+    for last_used, (digest, data) in enumerate(entries):
+        with open(cache.path(digest), 'wb') as f:
+            f.write(data)
+        cache.add(digest, len(data))
+        cache.index[digest]['last_used'] = last_used
+        cache.link(digest, os.path.join(frame_dir, '%s.ply' % digest))
+
+    cache.save_index()
+    return PLYCache(directory, 0)
+
+
+def test_linked_entries_are_kept_and_not_counted(tmpdir):
+    frame_dir = str(tmpdir.mkdir('00001'))
+    cache = cached_entries(str(tmpdir.join('cache')), frame_dir, [('a', b'ply a'), ('b', b'ply bb')])
+
+    # Removing entries the frame still links to would free nothing
+    assert cache.held_sizes() == {'a': 0, 'b': 0}
+    assert cache.collect() == 0
+    assert sorted(cache.index) == ['a', 'b']
+
+    # Once the frame is deleted, the entries only take space in the cache
+    os.remove(os.path.join(frame_dir, 'a.ply'))
+    assert cache.held_sizes() == {'a': 5, 'b': 0}
+
+    cache.max_size = 4
+    assert cache.collect() == 1
+    assert list(cache.index) == ['b'] and not os.path.exists(cache.path('a'))
+    assert read(os.path.join(frame_dir, 'b.ply')) == b'ply bb'
+
+
+def test_copied_entries_count_in_full(tmpdir, monkeypatch):
+    def no_link(source, link_name):
+        raise OSError('Hard links are not supported')
+
+    monkeypatch.setattr(os, 'link', no_link)
+    frame_dir = str(tmpdir.mkdir('00001'))
+    cache = cached_entries(str(tmpdir.join('cache')), frame_dir, [('a', b'ply a'), ('b', b'ply bb')])
+
+    # The frame has copies, the cache holds a second copy of each file
+    frame_a = os.path.join(frame_dir, 'a.ply')
+    assert os.stat(frame_a).st_ino != os.stat(cache.path('a')).st_ino
+    assert cache.held_sizes() == {'a': 5, 'b': 6}
+
+    # The least recently used entries are removed, the frame keeps its copies
+    cache.max_size = 6
+    assert cache.collect() == 1
+    assert list(cache.index) == ['b']
+    assert read(frame_a) == b'ply a'
+
+    # Entries used by the current export are kept over the limit
+    cache.max_size = 0
+    assert cache.have('b')
+    assert cache.collect() == 0
+
+
+def test_missing_entries_are_dropped(tmpdir):
+    cache = cached_entries(str(tmpdir.join('cache')), str(tmpdir.mkdir('00001')), [('a', b'ply a')])
+    os.remove(cache.path('a'))
+
+    assert cache.collect() == 0
+    assert cache.index == {}
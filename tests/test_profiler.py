@@ -0,0 +1,205 @@
+"""
+Export profiler: nested scope paths with their total and self time, scopes
+of other threads, thread safe counters, open scopes closed by stop(), the
+report and Chrome trace files written by finish(), and export phases which
+stay balanced when a scope is left open.
+"""
+
+import json, threading
+
+import pytest
+
+from luxrender.export.materials import MaterialCounter, TextureCounter
+from luxrender.export.scene import SceneExporter
+from luxrender.outputs import profiler as profiler_module
+from luxrender.outputs.profiler import ExportProfiler
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(profiler_module.time, 'perf_counter', clock)
+    return clock
+
+
+@pytest.fixture
+def profiler(clock):
+    profiler = ExportProfiler()
+    profiler.start('Scene')
+    return profiler
+
+
+@pytest.fixture
+def shared_profiler(monkeypatch, clock):
+    """
+    The profiler used by the exporters, started for the test
+    """
+    profiler = ExportProfiler()
+    for module in ('luxrender.export.materials', 'luxrender.export.scene'):
+        monkeypatch.setattr(module + '.profiler', profiler)
+
+    profiler.start('Scene')
+    return profiler
+
+
+def test_nested_scopes_total_and_self_time(profiler, clock):
+    with profiler.scope('geometry'):
+        clock.now += 1.0
+        for i in range(2):
+            with profiler.scope('mesh'):
+                clock.now += 2.0
+                with profiler.scope('ply'):
+                    clock.now += 0.5
+        with profiler.scope('hair'):
+            clock.now += 3.0
+
+    scopes = profiler.report()['scopes']
+
+    assert list(scopes) == ['geometry', 'geometry/mesh', 'geometry/mesh/ply', 'geometry/hair']
+    assert scopes['geometry'] == {'calls': 1, 'total': 9.0, 'self': 1.0}
+    assert scopes['geometry/mesh'] == {'calls': 2, 'total': 5.0, 'self': 4.0}
+    assert scopes['geometry/mesh/ply'] == {'calls': 2, 'total': 1.0, 'self': 1.0}
+    assert scopes['geometry/hair'] == {'calls': 1, 'total': 3.0, 'self': 3.0}
+
+    assert profiler.summary() == 'mesh 4.00s, hair 3.00s, geometry 1.00s, ply 1.00s'
+
+
+def test_scopes_of_other_threads_are_ignored(profiler, clock):
+    def worker():
+        with profiler.scope('worker'):
+            clock.now += 1.0
+        profiler.begin('unclosed')
+
+    with profiler.scope('export'):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert list(profiler.report()['scopes']) == ['export']
+    assert profiler.stack == []
+
+
+def test_count_from_threads(profiler):
+    def worker():
+        for i in range(1000):
+            profiler.count('faces', 2)
+            profiler.count('objects')
+
+    threads = [threading.Thread(target=worker) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert profiler.report()['counters'] == {'faces': 16000, 'objects': 8000}
+
+
+def test_disabled_profiler_records_nothing(clock):
+    profiler = ExportProfiler()
+
+    assert profiler.scope('mesh') is profiler.scope('object')
+    with profiler.scope('mesh'):
+        profiler.count('faces', 10)
+        profiler.begin('raw')
+    profiler.end()
+
+    assert (profiler.events, profiler.stack, dict(profiler.counters)) == ([], [], {})
+    assert profiler.finish('unused') == ''
+
+
+def test_stop_ends_open_scopes(profiler, clock):
+    profiler.begin('export')
+    clock.now += 1.0
+    profiler.begin('geometry')
+    clock.now += 2.0
+    profiler.stop()
+
+    assert not profiler.enabled and profiler.stack == []
+    assert profiler.report()['scopes'] == {
+        'export/geometry': {'calls': 1, 'total': 2.0, 'self': 2.0},
+        'export': {'calls': 1, 'total': 3.0, 'self': 1.0},
+    }
+
+    # Stopped, nothing more is recorded
+    with profiler.scope('late'):
+        profiler.count('objects')
+    assert len(profiler.events) == 2 and not profiler.counters
+
+
+def test_scope_ends_the_scopes_left_open_inside(profiler, clock):
+    with profiler.scope('object'):
+        profiler.begin('leaked')
+        clock.now += 1.0
+
+    with profiler.scope('next'):
+        clock.now += 1.0
+
+    assert list(profiler.report()['scopes']) == ['object/leaked', 'object', 'next']
+    assert profiler.stack == []
+
+
+def test_finish_writes_report_and_trace(profiler, clock, tmpdir):
+    clock.now += 0.25
+    with profiler.scope('geometry'):
+        clock.now += 1.5
+        with profiler.scope('mesh'):
+            clock.now += 0.5
+            profiler.count('faces', 12)
+
+    summary = profiler.finish(str(tmpdir))
+
+    assert summary == 'geometry 1.50s, mesh 0.50s'
+    assert not profiler.enabled
+
+    with open(str(tmpdir.join('Scene_profile.json'))) as report_file:
+        report = json.load(report_file)
+    assert report == {
+        'name': 'Scene',
+        'scopes': {
+            'geometry': {'calls': 1, 'total': 2.0, 'self': 1.5},
+            'geometry/mesh': {'calls': 1, 'total': 0.5, 'self': 0.5},
+        },
+        'counters': {'faces': 12},
+    }
+
+    with open(str(tmpdir.join('Scene_trace.json'))) as trace_file:
+        trace = json.load(trace_file)
+    events = sorted(trace['traceEvents'], key=lambda e: e['ts'])
+
+    assert [(e['name'], e['cat'], e['ph'], e['ts'], e['dur']) for e in events] == [
+        ('geometry', 'geometry', 'X', 250000.0, 2000000.0),
+        ('mesh', 'geometry', 'X', 1750000.0, 500000.0),
+    ]
+    assert all(e['tid'] == threading.get_ident() for e in events)
+
+
+def test_phases_stay_balanced(shared_profiler, clock):
+    exporter = SceneExporter()
+
+    exporter.start_phase('setup')
+    clock.now += 1.0
+    with MaterialCounter('Material'):
+        clock.now += 0.25
+        with TextureCounter('Texture'):
+            clock.now += 0.25
+    # A scope a phase leaves open ends with the phase
+    shared_profiler.begin('leaked')
+    exporter.start_phase('geometry')
+    clock.now += 2.0
+    exporter.start_phase()
+
+    scopes = shared_profiler.report()['scopes']
+
+    assert list(scopes) == ['setup', 'setup/material', 'setup/material/texture', 'setup/leaked', 'geometry']
+    assert scopes['setup']['total'] == 1.5
+    assert scopes['geometry'] == {'calls': 1, 'total': 2.0, 'self': 2.0}
+    assert shared_profiler.stack == []
+    assert list(exporter.phase_times) == ['setup', 'geometry']
@@ -0,0 +1,237 @@
+"""
+Smoke pointcaches: synthetic BPHYSICS files of both cache layouts, with
+uncompressed and LZMA segments, decode to the density and fire values they
+were written with. Decoded values do not keep the file buffer alive, and
+the frame cache stays within its byte budget and is emptied after exports.
+"""
+
+import array, lzma, os, struct
+
+import bpy
+import pytest
+
+from blender_stubs import Data
+
+from luxrender.export import volumes
+
+def float_values(count, seed):
+    return array.array('f', [((k * 7 + seed * 13) % 23) / 4.0 for k in range(count)])
+
+
+def segment(values, compression):
+    """
+    Data segment of values (an array) as Blender writes it, compression 0 (none) or 2 (LZMA)
+    """
+    data = values.tobytes()
+
+    if compression == 0:
+        return b'\0' + data
+
+    # .lzma files are the props, the uncompressed size and the raw stream Blender writes
+    alone = lzma.compress(data, format=lzma.FORMAT_ALONE)
+    props, stream = alone[:5], alone[13:]
+    return b'\2' + struct.pack('<I', len(stream)) + stream + struct.pack('<I', len(props)) + props
+
+
+def write_cache_file(path, resolution, new_cache=True, fire=False, high_res=False, amplifier=2, compression=0):
+    """
+    Write a BPHYSICS smoke domain file, returns the (density, fire) values a reader should return
+    """
+    cells = resolution[0] * resolution[1] * resolution[2]
+    big_cells = cells * amplifier ** 3
+    blocks = []
+
+    def floats(name, count=cells, compress=compression):
+        values = float_values(count, len(blocks))
+        blocks.append(segment(values, compress))
+        return values
+
+    blocks.append(b'BPHYSICS' + struct.pack('<III', 3, 0 if new_cache else cells, 0))
+
+    if new_cache:
+        blocks.append(b'1.04' + struct.pack('<6I', 1, 1, resolution[0], resolution[1], resolution[2], 1))
+
+    # Segments which are not read are never compressed, their size must be skipped either way
+    floats('shadow', compress=0)
+    density = floats('density')
+    if not new_cache:
+        floats('density_old', compress=2)
+    floats('heat', compress=2)
+    floats('heat_old')
+
+    fire_values = []
+    if new_cache and fire:
+        fire_values = floats('fire')
+        floats('fuel', compress=2)
+        floats('react')
+
+    if high_res:
+        for name in ('vx', 'vy', 'vz') + (() if new_cache else ('vx_old', 'vy_old', 'vz_old')):
+            floats(name, compress=2)
+
+        blocks.append(b'\0' + bytes(range(cells)))
+        blocks.append(struct.pack('<2f', 0.1, 0.2))
+
+        if new_cache:
+            blocks.append(b'\x07' * ((3 + 3 + 3 + 3 + 16 + 3) * 4 + (3 + 3 + 3 + 3) * 4))
+
+        density = floats('big_density', big_cells)
+        if new_cache and fire:
+            fire_values = floats('big_fire', big_cells)
+
+        # Wavelet turbulence texture coordinates follow, and are never read
+        blocks.append(segment(array.array('I', range(cells)), 0) * 3)
+
+    with open(path, 'wb') as cache_file:
+        cache_file.write(b''.join(blocks))
+
+    return density, fire_values
+
+
+@pytest.mark.parametrize('new_cache', [False, True])
+@pytest.mark.parametrize('fire', [False, True])
+@pytest.mark.parametrize('high_res', [False, True])
+@pytest.mark.parametrize('compression', [0, 2])
+def test_decodes_the_written_values(tmpdir, new_cache, fire, high_res, compression):
+    path = str(tmpdir.join('smoke.bphys'))
+    density, fire_values = write_cache_file(path, (3, 4, 5), new_cache, fire, high_res, compression=compression)
+
+    res_x, res_y, res_z, decoded_density, decoded_fire = volumes.read_cache_file(path, high_res, 2, int(fire))
+
+    assert (res_x, res_y, res_z) == ((3, 4, 5) if new_cache else (0, 0, 0))
+    assert list(decoded_density) == list(density)
+    assert list(decoded_fire) == list(fire_values)
+
+
+@pytest.mark.parametrize('compression', [0, 2])
+def test_values_do_not_reference_the_file(tmpdir, compression):
+    numpy = pytest.importorskip('numpy')
+    path = str(tmpdir.join('smoke.bphys'))
+    write_cache_file(path, (8, 8, 8), fire=True, compression=compression)
+
+    for values in volumes.read_cache_file(path, False, 2, 1)[3:]:
+        assert isinstance(values, numpy.ndarray) and len(values) == 512
+
+        # The buffer behind a view of a memoryview slice is the object the slice was taken from
+        base = values.base
+        if isinstance(base, memoryview):
+            base = base.obj
+        assert base is None or memoryview(base).nbytes == values.nbytes
+
+
+def test_rejects_other_files(tmpdir):
+    path = str(tmpdir.join('other.bphys'))
+    with open(path, 'wb') as other_file:
+        other_file.write(b'BPHYSICS' + struct.pack('<III', 1, 10, 0) + b'\0' * 64)
+
+    assert volumes.read_cache_file(path, False, 2, 0) == (0, 0, 0, [], [])
+
+
+@pytest.fixture
+def baked_frames(tmpdir, monkeypatch, use_scene):
+    """
+    write(frame, resolution) bakes a frame of a pointcache next to a saved .blend file, read(frame) reads it
+    through read_cache() and counts the decoded files
+    """
+    monkeypatch.setattr(bpy.data, 'filepath', str(tmpdir.join('scene.blend')), raising=False)
+    monkeypatch.setattr(volumes, 'decoded_frames', volumes.collections.OrderedDict())
+    cache_dir = tmpdir.mkdir('blendcache_scene')
+    scene = use_scene(Data('scene', name='Scene', frame_current=1))
+    pointcache = Data('point_cache', is_baked=True, name='smoke', index=0)
+    decoded = []
+
+    read_cache_file = volumes.read_cache_file
+
+    def counting_read(path, *args):
+        decoded.append(os.path.basename(path))
+        return read_cache_file(path, *args)
+
+    monkeypatch.setattr(volumes, 'read_cache_file', counting_read)
+
+    class Frames(object):
+        def write(self, frame, resolution=(4, 4, 4)):
+            return write_cache_file(str(cache_dir.join('smoke_%06d_00.bphys' % frame)), resolution, fire=True)
+
+        def read(self, frame):
+            scene.frame_current = frame
+            return volumes.read_cache(pointcache, False, 2, 1)
+
+    frames = Frames()
+    frames.decoded = decoded
+    return frames
+
+
+def test_channels_of_a_frame_are_decoded_once(baked_frames):
+    density, fire = baked_frames.write(1)
+
+    assert list(baked_frames.read(1)[3]) == list(density)
+    assert list(baked_frames.read(1)[4]) == list(fire)
+    assert baked_frames.decoded == ['smoke_000001_00.bphys']
+
+    volumes.clear_decoded_frames()
+    baked_frames.read(1)
+    assert len(baked_frames.decoded) == 2
+
+
+def test_frame_cache_is_bounded_by_bytes(baked_frames, monkeypatch):
+    # Each frame of 4 x 4 x 4 density and fire values takes 512 bytes
+    monkeypatch.setattr(volumes, 'DECODED_FRAMES_BYTES', 1200)
+
+    for frame in range(1, 5):
+        baked_frames.write(frame)
+        baked_frames.read(frame)
+
+    assert sum(volumes.frame_bytes(f) for f in volumes.decoded_frames.values()) <= 1200
+    assert [key[0][-15:] for key in volumes.decoded_frames] == ['000003_00.bphys', '000004_00.bphys']
+
+    # Reading a frame again makes it the most recent, frames larger than the budget are not kept
+    baked_frames.read(3)
+    baked_frames.write(5, (8, 8, 8))
+    baked_frames.read(5)
+
+    assert [key[0][-15:] for key in volumes.decoded_frames] == ['000004_00.bphys', '000003_00.bphys']
+    assert baked_frames.decoded == ['smoke_%06d_00.bphys' % frame for frame in (1, 2, 3, 4, 5)]
+
+
+def test_exports_clear_decoded_frames(tmpdir, monkeypatch, use_scene):
+    from luxrender.export.scene import SceneExporter
+    from luxrender.outputs import LuxManager
+    from scenes import make_render_scene
+
+    scene = use_scene(make_render_scene(1))
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    volumes.decoded_frames['frame'] = (1, 1, 1, [1.0], [])
+
+    properties = Data('properties', filename='scene', directory=str(tmpdir), api_type='FILE',
+                      write_files=True, write_all_files=True)
+    assert SceneExporter().set_properties(properties).set_scene(scene).export() == {'FINISHED'}
+    assert len(volumes.decoded_frames) == 0
+
+
+def make_domain(name, resolution, high_resolution=False, amplify=1):
+    """
+    Smoke domain object with Blender 2.71 grid access
+    """
+    cells = resolution[0] * resolution[1] * resolution[2]
+    if high_resolution:
+        cells *= (amplify + 1) ** 3
+
+    settings = Data('domain_settings', density_grid=list(float_values(cells, 1)),
+                    flame_grid=list(float_values(cells, 2)), resolution_max=max(resolution),
+                    domain_resolution=resolution, use_high_resolution=high_resolution, amplify=amplify)
+    return Data(name, name=name, modifiers=[Data('Smoke', name='Smoke', smoke_type='DOMAIN', domain_settings=settings)])
+
+
+@pytest.mark.parametrize('channel', ['density', 'fire'])
+@pytest.mark.parametrize('high_resolution', [False, True])
+def test_exports_the_domain_grid(monkeypatch, use_scene, channel, high_resolution):
+    use_scene(Data('scene', name='Scene'))
+    domain = make_domain('Domain', (6, 5, 4), high_resolution=high_resolution)
+    monkeypatch.setattr(bpy.data, 'objects', {'Domain': domain}, raising=False)
+
+    settings = domain.modifiers[0].domain_settings
+    grid = settings.density_grid if channel == 'density' else settings.flame_grid
+    scale = 2 if high_resolution else 1
+
+    # The grid is copied at once, with the values of the former voxel by voxel copy
+    assert volumes.export_smoke('Domain', channel) == (6 * scale, 5 * scale, 4 * scale, [v.real for v in grid])
@@ -0,0 +1,134 @@
+"""
+Scene snapshot of an export: the scene graph properties of each object are
+read once per export, whatever the number of stages using them, visibility
+is the same as is_obj_visible() and the light check finds the emitting
+materials recorded in the snapshot.
+"""
+
+import collections, random, sys
+
+import pytest
+
+import bpy
+
+from blender_stubs import Data
+from luxrender.export import is_obj_visible
+from luxrender.export.scene import SceneExporter
+from luxrender.export.snapshot import SceneSnapshot
+from luxrender.outputs import LuxManager
+
+from scenes import make_mesh, make_mesh_object, make_render_scene
+
+# Properties the exporter reads to walk the scene graph
+TRAVERSAL = frozenset(('hide_render', 'layers', 'parent', 'is_duplicator', 'dupli_type', 'particle_systems',
+                       'modifiers'))
+
+reads = collections.Counter()  # {(object name, property): reads by the add-on}
+
+
+class CountingObject(Data):
+    """
+    Object stand-in counting the reads of TRAVERSAL properties by add-on code, as RNA lookups
+    """
+
+    def __getattribute__(self, name):
+        if name in TRAVERSAL and sys._getframe(1).f_globals.get('__name__', '').startswith('luxrender'):
+            reads[(object.__getattribute__(self, '_name'), name)] += 1
+
+        return Data.__getattribute__(self, name)
+
+
+def count_reads(scene):
+    for obj in scene.objects:
+        obj.__class__ = CountingObject
+
+    reads.clear()
+    return reads
+
+
+@pytest.fixture
+def render_scene(monkeypatch, use_scene):
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    monkeypatch.setattr(bpy.data, 'groups', [], raising=False)
+    return use_scene(make_render_scene(4, particle_count=5))
+
+
+def test_export_reads_each_object_once(render_scene, tmpdir):
+    counted = count_reads(render_scene)
+    properties = Data('properties', filename='scene', directory=str(tmpdir), api_type='FILE', write_files=True,
+                      write_all_files=True)
+
+    assert SceneExporter().set_properties(properties).set_scene(render_scene).export() == {'FINISHED'}
+
+    # The light check, the volumes, the geometry and the lights share one walk of the scene
+    for obj in render_scene.objects:
+        for name in TRAVERSAL - {'dupli_type'}:
+            assert counted[(obj.name, name)] == 1, (obj.name, name)
+
+    assert counted[('Object0', 'dupli_type')] == 1
+    assert len([key for key in counted if key[1] == 'dupli_type']) == 1
+
+
+def test_snapshot_lookups_read_nothing(render_scene):
+    counted = count_reads(render_scene)
+    snapshot = SceneSnapshot(render_scene)
+    after_walk = sum(counted.values())
+
+    for obj in render_scene.objects:
+        assert snapshot.record(obj) is snapshot.records(render_scene)[list(render_scene.objects).index(obj)]
+        snapshot.is_visible(obj)
+        snapshot.is_visible(obj, is_dupli=True)
+        snapshot.modifiers(obj)
+
+    assert sum(counted.values()) == after_walk
+
+
+def test_visibility_matches_is_obj_visible(render_scene):
+    rng = random.Random(1)
+    objects = list(render_scene.objects)
+
+    for obj in objects:
+        obj.__dict__.update(layers=[rng.random() < 0.3 for k in range(20)], hide_render=rng.random() < 0.2)
+    render_scene.layers = [rng.random() < 0.5 for k in range(20)]
+
+    snapshot = SceneSnapshot(render_scene)
+    other = make_mesh_object(make_mesh('Other'), 'Other', layers=[False] * 19 + [True])
+
+    for obj in objects + [other]:
+        for is_dupli in (False, True):
+            assert snapshot.is_visible(obj, is_dupli) == is_obj_visible(render_scene, obj, is_dupli)
+
+    assert [record.visible for record in snapshot.records(render_scene)] == \
+           [is_obj_visible(render_scene, obj) for obj in objects]
+
+
+def emitting_material(use_emission=True):
+    emission = Data('luxrender_emission', use_emission=use_emission, lightgroup='', gain=1.0,
+                    L_color=Data('L_color', v=1.0))
+    return Data('Emitter', luxrender_emission=emission, luxrender_material=Data('luxrender_material', nodetree=''))
+
+
+@pytest.mark.parametrize('use_emission', [True, False])
+def test_light_check_uses_recorded_emission(render_scene, monkeypatch, use_emission):
+    # Only a mesh light, behind an empty slot
+    render_scene.objects.remove([obj for obj in render_scene.objects if obj.type == 'LAMP'][0])
+    material = emitting_material(use_emission)
+    render_scene.objects[1].material_slots = [Data('slot', material=None), Data('slot', material=material)]
+
+    exporter = SceneExporter().set_scene(render_scene)
+    snapshot = SceneSnapshot(render_scene)
+    assert snapshot.record(render_scene.objects[1]).emitting_materials == ([material] if use_emission else [])
+    assert exporter.scene_is_lit(snapshot) is use_emission
+
+    # Hidden emitters do not light the scene
+    render_scene.objects[1].hide_render = True
+    assert exporter.scene_is_lit(SceneSnapshot(render_scene)) is False
+
+    # Neither do objects of groups on hidden layers, visible ones do
+    grouped = make_mesh_object(make_mesh('Grouped'), 'Grouped', material_slots=[Data('slot', material=material)])
+    monkeypatch.setattr(bpy.data, 'groups', [Data('group', objects=[grouped])], raising=False)
+    assert exporter.scene_is_lit(SceneSnapshot(render_scene)) is use_emission
+
+    grouped.layers = [False] * 19 + [True]
+    render_scene.layers = [True] + [False] * 19
+    assert exporter.scene_is_lit(SceneSnapshot(render_scene)) is False
@@ -0,0 +1,191 @@
+"""
+Viewport update tracking: the dependency index of a LuxCoreExporter finds
+every material, volume and object converted from an edited datablock, and
+nothing else, and fingerprints change with every setting they cover.
+"""
+
+import random
+
+import pytest
+
+import bpy
+
+from blender_stubs import Collection, Data, Stub
+from luxrender.export.luxcore import LuxCoreExporter, fingerprints
+from luxrender.outputs import LuxManager
+
+from scenes import DependencyExporter, make_dependency_scene, make_render_scene, use_dependency_exporters
+
+
+def test_real_export_indexes_meshes_and_particles(monkeypatch, use_scene):
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    scene = use_scene(make_render_scene(3, particle_count=4))
+
+    exporter = LuxCoreExporter(scene, Stub('engine'))
+    exporter.convert(64, 48)
+    objects = {obj.name: obj for obj in scene.objects}
+    dependencies = exporter.dependencies
+
+    assert dependencies.affected({objects['Object1'].data}) == {objects['Object1']}
+
+    # The particle mesh is converted by the particle system of the emitter
+    emitter = objects['Object0']
+    assert emitter in dependencies.affected({objects['ParticleObject'].data})
+
+    exporter.remove_object(emitter, Stub('luxcore_scene'))
+    assert emitter not in dependencies.affected({objects['ParticleObject'].data, emitter.data})
+
+
+def uses(element, datablocks):
+    """
+    True if the conversion of element reads one of datablocks, directly or through textures
+    """
+    used = list(element.textures)
+
+    while used:
+        texture = used.pop()
+        if texture in datablocks:
+            return True
+        used.extend(texture.textures)
+
+    return False
+
+
+@pytest.fixture
+def engine(monkeypatch, use_scene):
+    from luxrender import core
+
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    monkeypatch.setattr(core.RENDERENGINE_luxrender, 'viewport_render_active', True)
+    monkeypatch.setattr(core.RENDERENGINE_luxrender, 'luxcore_session', Stub('session'))
+    monkeypatch.setattr(fingerprints, 'config_fingerprint', lambda *args: 'config')
+    monkeypatch.setattr(fingerprints, 'volume_fingerprint', lambda volume: volume.settings)
+    use_dependency_exporters(monkeypatch.setattr)
+
+    engine = core.RENDERENGINE_luxrender()
+    engine.camera_fingerprint_changed = lambda context: False
+    engine.lastRenderFingerprint = 'config'
+    engine.viewFilmWidth, engine.viewFilmHeight = 64, 48
+
+    def report(type, message):
+        raise AssertionError(message)
+
+    engine.report = report
+
+    def start(scene):
+        use_scene(scene)
+        context = Data('context', scene=scene, visible_objects=list(scene.objects),
+                       region=Data('region', width=64, height=48))
+
+        exporter = LuxCoreExporter(scene, engine, True, context)
+        luxcore_scene = Data('luxcore_scene')
+        for obj in scene.objects:
+            exporter.convert_object(obj, luxcore_scene)
+        for volume in scene.luxrender_volumes.volumes:
+            exporter.convert_volume(volume)
+        exporter.pop_updated_scene_properties()
+
+        engine.luxcore_exporter = exporter
+        engine.lastVisibilitySettings = set(scene.objects)
+        return context
+
+    engine.start = start
+    return engine
+
+
+def set_data(monkeypatch, scene):
+    for name in ('objects', 'materials', 'textures'):
+        items = scene.objects if name == 'objects' else getattr(scene, name)
+        collection = Collection(items, is_updated=any(item.is_updated for item in items))
+        monkeypatch.setattr(bpy.data, name, collection, raising=False)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_no_edit_is_missed(engine, monkeypatch, seed):
+    scene = make_dependency_scene(seed=seed)
+    context = engine.start(scene)
+
+    set_data(monkeypatch, scene)
+    engine.find_update_changes(context)
+
+    # Nothing edited, nothing to convert
+    changes = engine.find_update_changes(context)
+    assert (changes.changed_materials, changes.changed_objects_mesh, changes.changed_volumes) == (set(), set(), set())
+
+    rng = random.Random(seed)
+    edited_textures = set(rng.sample(scene.textures, rng.randint(0, 3)))
+    edited_materials = set(rng.sample(scene.materials, rng.randint(0, 2)))
+    edited_meshes = set(rng.sample(scene.meshes, rng.randint(0, 2)))
+
+    for datablock in edited_textures | edited_materials | edited_meshes:
+        datablock.is_updated = True
+
+    # Blender flags the edited object, not necessarily the other users of its mesh
+    for mesh in edited_meshes:
+        editor = [obj for obj in scene.objects if obj.data is mesh]
+        if editor:
+            editor[0].is_updated = True
+
+    set_data(monkeypatch, scene)
+    conversions = DependencyExporter.conversions.copy()
+    changes = engine.find_update_changes(context)
+
+    # Materials no object uses were never converted
+    used = {mat for obj in scene.objects for mat in obj.materials}
+    assert changes.changed_materials == {mat for mat in used if mat in edited_materials or uses(mat, edited_textures)}
+    assert changes.changed_objects_mesh == {obj for obj in scene.objects
+                                            if obj.data in edited_meshes or uses(obj, edited_textures)}
+
+    volumes = {volume.name for volume in scene.luxrender_volumes.volumes if uses(volume, edited_textures)}
+    assert changes.changed_volumes == volumes
+    assert {name for name in DependencyExporter.conversions - conversions if name.startswith('Volume')} == volumes
+
+
+def test_volume_settings_are_compared(engine, monkeypatch):
+    scene = make_dependency_scene(seed=1)
+    context = engine.start(scene)
+    set_data(monkeypatch, scene)
+    engine.find_update_changes(context)
+
+    volume = scene.luxrender_volumes.volumes[2]
+    volume.settings = (2, 0.5)
+
+    assert engine.find_update_changes(context).changed_volumes == {volume.name}
+    assert engine.find_update_changes(context).changed_volumes == set()
+
+
+def property_group(identifier, **values):
+    """
+    Property group stand-in with the RNA description of its values
+    """
+    def rna_property(name, value):
+        if isinstance(value, Data):
+            return Data(name, identifier=name, type='POINTER')
+        if isinstance(value, list):
+            return Data(name, identifier=name, type='COLLECTION')
+        return Data(name, identifier=name, type='FLOAT', is_array=isinstance(value, tuple))
+
+    properties = [Data('rna_type', identifier='rna_type', type='POINTER')]
+    properties += [rna_property(name, value) for name, value in sorted(values.items())]
+    return Data(identifier, bl_rna=Data('bl_rna', identifier=identifier, properties=properties), **values)
+
+
+def test_fingerprint_covers_every_property():
+    def make():
+        return property_group('Settings', gain=1.0, color=(1.0, 0.5, 0.0), name='volume',
+                              nested=property_group('Nested', depth=2, scale=(1.0, 1.0)),
+                              items=[property_group('Item', weight=0.5), property_group('Item', weight=0.7)])
+
+    fingerprint = fingerprints.rna_fingerprint(make())
+    assert fingerprints.rna_fingerprint(make()) == fingerprint
+    hash(fingerprint)
+
+    edits = [lambda g: setattr(g, 'gain', 2.0), lambda g: setattr(g, 'color', (1.0, 0.5, 0.1)),
+             lambda g: setattr(g, 'name', 'other'), lambda g: setattr(g.nested, 'depth', 3),
+             lambda g: setattr(g.nested, 'scale', (1.0, 2.0)), lambda g: setattr(g.items[1], 'weight', 0.8),
+             lambda g: g.items.pop()]
+
+    for edit in edits:
+        group = make()
+        edit(group)
+        assert fingerprints.rna_fingerprint(group) != fingerprint
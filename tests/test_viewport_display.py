@@ -0,0 +1,205 @@
+"""
+Pixel buffer of the LuxCore viewport: redraws allocate no buffer and fetch
+the film only when it has new samples, at most at the display FPS target,
+whether the film is written into the bgl.Buffer directly or through the
+pixel array of Buffer implementations without the buffer protocol.
+"""
+
+import array, tracemalloc, types
+
+import pytest
+
+import bgl
+
+from blender_stubs import Data
+from luxrender.outputs import luxcore_api, viewport
+
+WIDTH, HEIGHT = 160, 120
+FILM_BYTES = WIDTH * HEIGHT * 3 * 4
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class StandInSession(object):
+    """
+    Viewport session whose film holds the current pass count in every pixel
+    """
+
+    def __init__(self):
+        self.passes = 0
+        self.fetches = 0
+
+    def GetFilm(self):
+        return self
+
+    def GetOutputFloat(self, output_type, pixels):
+        self.fetches += 1
+        pixels[0] = pixels[len(pixels) - 1] = self.passes
+
+    def UpdateStats(self):
+        pass
+
+    def GetStats(self):
+        return Data('stats', Get=lambda name: Data(name, GetInt=lambda: self.passes))
+
+    def GetRenderConfig(self):
+        return Data('render_config')
+
+
+class ProtocolBuffer(array.array):
+    """
+    bgl.Buffer with the buffer protocol, like the one of Blender
+    """
+
+    def __new__(cls, gl_type, dimensions):
+        buffer = array.array.__new__(cls, 'f', bytes(dimensions[0] * 4))
+        bgl.buffers.append(buffer)
+        return buffer
+
+
+@pytest.fixture(params=['pixel array', 'buffer protocol'])
+def display(request, monkeypatch):
+    if request.param == 'buffer protocol':
+        monkeypatch.setattr(bgl, 'Buffer', ProtocolBuffer)
+
+    luxcore_api.load_pyluxcore()
+    clock = Clock()
+    monkeypatch.setattr(viewport, 'time', types.SimpleNamespace(time=clock.time))
+    monkeypatch.setattr(bgl, 'calls', [])
+    monkeypatch.setattr(bgl, 'buffers', [])
+
+    display = viewport.ViewportDisplay()
+    display.resize(WIDTH, HEIGHT)
+    display.clock = clock
+    assert (display.pixels is None) is (request.param == 'buffer protocol')
+    return display
+
+
+# Redraw interval, exact in floating point like the fetch intervals of the FPS targets below
+FRAME_TIME = 1.0 / 64
+
+
+def redraw(display, session, fps, frames, frame_time=FRAME_TIME, passes_per_frame=1):
+    for frame in range(frames):
+        session.passes += passes_per_frame
+        display.update(session, session.passes, fps)
+        display.draw(WIDTH, HEIGHT)
+        display.clock.now += frame_time
+
+
+def drawn_buffers():
+    return [call[-1] for call in bgl.calls if call[0] == 'glDrawPixels']
+
+
+def test_redraws_allocate_no_buffer(display):
+    session = StandInSession()
+    buffer = display.gl_buffer
+    redraw(display, session, fps=0, frames=100)
+
+    assert len(bgl.buffers) == 1 and display.gl_buffer is buffer
+    assert drawn_buffers() == [buffer] * 100
+    assert session.fetches == 100
+    assert buffer[0] == buffer[len(buffer) - 1] == 100
+
+    # Python allocations of a redraw are far below the size of the film
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        redraw(display, session, fps=0, frames=20)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak - start < FILM_BYTES / 20
+    assert session.fetches == 120
+
+
+def test_film_is_fetched_only_with_new_samples(display):
+    session = StandInSession()
+    redraw(display, session, fps=0, frames=10)
+    redraw(display, session, fps=0, frames=50, passes_per_frame=0)
+
+    # Every redraw draws the buffer, the film without new samples is not fetched again
+    assert session.fetches == 10
+    assert len(drawn_buffers()) == 60
+
+    display.invalidate()
+    redraw(display, session, fps=0, frames=5, passes_per_frame=0)
+    assert session.fetches == 11
+
+
+@pytest.mark.parametrize('fps, fetches', [(8, 8), (16, 16), (32, 32), (0, 64)])
+def test_fetches_follow_the_display_fps(display, fps, fetches):
+    session = StandInSession()
+
+    # One second of redraws at 64 fps
+    redraw(display, session, fps=fps, frames=64)
+    assert session.fetches == fetches
+    assert len(drawn_buffers()) == 64
+    assert len(display.fetch_times) == min(fetches, viewport.FRAME_TIME_SAMPLES)
+
+
+def test_buffer_is_allocated_once_per_resolution(display):
+    buffer = display.gl_buffer
+
+    display.resize(WIDTH, HEIGHT)
+    assert display.gl_buffer is buffer and len(bgl.buffers) == 1
+
+    display.resize(WIDTH // 2, HEIGHT // 2)
+    assert len(bgl.buffers) == 2 and len(display.gl_buffer) == WIDTH * HEIGHT * 3 // 4
+
+    # A resize fetches the film again, and the smaller film is scaled up to the region
+    session = StandInSession()
+    session.passes = 5
+    assert display.update(session, 5) is True
+    display.draw(WIDTH, HEIGHT)
+    assert ('glPixelZoom', 2.0, 2.0) in bgl.calls and bgl.calls[-1] == ('glPixelZoom', 1.0, 1.0)
+
+
+def test_frame_stats(display):
+    assert display.frame_stats() == 'Display: 0 fps (0.0ms), Film: 0 fps (0.0ms)'
+
+    redraw(display, StandInSession(), fps=16, frames=61)
+    assert display.frame_stats() == 'Display: 64 fps (0.0ms), Film: 16 fps (0.0ms)'
+
+
+def test_engine_redraws(display, monkeypatch):
+    from luxrender import core
+
+    session = StandInSession()
+    engine_class = core.RENDERENGINE_luxrender
+    monkeypatch.setattr(engine_class, 'viewport_render_active', True)
+    monkeypatch.setattr(engine_class, 'luxcore_session', session)
+
+    engine = engine_class()
+    engine.viewDisplay = display
+    engine.viewFilmWidth, engine.viewFilmHeight = WIDTH, HEIGHT
+    engine.camera_fingerprint_changed = lambda context: False
+    engine.haltConditionMet = lambda *args, **kwargs: False
+    engine.CreateBlenderStats = lambda *args, **kwargs: 'stats'
+
+    redraws, statistics = [], []
+    engine.tag_redraw = lambda: redraws.append(True)
+    engine.update_stats = lambda status, stats: statistics.append((status, stats))
+
+    scene = Data('scene', luxcore_realtimesettings=Data('settings', display_fps=16, interactive_idle_time=0.5),
+                 luxrender_engine=Data('engine', preview_stop=False),
+                 luxrender_testing=Data('testing', profile_viewport=True))
+    context = Data('context', scene=scene, region=Data('region', width=WIDTH, height=HEIGHT))
+
+    for frame in range(128):
+        session.passes += 1
+        engine.luxcore_view_draw(context)
+        display.clock.now += FRAME_TIME
+
+    # Two seconds at 64 redraws per second
+    assert len(bgl.buffers) == 1 and len(redraws) == 128
+    assert drawn_buffers() == [display.gl_buffer] * 128
+    assert session.fetches == 32
+    assert statistics[-1] == ('Rendering', 'stats | ' + display.frame_stats())
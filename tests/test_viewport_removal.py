@@ -0,0 +1,187 @@
+"""
+Deleted and hidden objects in the LuxCore viewport: everything defined for a
+Blender object, its lights, duplis and particles included, is deleted from
+the recording pyluxcore scene by name, within a scene edit, and objects
+shown again are defined again.
+"""
+
+import pytest
+
+import bpy
+
+from blender_stubs import Data, Matrix, Stub
+from luxrender.export.luxcore import LuxCoreExporter
+from luxrender.outputs import LuxManager
+
+from scenes import make_mesh, make_mesh_object, make_render_scene
+
+DUPLIS = 3
+
+
+def add_dupli_verts(scene):
+    """
+    Host object duplicating a child object on its vertices, the child is on a hidden layer
+    """
+    child = make_mesh_object(make_mesh('Child', rows=1, columns=1, materials=1), 'Child',
+                             layers=[False] * 19 + [True], users_group=[])
+    host = make_mesh_object(make_mesh('Host', rows=1, columns=1, materials=1), 'Host')
+
+    def dupli_list_create(scene, settings='RENDER'):
+        host.dupli_list = [Data('dupli', object=child, matrix=Matrix.Translation((k, 0.0, 0.0)))
+                           for k in range(DUPLIS)]
+
+    host.__dict__.update(is_duplicator=True, dupli_type='VERTS', dupli_list=[], dupli_list_create=dupli_list_create,
+                         dupli_list_clear=lambda: None)
+    scene.objects.extend([child, host])
+
+
+@pytest.fixture
+def exported(monkeypatch, use_scene):
+    """
+    (Blender objects by name, LuxCoreExporter, recording LuxCore scene) of an exported scene
+    """
+    monkeypatch.setattr(LuxManager, 'ActiveManager', None)
+    scene = use_scene(make_render_scene(3, particle_count=4))
+    add_dupli_verts(scene)
+
+    exporter = LuxCoreExporter(scene, Stub('engine'))
+    luxcore_scene = exporter.convert(64, 48).GetScene()
+    luxcore_scene.calls = []
+
+    return {obj.name: obj for obj in scene.objects}, exporter, luxcore_scene
+
+
+def defined(luxcore_scene, kind):
+    return {name.split('.')[2] for name in luxcore_scene.props.GetAllNames('scene.%s.' % kind)}
+
+
+def exported_names(exporter, kind):
+    return {name.split('.')[2] for name in exporter.scene_properties.GetAllNames('scene.%s.' % kind)}
+
+
+class DeletedObject(Data):
+    """
+    Blender object removed from the file, any access raises like a removed StructRNA
+    """
+
+    def __getattribute__(self, name):
+        raise ReferenceError('StructRNA of type Object has been removed')
+
+
+PARTICLES = {'ParticleObject0_ParticleSystem_%d' % k for k in range(4)}
+HOST_DUPLIS = {'Child0_Host_%d' % k for k in range(DUPLIS)}
+
+
+@pytest.mark.parametrize('name, objects, lights', [
+    ('Object1', {'Object10'}, set()),
+    ('Sun', set(), {'Sun_sun'}),
+    ('Object0', {'Object00'} | PARTICLES, set()),
+    ('Host', HOST_DUPLIS, set()),
+])
+def test_deleted_object_is_deleted_by_name(exported, name, objects, lights):
+    blender_objects, exporter, luxcore_scene = exported
+    all_objects, all_lights = defined(luxcore_scene, 'objects'), defined(luxcore_scene, 'lights')
+    assert objects <= all_objects and lights <= all_lights
+
+    deleted = blender_objects[name]
+    deleted.__class__ = DeletedObject
+    exporter.remove_object(deleted, luxcore_scene)
+
+    assert sorted(luxcore_scene.calls) == sorted([('DeleteObject', n) for n in objects] +
+                                                 [('DeleteLight', n) for n in lights])
+    assert defined(luxcore_scene, 'objects') == all_objects - objects
+    assert defined(luxcore_scene, 'lights') == all_lights - lights
+
+    # Not exported again with the next scene edit
+    assert not (objects & exported_names(exporter, 'objects')) and not (lights & exported_names(exporter, 'lights'))
+    assert deleted not in exporter.exported_names and deleted not in exporter.object_cache
+
+
+def test_removing_an_unknown_object_deletes_nothing(exported):
+    blender_objects, exporter, luxcore_scene = exported
+
+    exporter.remove_object(blender_objects['Child'], luxcore_scene)
+    exporter.remove_object(Data('never exported'), luxcore_scene)
+    assert luxcore_scene.calls == []
+
+
+@pytest.mark.parametrize('name, objects, lights', [
+    ('Object2', {'Object20'}, set()),
+    ('Sun', set(), {'Sun_sun'}),
+    ('Object0', {'Object00'} | PARTICLES, set()),
+    ('Host', HOST_DUPLIS, set()),
+])
+def test_hidden_object_is_deleted_and_shown_again(exported, name, objects, lights):
+    blender_objects, exporter, luxcore_scene = exported
+    obj = blender_objects[name]
+
+    obj.hide_render = True
+    exporter.convert_object(obj, luxcore_scene)
+    luxcore_scene.Parse(exporter.pop_updated_scene_properties())
+
+    assert sorted(call for call in luxcore_scene.calls if call[0] != 'Parse') == \
+        sorted([('DeleteObject', n) for n in objects] + [('DeleteLight', n) for n in lights])
+    assert not (objects & defined(luxcore_scene, 'objects')) and not (lights & defined(luxcore_scene, 'lights'))
+    assert not (objects & exported_names(exporter, 'objects')) and not (lights & exported_names(exporter, 'lights'))
+
+    obj.hide_render = False
+    luxcore_scene.calls = []
+    exporter.convert_object(obj, luxcore_scene)
+    luxcore_scene.Parse(exporter.pop_updated_scene_properties())
+
+    assert [call for call in luxcore_scene.calls if call[0].startswith('Delete')] == []
+    assert objects <= defined(luxcore_scene, 'objects') and lights <= defined(luxcore_scene, 'lights')
+
+
+def test_fewer_particles_delete_the_remaining_ones(exported):
+    blender_objects, exporter, luxcore_scene = exported
+    emitter = blender_objects['Object0']
+
+    del emitter.particle_systems[0].particles[2:]
+    exporter.convert_object(emitter, luxcore_scene)
+
+    assert sorted(call for call in luxcore_scene.calls if call[0] == 'DeleteObject') == \
+        [('DeleteObject', 'ParticleObject0_ParticleSystem_2'), ('DeleteObject', 'ParticleObject0_ParticleSystem_3')]
+    assert exported_names(exporter, 'objects') & PARTICLES == PARTICLES - {'ParticleObject0_ParticleSystem_2',
+                                                                       'ParticleObject0_ParticleSystem_3'}
+
+
+class RecordingSession(object):
+    def __init__(self, luxcore_scene):
+        self.luxcore_scene = luxcore_scene
+
+    def GetRenderConfig(self):
+        return Data('render_config', GetScene=lambda: self.luxcore_scene)
+
+    def BeginSceneEdit(self):
+        self.luxcore_scene.calls.append(('BeginSceneEdit',))
+
+    def EndSceneEdit(self):
+        self.luxcore_scene.calls.append(('EndSceneEdit',))
+
+
+def test_viewport_update_deletes_within_a_scene_edit(exported, monkeypatch):
+    from luxrender import core
+
+    blender_objects, exporter, luxcore_scene = exported
+    engine_class = core.RENDERENGINE_luxrender
+    monkeypatch.setattr(engine_class, 'viewport_render_active', True)
+    monkeypatch.setattr(engine_class, 'viewport_render_paused', False)
+    monkeypatch.setattr(engine_class, 'luxcore_session', RecordingSession(luxcore_scene))
+
+    engine = engine_class()
+    engine.luxcore_exporter = exporter
+    engine.test_break = lambda: False
+
+    changes = core.UpdateChanges()
+    changes.set_cause(objectsRemoved=True)
+    changes.removed_objects.update([blender_objects['Object1'], blender_objects['Sun']])
+
+    scene = bpy.context.scene
+    scene.luxrender_engine.preview_stop = False
+    engine.luxcore_view_update(Data('context', scene=scene), changes)
+
+    calls = [call[0] for call in luxcore_scene.calls]
+    assert calls[0] == 'BeginSceneEdit' and calls[-2:] == ['Parse', 'EndSceneEdit']
+    assert sorted(luxcore_scene.calls[1:-2]) == [('DeleteLight', 'Sun_sun'), ('DeleteObject', 'Object10')]
+    assert 'Object10' not in defined(luxcore_scene, 'objects') and 'Sun_sun' not in defined(luxcore_scene, 'lights')